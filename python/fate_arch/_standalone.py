@@ -15,8 +15,11 @@
 #
 
 import asyncio
+import fcntl
 import hashlib
 import itertools
+import multiprocessing
+import os
 import pickle as c_pickle
 import shutil
 import time
@@ -33,6 +36,7 @@ from pathlib import Path
 import cloudpickle as f_pickle
 import lmdb
 import numpy as np
+from cachetools import LRUCache
 from fate_arch.common import Party, file_utils
 from fate_arch.common.log import getLogger
 from fate_arch.federation import FederationDataType
@@ -45,6 +49,9 @@ deserialize = c_pickle.loads
 # default message max size in bytes = 1MB
 DEFAULT_MESSAGE_MAX_SIZE = 1048576
 
+# default bytes of intermediate tables kept in shared memory before spilling to lmdb = 1GB
+DEFAULT_MEMORY_BUDGET = 1073741824
+
 
 # noinspection PyPep8Naming
 class Table(object):
@@ -55,12 +62,21 @@ class Table(object):
         name: str,
         partitions,
         need_cleanup=True,
+        plan=None,
+        source=None,
+        in_memory=False,
     ):
         self._need_cleanup = need_cleanup
         self._namespace = namespace
         self._name = name
         self._partitions = partitions
         self._session = session
+        self._in_memory = in_memory
+
+        # narrow operators recorded on top of the (namespace, name) table when the session runs in lazy plan mode,
+        # `source` keeps the table which owns the data alive until the plan is materialized
+        self._plan = [] if plan is None else plan
+        self._source = source
 
     @property
     def partitions(self):
@@ -68,10 +84,12 @@ class Table(object):
 
     @property
     def name(self):
+        self._materialize()
         return self._name
 
     @property
     def namespace(self):
+        self._materialize()
         return self._namespace
 
     def __del__(self):
@@ -85,11 +103,20 @@ class Table(object):
         return self.__str__()
 
     def destroy(self):
-        for p in range(self._partitions):
-            with self._get_env_for_partition(p, write=True) as env:
-                db = env.open_db()
-                with env.begin(write=True) as txn:
-                    txn.drop(db)
+        if self._plan:
+            # nothing materialized yet, the data belongs to source table
+            self._plan = []
+            self._source = None
+            return
+        if self._in_memory:
+            # noinspection PyProtectedMember
+            self._session._cleanup_memory(self._name, self._namespace)
+        else:
+            for p in range(self._partitions):
+                with self._get_env_for_partition(p, write=True) as env:
+                    db = env.open_db()
+                    with env.begin(write=True) as txn:
+                        txn.drop(db)
         _TableMetaManager.destory_table(self._namespace, self._name)
 
     def take(self, n, **kwargs):
@@ -98,6 +125,7 @@ class Table(object):
         return list(itertools.islice(self.collect(**kwargs), n))
 
     def count(self):
+        self._materialize()
         cnt = 0
         for p in range(self._partitions):
             with self._get_env_for_partition(p) as env:
@@ -106,6 +134,7 @@ class Table(object):
 
     # noinspection PyUnusedLocal
     def collect(self, **kwargs):
+        self._materialize()
         iterators = []
         with ExitStack() as s:
             for p in range(self._partitions):
@@ -130,6 +159,7 @@ class Table(object):
                     _, _, _, it = heappop(entries)
 
     def reduce(self, func):
+        self._materialize()
         # noinspection PyProtectedMember
         rs = self._session._submit_unary(func, _do_reduce, self._partitions, self._name, self._namespace)
         rs = [r for r in filter(partial(is_not, None), rs)]
@@ -144,6 +174,8 @@ class Table(object):
         return self._unary(func, _do_map)
 
     def mapValues(self, func):
+        if self._session.lazy_plan:
+            return self._lazy(_MAP_VALUES_STAGE, func)
         return self._unary(func, _do_map_values)
 
     def flatMap(self, func):
@@ -216,6 +248,8 @@ class Table(object):
         return self._unary((fraction, seed), _do_sample)
 
     def filter(self, func):
+        if self._session.lazy_plan:
+            return self._lazy(_FILTER_STAGE, func)
         return self._unary(func, _do_filter)
 
     def join(self, other: "Table", func):
@@ -228,8 +262,39 @@ class Table(object):
     def union(self, other: "Table", func=lambda v1, v2: v1):
         return self._binary(other, func, _do_union)
 
+    def _lazy(self, stage, func):
+        # functions are pickled when recorded, as eager operators do, so later changes of captured state are not seen
+        return Table(
+            session=self._session,
+            namespace=self._namespace,
+            name=self._name,
+            partitions=self._partitions,
+            need_cleanup=False,
+            plan=[*self._plan, (stage, f_pickle.dumps(func))],
+            source=self._source if self._plan else self,
+        )
+
+    def _materialize(self):
+        """
+        run recorded narrow operators in one pass per partition, the table then refers to the fused output
+        """
+        if not self._plan:
+            return self
+        # noinspection PyProtectedMember
+        results = self._session._submit_unary(self._plan, _do_pipeline, self._partitions, self._name, self._namespace)
+        result = results[0]
+        _TableMetaManager.add_table_meta(result.namespace, result.name, self._partitions)
+        self._namespace = result.namespace
+        self._name = result.name
+        self._need_cleanup = True
+        self._in_memory = result.in_memory
+        self._plan = []
+        self._source = None
+        return self
+
     # noinspection PyProtectedMember
     def _map_reduce(self, mapper, reducer):
+        self._materialize()
         results = self._session._submit_map_reduce_in_partitions(
             mapper, reducer, self._partitions, self._name, self._namespace
         )
@@ -243,6 +308,7 @@ class Table(object):
         )
 
     def _unary(self, func, do_func):
+        self._materialize()
         # noinspection PyProtectedMember
         results = self._session._submit_unary(func, do_func, self._partitions, self._name, self._namespace)
         result = results[0]
@@ -256,12 +322,12 @@ class Table(object):
 
     def _binary(self, other: "Table", func, do_func):
         session_id = self._session.session_id
-        left, right = self, other
+        left, right = self._materialize(), other._materialize()
         if left._partitions != right._partitions:
-            if other.count() > self.count():
+            if right.count() > left.count():
                 left = left.save_as(str(uuid.uuid1()), session_id, partition=right._partitions)
             else:
-                right = other.save_as(str(uuid.uuid1()), session_id, partition=left._partitions)
+                right = right.save_as(str(uuid.uuid1()), session_id, partition=left._partitions)
 
         # noinspection PyProtectedMember
         results = self._session._submit_binary(
@@ -283,17 +349,26 @@ class Table(object):
         )
 
     def save_as(self, name, namespace, partition=None, need_cleanup=True):
+        self._materialize()
         if partition is None:
             partition = self._partitions
         # noinspection PyProtectedMember
         dup = _create_table(self._session, name, namespace, partition, need_cleanup)
-        dup.put_all(self.collect())
+        # every source partition is shuffled to the target partitions by its own worker,
+        # serialized bytes are moved as they are
+        target = _Operand(dup._namespace, dup._name, None, dup._partitions, dup._in_memory, durable=not need_cleanup)
+        # noinspection PyProtectedMember
+        self._session._submit_unary(target, _do_save_as, self._partitions, self._name, self._namespace)
         return dup
 
     def _get_env_for_partition(self, p: int, write=False):
+        if self._in_memory:
+            # noinspection PyProtectedMember
+            return _MemoryEnv(self._namespace, self._name, str(p), store=self._session._memory_store)
         return _get_env(self._namespace, self._name, str(p), write=write)
 
     def put(self, k, v):
+        self._materialize()
         k_bytes, v_bytes = _kv_to_bytes(k=k, v=v)
         p = _hash_key_to_partition(k_bytes, self._partitions)
         with self._get_env_for_partition(p, write=True) as env:
@@ -301,25 +376,28 @@ class Table(object):
                 return txn.put(k_bytes, v_bytes)
 
     def put_all(self, kv_list: Iterable):
+        self._materialize()
         txn_map = {}
         is_success = True
         with ExitStack() as s:
             for p in range(self._partitions):
                 env = s.enter_context(self._get_env_for_partition(p, write=True))
                 txn_map[p] = env, env.begin(write=True)
-            for k, v in kv_list:
+            for kv_chunk in _chunked(kv_list, _PARTITIONER_BATCH_SIZE):
                 try:
-                    k_bytes, v_bytes = _kv_to_bytes(k=k, v=v)
-                    p = _hash_key_to_partition(k_bytes, self._partitions)
-                    is_success = is_success and txn_map[p][1].put(k_bytes, v_bytes)
+                    kv_bytes = [_kv_to_bytes(k=k, v=v) for k, v in kv_chunk]
+                    partitions = _hash_keys_to_partitions([k_bytes for k_bytes, _ in kv_bytes], self._partitions)
+                    for (k_bytes, v_bytes), p in zip(kv_bytes, partitions.tolist()):
+                        is_success = is_success and txn_map[p][1].put(k_bytes, v_bytes)
                 except Exception as e:
                     is_success = False
-                    LOGGER.exception(f"put_all for k={k} v={v} fail. exception: {e}")
+                    LOGGER.exception(f"put_all fail. exception: {e}")
                     break
             for p, (env, txn) in txn_map.items():
                 txn.commit() if is_success else txn.abort()
 
     def get(self, k):
+        self._materialize()
         k_bytes = _k_to_bytes(k=k)
         p = _hash_key_to_partition(k_bytes, self._partitions)
         with self._get_env_for_partition(p) as env:
@@ -328,6 +406,7 @@ class Table(object):
                 return None if old_value_bytes is None else deserialize(old_value_bytes)
 
     def delete(self, k):
+        self._materialize()
         k_bytes = _k_to_bytes(k=k)
         p = _hash_key_to_partition(k_bytes, self._partitions)
         with self._get_env_for_partition(p, write=True) as env:
@@ -340,9 +419,27 @@ class Table(object):
 
 # noinspection PyMethodMayBeStatic
 class Session(object):
-    def __init__(self, session_id, max_workers=None):
+    def __init__(self, session_id, max_workers=None, lazy_plan=False, in_memory=False,
+                 memory_budget=DEFAULT_MEMORY_BUDGET):
         self.session_id = session_id
-        self._pool = Executor(max_workers=max_workers)
+        self.lazy_plan = lazy_plan
+
+        # intermediate tables(need_cleanup=True) stored in shared memory, spilled to lmdb when out of budget
+        self._memory_store = None
+        if in_memory:
+            if _memory_dir is None:
+                LOGGER.warning("shared memory not available on this platform, intermediate tables stored in lmdb")
+            else:
+                self._memory_store = _MemoryStore(memory_budget)
+
+        # long-lived single process pools, partition p always runs on worker p % len(self._pools),
+        # so that workers reuse open lmdb envs of the partitions they own
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        self._pools = [
+            Executor(max_workers=1, initializer=_init_memory_store, initargs=(self._memory_store,))
+            for _ in range(int(max_workers))
+        ]
 
     def __getstate__(self):
         # session won't be pickled
@@ -375,6 +472,9 @@ class Session(object):
         return table
 
     def cleanup(self, name, namespace):
+        if _memory_dir is not None:
+            self._cleanup_memory(name, namespace)
+
         data_path = _data_dir
         if not data_path.is_dir():
             LOGGER.error(f"illegal data dir: {data_path}")
@@ -392,24 +492,45 @@ class Session(object):
         for table in namespace_dir.glob(name):
             shutil.rmtree(table, True)
 
+    def _cleanup_memory(self, name, namespace):
+        namespace_dir = _memory_dir.joinpath(namespace)
+        if not namespace_dir.is_dir():
+            return
+
+        for table in namespace_dir.glob(name):
+            if self._memory_store is not None:
+                self._memory_store.release(sum(f.stat().st_size for f in table.glob("[0-9]*")))
+            shutil.rmtree(table, True)
+        if name == "*":
+            shutil.rmtree(namespace_dir, True)
+
     def stop(self):
         self.cleanup(name="*", namespace=self.session_id)
-        self._pool.shutdown()
+        self._shutdown()
 
     def kill(self):
         self.cleanup(name="*", namespace=self.session_id)
-        self._pool.shutdown()
+        self._shutdown()
+
+    def _shutdown(self):
+        for pool in self._pools:
+            pool.shutdown()
+
+    def _submit(self, partition, do_func, process):
+        return self._pools[partition % len(self._pools)].submit(do_func, process)
 
     def _submit_unary(self, func, _do_func, partitions, name, namespace):
         task_info = _TaskInfo(
             self.session_id,
             function_id=str(uuid.uuid1()),
             function_bytes=f_pickle.dumps(func),
+            in_memory=self._memory_store is not None,
         )
         futures = []
         for p in range(partitions):
             futures.append(
-                self._pool.submit(
+                self._submit(
+                    p,
                     _do_func,
                     _UnaryProcess(task_info, _Operand(namespace, name, p, partitions)),
                 )
@@ -423,11 +544,13 @@ class Session(object):
             function_id=str(uuid.uuid1()),
             map_function_bytes=f_pickle.dumps(mapper),
             reduce_function_bytes=f_pickle.dumps(reducer),
+            in_memory=self._memory_store is not None,
         )
         futures = []
         for p in range(partitions):
             futures.append(
-                self._pool.submit(
+                self._submit(
+                    p,
                     _do_map_reduce_in_partitions,
                     _MapReduceProcess(task_info, _Operand(namespace, name, p, partitions)),
                 )
@@ -440,12 +563,13 @@ class Session(object):
             self.session_id,
             function_id=str(uuid.uuid1()),
             function_bytes=f_pickle.dumps(func),
+            in_memory=self._memory_store is not None,
         )
         futures = []
         for p in range(partitions):
             left = _Operand(namespace, name, p, partitions)
             right = _Operand(other_namespace, other_name, p, partitions)
-            futures.append(self._pool.submit(do_func, _BinaryProcess(task_info, left, right)))
+            futures.append(self._submit(p, do_func, _BinaryProcess(task_info, left, right)))
         results = [r.result() for r in futures]
         return results
 
@@ -674,9 +798,16 @@ class _TableMetaManager:
             txn.delete(k_bytes)
         path = _data_dir.joinpath(namespace, name)
         shutil.rmtree(path, ignore_errors=True)
+        if _memory_dir is not None:
+            shutil.rmtree(_memory_dir.joinpath(namespace, name), ignore_errors=True)
 
 
 _data_dir = Path(file_utils.get_project_base_directory()).joinpath("data").absolute()
+_memory_dir = (
+    Path("/dev/shm").joinpath(f"fate_standalone_{hashlib.sha1(_data_dir.as_posix().encode()).hexdigest()[:8]}")
+    if Path("/dev/shm").is_dir()
+    else None
+)
 
 
 def _create_table(
@@ -694,10 +825,15 @@ def _create_table(
     exist_partitions = _TableMetaManager.get_table_meta(namespace, name)
     if exist_partitions is None:
         _TableMetaManager.add_table_meta(namespace, name, partitions)
+        # noinspection PyProtectedMember
+        in_memory = need_cleanup and session._memory_store is not None
+        if in_memory:
+            _memory_dir.joinpath(namespace, name).mkdir(parents=True, exist_ok=True)
     else:
         if error_if_exist:
             raise RuntimeError(f"table already exist: name={name}, namespace={namespace}")
         partitions = exist_partitions
+        in_memory = _is_in_memory(namespace, name)
 
     return Table(
         session=session,
@@ -705,6 +841,7 @@ def _create_table(
         name=name,
         partitions=partitions,
         need_cleanup=need_cleanup,
+        in_memory=in_memory,
     )
 
 
@@ -718,14 +855,16 @@ def _load_table(session, name, namespace, need_cleanup=False):
         name=name,
         partitions=partitions,
         need_cleanup=need_cleanup,
+        in_memory=_is_in_memory(namespace, name),
     )
 
 
 class _TaskInfo:
-    def __init__(self, task_id, function_id, function_bytes):
+    def __init__(self, task_id, function_id, function_bytes, in_memory=False):
         self.task_id = task_id
         self.function_id = function_id
         self.function_bytes = function_bytes
+        self.in_memory = in_memory
         self._function_deserialized = None
 
     def get_func(self):
@@ -735,11 +874,12 @@ class _TaskInfo:
 
 
 class _MapReduceTaskInfo:
-    def __init__(self, task_id, function_id, map_function_bytes, reduce_function_bytes):
+    def __init__(self, task_id, function_id, map_function_bytes, reduce_function_bytes, in_memory=False):
         self.task_id = task_id
         self.function_id = function_id
         self.map_function_bytes = map_function_bytes
         self.reduce_function_bytes = reduce_function_bytes
+        self.in_memory = in_memory
         self._reduce_function_deserialized = None
         self._mapper_function_deserialized = None
 
@@ -755,14 +895,23 @@ class _MapReduceTaskInfo:
 
 
 class _Operand:
-    def __init__(self, namespace, name, partition, num_partitions):
+    def __init__(self, namespace, name, partition, num_partitions, in_memory=None, durable=False):
         self.namespace = namespace
         self.name = name
         self.partition = partition
         self.num_partitions = num_partitions
+        self.in_memory = in_memory
+        # persistent tables, their writes are flushed to disk before the task returns
+        self.durable = durable
+
+    def with_partition(self, partition):
+        return _Operand(self.namespace, self.name, partition, self.num_partitions, self.in_memory, self.durable)
 
     def as_env(self, write=False):
-        return _get_env(self.namespace, self.name, str(self.partition), write=write)
+        in_memory = _is_in_memory(self.namespace, self.name) if self.in_memory is None else self.in_memory
+        if in_memory:
+            return _MemoryEnv(self.namespace, self.name, str(self.partition), store=_memory_store)
+        return _get_cached_env(self.namespace, self.name, str(self.partition))
 
 
 class _UnaryProcess:
@@ -776,6 +925,7 @@ class _UnaryProcess:
             self.info.function_id,
             self.operand.partition,
             self.operand.num_partitions,
+            self.info.in_memory,
         )
 
     def get_func(self):
@@ -793,6 +943,7 @@ class _MapReduceProcess:
             self.info.function_id,
             self.operand.partition,
             self.operand.num_partitions,
+            self.info.in_memory,
         )
 
     def get_mapper(self):
@@ -814,6 +965,7 @@ class _BinaryProcess:
             self.info.function_id,
             self.left.partition,
             self.left.num_partitions,
+            self.info.in_memory,
         )
 
     def get_func(self):
@@ -825,8 +977,82 @@ def _get_env(*args, write=False):
     return _open_env(_path, write=write)
 
 
-# @cached(cache=EvictLRUCache(maxsize=64, evict=_evict))
-def _open_env(path, write=False):
+class _EvictLRUCache(LRUCache):
+    def __init__(self, maxsize, evict):
+        super().__init__(maxsize)
+        self._evict = evict
+
+    def popitem(self):
+        key, value = super().popitem()
+        self._evict(value)
+        return key, value
+
+
+class _CachedEnv(object):
+    """
+    lmdb env shared by tasks running on a worker, closed once evicted from cache and not in use
+    """
+
+    def __init__(self, env, path):
+        self._env = env
+        self._refs = 0
+        self._evicted = False
+        # the data file is held open by the env, its inode is not reused while cached
+        self._data_file = path.joinpath("data.mdb")
+        self._ino = os.stat(self._data_file).st_ino
+
+    def is_current(self):
+        """
+        whether the env still points at the table on disk, not at one destroyed and created again at the same path
+        """
+        try:
+            return os.stat(self._data_file).st_ino == self._ino
+        except FileNotFoundError:
+            return False
+
+    def __enter__(self):
+        self._refs += 1
+        return self._env
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._refs -= 1
+        if self._evicted and self._refs == 0:
+            self._env.close()
+
+    def evict(self):
+        self._evicted = True
+        if self._refs == 0:
+            self._env.close()
+
+
+# open lmdb envs of worker processes
+_env_cache = _EvictLRUCache(maxsize=64, evict=_CachedEnv.evict)
+_env_cache_purged_at = 0.0
+
+
+def _get_cached_env(*args):
+    global _env_cache_purged_at
+
+    path = _data_dir.joinpath(*args)
+    key = path.as_posix()
+    env = _env_cache.get(key)
+    if env is not None and not env.is_current():
+        _env_cache.pop(key).evict()
+        env = None
+    if env is None:
+        # close envs of tables destroyed by driver to release disk space, at most once per second
+        if time.monotonic() - _env_cache_purged_at > 1.0:
+            for stale_key in [k for k in _env_cache.keys() if not os.path.exists(k)]:
+                _env_cache.pop(stale_key).evict()
+            _env_cache_purged_at = time.monotonic()
+        # most tables written by workers are intermediate ones, no need to sync on commit,
+        # writers of persistent tables sync the env themselves, see `_Operand.durable`
+        env = _CachedEnv(_open_env(path, write=True, sync=False), path)
+        _env_cache[key] = env
+    return env
+
+
+def _open_env(path, write=False, sync=True):
     path.mkdir(parents=True, exist_ok=True)
 
     t = 0
@@ -838,7 +1064,7 @@ def _open_env(path, write=False):
                 max_dbs=1,
                 max_readers=1024,
                 lock=write,
-                sync=True,
+                sync=sync,
                 map_size=10_737_418_240,
             )
             return env
@@ -851,6 +1077,388 @@ def _open_env(path, write=False):
     raise lmdb.Error(f"No such file or directory: {path}, with {t} times retry")
 
 
+class _MemoryStore(object):
+    def __init__(self, budget):
+        self.budget = budget
+        self._usage = multiprocessing.Value("q", 0)
+
+    def acquire(self, size, released=0):
+        with self._usage.get_lock():
+            if self._usage.value - released + size > self.budget:
+                return False
+            self._usage.value += size - released
+            return True
+
+    def release(self, size):
+        with self._usage.get_lock():
+            self._usage.value -= size
+
+
+# memory store of worker processes, set by pool initializer
+_memory_store: typing.Optional[_MemoryStore] = None
+
+
+def _init_memory_store(store):
+    global _memory_store
+    _memory_store = store
+
+
+def _is_in_memory(namespace, name):
+    return _memory_dir is not None and _memory_dir.joinpath(namespace, name).is_dir()
+
+
+class _MemoryEnv(object):
+    """
+    lmdb-like environment of one partition of an intermediate table, the partition is kept as a log file in shared
+    memory, or spilled to lmdb under data dir when the memory store is out of budget.
+
+    a log file starts with a random generation id, followed by length prefixed pickled records, the first record
+    holds sorted items and the others the changes of write transactions, (key, None) for deletes. writers append
+    their changes and rewrite the file under a new generation once the changes outgrow the items, so a write
+    costs the size of its changes and processes only parse the records appended since they last read the file.
+    """
+
+    def __init__(self, namespace, name, partition, store: _MemoryStore = None):
+        self._path = _memory_dir.joinpath(namespace, name, partition)
+        self._spill_path = _data_dir.joinpath(namespace, name, partition)
+        self._store = store
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    def open_db(self):
+        return None
+
+    def begin(self, write=False):
+        lock = self.lock() if write else None
+        if not self._path.exists() and self._spill_path.exists():
+            return _SpilledTxn(self, lock, write=write)
+        return _MemoryTxn(self, lock)
+
+    def stat(self):
+        partition = self.read()
+        if partition is not None:
+            return {"entries": len(partition.index)}
+        if not self._spill_path.exists():
+            return {"entries": 0}
+        with _open_env(self._spill_path) as env:
+            return env.stat()
+
+    def lock(self):
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self._path.with_name(f".{self._path.name}.lock"), os.O_RDWR | os.O_CREAT)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        return fd
+
+    @staticmethod
+    def unlock(fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    def read(self) -> typing.Optional["_MemoryPartition"]:
+        key = self._path.as_posix()
+        partition = _memory_partitions.get(key)
+        try:
+            with self._path.open("rb") as f:
+                generation = f.read(_MEMORY_HEADER_SIZE)
+                if partition is None or partition.generation != generation:
+                    partition = _MemoryPartition(generation)
+                f.seek(partition.offset)
+                partition.load(f.read())
+        except FileNotFoundError:
+            _memory_partitions.pop(key, None)
+            return None
+        _cache_memory_partition(key, partition)
+        return partition
+
+    def append(self, partition: "_MemoryPartition", changes):
+        """
+        append changes to the log file of partition, which is up to date and locked by caller
+        """
+        record = _memory_record(changes)
+        if self._store is not None and self._store.acquire(len(record)):
+            with self._path.open("ab") as f:
+                f.write(record)
+            partition.apply(changes)
+            partition.offset += len(record)
+            return
+        partition.apply(changes)
+        self.write(partition.sorted_items())
+
+    def write(self, items):
+        """
+        rewrite the partition with sorted items, spill it if the memory store is out of budget
+        """
+        key = self._path.as_posix()
+        old_size = self._path.stat().st_size if self._path.exists() else 0
+        generation = os.urandom(_MEMORY_HEADER_SIZE)
+        data = generation + _memory_record(items)
+        if self._store is not None and self._store.acquire(len(data), old_size):
+            tmp_path = self._path.with_name(f".{self._path.name}.{os.getpid()}")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, self._path)
+            shutil.rmtree(self._spill_path, ignore_errors=True)
+            partition = _MemoryPartition(generation)
+            partition.load(memoryview(data)[_MEMORY_HEADER_SIZE:])
+            _cache_memory_partition(key, partition)
+        else:
+            with _open_env(self._spill_path, write=True) as env:
+                db = env.open_db()
+                with env.begin(write=True) as txn:
+                    txn.drop(db, delete=False)
+                    for k_bytes, v_bytes in items:
+                        txn.put(k_bytes, v_bytes)
+            if old_size > 0:
+                self._path.unlink()
+                if self._store is not None:
+                    self._store.release(old_size)
+            _memory_partitions.pop(key, None)
+
+
+_MEMORY_HEADER_SIZE = 8
+# rewrite log files of memory partitions once their changes outgrow their items and this size
+_MEMORY_COMPACT_SIZE = 1 << 20
+
+
+def _memory_record(obj):
+    data = serialize(obj, protocol=4)
+    return len(data).to_bytes(8, byteorder="little") + data
+
+
+class _MemoryPartition(object):
+    """
+    items of a memory partition parsed by this process, up to `offset` of its log file
+    """
+
+    def __init__(self, generation):
+        self.generation = generation
+        self.offset = _MEMORY_HEADER_SIZE
+        self.snapshot_size = 0
+        self.index = {}
+        self._items = []
+
+    def load(self, buffer):
+        pos = 0
+        while pos + 8 <= len(buffer):
+            size = int.from_bytes(buffer[pos: pos + 8], byteorder="little")
+            if pos + 8 + size > len(buffer):
+                # being appended by a writer
+                break
+            record = deserialize(buffer[pos + 8: pos + 8 + size])
+            if self.offset == _MEMORY_HEADER_SIZE:
+                self.index = dict(record)
+                self._items = record
+                self.snapshot_size = size + 8
+            else:
+                self.apply(record)
+            pos += size + 8
+            self.offset += size + 8
+
+    def apply(self, changes):
+        for k_bytes, v_bytes in changes:
+            if v_bytes is None:
+                self.index.pop(k_bytes, None)
+            else:
+                self.index[k_bytes] = v_bytes
+        if changes:
+            self._items = None
+
+    def log_size(self):
+        return self.offset - _MEMORY_HEADER_SIZE - self.snapshot_size
+
+    def sorted_items(self):
+        if self._items is None:
+            self._items = sorted(self.index.items())
+        return self._items
+
+
+# memory partitions read by this process by path of their log files, bounded by size of the files
+_memory_partitions = LRUCache(maxsize=1 << 28, getsizeof=lambda partition: partition.offset)
+
+
+def _cache_memory_partition(key, partition):
+    if partition.offset <= _memory_partitions.maxsize:
+        _memory_partitions[key] = partition
+    else:
+        _memory_partitions.pop(key, None)
+
+
+class _MemoryTxn(object):
+    def __init__(self, env: _MemoryEnv, lock=None):
+        self._env = env
+        self._lock = lock
+        self._partition = env.read()
+        self._changes = {}
+        self._dropped = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+    def get(self, key, default=None):
+        if key in self._changes:
+            value = self._changes[key]
+            return default if value is None else value
+        if self._dropped or self._partition is None:
+            return default
+        return self._partition.index.get(key, default)
+
+    def put(self, key, value):
+        self._changes[key] = value
+        return True
+
+    def delete(self, key):
+        existed = self.get(key) is not None
+        self._changes[key] = None
+        return existed
+
+    # noinspection PyUnusedLocal
+    def drop(self, db, delete=True):
+        self._changes = {}
+        self._dropped = True
+
+    def cursor(self):
+        if self._dropped or self._partition is None:
+            items = []
+        else:
+            items = self._partition.sorted_items()
+        if self._changes:
+            index = dict(items)
+            for k_bytes, v_bytes in self._changes.items():
+                if v_bytes is None:
+                    index.pop(k_bytes, None)
+                else:
+                    index[k_bytes] = v_bytes
+            items = sorted(index.items())
+        return _MemoryCursor(items)
+
+    def commit(self):
+        if self._lock is None:
+            return
+        try:
+            if self._dropped or self._partition is None:
+                if self._dropped or self._changes:
+                    self._env.write(sorted((k, v) for k, v in self._changes.items() if v is not None))
+            elif self._changes:
+                changes = list(self._changes.items())
+                if self._partition.log_size() > max(self._partition.snapshot_size, _MEMORY_COMPACT_SIZE):
+                    self._partition.apply(changes)
+                    self._env.write(self._partition.sorted_items())
+                else:
+                    self._env.append(self._partition, changes)
+        finally:
+            self.abort()
+
+    def abort(self):
+        if self._lock is not None:
+            self._env.unlock(self._lock)
+            self._lock = None
+
+
+class _SpilledTxn(object):
+    """
+    transaction on a memory partition spilled to lmdb
+    """
+
+    def __init__(self, env: _MemoryEnv, lock=None, write=False):
+        self._env = env
+        self._lock = lock
+        self._lmdb_env = _open_env(env._spill_path, write=write)
+        self._txn = self._lmdb_env.begin(write=write)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+    def get(self, key, default=None):
+        return self._txn.get(key, default)
+
+    def put(self, key, value):
+        return self._txn.put(key, value)
+
+    def delete(self, key):
+        return self._txn.delete(key)
+
+    # noinspection PyUnusedLocal
+    def drop(self, db, delete=True):
+        self._txn.drop(self._lmdb_env.open_db(), delete=False)
+
+    def cursor(self):
+        return self._txn.cursor()
+
+    def commit(self):
+        self._close(self._txn.commit)
+
+    def abort(self):
+        self._close(self._txn.abort)
+
+    def _close(self, end_txn):
+        if self._txn is None:
+            return
+        try:
+            end_txn()
+            self._lmdb_env.close()
+        finally:
+            self._txn = None
+            if self._lock is not None:
+                self._env.unlock(self._lock)
+                self._lock = None
+
+
+class _MemoryCursor(object):
+    def __init__(self, items):
+        self._items = items
+        self._pos = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    def __iter__(self):
+        if self._pos is None:
+            self.first()
+        while self._pos is not None:
+            yield self._items[self._pos]
+            self.next()
+
+    def _move(self, pos):
+        self._pos = pos if 0 <= pos < len(self._items) else None
+        return self._pos is not None
+
+    def first(self):
+        return self._move(0)
+
+    def last(self):
+        return self._move(len(self._items) - 1)
+
+    def next(self):
+        return self._move(0 if self._pos is None else self._pos + 1)
+
+    def key(self):
+        return b"" if self._pos is None else self._items[self._pos][0]
+
+    def value(self):
+        return b"" if self._pos is None else self._items[self._pos][1]
+
+    def item(self):
+        return self.key(), self.value()
+
+
 def _hash_key_to_partition(key, partitions):
     _key = hashlib.sha1(key).digest()
     if isinstance(_key, bytes):
@@ -865,22 +1473,91 @@ def _hash_key_to_partition(key, partitions):
     return int(b)
 
 
+_PARTITIONER_BATCH_SIZE = 10000
+
+
+def _hash_keys_to_partitions(keys, partitions):
+    """
+    batched version of `_hash_key_to_partition`, gives the same partition for every key.
+
+    only the lowest 64 bits of the sha1 digest survive the first step of the jump hash,
+    so the loop runs over a uint64 array and keys leave it once they have settled.
+    """
+    if partitions < 1:
+        raise ValueError("partitions must be a positive number")
+    digests = b"".join(hashlib.sha1(key).digest()[:8] for key in keys)
+    _keys = np.frombuffer(digests, dtype="<u8").astype(np.uint64)
+    b = np.zeros(len(_keys), dtype=np.int64)
+    j = np.zeros(len(_keys), dtype=np.float64)
+    active = np.arange(len(_keys))
+    with np.errstate(over="ignore"):
+        while len(active) > 0:
+            b[active] = j[active].astype(np.int64)
+            _keys[active] = _keys[active] * np.uint64(2862933555777941757) + np.uint64(1)
+            j[active] = (b[active] + 1).astype(np.float64) * (
+                float(1 << 31) / ((_keys[active] >> np.uint64(33)) + np.uint64(1)).astype(np.float64))
+            active = active[j[active] < partitions]
+    return b
+
+
+def _chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+_MAP_VALUES_STAGE = "mapValues"
+_FILTER_STAGE = "filter"
+
+
+def _do_pipeline(p: _UnaryProcess):
+    rtn = p.output_operand()
+    stages = [(stage, f_pickle.loads(func_bytes)) for stage, func_bytes in p.get_func()]
+    need_key = any(stage == _FILTER_STAGE for stage, _ in stages)
+    value_changed = any(stage == _MAP_VALUES_STAGE for stage, _ in stages)
+    with ExitStack() as s:
+        source_env = s.enter_context(p.operand.as_env())
+        dst_env = s.enter_context(rtn.as_env(write=True))
+
+        source_txn = s.enter_context(source_env.begin())
+        dst_txn = s.enter_context(dst_env.begin(write=True))
+
+        cursor = s.enter_context(source_txn.cursor())
+        for k_bytes, v_bytes in cursor:
+            k = deserialize(k_bytes) if need_key else None
+            v = deserialize(v_bytes)
+            for stage, func in stages:
+                if stage == _MAP_VALUES_STAGE:
+                    v = func(v)
+                elif not func(k, v):
+                    break
+            else:
+                dst_txn.put(k_bytes, serialize(v) if value_changed else v_bytes)
+    return rtn
+
+
 def _do_map(p: _UnaryProcess):
     rtn = p.output_operand()
     with ExitStack() as s:
         source_env = s.enter_context(p.operand.as_env())
         txn_map = {}
         for partition in range(p.operand.num_partitions):
-            env = s.enter_context(_get_env(rtn.namespace, rtn.name, str(partition), write=True))
+            env = s.enter_context(rtn.with_partition(partition).as_env(write=True))
             txn_map[partition] = s.enter_context(env.begin(write=True))
         source_txn = s.enter_context(source_env.begin())
         cursor = s.enter_context(source_txn.cursor())
-        for k_bytes, v_bytes in cursor:
-            k, v = deserialize(k_bytes), deserialize(v_bytes)
-            k1, v1 = p.get_func()(k, v)
-            k1_bytes, v1_bytes = serialize(k1), serialize(v1)
-            partition = _hash_key_to_partition(k1_bytes, p.operand.num_partitions)
-            txn_map[partition].put(k1_bytes, v1_bytes)
+        func = p.get_func()
+        for kv_chunk in _chunked(cursor, _PARTITIONER_BATCH_SIZE):
+            kv1_bytes = []
+            for k_bytes, v_bytes in kv_chunk:
+                k1, v1 = func(deserialize(k_bytes), deserialize(v_bytes))
+                kv1_bytes.append((serialize(k1), serialize(v1)))
+            partitions = _hash_keys_to_partitions([k1_bytes for k1_bytes, _ in kv1_bytes], p.operand.num_partitions)
+            for (k1_bytes, v1_bytes), partition in zip(kv1_bytes, partitions.tolist()):
+                txn_map[partition].put(k1_bytes, v1_bytes)
     return rtn
 
 
@@ -955,7 +1632,7 @@ def _do_map_reduce_in_partitions(p: _MapReduceProcess):
         partitions = p.operand.num_partitions
         txn_map = {}
         for partition in range(partitions):
-            env = s.enter_context(_get_env(rtn.namespace, rtn.name, str(partition), write=True))
+            env = s.enter_context(rtn.with_partition(partition).as_env(write=True))
             txn_map[partition] = s.enter_context(env.begin(write=True))
         source_txn = s.enter_context(source_env.begin())
         cursor = s.enter_context(source_txn.cursor())
@@ -964,15 +1641,16 @@ def _do_map_reduce_in_partitions(p: _MapReduceProcess):
             raise ValueError("mapper function should return a iterable of pair")
         reducer = p.get_reducer()
 
-        for k, v in mapped:
-            k_bytes = serialize(k)
-            partition = _hash_key_to_partition(k_bytes, partitions)
-            # todo: not atomic, fix me
-            pre_v = txn_map[partition].get(k_bytes, None)
-            if pre_v is None:
-                txn_map[partition].put(k_bytes, serialize(v))
-            else:
-                txn_map[partition].put(k_bytes, serialize(reducer(deserialize(pre_v), v)))
+        for kv_chunk in _chunked(mapped, _PARTITIONER_BATCH_SIZE):
+            k_bytes_list = [serialize(k) for k, _ in kv_chunk]
+            partition_list = _hash_keys_to_partitions(k_bytes_list, partitions).tolist()
+            for k_bytes, (_, v), partition in zip(k_bytes_list, kv_chunk, partition_list):
+                # todo: not atomic, fix me
+                pre_v = txn_map[partition].get(k_bytes, None)
+                if pre_v is None:
+                    txn_map[partition].put(k_bytes, serialize(v))
+                else:
+                    txn_map[partition].put(k_bytes, serialize(reducer(deserialize(pre_v), v)))
     return rtn
 
 
@@ -1085,6 +1763,59 @@ def _do_filter(p: _UnaryProcess):
     return rtn
 
 
+def _do_save_as(p: _UnaryProcess):
+    target: _Operand = p.get_func()
+    buckets = [[] for _ in range(target.num_partitions)]
+    with ExitStack() as s:
+        source_env = s.enter_context(p.operand.as_env())
+        source_txn = s.enter_context(source_env.begin())
+        cursor = s.enter_context(source_txn.cursor())
+        for kv_chunk in _chunked(cursor, _PARTITIONER_BATCH_SIZE):
+            partitions = _hash_keys_to_partitions([k_bytes for k_bytes, _ in kv_chunk], target.num_partitions)
+            for kv, partition in zip(kv_chunk, partitions.tolist()):
+                buckets[partition].append(kv)
+
+    # start from a different target per source partition so that workers rarely wait on the same write lock
+    for i in range(target.num_partitions):
+        partition = (p.operand.partition + i) % target.num_partitions
+        if not buckets[partition]:
+            continue
+        with target.with_partition(partition).as_env(write=True) as env:
+            with env.begin(write=True) as txn:
+                for k_bytes, v_bytes in buckets[partition]:
+                    txn.put(k_bytes, v_bytes)
+            if target.durable:
+                env.sync(True)
+        buckets[partition] = None
+    return target
+
+
+def _merge_cursors(left_cursor, right_cursor):
+    """
+    walk two key-sorted cursors in lockstep
+
+    yields (k_bytes, left_v_bytes, right_v_bytes) in key order, the value of a missing side is None
+    """
+    left_it, right_it = iter(left_cursor), iter(right_cursor)
+    left_kv, right_kv = next(left_it, None), next(right_it, None)
+    while left_kv is not None and right_kv is not None:
+        if left_kv[0] < right_kv[0]:
+            yield left_kv[0], left_kv[1], None
+            left_kv = next(left_it, None)
+        elif left_kv[0] > right_kv[0]:
+            yield right_kv[0], None, right_kv[1]
+            right_kv = next(right_it, None)
+        else:
+            yield left_kv[0], left_kv[1], right_kv[1]
+            left_kv, right_kv = next(left_it, None), next(right_it, None)
+    while left_kv is not None:
+        yield left_kv[0], left_kv[1], None
+        left_kv = next(left_it, None)
+    while right_kv is not None:
+        yield right_kv[0], None, right_kv[1]
+        right_kv = next(right_it, None)
+
+
 def _do_subtract_by_key(p: _BinaryProcess):
     rtn = p.output_operand()
     with ExitStack() as s:
@@ -1098,10 +1829,10 @@ def _do_subtract_by_key(p: _BinaryProcess):
         right_txn = s.enter_context(right_env.begin())
         dst_txn = s.enter_context(dst_env.begin(write=True))
 
-        cursor = s.enter_context(left_txn.cursor())
-        for k_bytes, left_v_bytes in cursor:
-            right_v_bytes = right_txn.get(k_bytes)
-            if right_v_bytes is None:
+        left_cursor = s.enter_context(left_txn.cursor())
+        right_cursor = s.enter_context(right_txn.cursor())
+        for k_bytes, left_v_bytes, right_v_bytes in _merge_cursors(left_cursor, right_cursor):
+            if left_v_bytes is not None and right_v_bytes is None:
                 dst_txn.put(k_bytes, left_v_bytes)
     return rtn
 
@@ -1117,14 +1848,15 @@ def _do_join(p: _BinaryProcess):
         right_txn = s.enter_context(right_env.begin())
         dst_txn = s.enter_context(dst_env.begin(write=True))
 
-        cursor = s.enter_context(left_txn.cursor())
-        for k_bytes, v1_bytes in cursor:
-            v2_bytes = right_txn.get(k_bytes)
-            if v2_bytes is None:
+        left_cursor = s.enter_context(left_txn.cursor())
+        right_cursor = s.enter_context(right_txn.cursor())
+        func = p.get_func()
+        for k_bytes, v1_bytes, v2_bytes in _merge_cursors(left_cursor, right_cursor):
+            if v1_bytes is None or v2_bytes is None:
                 continue
             v1 = deserialize(v1_bytes)
             v2 = deserialize(v2_bytes)
-            v3 = p.get_func()(v1, v2)
+            v3 = func(v1, v2)
             dst_txn.put(k_bytes, serialize(v3))
     return rtn
 
@@ -1140,24 +1872,19 @@ def _do_union(p: _BinaryProcess):
         right_txn = s.enter_context(right_env.begin())
         dst_txn = s.enter_context(dst_env.begin(write=True))
 
-        # process left op
-        with left_txn.cursor() as left_cursor:
-            for k_bytes, left_v_bytes in left_cursor:
-                right_v_bytes = right_txn.get(k_bytes)
-                if right_v_bytes is None:
-                    dst_txn.put(k_bytes, left_v_bytes)
-                else:
-                    left_v = deserialize(left_v_bytes)
-                    right_v = deserialize(right_v_bytes)
-                    final_v = p.get_func()(left_v, right_v)
-                    dst_txn.put(k_bytes, serialize(final_v))
-
-        # process right op
-        with right_txn.cursor() as right_cursor:
-            for k_bytes, right_v_bytes in right_cursor:
-                final_v_bytes = dst_txn.get(k_bytes)
-                if final_v_bytes is None:
-                    dst_txn.put(k_bytes, right_v_bytes)
+        left_cursor = s.enter_context(left_txn.cursor())
+        right_cursor = s.enter_context(right_txn.cursor())
+        func = p.get_func()
+        for k_bytes, left_v_bytes, right_v_bytes in _merge_cursors(left_cursor, right_cursor):
+            if right_v_bytes is None:
+                dst_txn.put(k_bytes, left_v_bytes)
+            elif left_v_bytes is None:
+                dst_txn.put(k_bytes, right_v_bytes)
+            else:
+                left_v = deserialize(left_v_bytes)
+                right_v = deserialize(right_v_bytes)
+                final_v = func(left_v, right_v)
+                dst_txn.put(k_bytes, serialize(final_v))
     return rtn
 
 
@@ -15,7 +15,7 @@
 #
 from collections import Iterable
 
-from fate_arch._standalone import Session
+from fate_arch._standalone import Session, DEFAULT_MEMORY_BUDGET
 from fate_arch.abc import AddressABC, CSessionABC
 from fate_arch.common.base_utils import fate_uuid
 from fate_arch.common.log import getLogger
@@ -26,9 +26,14 @@ LOGGER = getLogger()
 
 class CSession(CSessionABC):
     def __init__(self, session_id: str, options=None):
-        if options is not None:
-            max_workers = options.get("task_cores", None)
-        self._session = Session(session_id, max_workers=max_workers)
+        if options is None:
+            options = {}
+        max_workers = options.get("task_cores", None)
+        lazy_plan = options.get("lazy_plan", False)
+        in_memory = options.get("in_memory", False)
+        memory_budget = options.get("memory_budget", DEFAULT_MEMORY_BUDGET)
+        self._session = Session(session_id, max_workers=max_workers, lazy_plan=lazy_plan, in_memory=in_memory,
+                                memory_budget=memory_budget)
 
     def get_standalone_session(self):
         return self._session
@@ -16,29 +16,143 @@
 
 
 import io
-import sys
 import json
+import struct
+import sys
+
+JSON_CONTENT_TYPE = "application/json"
+BINARY_CONTENT_TYPE = "application/octet-stream"
+
+JSON_WIRE_VERSION = 1
+BINARY_WIRE_VERSION = 2
+
+COMPRESSION_ZSTD = "zstd"
+COMPRESSION_LZ4 = "lz4"
+COMPRESSIONS = {COMPRESSION_ZSTD, COMPRESSION_LZ4}
+
+_FRAME_HEADER = struct.Struct("!II")
 
 
 # Datastream is a wraper of StringIO, it receives kv pairs and dump it to json string
 class Datastream(object):
+    content_type = JSON_CONTENT_TYPE
+    wire_version = JSON_WIRE_VERSION
+
     def __init__(self):
         self._string = io.StringIO()
         self._string.write("[")
+        self._size = sys.getsizeof("[")
+        self._empty = True
+
+    @staticmethod
+    def pack(k_bytes: bytes, v_bytes: bytes):
+        return {"k": k_bytes.hex(), "v": v_bytes.hex()}
+
+    @staticmethod
+    def element_size(el):
+        return sys.getsizeof(el["k"]) + sys.getsizeof(el["v"])
 
     def get_size(self):
-        return sys.getsizeof(self._string.getvalue())
+        return self._size
 
     def get_data(self):
         self._string.write("]")
-        return self._string.getvalue()
+        return self._string.getvalue().encode()
 
     def append(self, kv: dict):
         # add ',' if not the first element
-        if self._string.getvalue() != "[":
-            self._string.write(",")
-        json.dump(kv, self._string)
+        if not self._empty:
+            self._size += self._string.write(",")
+        self._size += self._string.write(json.dumps(kv))
+        self._empty = False
 
     def clear(self):
         self._string.close()
         self.__init__()
+
+    @staticmethod
+    def unpack(body: bytes):
+        return [(bytes.fromhex(el["k"]), bytes.fromhex(el["v"])) for el in json.loads(body.decode())]
+
+
+# BinaryDatastream frames kv pairs as [key length][value length][key][value] in a BytesIO,
+# the whole message could be compressed with zstd or lz4
+class BinaryDatastream(object):
+    content_type = BINARY_CONTENT_TYPE
+    wire_version = BINARY_WIRE_VERSION
+
+    def __init__(self, compression=None):
+        check_compression(compression)
+        self._compression = compression
+        self._buffer = io.BytesIO()
+
+    @staticmethod
+    def pack(k_bytes: bytes, v_bytes: bytes):
+        return k_bytes, v_bytes
+
+    @staticmethod
+    def element_size(el):
+        return _FRAME_HEADER.size + len(el[0]) + len(el[1])
+
+    def get_size(self):
+        return self._buffer.tell()
+
+    def get_data(self):
+        return compress(self._buffer.getvalue(), self._compression)
+
+    def append(self, kv: tuple):
+        k_bytes, v_bytes = kv
+        self._buffer.write(_FRAME_HEADER.pack(len(k_bytes), len(v_bytes)))
+        self._buffer.write(k_bytes)
+        self._buffer.write(v_bytes)
+
+    def clear(self):
+        self._buffer = io.BytesIO()
+
+    @staticmethod
+    def unpack(body: bytes, compression=None):
+        data = memoryview(decompress(body, compression))
+        kvs = []
+        offset = 0
+        while offset < len(data):
+            k_size, v_size = _FRAME_HEADER.unpack_from(data, offset)
+            offset += _FRAME_HEADER.size
+            kvs.append((bytes(data[offset:offset + k_size]), bytes(data[offset + k_size:offset + k_size + v_size])))
+            offset += k_size + v_size
+        return kvs
+
+
+def check_compression(compression):
+    if compression is None:
+        return
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"compression {compression} not supported, should be one of {sorted(COMPRESSIONS)}")
+    _get_codec(compression)
+
+
+def compress(data: bytes, compression=None):
+    if compression is None:
+        return data
+    return _get_codec(compression).compress(data)
+
+
+def decompress(data: bytes, compression=None):
+    if compression is None:
+        return data
+    return _get_codec(compression).decompress(data)
+
+
+def _get_codec(compression):
+    # codecs are optional dependencies, only imported when compression is configured
+    try:
+        if compression == COMPRESSION_ZSTD:
+            import zstandard
+
+            return zstandard
+        if compression == COMPRESSION_LZ4:
+            import lz4.frame
+
+            return lz4.frame
+    except ImportError as e:
+        raise ImportError(f"compression {compression} requires {e.name}, please install it first") from e
+    raise ValueError(f"compression {compression} not supported")
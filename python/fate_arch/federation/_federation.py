@@ -16,8 +16,9 @@
 
 
 import json
-import sys
+import threading
 import typing
+from concurrent.futures import ThreadPoolExecutor
 from pickle import dumps as p_dumps, loads as p_loads
 
 from fate_arch.abc import CTableABC
@@ -25,7 +26,8 @@ from fate_arch.abc import FederationABC, GarbageCollectionABC
 from fate_arch.common import Party
 from fate_arch.common.log import getLogger
 from fate_arch.federation import FederationDataType
-from fate_arch.federation._datastream import Datastream
+from fate_arch.federation._datastream import Datastream, BinaryDatastream, BINARY_CONTENT_TYPE, \
+    BINARY_WIRE_VERSION, JSON_CONTENT_TYPE, JSON_WIRE_VERSION, check_compression
 from fate_arch.session import computing_session
 
 LOGGER = getLogger()
@@ -33,6 +35,12 @@ LOGGER = getLogger()
 NAME_DTYPE_TAG = "<dtype>"
 _SPLIT_ = "^"
 
+WIRE_FORMAT_JSON = "json"
+WIRE_FORMAT_BINARY = "binary"
+
+# messages of a partition being produced to one destination while next batches are serialized
+DEFAULT_MAX_INFLIGHT_MESSAGES = 8
+
 
 def _get_splits(obj, max_message_size):
     obj_bytes = p_dumps(obj, protocol=4)
@@ -46,6 +54,59 @@ def _get_splits(obj, max_message_size):
         return kv, num_slice
 
 
+class _PipelinedSender(object):
+    """
+    produce messages on a dedicated thread per channel, at most `window` messages per channel are in flight
+
+    channels are only touched by their own thread, messages of a channel keep their order,
+    window 0 means producing synchronously in caller's thread
+    """
+
+    def __init__(self, window):
+        self._window = window
+        self._pipelines = {}
+        self._futures = []
+
+    def produce(self, info, body, properties):
+        if self._window == 0:
+            return info.produce(body=body, properties=properties)
+        if id(info) not in self._pipelines:
+            self._pipelines[id(info)] = ThreadPoolExecutor(max_workers=1), threading.Semaphore(self._window)
+        executor, window = self._pipelines[id(info)]
+        window.acquire()
+        self._check()
+        future = executor.submit(info.produce, body=body, properties=properties)
+        future.add_done_callback(lambda _: window.release())
+        self._futures.append(future)
+
+    def _check(self):
+        futures = []
+        for future in self._futures:
+            if not future.done():
+                futures.append(future)
+            elif future.exception() is not None:
+                raise future.exception()
+        self._futures = futures
+
+    def close(self, wait_result=True):
+        try:
+            if wait_result:
+                for future in self._futures:
+                    future.result()
+        finally:
+            for executor, _ in self._pipelines.values():
+                executor.shutdown(wait=True)
+            self._pipelines.clear()
+            self._futures = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # do not hide the original exception with failures of in-flight messages
+        self.close(wait_result=exc_type is None)
+
+
 class FederationBase(FederationABC):
     @staticmethod
     def from_conf(
@@ -62,8 +123,18 @@ class FederationBase(FederationABC):
             party: Party,
             mq,
             max_message_size,
-            conf=None
+            conf=None,
+            wire_format=WIRE_FORMAT_JSON,
+            compression=None,
+            max_inflight_messages=DEFAULT_MAX_INFLIGHT_MESSAGES,
     ):
+        if wire_format not in {WIRE_FORMAT_JSON, WIRE_FORMAT_BINARY}:
+            raise ValueError(f"wire_format should be {WIRE_FORMAT_JSON} or {WIRE_FORMAT_BINARY}, got {wire_format}")
+        if compression is not None and wire_format != WIRE_FORMAT_BINARY:
+            raise ValueError(f"compression is only supported by {WIRE_FORMAT_BINARY} wire_format")
+        check_compression(compression)
+        if max_inflight_messages < 0:
+            raise ValueError(f"max_inflight_messages should be non-negative, got {max_inflight_messages}")
         self._session_id = session_id
         self._party = party
         self._mq = mq
@@ -73,6 +144,9 @@ class FederationBase(FederationABC):
         self._message_cache = {}
         self._max_message_size = max_message_size
         self._conf = conf
+        self._wire_format = wire_format
+        self._compression = compression
+        self._max_inflight_messages = max_inflight_messages
 
     def __getstate__(self):
         pass
@@ -117,6 +191,12 @@ class FederationBase(FederationABC):
         rtn = []
         dtype = rtn_dtype.get("dtype", None)
         partitions = rtn_dtype.get("partitions", None)
+        # peers before binary wire format do not send wire_version
+        wire_version = rtn_dtype.get("wire_version", JSON_WIRE_VERSION)
+        if wire_version > BINARY_WIRE_VERSION:
+            raise ValueError(f"wire_version {wire_version} of remote party is not supported, "
+                             f"max supported version is {BINARY_WIRE_VERSION}")
+        check_compression(rtn_dtype.get("compression", None))
 
         if dtype == FederationDataType.TABLE or dtype == FederationDataType.SPLIT_OBJECT:
             party_topic_infos = self._get_party_topic_infos(parties, name, partitions=partitions)
@@ -195,6 +275,12 @@ class FederationBase(FederationABC):
             else:
                 body = {"dtype": FederationDataType.TABLE, "partitions": v.partitions}
 
+            # binary framing is opt-in, receivers learn the wire version from dtype and decode by content_type,
+            # old receivers only understand json, so all parties must be upgraded before enabling it
+            if self._wire_format == WIRE_FORMAT_BINARY and "partitions" in body:
+                body["wire_version"] = BINARY_WIRE_VERSION
+                body["compression"] = self._compression
+
             LOGGER.debug(
                 f"[federation.remote] _name_dtype_keys: {_name_dtype_keys}, dtype: {body}"
             )
@@ -229,7 +315,10 @@ class FederationBase(FederationABC):
                 src_role=self._party.role,
                 mq=self._mq,
                 max_message_size=self._max_message_size,
-                conf=self._conf
+                conf=self._conf,
+                wire_format=self._wire_format,
+                compression=self._compression,
+                max_inflight_messages=self._max_inflight_messages,
             )
             # noinspection PyProtectedMember
             v.mapPartitionsWithIndex(send_func)
@@ -351,25 +440,30 @@ class FederationBase(FederationABC):
             info.produce(body=data, properties=properties)
 
     def _send_kv(
-            self, name, tag, data, channel_infos, partition_size, partitions, message_key
+            self, name, tag, data, channel_infos, partition_size, partitions, message_key,
+            content_type=JSON_CONTENT_TYPE, compression=None, sender: _PipelinedSender = None
     ):
-        headers = json.dumps(
-            {
-                "partition_size": partition_size,
-                "partitions": partitions,
-                "message_key": message_key
-            }
-        )
+        headers = {
+            "partition_size": partition_size,
+            "partitions": partitions,
+            "message_key": message_key
+        }
+        if compression is not None:
+            headers["compression"] = compression
+        headers = json.dumps(headers)
         for info in channel_infos:
             properties = {
-                "content_type": "application/json",
+                "content_type": content_type,
                 "app_id": info._dst_party_id,
                 "message_id": name,
                 "correlation_id": tag,
                 "headers": headers
             }
             print(f"[federation._send_kv]info: {info}, properties: {properties}.")
-            info.produce(body=data, properties=properties)
+            if sender is None:
+                info.produce(body=data, properties=properties)
+            else:
+                sender.produce(info, body=data, properties=properties)
 
     def _get_partition_send_func(
             self,
@@ -382,6 +476,9 @@ class FederationBase(FederationABC):
             mq,
             max_message_size,
             conf: dict,
+            wire_format=WIRE_FORMAT_JSON,
+            compression=None,
+            max_inflight_messages=DEFAULT_MAX_INFLIGHT_MESSAGES,
     ):
         def _fn(index, kvs):
             return self._partition_send(
@@ -396,6 +493,9 @@ class FederationBase(FederationABC):
                 mq=mq,
                 max_message_size=max_message_size,
                 conf=conf,
+                wire_format=wire_format,
+                compression=compression,
+                max_inflight_messages=max_inflight_messages,
             )
 
         return _fn
@@ -413,54 +513,68 @@ class FederationBase(FederationABC):
             mq,
             max_message_size,
             conf: dict,
+            wire_format=WIRE_FORMAT_JSON,
+            compression=None,
+            max_inflight_messages=DEFAULT_MAX_INFLIGHT_MESSAGES,
     ):
         channel_infos = self._get_channels_index(
             index=index, party_topic_infos=party_topic_infos, src_party_id=src_party_id, src_role=src_role, mq=mq,
             conf=conf
         )
 
-        datastream = Datastream()
-        base_message_key = str(index)
-        message_key_idx = 0
-        count = 0
+        if wire_format == WIRE_FORMAT_BINARY:
+            datastream = BinaryDatastream(compression)
+        else:
+            datastream = Datastream()
+        # serializing next batch overlaps with producing in-flight ones
+        with _PipelinedSender(max_inflight_messages) as sender:
+            base_message_key = str(index)
+            message_key_idx = 0
+            count = 0
+
+            for k, v in kvs:
+                count += 1
+                el = datastream.pack(p_dumps(k), p_dumps(v))
+                # roughly caculate the size of package to avoid serialization ;)
+                if (
+                        datastream.get_size() + datastream.element_size(el)
+                        >= max_message_size
+                ):
+                    print(
+                        f"[federation._partition_send]The size of message is: {datastream.get_size()}"
+                    )
+                    message_key_idx += 1
+                    message_key = base_message_key + "_" + str(message_key_idx)
+                    self._send_kv(
+                        name=name,
+                        tag=tag,
+                        data=datastream.get_data(),
+                        channel_infos=channel_infos,
+                        partition_size=-1,
+                        partitions=partitions,
+                        message_key=message_key,
+                        content_type=datastream.content_type,
+                        compression=compression,
+                        sender=sender,
+                    )
+                    datastream.clear()
+                datastream.append(el)
 
-        for k, v in kvs:
-            count += 1
-            el = {"k": p_dumps(k).hex(), "v": p_dumps(v).hex()}
-            # roughly caculate the size of package to avoid serialization ;)
-            if (
-                    datastream.get_size() + sys.getsizeof(el["k"]) + sys.getsizeof(el["v"])
-                    >= max_message_size
-            ):
-                print(
-                    f"[federation._partition_send]The size of message is: {datastream.get_size()}"
-                )
-                message_key_idx += 1
-                message_key = base_message_key + "_" + str(message_key_idx)
-                self._send_kv(
-                    name=name,
-                    tag=tag,
-                    data=datastream.get_data().encode(),
-                    channel_infos=channel_infos,
-                    partition_size=-1,
-                    partitions=partitions,
-                    message_key=message_key,
-                )
-                datastream.clear()
-            datastream.append(el)
-
-        message_key_idx += 1
-        message_key = _SPLIT_.join([base_message_key, str(message_key_idx)])
-
-        self._send_kv(
-            name=name,
-            tag=tag,
-            data=datastream.get_data().encode(),
-            channel_infos=channel_infos,
-            partition_size=count,
-            partitions=partitions,
-            message_key=message_key,
-        )
+            message_key_idx += 1
+            message_key = _SPLIT_.join([base_message_key, str(message_key_idx)])
+
+            self._send_kv(
+                name=name,
+                tag=tag,
+                data=datastream.get_data(),
+                channel_infos=channel_infos,
+                partition_size=count,
+                partitions=partitions,
+                message_key=message_key,
+                content_type=datastream.content_type,
+                compression=compression,
+                sender=sender,
+            )
 
         return [(index, 1)]
 
@@ -584,7 +698,7 @@ class FederationBase(FederationABC):
                         )
                         continue
 
-                    if properties["content_type"] == "application/json":
+                    if properties["content_type"] in {JSON_CONTENT_TYPE, BINARY_CONTENT_TYPE}:
                         header = json.loads(properties["headers"])
                         message_key = header["message_key"]
                         if message_key in message_key_cache:
@@ -599,11 +713,11 @@ class FederationBase(FederationABC):
                         if header["partition_size"] >= 0:
                             partition_size = header["partition_size"]
 
-                        data = json.loads(body.decode())
-                        data_iter = (
-                            (p_loads(bytes.fromhex(el["k"])), p_loads(bytes.fromhex(el["v"])))
-                            for el in data
-                        )
+                        if properties["content_type"] == BINARY_CONTENT_TYPE:
+                            data = BinaryDatastream.unpack(body, header.get("compression", None))
+                        else:
+                            data = Datastream.unpack(body)
+                        data_iter = ((p_loads(k_bytes), p_loads(v_bytes)) for k_bytes, v_bytes in data)
                         count += len(data)
                         print(f"[federation._partition_receive] count: {count}")
                         all_data.extend(data_iter)
@@ -614,7 +728,8 @@ class FederationBase(FederationABC):
                             return all_data
                     else:
                         ValueError(
-                            f"[federation._partition_receive]properties.content_type is {properties['content_type']}, but must be application/json"
+                            f"[federation._partition_receive]properties.content_type is {properties['content_type']}, "
+                            f"but must be {JSON_CONTENT_TYPE} or {BINARY_CONTENT_TYPE}"
                         )
 
             except Exception as e:
@@ -17,7 +17,7 @@
 from fate_arch.common import Party
 from fate_arch.common import file_utils
 from fate_arch.common.log import getLogger
-from fate_arch.federation._federation import FederationBase
+from fate_arch.federation._federation import FederationBase, WIRE_FORMAT_JSON, DEFAULT_MAX_INFLIGHT_MESSAGES
 from fate_arch.federation.pulsar._mq_channel import (
     MQChannel,
     DEFAULT_TENANT,
@@ -86,6 +86,13 @@ class Federation(FederationBase):
 
         LOGGER.debug(f"set max message size to {max_message_size} Bytes")
 
+        # wire format of table transfer: json / binary, compression: zstd / lz4, only for binary
+        wire_format = pulsar_run.get("wire_format", pulsar_config.get("wire_format", WIRE_FORMAT_JSON))
+        compression = pulsar_run.get("compression", pulsar_config.get("compression", None))
+        # messages of a partition in flight per destination party, 0 means sending synchronously
+        max_inflight_messages = int(pulsar_run.get(
+            "max_inflight_messages", pulsar_config.get("max_inflight_messages", DEFAULT_MAX_INFLIGHT_MESSAGES)))
+
         # topic ttl could be overwritten by run time config
         topic_ttl = int(pulsar_run.get("topic_ttl", topic_ttl))
 
@@ -127,12 +134,18 @@ class Federation(FederationBase):
             cluster,
             tenant,
             conf,
-            mode
+            mode,
+            wire_format,
+            compression,
+            max_inflight_messages
         )
 
     def __init__(self, session_id, party: Party, mq: MQ, pulsar_manager: PulsarManager, max_message_size, topic_ttl,
-                 cluster, tenant, conf, mode):
-        super().__init__(session_id=session_id, party=party, mq=mq, max_message_size=max_message_size, conf=conf)
+                 cluster, tenant, conf, mode, wire_format=WIRE_FORMAT_JSON, compression=None,
+                 max_inflight_messages=DEFAULT_MAX_INFLIGHT_MESSAGES):
+        super().__init__(session_id=session_id, party=party, mq=mq, max_message_size=max_message_size, conf=conf,
+                         wire_format=wire_format, compression=compression,
+                         max_inflight_messages=max_inflight_messages)
 
         self._pulsar_manager = pulsar_manager
         self._topic_ttl = topic_ttl
@@ -19,7 +19,7 @@ import json
 from fate_arch.common import Party
 from fate_arch.common import file_utils
 from fate_arch.common.log import getLogger
-from fate_arch.federation._federation import FederationBase
+from fate_arch.federation._federation import FederationBase, WIRE_FORMAT_JSON, DEFAULT_MAX_INFLIGHT_MESSAGES
 from fate_arch.federation.rabbitmq._mq_channel import MQChannel
 from fate_arch.federation.rabbitmq._rabbit_manager import RabbitManager
 
@@ -86,6 +86,13 @@ class Federation(FederationBase):
 
         LOGGER.debug(f"set max message size to {max_message_size} Bytes")
 
+        # wire format of table transfer: json / binary, compression: zstd / lz4, only for binary
+        wire_format = rabbitmq_run.get("wire_format", rabbitmq_config.get("wire_format", WIRE_FORMAT_JSON))
+        compression = rabbitmq_run.get("compression", rabbitmq_config.get("compression", None))
+        # messages of a partition in flight per destination party, 0 means sending synchronously
+        max_inflight_messages = int(rabbitmq_run.get(
+            "max_inflight_messages", rabbitmq_config.get("max_inflight_messages", DEFAULT_MAX_INFLIGHT_MESSAGES)))
+
         rabbit_manager = RabbitManager(
             base_user, base_password, f"{host}:{mng_port}", rabbitmq_run
         )
@@ -100,11 +107,15 @@ class Federation(FederationBase):
         )
 
         return Federation(
-            federation_session_id, party, mq, rabbit_manager, max_message_size, conf, mode
+            federation_session_id, party, mq, rabbit_manager, max_message_size, conf, mode, wire_format, compression,
+            max_inflight_messages
         )
 
-    def __init__(self, session_id, party: Party, mq: MQ, rabbit_manager: RabbitManager, max_message_size, conf, mode):
-        super().__init__(session_id=session_id, party=party, mq=mq, max_message_size=max_message_size, conf=conf)
+    def __init__(self, session_id, party: Party, mq: MQ, rabbit_manager: RabbitManager, max_message_size, conf, mode,
+                 wire_format=WIRE_FORMAT_JSON, compression=None, max_inflight_messages=DEFAULT_MAX_INFLIGHT_MESSAGES):
+        super().__init__(session_id=session_id, party=party, mq=mq, max_message_size=max_message_size, conf=conf,
+                         wire_format=wire_format, compression=compression,
+                         max_inflight_messages=max_inflight_messages)
         self._rabbit_manager = rabbit_manager
         self._vhost_set = set()
         self._mode = mode
@@ -0,0 +1,55 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import argparse
+import time
+import uuid
+
+from fate_arch._standalone import Session
+
+
+def narrow_chain(table):
+    return table.mapValues(lambda v: v + 1) \
+        .filter(lambda k, v: k % 11 != 0) \
+        .mapValues(lambda v: v * 2) \
+        .filter(lambda k, v: v % 3 != 0) \
+        .mapValues(lambda v: -v)
+
+
+def run(lazy_plan, data_num, partitions, max_workers):
+    session = Session(str(uuid.uuid1()), max_workers=max_workers, lazy_plan=lazy_plan)
+    try:
+        source = session.parallelize(((i, i) for i in range(data_num)), partition=partitions, include_key=True)
+        start = time.perf_counter()
+        count = narrow_chain(source).count()
+        return count, time.perf_counter() - start
+    finally:
+        session.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("standalone lazy plan benchmark")
+    parser.add_argument("--data-num", type=int, default=1_000_000)
+    parser.add_argument("--partitions", type=int, default=16)
+    parser.add_argument("--max-workers", type=int, default=None)
+    args = parser.parse_args()
+
+    eager_count, eager_cost = run(False, args.data_num, args.partitions, args.max_workers)
+    lazy_count, lazy_cost = run(True, args.data_num, args.partitions, args.max_workers)
+    assert eager_count == lazy_count, f"{eager_count} != {lazy_count}"
+    print(f"rows: {args.data_num}, partitions: {args.partitions}, 5 narrow ops")
+    print(f"eager: {eager_cost:.3f}s")
+    print(f"lazy : {lazy_cost:.3f}s")
+    print(f"speedup: {eager_cost / lazy_cost:.2f}x")
@@ -0,0 +1,283 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import contextlib
+import os
+import unittest
+import uuid
+from unittest import mock
+
+from fate_arch import _standalone
+from fate_arch._standalone import Session
+
+
+class TestStandaloneLazyPlan(unittest.TestCase):
+    def setUp(self):
+        self.eager_session = Session(str(uuid.uuid1()), max_workers=2)
+        self.lazy_session = Session(str(uuid.uuid1()), max_workers=2, lazy_plan=True)
+        self.data = [(i, i * 2) for i in range(1000)]
+
+    def _chain(self, table):
+        return table.mapValues(lambda v: v + 1) \
+            .filter(lambda k, v: k % 3 != 0) \
+            .mapValues(lambda v: v * 10) \
+            .filter(lambda k, v: v % 7 != 0) \
+            .mapValues(lambda v: (v, -v))
+
+    def test_fused_chain_same_as_eager(self):
+        eager = self._chain(self.eager_session.parallelize(self.data, partition=4, include_key=True))
+        lazy = self._chain(self.lazy_session.parallelize(self.data, partition=4, include_key=True))
+        self.assertEqual(len(lazy._plan), 5)
+        self.assertEqual(sorted(eager.collect()), sorted(lazy.collect()))
+        self.assertEqual(lazy._plan, [])
+        self.assertEqual(eager.count(), lazy.count())
+
+    def test_plan_materialized_at_wide_boundary(self):
+        source = self.lazy_session.parallelize(self.data, partition=4, include_key=True)
+        lazy = source.mapValues(lambda v: v + 1)
+        other = self.lazy_session.parallelize(self.data, partition=3, include_key=True).filter(lambda k, v: k < 10)
+        joined = lazy.join(other, lambda v1, v2: v1 - v2)
+        self.assertEqual(lazy._plan, [])
+        self.assertEqual(other._plan, [])
+        self.assertEqual(sorted(joined.collect()), [(i, 1) for i in range(10)])
+        self.assertEqual(lazy.reduce(lambda a, b: a + b), sum(v + 1 for _, v in self.data))
+
+    def test_captured_state_bound_at_call(self):
+        class _Scale(object):
+            factor = 1
+
+        scale = _Scale()
+        data = [(i, i) for i in range(4)]
+        tables = [session.parallelize(data, partition=2, include_key=True).mapValues(lambda v: v * scale.factor)
+                  for session in [self.eager_session, self.lazy_session]]
+        eager, lazy = tables
+        scale.factor = 100
+        self.assertEqual(sorted(lazy.collect()), sorted(eager.collect()))
+        self.assertEqual(sorted(lazy.collect()), data)
+
+        source = self.lazy_session.parallelize(data, partition=2, include_key=True)
+        shifted = [source.mapValues(lambda v: v + i) for i in range(3)]
+        self.assertEqual([sorted(t.collect()) for t in shifted], [[(k, k + i) for k in range(4)] for i in range(3)])
+
+    def test_source_untouched(self):
+        source = self.lazy_session.parallelize(self.data, partition=4, include_key=True)
+        lazy = source.filter(lambda k, v: k < 5)
+        lazy.destroy()
+        self.assertEqual(source.count(), len(self.data))
+
+    def tearDown(self):
+        self.eager_session.stop()
+        self.lazy_session.stop()
+
+
+class TestStandaloneInMemory(unittest.TestCase):
+    def setUp(self):
+        self.data = [(i, str(i)) for i in range(1000)]
+        self.lmdb_session = Session(str(uuid.uuid1()), max_workers=2)
+
+    def _run(self, session):
+        table = session.parallelize(self.data, partition=4, include_key=True)
+        mapped = table.mapValues(lambda v: v + "a").map(lambda k, v: (k + 1, v))
+        other = session.parallelize(self.data[:100], partition=2, include_key=True)
+        joined = mapped.join(other, lambda v1, v2: v1 + v2)
+        union = joined.union(other.filter(lambda k, v: k < 50))
+        subtracted = union.subtractByKey(session.parallelize([(1, 1)], partition=4, include_key=True))
+        reduced = subtracted.mapReducePartitions(lambda it: ((k % 3, 1) for k, _ in it), lambda a, b: a + b)
+        return sorted(subtracted.collect()), sorted(reduced.collect()), subtracted.count()
+
+    def test_same_as_lmdb(self):
+        memory_session = Session(str(uuid.uuid1()), max_workers=2, in_memory=True)
+        try:
+            self.assertEqual(self._run(self.lmdb_session), self._run(memory_session))
+        finally:
+            memory_session.stop()
+
+    def test_spill_out_of_budget(self):
+        memory_session = Session(str(uuid.uuid1()), max_workers=2, in_memory=True, memory_budget=4096)
+        try:
+            self.assertEqual(self._run(self.lmdb_session), self._run(memory_session))
+        finally:
+            memory_session.stop()
+
+    def test_in_memory_table(self):
+        memory_session = Session(str(uuid.uuid1()), max_workers=2, in_memory=True)
+        try:
+            table = memory_session.parallelize(self.data, partition=4, include_key=True)
+            self.assertTrue(table._in_memory)
+            self.assertFalse(_standalone._data_dir.joinpath(table._namespace, table._name).exists())
+            self.assertEqual(table.get(3), "3")
+            self.assertEqual(table.delete(3), "3")
+            self.assertIsNone(table.get(3))
+            self.assertEqual(table.count(), len(self.data) - 1)
+
+            saved = table.save_as(str(uuid.uuid1()), memory_session.session_id, need_cleanup=False)
+            self.assertFalse(saved._in_memory)
+            self.assertEqual(sorted(saved.collect()), sorted(table.collect()))
+            saved.destroy()
+
+            table.destroy()
+            self.assertFalse(_standalone._memory_dir.joinpath(table._namespace, table._name).exists())
+        finally:
+            memory_session.stop()
+
+    def test_in_memory_put_log(self):
+        memory_session = Session(str(uuid.uuid1()), max_workers=2, in_memory=True)
+        try:
+            for compact_size in [0, 1 << 20]:
+                with mock.patch.object(_standalone, "_MEMORY_COMPACT_SIZE", compact_size):
+                    table = memory_session.parallelize([], partition=3, include_key=True)
+                    expected = {}
+                    for round_id in range(3):
+                        for i in range(200):
+                            table.put(i, f"{round_id}_{i}")
+                            expected[i] = f"{round_id}_{i}"
+                        for i in range(round_id, 200, 7):
+                            self.assertEqual(table.delete(i), expected.pop(i))
+                        self.assertEqual(table.get(round_id + 1), expected.get(round_id + 1))
+                        # workers read the partitions again after each round of changes
+                        self.assertEqual(dict(table.mapValues(lambda v: v + "a").collect()),
+                                         {k: v + "a" for k, v in expected.items()})
+                        self.assertEqual(table.count(), len(expected))
+                    table.destroy()
+        finally:
+            memory_session.stop()
+
+    def tearDown(self):
+        self.lmdb_session.stop()
+
+
+class TestStandaloneHashPartitioner(unittest.TestCase):
+    def test_same_as_scalar(self):
+        keys = [_standalone._k_to_bytes(k) for k in [*range(2000), *(str(uuid.uuid1()) for _ in range(500))]]
+        for partitions in [1, 2, 3, 7, 16, 100, 1024, 65536]:
+            expected = [_standalone._hash_key_to_partition(k, partitions) for k in keys]
+            self.assertEqual(_standalone._hash_keys_to_partitions(keys, partitions).tolist(), expected)
+
+    def test_empty(self):
+        self.assertEqual(len(_standalone._hash_keys_to_partitions([], 4)), 0)
+        with self.assertRaises(ValueError):
+            _standalone._hash_keys_to_partitions([b"a"], 0)
+
+
+class TestStandaloneMergeJoin(unittest.TestCase):
+    def setUp(self):
+        self.session = Session(str(uuid.uuid1()), max_workers=2)
+        self.left = [(i, i) for i in range(0, 300, 2)]
+        self.right = [(i, -i) for i in range(0, 300, 3)]
+
+    def test_merge_cursors(self):
+        left = [(b"a", b"1"), (b"c", b"3"), (b"d", b"4")]
+        right = [(b"b", b"2"), (b"c", b"-3"), (b"e", b"5")]
+        self.assertEqual(list(_standalone._merge_cursors(left, right)),
+                         [(b"a", b"1", None), (b"b", None, b"2"), (b"c", b"3", b"-3"),
+                          (b"d", b"4", None), (b"e", None, b"5")])
+        self.assertEqual(list(_standalone._merge_cursors([], right)), [(k, None, v) for k, v in right])
+
+    def test_binary_ops(self):
+        for left_partitions, right_partitions in [(4, 4), (3, 5), (6, 2)]:
+            left = self.session.parallelize(self.left, partition=left_partitions, include_key=True)
+            right = self.session.parallelize(self.right, partition=right_partitions, include_key=True)
+            right_dict = dict(self.right)
+            self.assertEqual(sorted(left.join(right, lambda v1, v2: (v1, v2)).collect()),
+                             [(k, (v, right_dict[k])) for k, v in self.left if k in right_dict])
+            self.assertEqual(sorted(left.subtractByKey(right).collect()),
+                             [(k, v) for k, v in self.left if k not in right_dict])
+            self.assertEqual(dict(left.union(right, lambda v1, v2: v1 + v2).collect()),
+                             {**right_dict, **{k: v + right_dict.get(k, 0) for k, v in self.left}})
+
+    def test_save_as_repartition(self):
+        table = self.session.parallelize(self.left, partition=3, include_key=True)
+        for partitions in [1, 3, 7]:
+            saved = table.save_as(str(uuid.uuid1()), self.session.session_id, partition=partitions)
+            self.assertEqual(saved.partitions, partitions)
+            self.assertEqual(sorted(saved.collect()), self.left)
+            self.assertEqual(saved.get(4), 4)
+
+    def test_save_as_sync_persistent(self):
+        table = self.session.parallelize(self.left, partition=2, include_key=True)
+        synced = []
+
+        class _RecordingEnv(object):
+            def __init__(self, env):
+                self._env = env
+
+            def begin(self, **kwargs):
+                return self._env.begin(**kwargs)
+
+            def sync(self, force=False):
+                synced.append(force)
+                return self._env.sync(force)
+
+        cached_env = _standalone._get_cached_env
+
+        @contextlib.contextmanager
+        def recording_env(*args):
+            with cached_env(*args) as env:
+                yield _RecordingEnv(env)
+
+        for need_cleanup in [True, False]:
+            synced.clear()
+            dup = _standalone._create_table(self.session, str(uuid.uuid1()), self.session.session_id, 3,
+                                            need_cleanup)
+            target = _standalone._Operand(dup._namespace, dup._name, None, dup._partitions, False,
+                                          durable=not need_cleanup)
+            task_info = _standalone._TaskInfo(str(uuid.uuid1()), "save_as", _standalone.f_pickle.dumps(target))
+            with mock.patch.object(_standalone, "_get_cached_env", recording_env):
+                for partition in range(table.partitions):
+                    operand = _standalone._Operand(table._namespace, table._name, partition, table.partitions)
+                    _standalone._do_save_as(_standalone._UnaryProcess(task_info, operand))
+            self.assertEqual(sorted(dup.collect()), self.left)
+            self.assertEqual(bool(synced), not need_cleanup)
+            self.assertTrue(all(synced))
+
+    def tearDown(self):
+        self.session.stop()
+
+
+class TestStandaloneWorkerPool(unittest.TestCase):
+    def setUp(self):
+        self.session = Session(str(uuid.uuid1()), max_workers=3)
+
+    def _partition_pids(self, table):
+        pids = table.mapPartitionsWithIndex(lambda p, it: [(p, os.getpid())], preserves_partitioning=True)
+        return dict(pids.collect())
+
+    def test_partition_affinity(self):
+        table = self.session.parallelize(range(100), partition=7)
+        pids = self._partition_pids(table)
+        self.assertEqual(len(set(pids.values())), 3)
+        for p in range(7):
+            self.assertEqual(pids[p], pids[p % 3])
+
+        mapped = table.mapValues(lambda v: v + 1)
+        self.assertEqual(self._partition_pids(mapped), pids)
+        self.assertEqual(mapped.reduce(lambda a, b: a + b), sum(range(1, 101)))
+
+    def test_recreate_table(self):
+        # workers keep envs of tables they wrote, a table created again at the same path must not reuse them
+        table = self.session.parallelize([(i, i) for i in range(100)], partition=3, include_key=True)
+        name, namespace = str(uuid.uuid1()), self.session.session_id
+        for i in range(3):
+            saved = table.mapValues(lambda v, i=i: v + i).save_as(name, namespace, partition=3, need_cleanup=False)
+            self.assertEqual(sorted(saved.collect()), [(k, k + i) for k in range(100)])
+            self.assertEqual(saved.mapValues(lambda v: -v).reduce(lambda a, b: a + b), -sum(range(100)) - 100 * i)
+            saved.destroy()
+
+    def tearDown(self):
+        self.session.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,200 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import importlib.util
+import random
+import threading
+import time
+import unittest
+from collections import defaultdict
+
+from fate_arch.common import Party
+from fate_arch.federation._datastream import BinaryDatastream, Datastream
+from fate_arch.federation._federation import FederationBase, WIRE_FORMAT_BINARY, WIRE_FORMAT_JSON, \
+    DEFAULT_MAX_INFLIGHT_MESSAGES
+
+
+class LoopbackChannel(object):
+    def __init__(self, queue, dst_party_id, dst_role, latency=0.0, fail_at=None):
+        self._queue = queue
+        self._dst_party_id = dst_party_id
+        self._dst_role = dst_role
+        self._latency = latency
+        self._fail_at = fail_at
+        self.produce_threads = set()
+
+    def produce(self, body, properties):
+        self.produce_threads.add(threading.get_ident())
+        if self._fail_at is not None and len(self._queue) >= self._fail_at:
+            raise ConnectionError("loopback channel closed")
+        time.sleep(self._latency)
+        self._queue.append((properties, body))
+
+    def cancel(self):
+        pass
+
+
+class LoopbackFederation(FederationBase):
+    """
+    federation over in-process queues, every topic is a list of (properties, body) messages
+
+    receivers could get messages shuffled and duplicated, as brokers may redeliver out of order
+    """
+
+    def __init__(self, wire_format=WIRE_FORMAT_JSON, compression=None, max_message_size=1048576,
+                 max_inflight_messages=DEFAULT_MAX_INFLIGHT_MESSAGES, latency=0.0, fail_at=None, shuffle=False):
+        super().__init__(session_id="loopback", party=Party("guest", "9999"), mq=None,
+                         max_message_size=max_message_size, wire_format=wire_format, compression=compression,
+                         max_inflight_messages=max_inflight_messages)
+        self.queues = defaultdict(list)
+        self.channels = []
+        self._latency = latency
+        self._fail_at = fail_at
+        self._shuffle = shuffle
+
+    def _maybe_create_topic_and_replication(self, party, topic_suffix):
+        return f"{party.role}-{party.party_id}-{topic_suffix}"
+
+    def _get_channel(self, topic_pair, src_party_id, src_role, dst_party_id, dst_role, mq=None, conf: dict = None):
+        channel = LoopbackChannel(self.queues[topic_pair], dst_party_id, dst_role, self._latency, self._fail_at)
+        self.channels.append(channel)
+        return channel
+
+    def _get_consume_message(self, channel_info):
+        messages = list(channel_info._queue)
+        if self._shuffle:
+            messages = messages + messages[:len(messages) // 2]
+            random.shuffle(messages)
+        for i, (properties, body) in enumerate(messages):
+            yield i, properties, body
+
+    def _consume_ack(self, channel_info, id):
+        pass
+
+    def send_partition(self, name, tag, index, kvs, partitions=1):
+        party_topic_infos = self._get_party_topic_infos([self._party], name, partitions=partitions)
+        return self._partition_send(index=index, kvs=kvs, name=name, tag=tag, partitions=partitions,
+                                    party_topic_infos=party_topic_infos, src_party_id=self._party.party_id,
+                                    src_role=self._party.role, mq=None, max_message_size=self._max_message_size,
+                                    conf=None, wire_format=self._wire_format, compression=self._compression)
+
+    def receive_partition(self, name, tag, index, partitions=1):
+        topic_infos = self._get_party_topic_infos([self._party], name, partitions=partitions)[0]
+        return self._partition_receive(index=index, kvs=[], name=name, tag=tag, src_party_id=self._party.party_id,
+                                       src_role=self._party.role, dst_party_id=self._party.party_id,
+                                       dst_role=self._party.role, topic_infos=topic_infos, mq=None, conf=None)
+
+
+class TestDatastream(unittest.TestCase):
+    def setUp(self):
+        self.kvs = [(f"k{i}".encode(), bytes(range(i % 256))) for i in range(300)]
+
+    def test_json(self):
+        datastream = Datastream()
+        for k, v in self.kvs:
+            datastream.append(datastream.pack(k, v))
+        self.assertEqual(Datastream.unpack(datastream.get_data()), self.kvs)
+
+    def test_binary(self):
+        datastream = BinaryDatastream()
+        for k, v in self.kvs:
+            el = datastream.pack(k, v)
+            size = datastream.get_size()
+            datastream.append(el)
+            self.assertEqual(datastream.get_size(), size + datastream.element_size(el))
+        self.assertEqual(BinaryDatastream.unpack(datastream.get_data()), self.kvs)
+
+    def test_unknown_compression(self):
+        with self.assertRaises(ValueError):
+            BinaryDatastream("gzip")
+
+
+class TestWireFormat(unittest.TestCase):
+    def setUp(self):
+        self.kvs = [(i, {"feature": [i * 0.5] * 10, "label": i % 2}) for i in range(2000)]
+
+    def _roundtrip(self, federation):
+        federation.send_partition("x", "0", 0, self.kvs)
+        return sorted(federation.receive_partition("x", "0", 0))
+
+    def _body_size(self, federation):
+        return sum(len(body) for queue in federation.queues.values() for _, body in queue)
+
+    def test_roundtrip(self):
+        json_federation = LoopbackFederation(WIRE_FORMAT_JSON, max_message_size=4096)
+        binary_federation = LoopbackFederation(WIRE_FORMAT_BINARY, max_message_size=4096)
+        self.assertEqual(self._roundtrip(json_federation), self.kvs)
+        self.assertEqual(self._roundtrip(binary_federation), self.kvs)
+        self.assertLess(self._body_size(binary_federation), self._body_size(json_federation) / 1.5)
+
+    @unittest.skipUnless(importlib.util.find_spec("zstandard"), "zstandard not installed")
+    def test_zstd(self):
+        self.assertEqual(self._roundtrip(LoopbackFederation(WIRE_FORMAT_BINARY, compression="zstd")), self.kvs)
+
+    @unittest.skipUnless(importlib.util.find_spec("lz4"), "lz4 not installed")
+    def test_lz4(self):
+        self.assertEqual(self._roundtrip(LoopbackFederation(WIRE_FORMAT_BINARY, compression="lz4")), self.kvs)
+
+    def test_out_of_order(self):
+        federation = LoopbackFederation(WIRE_FORMAT_BINARY, max_message_size=2048, shuffle=True)
+        self.assertEqual(self._roundtrip(federation), self.kvs)
+
+    def test_invalid_conf(self):
+        with self.assertRaises(ValueError):
+            LoopbackFederation("xml")
+        with self.assertRaises(ValueError):
+            LoopbackFederation(WIRE_FORMAT_JSON, compression="zstd")
+
+
+class TestPipelinedSend(unittest.TestCase):
+    def setUp(self):
+        self.kvs = [(i, [i] * 100) for i in range(500)]
+        self.parties = [Party("host", "10000"), Party("host", "10001"), Party("arbiter", "9999")]
+
+    def _send(self, federation):
+        party_topic_infos = federation._get_party_topic_infos(self.parties, "x", partitions=1)
+        federation._partition_send(index=0, kvs=self.kvs, name="x", tag="0", partitions=1,
+                                   party_topic_infos=party_topic_infos, src_party_id="9999", src_role="guest",
+                                   mq=None, max_message_size=4096, conf=None,
+                                   max_inflight_messages=federation._max_inflight_messages)
+        return {key: [properties["headers"] for properties, _ in queue] for key, queue in federation.queues.items()}
+
+    def test_same_as_synchronous(self):
+        pipelined = LoopbackFederation(max_inflight_messages=2, latency=0.001)
+        synchronous = LoopbackFederation(max_inflight_messages=0)
+        messages = self._send(pipelined)
+        self.assertEqual(len(messages), len(self.parties))
+        self.assertEqual(messages, self._send(synchronous))
+
+        main_thread = {threading.get_ident()}
+        self.assertTrue(all(channel.produce_threads and channel.produce_threads.isdisjoint(main_thread)
+                            for channel in pipelined.channels))
+        self.assertTrue(all(channel.produce_threads == main_thread for channel in synchronous.channels))
+
+    def test_overlap(self):
+        latency = 0.01
+        start = time.perf_counter()
+        messages = self._send(LoopbackFederation(latency=latency))
+        cost = time.perf_counter() - start
+        # three parties are sent in parallel
+        self.assertLess(cost, latency * sum(len(queue) for queue in messages.values()))
+
+    def test_produce_failure(self):
+        with self.assertRaises(ConnectionError):
+            self._send(LoopbackFederation(max_inflight_messages=2, fail_at=3))
+
+
+if __name__ == '__main__':
+    unittest.main()
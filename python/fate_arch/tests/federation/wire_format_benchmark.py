@@ -0,0 +1,64 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+
+from federation_test import LoopbackFederation
+from fate_arch.federation._federation import WIRE_FORMAT_BINARY, WIRE_FORMAT_JSON, DEFAULT_MAX_INFLIGHT_MESSAGES
+
+
+def run(wire_format, compression, kvs, max_message_size, max_inflight_messages, latency):
+    federation = LoopbackFederation(wire_format, compression, max_message_size, max_inflight_messages, latency)
+    # _partition_send / _partition_receive print every message
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        federation.send_partition("benchmark", "0", 0, kvs)
+        send_cost = time.perf_counter() - start
+        start = time.perf_counter()
+        received = federation.receive_partition("benchmark", "0", 0)
+        receive_cost = time.perf_counter() - start
+    assert len(received) == len(kvs)
+    size = sum(len(body) for queue in federation.queues.values() for _, body in queue)
+    return size, send_cost, receive_cost
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("federation wire format loopback benchmark")
+    parser.add_argument("--data-num", type=int, default=100_000)
+    parser.add_argument("--feature-num", type=int, default=20)
+    parser.add_argument("--max-message-size", type=int, default=1048576)
+    parser.add_argument("--compression", nargs="*", default=[])
+    parser.add_argument("--max-inflight-messages", type=int, default=DEFAULT_MAX_INFLIGHT_MESSAGES)
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated seconds to produce a message")
+    args = parser.parse_args()
+
+    features = np.random.random((args.data_num, args.feature_num))
+    kvs = [(str(i), features[i]) for i in range(args.data_num)]
+
+    cases = [(WIRE_FORMAT_JSON, None), (WIRE_FORMAT_BINARY, None)]
+    cases.extend((WIRE_FORMAT_BINARY, compression) for compression in args.compression)
+    print(f"rows: {args.data_num}, features: {args.feature_num}, "
+          f"max inflight messages: {args.max_inflight_messages}, latency: {args.latency}s")
+    for wire_format, compression in cases:
+        size, send_cost, receive_cost = run(wire_format, compression, kvs, args.max_message_size,
+                                            args.max_inflight_messages, args.latency)
+        print(f"{wire_format:<6} compression={str(compression):<5} bytes={size:<12} "
+              f"send={send_cost:.3f}s ({args.data_num / send_cost:.0f} rows/s) "
+              f"receive={receive_cost:.3f}s ({args.data_num / receive_cost:.0f} rows/s)")
@@ -85,6 +85,9 @@ class DataTransformParam(BaseParam):
 
     with_match_id: bool, True if dataset has match_id, default: False
 
+    instance_block_size: None or int, if set, output data is grouped into InstanceBlock of at most
+                         instance_block_size rows, default: None
+
     """
 
     def __init__(self, input_format="dense", delimitor=',', data_type='float64',
@@ -95,7 +98,7 @@ class DataTransformParam(BaseParam):
                  outlier_impute=None, outlier_replace_value=0,
                  with_label=False, label_name='y',
                  label_type='int', output_format='dense', need_run=True,
-                 with_match_id=False, match_id_name='', match_id_index=0):
+                 with_match_id=False, match_id_name='', match_id_index=0, instance_block_size=None):
         self.input_format = input_format
         self.delimitor = delimitor
         self.data_type = data_type
@@ -118,6 +121,7 @@ class DataTransformParam(BaseParam):
         self.with_match_id = with_match_id
         self.match_id_name = match_id_name
         self.match_id_index = match_id_index
+        self.instance_block_size = instance_block_size
 
     def check(self):
 
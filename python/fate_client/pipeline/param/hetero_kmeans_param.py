@@ -30,15 +30,20 @@ class KmeansParam(BaseParam):
         Maximum number of iterations of the hetero-k-means algorithm to run.
     tol : float, default 0.001。
     random_stat: int, random state, default is None
+    init_method: str, 'random' or 'k-means++', method to choose initial centroids, default is 'random'
+    batch_size: int, samples used to update centroids in each iteration, -1 means use all data, default is -1.
+        a batch is made of whole blocks of min(batch_size, 1024) samples on average, its size varies around batch_size
 
     """
 
-    def __init__(self, k=5, max_iter=300, tol=0.001, random_stat=None):
+    def __init__(self, k=5, max_iter=300, tol=0.001, random_stat=None, init_method='random', batch_size=-1):
         super(KmeansParam, self).__init__()
         self.k = k
         self.max_iter = max_iter
         self.tol = tol
         self.random_stat = random_stat
+        self.init_method = init_method
+        self.batch_size = batch_size
 
     def check(self):
         descr = "Kmeans_param's"
@@ -63,3 +68,16 @@ class KmeansParam(BaseParam):
         elif self.tol < 0:
             raise ValueError(
                 descr + "tol not supported, should be larger than or equal to 0".format(self.tol))
+
+        if self.init_method not in ['random', 'k-means++']:
+            raise ValueError(
+                descr + "init_method {} not supported, should be 'random' or 'k-means++'".format(self.init_method))
+
+        if not isinstance(self.batch_size, int):
+            raise ValueError(
+                descr + "batch_size {} not supported, should be int type".format(self.batch_size))
+        elif self.batch_size != -1 and self.batch_size <= 0:
+            raise ValueError(
+                descr + "batch_size {} not supported, should be -1 or larger than 0".format(self.batch_size))
+
+        return True
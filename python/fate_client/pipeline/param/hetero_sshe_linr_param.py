@@ -93,6 +93,14 @@ class HeteroSSHELinRParam(LinearModelParam):
         Whether reconstruct model weights every iteration. If so, Regularization is available.
         The performance will be better as well since the algorithm process is simplified.
 
+    share_field: str, "paillier" or "ring", default: "paillier"
+        "paillier": Secret shares live in the field of the Paillier modulus, held as python big integers.
+        "ring": Secret shares live in the ring Z_2^64, held as uint64 arrays, the arithmetic wraps around natively.
+        Only the "respectively" reveal strategy is supported.
+
+    ring_fraction_bits: int, default: 16
+        Fractional bits of fixed point numbers when share_field is "ring".
+
 
     """
 
@@ -106,7 +114,9 @@ class HeteroSSHELinRParam(LinearModelParam):
                  callback_param=CallbackParam(),
                  use_mix_rand=True,
                  reveal_strategy="respectively",
-                 reveal_every_iter=False
+                 reveal_every_iter=False,
+                 share_field="paillier",
+                 ring_fraction_bits=16
                  ):
         super(HeteroSSHELinRParam, self).__init__(penalty=penalty, tol=tol, alpha=alpha, optimizer=optimizer,
                                                   batch_size=batch_size, learning_rate=learning_rate,
@@ -118,6 +128,8 @@ class HeteroSSHELinRParam(LinearModelParam):
         self.use_mix_rand = use_mix_rand
         self.reveal_strategy = reveal_strategy
         self.reveal_every_iter = reveal_every_iter
+        self.share_field = share_field
+        self.ring_fraction_bits = ring_fraction_bits
 
     def check(self):
         descr = "sshe linear_regression_param's "
@@ -170,6 +182,15 @@ class HeteroSSHELinRParam(LinearModelParam):
                                                            ["respectively", "encrypted_reveal_in_host"],
                                                            f"{descr} reveal_strategy")
 
+        self.share_field = self.check_and_change_lower(self.share_field, ["paillier", "ring"],
+                                                       f"{descr} share_field")
+        if self.share_field == "ring":
+            if self.reveal_strategy != "respectively":
+                raise ValueError(f"{descr} reveal_strategy should be 'respectively' when share_field is 'ring'")
+            if type(self.ring_fraction_bits).__name__ != "int" or not 0 < self.ring_fraction_bits <= 24:
+                raise ValueError(f"{descr} ring_fraction_bits should be an int in (0, 24], "
+                                 f"but got {self.ring_fraction_bits}")
+
         if self.reveal_strategy == "encrypted_reveal_in_host" and self.reveal_every_iter:
             raise PermissionError("reveal strategy: encrypted_reveal_in_host mode is not allow to reveal every iter.")
         return True
@@ -225,6 +225,12 @@ class CipherCompressorHost(object):
             self._padding_length, self._capacity = self.transfer_var.compress_para.get(idx=0)
             LOGGER.debug("received parameter from guest is {} {}".format(self._padding_length, self._capacity))
 
+    def get_compress_parameter(self):
+        return self._padding_length, self._capacity
+
+    def set_compress_parameter(self, padding_length, capacity):
+        self._padding_length, self._capacity = padding_length, capacity
+
     def compress(self, encrypted_obj_list):
 
         rs = []
@@ -114,7 +114,7 @@ class GuestIntegerPacker(object):
     def pack_and_encrypt(self, data_table, post_process_func=cipher_list_to_cipher_tensor):
 
         packing_data_table = self.pack(data_table)
-        en_packing_data_table = self.encrypter.distribute_raw_encrypt(packing_data_table)
+        en_packing_data_table = EncryptModeCalculator(self.encrypter).raw_encrypt(packing_data_table)
 
         if post_process_func:
             en_packing_data_table = en_packing_data_table.mapValues(post_process_func)
@@ -11,6 +11,7 @@ from federatedml.transfer_variable.transfer_class.hetero_decision_tree_transfer_
     HeteroDecisionTreeTransferVariable
 from federatedml.ensemble.basic_algorithms.decision_tree.tree_core.g_h_optim import GHPacker
 from federatedml.statistic.statics import MultivariateStatisticalSummary
+from federatedml.secureprotol.encrypt_mode import EncryptModeCalculator
 from federatedml.util import consts
 
 
@@ -383,7 +384,7 @@ class HeteroDecisionTreeGuest(DecisionTree):
             en_grad_hess = self.packer.pack_and_encrypt(self.grad_and_hess)
 
         else:
-            en_grad_hess = self.encrypter.distribute_encrypt(self.grad_and_hess)
+            en_grad_hess = EncryptModeCalculator(self.encrypter).encrypt(self.grad_and_hess)
 
         LOGGER.info('sending g/h to host')
         self.transfer_inst.encrypted_grad_and_hess.remote(en_grad_hess,
@@ -210,6 +210,8 @@ class HeteroDecisionTreeHost(DecisionTree):
             self.cipher_compressor = PackedGHCompressor(mo_mode=self.mo_tree)
 
         self.grad_and_hess = self.transfer_inst.encrypted_grad_and_hess.get(idx=0)
+        if self.cipher_compressor is not None:
+            self.cipher_compressor.set_sample_num(self.grad_and_hess.count())
 
     def sync_node_positions(self, dep=-1):
         LOGGER.info("get tree node queue of depth {}".format(dep))
@@ -374,6 +376,8 @@ class HeteroDecisionTreeHost(DecisionTree):
             inst2node_idx = self.get_computing_inst2node_idx()
             node_sample_count = self.count_node_sample_num(inst2node_idx, node_map)
             LOGGER.debug('sample count is {}'.format(node_sample_count))
+            if self.cipher_compressor is not None:
+                self.cipher_compressor.renew_compress_parameter(node_sample_count)
             acc_histograms = self.get_local_histograms(dep, data, self.grad_and_hess, node_sample_count,
                                                        cur_to_split_nodes, node_map, ret='tb',
                                                        hist_sub=True)
@@ -96,6 +96,8 @@ class HeteroFastDecisionTreeHost(HeteroDecisionTreeHost):
             inst2node_idx = self.get_computing_inst2node_idx()
             node_sample_count = self.count_node_sample_num(inst2node_idx, node_map)
             LOGGER.debug('sample count is {}'.format(node_sample_count))
+            if self.cipher_compressor is not None:
+                self.cipher_compressor.renew_compress_parameter(node_sample_count)
             acc_histograms = self.get_local_histograms(dep, data, self.grad_and_hess, node_sample_count,
                                                        cur_to_split_nodes, node_map, ret='tb',
                                                        hist_sub=True)
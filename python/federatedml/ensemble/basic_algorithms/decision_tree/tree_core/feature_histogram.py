@@ -35,6 +35,7 @@ from fate_arch.session import computing_session as session
 from fate_arch.common import log
 from federatedml.feature.fate_element_type import NoneType
 from federatedml.framework.weights import Weights
+from federatedml.secureprotol.fate_paillier import PaillierEncryptedNumber, PaillierEncryptedVector
 
 LOGGER = log.getLogger()
 
@@ -42,6 +43,9 @@ LOGGER = log.getLogger()
 TENSOR = 'tensor'
 TABLE = 'tb'
 
+# samples x features cells binned at a time by the vectorized histogram, bounds its dense index matrices
+HIST_CHUNK_CELLS = 1 << 22
+
 
 class HistogramBag(object):
     """
@@ -504,6 +508,33 @@ class FeatureHistogram(object):
             data_record += 1
 
         LOGGER.debug("begin batch calculate histogram, data count is {}".format(data_record))
+
+        if data_record > 0 and FeatureHistogram._is_plaintext_g_h(grad[0], mo_dim):
+            node_histograms = FeatureHistogram._vectorized_node_histograms(data_bins, node_ids, grad, hess,
+                                                                           bin_split_points, bin_sparse_points,
+                                                                           valid_features, node_map, use_missing,
+                                                                           zero_as_missing, mo_dim=mo_dim)
+        else:
+            if data_record > 0 and isinstance(grad[0], PaillierEncryptedNumber):
+                # align exponents once per partition, so adding g/h into bins never triggers exponent alignment
+                grad = PaillierEncryptedVector.from_encrypted_numbers(grad).to_encrypted_numbers()
+                if isinstance(hess[0], PaillierEncryptedNumber):  # hess is a 0 placeholder when g/h are packed
+                    hess = PaillierEncryptedVector.from_encrypted_numbers(hess).to_encrypted_numbers()
+            node_histograms = FeatureHistogram._iterative_node_histograms(data_bins, node_ids, grad, hess,
+                                                                          bin_split_points, bin_sparse_points,
+                                                                          valid_features, node_map, use_missing,
+                                                                          zero_as_missing, mo_dim=mo_dim)
+
+        ret = FeatureHistogram._generate_histogram_key_value_list(node_histograms, node_map, bin_split_points,
+                                                                  parent_nid_map, sibling_node_id_map,
+                                                                  partition_key=partition_key)
+        return ret
+
+    @staticmethod
+    def _iterative_node_histograms(data_bins, node_ids, grad, hess, bin_split_points, bin_sparse_points,
+                                   valid_features, node_map, use_missing, zero_as_missing, mo_dim=None):
+
+        data_record = len(data_bins)
         node_num = len(node_map)
 
         missing_bin = 1 if use_missing else 0
@@ -576,10 +607,116 @@ class FeatureHistogram(object):
                         node_histograms[node_idx][fid][-1][2] += zero_opt_node_sum[node_idx][2] - \
                             zero_optim[node_idx][fid][2]
 
-        ret = FeatureHistogram._generate_histogram_key_value_list(node_histograms, node_map, bin_split_points,
-                                                                  parent_nid_map, sibling_node_id_map,
-                                                                  partition_key=partition_key)
-        return ret
+        return node_histograms
+
+    @staticmethod
+    def _is_plaintext_g_h(g, mo_dim=None):
+        # guest holds plaintext g/h, host holds ciphertexts which have to go through the iterative path
+        if mo_dim:
+            return isinstance(g, np.ndarray) and g.dtype.kind in 'iuf'
+        return isinstance(g, (int, float, np.integer, np.floating)) and not isinstance(g, bool)
+
+    @staticmethod
+    def _vectorized_node_histograms(data_bins, node_ids, grad, hess, bin_split_points, bin_sparse_points,
+                                    valid_features, node_map, use_missing, zero_as_missing, mo_dim=None):
+        """
+        plaintext version of _iterative_node_histograms, samples are turned into a dense bin matrix,
+        in which zeros not stored in sparse vectors take their sparse point(or missing bin),
+        then histograms of all nodes are accumulated by np.bincount, output format is the same.
+        Samples go through in chunks of HIST_CHUNK_CELLS cells, so memory does not grow with the partition
+        """
+        feature_num = bin_split_points.shape[0]
+        node_num = len(node_map)
+        missing_bin = 1 if use_missing else 0
+        bin_nums = np.array([bin_split_points[fid].shape[0] + missing_bin for fid in range(feature_num)],
+                            dtype=np.int64)
+        bin_offsets = np.zeros(feature_num, dtype=np.int64)
+        bin_offsets[1:] = np.cumsum(bin_nums)[:-1]
+        total_bin_num = int(bin_nums.sum())
+
+        bin_dtype = np.uint8 if bin_nums.max(initial=0) < np.iinfo(np.uint8).max else np.uint16 \
+            if bin_nums.max(initial=0) < np.iinfo(np.uint16).max else np.uint32
+        skip = np.iinfo(bin_dtype).max  # bins not counted: invalid features, or zeros if valid_features is None
+
+        # same rules as the iterative path for invalid features and the sparse point
+        is_valid = np.array([valid_features is None or valid_features[fid] is not False
+                             for fid in range(feature_num)], dtype=bool)
+        zero_bins = np.full(feature_num, skip, dtype=np.int64)
+        for fid in range(feature_num):
+            if valid_features is not None and valid_features[fid] is True:
+                zero_bins[fid] = bin_nums[fid] - 1 if use_missing and zero_as_missing else bin_sparse_points[fid]
+
+        sample_num = len(data_bins)
+        node_idx = np.array([node_map[nid] for nid in node_ids], dtype=np.int64)
+        grad, hess = np.array(grad, dtype=np.float64), np.array(hess, dtype=np.float64)
+
+        length = node_num * total_bin_num
+        hist_shape = (length, mo_dim) if mo_dim else (length,)
+        count_hist = np.zeros(length, dtype=np.int64)
+        g_hist, h_hist = np.zeros(hist_shape), np.zeros(hist_shape)
+
+        # samples are binned chunk by chunk, histograms of the chunks are summed up
+        chunk_size = max(1, HIST_CHUNK_CELLS // max(feature_num, 1))
+        for chunk_start in range(0, sample_num, chunk_size):
+            chunk_end = min(chunk_start + chunk_size, sample_num)
+            chunk_num = chunk_end - chunk_start
+            bin_matrix = np.tile(zero_bins.astype(bin_dtype), (chunk_num, 1))
+            sparse_vecs = [data_bin.features for data_bin in data_bins[chunk_start: chunk_end]]
+            row_lengths = np.fromiter((len(sparse_vec.indices) for sparse_vec in sparse_vecs), dtype=np.int64,
+                                      count=chunk_num)
+            cols = np.concatenate([sparse_vec.indices for sparse_vec in sparse_vecs]).astype(np.int64)
+            values = np.concatenate([FeatureHistogram._bin_values(sparse_vec.values, use_missing)
+                                     for sparse_vec in sparse_vecs]).astype(np.int64)
+            rows = np.repeat(np.arange(chunk_num), row_lengths)
+            values = np.where(values < 0, values + bin_nums[cols], values)
+            stored = is_valid[cols]
+            bin_matrix[rows[stored], cols[stored]] = values[stored]
+
+            counted = bin_matrix != skip
+            sample_idx = np.nonzero(counted)[0] + chunk_start
+            flat_idx = (node_idx[chunk_start: chunk_end, None] * total_bin_num + bin_offsets[None, :] +
+                        bin_matrix)[counted]
+
+            count_hist += np.bincount(flat_idx, minlength=length)
+            if mo_dim:
+                for d in range(mo_dim):
+                    g_hist[:, d] += np.bincount(flat_idx, weights=grad[sample_idx, d], minlength=length)
+                    h_hist[:, d] += np.bincount(flat_idx, weights=hess[sample_idx, d], minlength=length)
+            else:
+                g_hist += np.bincount(flat_idx, weights=grad[sample_idx], minlength=length)
+                h_hist += np.bincount(flat_idx, weights=hess[sample_idx], minlength=length)
+
+        count_hist = count_hist.reshape(node_num, total_bin_num).tolist()
+        if mo_dim:
+            g_hist = g_hist.reshape(node_num, total_bin_num, mo_dim)
+            h_hist = h_hist.reshape(node_num, total_bin_num, mo_dim)
+        else:
+            g_hist = g_hist.reshape(node_num, total_bin_num).tolist()
+            h_hist = h_hist.reshape(node_num, total_bin_num).tolist()
+
+        node_histograms = []
+        for nid in range(node_num):
+            feature_histograms = []
+            for fid in range(feature_num):
+                if not is_valid[fid]:
+                    feature_histograms.append([])
+                    continue
+                start, end = bin_offsets[fid], bin_offsets[fid] + bin_nums[fid]
+                feature_histograms.append([[g, h, c] for g, h, c in zip(g_hist[nid][start: end],
+                                                                         h_hist[nid][start: end],
+                                                                         count_hist[nid][start: end])])
+            node_histograms.append(feature_histograms)
+
+        return node_histograms
+
+    @staticmethod
+    def _bin_values(values, use_missing):
+        if values.dtype.kind != 'O':
+            return values
+        if use_missing:
+            # missing value is set as -1
+            return np.array([-1 if value == NoneType() else value for value in values.tolist()], dtype=np.int64)
+        return values.astype(np.int64)
 
     @staticmethod
     def _recombine_histograms(histograms_list: list, node_map, feature_num):
@@ -32,6 +32,22 @@ def g_h_recover_post_func(unpack_rs_list: list, precision):
         return np.array(g_list), np.array(h_list)
 
 
+def layer_compress_parameter(padding_length, capacity, sample_num, max_node_sample_num):
+    """
+    padding_length and capacity from guest are computed for g/h sums of all sample_num samples, while g/h sums of
+    a node are bounded by its own sample count: every halving of the sample count frees one bit of the top packed
+    field, 1 bit is kept in reserve for fixed-point rounding
+    """
+    if not sample_num or not max_node_sample_num or max_node_sample_num >= sample_num:
+        return padding_length, capacity
+
+    shrink_bit = max((int(sample_num) // int(max_node_sample_num)).bit_length() - 2, 0)
+    layer_padding_length = padding_length - shrink_bit
+    # padding_length * capacity never exceeds the bit length guest reserved for a ciphertext
+    layer_capacity = (padding_length * capacity) // layer_padding_length
+    return layer_padding_length, layer_capacity
+
+
 class SplitInfoPackage(NormalCipherPackage):
 
     def __init__(self, padding_length, max_capacity):
@@ -187,6 +203,25 @@ class PackedGHCompressor(object):
         if mo_mode:
             package_class = SplitInfoPackage2
         self.compressor = CipherCompressorHost(package_class=package_class, sync_para=sync_para)
+        self.sample_num = None
+        self._padding_length, self._capacity = None, None
+
+    def set_sample_num(self, sample_num):
+        # compress parameter from guest is computed for g/h sums of sample_num samples
+        self.sample_num = sample_num
+        self._padding_length, self._capacity = self.compressor.get_compress_parameter()
+
+    def renew_compress_parameter(self, node_sample_count):
+        """
+        recompute packing capacity of a tree layer from sample counts of nodes to split, deep layers with small
+        nodes pack more split infos into one ciphertext
+        """
+        max_node_sample_num = int(np.max(node_sample_count)) if len(node_sample_count) > 0 else 0
+        padding_length, capacity = layer_compress_parameter(self._padding_length, self._capacity,
+                                                            self.sample_num, max_node_sample_num)
+        self.compressor.set_compress_parameter(padding_length, capacity)
+        LOGGER.debug('layer compress parameter is {} {}, max node sample num is {}'.format(padding_length, capacity,
+                                                                                           max_node_sample_num))
 
     def compress_split_info(self, split_info_list, g_h_sum_info):
         split_info_list.append(g_h_sum_info)  # append to end
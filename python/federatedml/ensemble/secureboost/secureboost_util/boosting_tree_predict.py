@@ -7,10 +7,152 @@ from federatedml.secureprotol import PaillierEncrypt
 from federatedml.ensemble.basic_algorithms import HeteroDecisionTreeGuest, HeteroDecisionTreeHost, \
     HeteroFastDecisionTreeGuest, HeteroFastDecisionTreeHost
 from federatedml.ensemble.basic_algorithms.decision_tree.tree_core.decision_tree import DecisionTree, Node
+from federatedml.feature.fate_element_type import NoneType
 from federatedml.util import LOGGER
 from federatedml.transfer_variable.transfer_class.hetero_secure_boosting_predict_transfer_variable import \
     HeteroSecureBoostTransferVariable
 
+"""
+Compiled tree traversal
+"""
+
+
+class CompiledTrees(object):
+    """
+    Trees of one party compiled into flat node arrays, node nid of tree t is stored at offsets[t] + nid.
+    Samples are traversed as a batch: every step moves all (sample, tree) pairs standing on a local split node
+    one layer down, until they reach a leaf or a split node of another party.
+    """
+
+    def __init__(self, trees: List[DecisionTree]):
+
+        self.tree_num = len(trees)
+        self.offsets = np.zeros(self.tree_num, dtype=np.int64)
+        feature, threshold, missing_left, left, right, go_on, local_leaf = [], [], [], [], [], [], []
+
+        offset = 0
+        for t_idx, tree in enumerate(trees):
+            self.offsets[t_idx] = offset
+            use_mask = tree.split_maskdict is not None and tree.missing_dir_maskdict is not None
+            for node in tree.tree_node:
+                is_local = node.sitename == tree.sitename
+                is_split = is_local and not node.is_leaf
+                fid, bid, missing_dir = 0, 0, 1
+                if is_split:
+                    fid, bid, missing_dir = node.fid, node.bid, node.missing_dir
+                    if use_mask:
+                        bid = tree.decode("feature_val", node.bid, node.id, split_maskdict=tree.split_maskdict)
+                        missing_dir = tree.decode("missing_dir", node.missing_dir, node.id,
+                                                  missing_dir_maskdict=tree.missing_dir_maskdict)
+                feature.append(fid)
+                threshold.append(bid)
+                missing_left.append(missing_dir == -1)
+                left.append(offset + node.left_nodeid if is_split else -1)
+                right.append(offset + node.right_nodeid if is_split else -1)
+                go_on.append(is_split)
+                local_leaf.append(is_local and node.is_leaf)
+            offset += len(tree.tree_node)
+
+        # split nodes refer to columns of compact feature rows, which hold only the features used by the trees
+        feature = np.array(feature, dtype=np.int64)
+        self.go_on = np.array(go_on, dtype=bool)
+        self.used_fids = np.unique(feature[self.go_on])
+        self.feature = np.where(self.go_on, np.searchsorted(self.used_fids, feature), 0)
+        self.threshold = np.array(threshold, dtype=np.float64) + consts.FLOAT_ZERO
+        self.missing_left = np.array(missing_left, dtype=bool)
+        self.left = np.array(left, dtype=np.int64)
+        self.right = np.array(right, dtype=np.int64)
+        self.local_leaf = np.array(local_leaf, dtype=bool)
+
+        # trees of a boosting model share missing value settings
+        self.zero_as_missing = bool(trees) and trees[0].use_missing and trees[0].zero_as_missing
+
+    def to_feature_row(self, inst):
+        """
+        dense float row of the features used by compiled trees, in the order of used_fids, missing values are nan
+        """
+        row = np.full(len(self.used_fids), np.nan if self.zero_as_missing else 0, dtype=np.float64)
+        indices, values = inst.features.indices, inst.features.values
+        cols = np.searchsorted(self.used_fids, indices)
+        used = cols < len(self.used_fids)
+        used[used] = self.used_fids[cols[used]] == indices[used]
+        cols, values = cols[used], values[used]
+        if values.dtype.kind == 'O':
+            values = np.array([np.nan if isinstance(val, NoneType) else val for val in values.tolist()],
+                              dtype=np.float64)
+        row[cols] = values
+        return row
+
+    def traverse(self, feature_rows, node_pos):
+        """
+        feature_rows: compact rows of a sample batch, shape (sample_num, len(used_fids))
+        node_pos: node ids of the batch, shape (sample_num, tree_num), trees of -1 are skipped
+        return node ids where samples stop, and a mask of samples reaching local leaves
+        """
+        active = node_pos != -1
+        pos = np.where(active, node_pos + self.offsets, 0)
+        moving = active & self.go_on[pos]
+        while moving.any():
+            rows = np.nonzero(moving)[0]
+            cur = pos[moving]
+            x = feature_rows[rows, self.feature[cur]]
+            go_left = np.where(np.isnan(x), self.missing_left[cur], x <= self.threshold[cur])
+            pos[moving] = np.where(go_left, self.left[cur], self.right[cur])
+            moving[moving] = self.go_on[pos[moving]]
+
+        reach_leaf = active & self.local_leaf[pos]
+        return np.where(active, pos - self.offsets, node_pos), reach_leaf
+
+
+def _collect_partition(kv_iterator):
+    keys, node_pos_list, feature_rows = [], [], []
+    for key, (node_pos, feature_row) in kv_iterator:
+        keys.append(key)
+        node_pos_list.append(node_pos)
+        feature_rows.append(feature_row)
+    return keys, node_pos_list, feature_rows
+
+
+def guest_traverse_partition(kv_iterator, compiled_trees: CompiledTrees):
+    keys, node_pos_list, feature_rows = _collect_partition(kv_iterator)
+    if len(keys) == 0:
+        return []
+
+    dtype = node_pos_list[0]['node_pos'].dtype
+    node_pos = np.stack([v['node_pos'] for v in node_pos_list]).astype(np.int64)
+    new_pos, reach_leaf = compiled_trees.traverse(np.stack(feature_rows), node_pos)
+    new_pos = new_pos.astype(dtype)
+
+    rs = []
+    for idx, (key, v) in enumerate(zip(keys, node_pos_list)):
+        v['node_pos'] = new_pos[idx]
+        v['reach_leaf_node'] = v['reach_leaf_node'] | reach_leaf[idx]
+        rs.append((key, v))
+    return rs
+
+
+def host_traverse_partition(kv_iterator, compiled_trees: CompiledTrees):
+    keys, node_pos_list, feature_rows = _collect_partition(kv_iterator)
+    if len(keys) == 0:
+        return []
+
+    dtype = node_pos_list[0]['node_pos'].dtype
+    node_pos = np.stack([v['node_pos'] for v in node_pos_list]).astype(np.int64)
+    new_pos, _ = compiled_trees.traverse(np.stack(feature_rows), node_pos)
+    new_pos = new_pos.astype(dtype)
+
+    rs = []
+    for idx, (key, v) in enumerate(zip(keys, node_pos_list)):
+        v['node_pos'] = new_pos[idx]
+        rs.append((key, v))
+    return rs
+
+
+def compiled_traverse(node_pos_tb, feature_row_tb, traverse_partition_func):
+    return node_pos_tb.join(feature_row_tb, lambda node_pos, feature_row: (node_pos, feature_row)) \
+        .mapPartitions(traverse_partition_func, use_previous_behavior=False, preserves_partitioning=True)
+
+
 """
 Hetero guest predict utils
 """
@@ -177,13 +319,15 @@ def sbt_guest_predict(data_inst, transfer_var: HeteroSecureBoostTransferVariable
     generate_func = functools.partial(generate_leaf_pos_dict, tree_num=tree_num, np_int_type=dtype)
     node_pos_tb = data_inst.mapValues(generate_func)  # record node pos
     final_leaf_pos = data_inst.mapValues(lambda x: np.zeros(tree_num, dtype=dtype) + np.nan)  # record final leaf pos
-    traverse_func = functools.partial(guest_traverse_trees, trees=trees)
+    compiled_trees = CompiledTrees(trees)
+    feature_row_tb = data_inst.mapValues(compiled_trees.to_feature_row)
+    traverse_func = functools.partial(guest_traverse_partition, compiled_trees=compiled_trees)
     comm_round = 0
 
     while True:
 
         # LOGGER.info('cur predict round is {}'.format(comm_round))
-        node_pos_tb = node_pos_tb.join(data_inst, traverse_func)
+        node_pos_tb = compiled_traverse(node_pos_tb, feature_row_tb, traverse_func)
         node_pos_tb, final_leaf_pos = save_leaf_pos_and_mask_leaf_pos(node_pos_tb, final_leaf_pos)
 
         # remove sample that reaches leaves of all trees
@@ -293,7 +437,9 @@ Hetero host predict function
 def sbt_host_predict(data_inst, transfer_var: HeteroSecureBoostTransferVariable, trees: List[HeteroDecisionTreeHost]):
     comm_round = 0
 
-    traverse_func = functools.partial(host_traverse_trees, trees=trees)
+    compiled_trees = CompiledTrees(trees)
+    feature_row_tb = data_inst.mapValues(compiled_trees.to_feature_row)
+    traverse_func = functools.partial(host_traverse_partition, compiled_trees=compiled_trees)
 
     while True:
 
@@ -304,7 +450,7 @@ def sbt_host_predict(data_inst, transfer_var: HeteroSecureBoostTransferVariable,
             break
 
         guest_node_pos = transfer_var.guest_predict_data.get(idx=0, suffix=(comm_round,))
-        host_node_pos = data_inst.join(guest_node_pos, traverse_func)
+        host_node_pos = compiled_traverse(guest_node_pos, feature_row_tb, traverse_func)
         if guest_node_pos.count() != host_node_pos.count():
             raise ValueError('sample count mismatch: guest table {}, host table {}'.format(guest_node_pos.count(),
                                                                                            host_node_pos.count()))
@@ -0,0 +1,175 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import copy
+import functools
+import random
+import unittest
+
+import numpy as np
+
+from fate_arch.session import computing_session as session
+from federatedml.ensemble import HeteroDecisionTreeGuest, HeteroDecisionTreeHost, Node
+from federatedml.ensemble.secureboost.secureboost_util.boosting_tree_predict import CompiledTrees, \
+    guest_traverse_trees, host_traverse_trees, guest_traverse_partition, host_traverse_partition, compiled_traverse
+from federatedml.feature.fate_element_type import NoneType
+from federatedml.feature.instance import Instance
+from federatedml.feature.sparse_vector import SparseVector
+from federatedml.param.boosting_param import DecisionTreeParam
+
+GUEST_SITE, HOST_SITE = 'guest:9999', 'host:10000'
+
+
+def generate_tree_pair(depth, feature_num, use_missing, zero_as_missing):
+    """
+    a full tree of given depth split by guest and host, guest holds leaves, split values are kept in mask dicts
+    """
+    tree_param = DecisionTreeParam(use_missing=use_missing, zero_as_missing=zero_as_missing)
+    guest_tree, host_tree = HeteroDecisionTreeGuest(tree_param), HeteroDecisionTreeHost(tree_param)
+    guest_tree.sitename, host_tree.sitename = GUEST_SITE, HOST_SITE
+    node_num = 2 ** (depth + 1) - 1
+    for nid in range(node_num):
+        if nid >= 2 ** depth - 1:
+            node = Node(id=nid, sitename=GUEST_SITE, weight=random.random(), is_leaf=True)
+            guest_tree.tree_node.append(node)
+            host_tree.tree_node.append(copy.deepcopy(node))
+            continue
+
+        sitename = random.choice([GUEST_SITE, HOST_SITE])
+        node = Node(id=nid, sitename=sitename, fid=random.randint(0, feature_num - 1), bid=-1,
+                    left_nodeid=2 * nid + 1, right_nodeid=2 * nid + 2, missing_dir=-1)
+        owner = guest_tree if sitename == GUEST_SITE else host_tree
+        owner.split_maskdict[nid] = random.randint(-2, 2) + random.choice([0, 0.5])
+        owner.missing_dir_maskdict[nid] = random.choice([-1, 1])
+        guest_tree.tree_node.append(node)
+        host_tree.tree_node.append(copy.deepcopy(node))
+
+    return guest_tree, host_tree
+
+
+def generate_instances(num, feature_num):
+    insts = []
+    for i in range(num):
+        indices, data = [], []
+        for fid in range(feature_num):
+            x = random.randint(-3, 4)
+            if x == 4:
+                indices.append(fid)
+                data.append(NoneType())
+            elif x != 0 or random.random() < 0.2:  # some explicit zeros
+                indices.append(fid)
+                data.append(x + random.choice([0, 0.5]))
+        insts.append(Instance(features=SparseVector(indices, data, shape=feature_num)))
+    return insts
+
+
+def generate_node_pos(insts, guest_trees):
+    node_pos = []
+    for _ in insts:
+        pos = np.array([random.choice([-1] + list(range(len(tree.tree_node)))) for tree in guest_trees],
+                       dtype=np.int8)
+        node_pos.append({'node_pos': pos, 'reach_leaf_node': pos == -1})
+    return node_pos
+
+
+class TestCompiledTrees(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(42)
+        self.feature_num = 8
+        self.insts = generate_instances(300, self.feature_num)
+
+    def _check(self, use_missing, zero_as_missing):
+        tree_pairs = [generate_tree_pair(random.randint(1, 5), self.feature_num, use_missing, zero_as_missing)
+                      for _ in range(20)]
+        guest_trees, host_trees = [p[0] for p in tree_pairs], [p[1] for p in tree_pairs]
+        guest_compiled, host_compiled = CompiledTrees(guest_trees), CompiledTrees(host_trees)
+        node_pos = generate_node_pos(self.insts, guest_trees)
+
+        guest_expected = [guest_traverse_trees(copy.deepcopy(p), inst, guest_trees)
+                          for p, inst in zip(node_pos, self.insts)]
+        guest_rs = guest_traverse_partition(
+            [(i, (copy.deepcopy(p), guest_compiled.to_feature_row(inst)))
+             for i, (p, inst) in enumerate(zip(node_pos, self.insts))], guest_compiled)
+
+        host_expected = [host_traverse_trees(inst, copy.deepcopy(p), host_trees)
+                         for p, inst in zip(node_pos, self.insts)]
+        host_rs = host_traverse_partition(
+            [(i, (copy.deepcopy(p), host_compiled.to_feature_row(inst)))
+             for i, (p, inst) in enumerate(zip(node_pos, self.insts))], host_compiled)
+
+        for expected, (_, rs) in zip(guest_expected, guest_rs):
+            self.assertEqual(rs['node_pos'].dtype, np.int8)
+            np.testing.assert_array_equal(rs['node_pos'], expected['node_pos'])
+            np.testing.assert_array_equal(rs['reach_leaf_node'], expected['reach_leaf_node'])
+        for expected, (_, rs) in zip(host_expected, host_rs):
+            np.testing.assert_array_equal(rs['node_pos'], expected['node_pos'])
+
+    def test_same_as_iterative_traverse(self):
+        for use_missing, zero_as_missing in [(False, False), (True, False), (True, True)]:
+            self._check(use_missing, zero_as_missing)
+
+    def test_compact_feature_row(self):
+        # wide sparse features of which the trees only use a few
+        feature_num = 100000
+        fid_map = np.array(random.sample(range(feature_num), self.feature_num))
+        insts = [Instance(features=SparseVector(fid_map[inst.features.indices].tolist(),
+                                                inst.features.values.tolist(), shape=feature_num))
+                 for inst in self.insts]
+        guest_trees = [generate_tree_pair(4, self.feature_num, True, False)[0] for _ in range(5)]
+        for tree in guest_trees:
+            for node in tree.tree_node:
+                if not node.is_leaf:
+                    node.fid = int(fid_map[node.fid])
+
+        compiled_trees = CompiledTrees(guest_trees)
+        feature_rows = [compiled_trees.to_feature_row(inst) for inst in insts]
+        self.assertTrue(all(len(row) == len(compiled_trees.used_fids) <= self.feature_num for row in feature_rows))
+
+        node_pos = generate_node_pos(insts, guest_trees)
+        rs = guest_traverse_partition(
+            [(i, (copy.deepcopy(p), row)) for i, (p, row) in enumerate(zip(node_pos, feature_rows))], compiled_trees)
+        for (_, v), p, inst in zip(rs, node_pos, insts):
+            expected = guest_traverse_trees(copy.deepcopy(p), inst, guest_trees)
+            np.testing.assert_array_equal(v['node_pos'], expected['node_pos'])
+            np.testing.assert_array_equal(v['reach_leaf_node'], expected['reach_leaf_node'])
+
+    def test_empty_partition(self):
+        guest_tree, _ = generate_tree_pair(2, self.feature_num, False, False)
+        self.assertEqual(guest_traverse_partition([], CompiledTrees([guest_tree])), [])
+
+    def test_compiled_traverse_table(self):
+        session.init("test_compiled_trees")
+        try:
+            guest_trees = [generate_tree_pair(4, self.feature_num, True, False)[0] for _ in range(5)]
+            compiled_trees = CompiledTrees(guest_trees)
+            node_pos = [{'node_pos': np.zeros(5, dtype=np.int8), 'reach_leaf_node': np.zeros(5, dtype=bool)}
+                        for _ in self.insts]
+            data_inst = session.parallelize(self.insts, include_key=False, partition=4)
+            node_pos_tb = session.parallelize(node_pos, include_key=False, partition=4)
+            feature_row_tb = data_inst.mapValues(compiled_trees.to_feature_row)
+            traverse_func = functools.partial(guest_traverse_partition, compiled_trees=compiled_trees)
+            rs = dict(compiled_traverse(node_pos_tb, feature_row_tb, traverse_func).collect())
+            self.assertEqual(len(rs), len(self.insts))
+            for idx, inst in enumerate(self.insts):
+                expected = guest_traverse_trees(copy.deepcopy(node_pos[idx]), inst, guest_trees)
+                np.testing.assert_array_equal(rs[idx]['node_pos'], expected['node_pos'])
+        finally:
+            session.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
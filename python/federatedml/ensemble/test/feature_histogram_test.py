@@ -15,11 +15,16 @@
 #
 
 import unittest
+from unittest import mock
 
 from fate_arch.session import computing_session as session
 from federatedml.ensemble import FeatureHistogram
+from federatedml.ensemble.basic_algorithms.decision_tree.tree_core import feature_histogram
+from federatedml.feature.fate_element_type import NoneType
 from federatedml.feature.instance import Instance
 from federatedml.feature.sparse_vector import SparseVector
+from federatedml.secureprotol.encrypt import PaillierEncrypt
+from federatedml.secureprotol.fate_paillier import PaillierKeypair
 from federatedml.util import consts
 import copy
 import numpy as np
@@ -94,6 +99,106 @@ class TestFeatureHistogram(unittest.TestCase):
                     for r in range(len(his2[i][j][k])):
                         self.assertTrue(np.fabs(his2[i][j][k][r] - histograms[i][j][k][r]) < consts.FLOAT_ZERO)
 
+    def _assert_histograms_equal(self, histograms, expected):
+        self.assertEqual(len(histograms), len(expected))
+        for node_hist, expected_node_hist in zip(histograms, expected):
+            for feature_hist, expected_feature_hist in zip(node_hist, expected_node_hist):
+                self.assertEqual(len(feature_hist), len(expected_feature_hist))
+                for bin_hist, expected_bin_hist in zip(feature_hist, expected_feature_hist):
+                    np.testing.assert_allclose(bin_hist[0], expected_bin_hist[0], atol=consts.FLOAT_ZERO)
+                    np.testing.assert_allclose(bin_hist[1], expected_bin_hist[1], atol=consts.FLOAT_ZERO)
+                    self.assertEqual(bin_hist[2], expected_bin_hist[2])
+
+    def test_vectorized_histogram(self):
+        data_bins, node_ids, grad, hess = [], [], [], []
+        for i in range(500):
+            indices, data = [], []
+            for j in range(10):
+                x = random.randint(0, 6)
+                if x == 6:
+                    data.append(NoneType())
+                    indices.append(j)
+                elif x != 0:
+                    data.append(x)
+                    indices.append(j)
+            data_bins.append(Instance(features=SparseVector(indices, data, shape=10)))
+            node_ids.append(random.randint(0, 3))
+            grad.append(random.random())
+            hess.append(random.random())
+
+        valid_features = {fid: fid != 3 for fid in range(10)}
+        bin_sparse = [random.randint(0, 5) for _ in range(10)]
+        for valid, use_missing, zero_as_missing in [(None, False, False), (valid_features, False, False),
+                                                    (valid_features, True, False), (valid_features, True, True)]:
+            if not use_missing:
+                bins = [inst.features.get_sparse_vector() for inst in data_bins]
+                inputs = [Instance(features=SparseVector(list(b.keys()),
+                                                         [0 if v == NoneType() else v for v in b.values()], 10))
+                          for b in bins]
+            else:
+                inputs = data_bins
+            args = (inputs, node_ids, grad, hess, self.bin_split_points, bin_sparse, valid, self.node_map,
+                    use_missing, zero_as_missing)
+            self.assertTrue(FeatureHistogram._is_plaintext_g_h(grad[0]))
+            self._assert_histograms_equal(FeatureHistogram._vectorized_node_histograms(*args),
+                                          FeatureHistogram._iterative_node_histograms(*args))
+
+        mo_grad = [np.random.random(3) for _ in grad]
+        mo_hess = [np.random.random(3) for _ in hess]
+        args = (data_bins, node_ids, mo_grad, mo_hess, self.bin_split_points, bin_sparse, valid_features,
+                self.node_map, True, False)
+        self.assertTrue(FeatureHistogram._is_plaintext_g_h(mo_grad[0], mo_dim=3))
+        self._assert_histograms_equal(FeatureHistogram._vectorized_node_histograms(*args, mo_dim=3),
+                                      FeatureHistogram._iterative_node_histograms(*args, mo_dim=3))
+
+    def test_vectorized_histogram_chunks(self):
+        # 3 samples of 10 features per chunk, the last chunk is partial
+        with mock.patch.object(feature_histogram, "HIST_CHUNK_CELLS", 37):
+            self.test_vectorized_histogram()
+
+    def test_encrypted_histogram(self):
+        public_key, private_key = PaillierKeypair.generate_keypair()
+        data = [(i, ((inst, (1, node_id)), g_h))
+                for i, ((inst, (_, node_id)), g_h) in enumerate(zip(self.data_insts[:100],
+                                                                    self.grad_and_hess_list[:100]))]
+        encrypted_data = [(k, (v[0], (public_key.encrypt(v[1][0] * 10 ** (k % 5)), public_key.encrypt(v[1][1]))))
+                          for k, v in data]
+        plain_data = [(k, (v[0], (v[1][0] * 10 ** (k % 5), v[1][1]))) for k, v in data]
+        valid_features = {fid: True for fid in range(10)}
+        kwargs = dict(bin_split_points=self.bin_split_points, bin_sparse_points=self.bin_sparse,
+                      valid_features=valid_features, node_map=self.node_map)
+        expected = FeatureHistogram._batch_calculate_histogram(plain_data, **kwargs)
+        encrypted = FeatureHistogram._batch_calculate_histogram(encrypted_data, **kwargs)
+        for (key, (fid, hist)), (en_key, (en_fid, en_hist)) in zip(expected, encrypted):
+            self.assertEqual((key, fid), (en_key, en_fid))
+            for bin_hist, en_bin_hist in zip(hist, en_hist):
+                self.assertEqual(en_bin_hist[2], bin_hist[2])
+                if en_bin_hist[2] == 0:  # empty bins keep the initial 0
+                    continue
+                self.assertAlmostEqual(private_key.decrypt(en_bin_hist[0]), bin_hist[0])
+                self.assertAlmostEqual(private_key.decrypt(en_bin_hist[1]), bin_hist[1])
+
+    def test_packed_histogram(self):
+        # packed g/h: g carries raw encrypted integers, h is a 0 placeholder
+        encrypter = PaillierEncrypt()
+        encrypter.generate_key(1024)
+        data = [(i, ((inst, (1, node_id)), i + 1))
+                for i, ((inst, (_, node_id)), _) in enumerate(zip(self.data_insts[:100], self.grad_and_hess_list))]
+        packed_data = [(k, (v[0], (encrypter.raw_encrypt(v[1]), 0))) for k, v in data]
+        plain_data = [(k, (v[0], (v[1], 0))) for k, v in data]
+        valid_features = {fid: True for fid in range(10)}
+        kwargs = dict(bin_split_points=self.bin_split_points, bin_sparse_points=self.bin_sparse,
+                      valid_features=valid_features, node_map=self.node_map)
+        expected = FeatureHistogram._batch_calculate_histogram(plain_data, **kwargs)
+        packed = FeatureHistogram._batch_calculate_histogram(packed_data, **kwargs)
+        for (key, (fid, hist)), (en_key, (en_fid, en_hist)) in zip(expected, packed):
+            self.assertEqual((key, fid), (en_key, en_fid))
+            for bin_hist, en_bin_hist in zip(hist, en_hist):
+                self.assertEqual(en_bin_hist[1:], bin_hist[1:])
+                if en_bin_hist[2] == 0:
+                    continue
+                self.assertEqual(encrypter.raw_decrypt(en_bin_hist[0]), bin_hist[0])
+
     def test_aggregate_histogram(self):
 
         fake_fid = 114
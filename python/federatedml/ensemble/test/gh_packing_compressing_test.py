@@ -281,6 +281,39 @@ class TestFeatureHistogram(unittest.TestCase):
             self.assertTrue(truncate(s.sum_hess) == truncate(h_sum_))
         print('check passed')
 
+    def test_layer_compress_parameter(self):
+
+        # g/h sums of small nodes are packed more densely, and still unpack correctly
+        node_sample_num = self.max_sample_num // 16
+        compressor = PackedGHCompressor(sync_para=False)
+        compressor.compressor.set_compress_parameter(*self.p_packer.packer.cipher_compress_suggest())
+        compressor.set_sample_num(self.max_sample_num)
+        compressor.renew_compress_parameter(np.array([node_sample_num, node_sample_num // 2]))
+        padding_length, capacity = compressor.compressor.get_compress_parameter()
+        base_padding_length, base_capacity = self.p_packer.packer.cipher_compress_suggest()
+        self.assertEqual(padding_length, base_padding_length - 3)
+        self.assertGreaterEqual(capacity, base_capacity)
+        self.assertLessEqual(padding_length * capacity, base_padding_length * base_capacity)
+
+        sp_list, g_sum_list, h_sum_list = [], [], []
+        for i in range(self.split_info_test_num):
+            g_sum, h_sum, en_sum, _, _, sample_num = make_random_sum(self.p_collected_gh, self.g, self.h,
+                                                                     self.p_en_g_l, self.p_en_h_l, node_sample_num)
+            sp_list.append(SplitInfo(sum_grad=en_sum, sum_hess=0, sample_count=sample_num))
+            g_sum_list.append(g_sum)
+            h_sum_list.append(h_sum)
+
+        packages = compressor.compress_split_info(sp_list[:-1], sp_list[-1])
+        unpack_rs = self.p_packer.decompress_and_unpack(packages)
+        self.assertEqual(len(unpack_rs), self.split_info_test_num)
+        for s, g, h in zip(unpack_rs, g_sum_list, h_sum_list):
+            self.assertAlmostEqual(s.sum_grad, g, places=6)
+            self.assertAlmostEqual(s.sum_hess, h, places=6)
+
+        # no shrinking for nodes holding most samples
+        compressor.renew_compress_parameter(np.array([self.max_sample_num // 2 + 1]))
+        self.assertEqual(compressor.compressor.get_compress_parameter(), (base_padding_length, base_capacity))
+
     def test_regression_gh_packing(self):
 
         # Paillier
@@ -14,6 +14,7 @@
 #  limitations under the License.
 #
 from collections import defaultdict
+import functools
 import math
 from federatedml.util import LOGGER
 from federatedml.model_base import Metric, MetricMeta
@@ -21,11 +22,34 @@ from federatedml.param import EvaluateParam
 from federatedml.util import consts
 from federatedml.model_base import ModelBase
 from federatedml.evaluation.metric_interface import MetricInterface
+from federatedml.evaluation.metrics.classification_metric import ScoreRuns
 from federatedml.statistic.data_overview import predict_detail_str_to_dict
 
 import numpy as np
 
 
+def _partition_score_runs(kv_iterator, pos_label):
+    """
+    score runs of a partition for each data mode
+    """
+    mode_labels, mode_scores = defaultdict(list), defaultdict(list)
+    for _, inst in kv_iterator:
+        # label, predict_type, predict_score, predict_detail, type
+        label, _, pred_score, _, mode = inst.features
+        mode_labels[mode].append(label == pos_label)
+        mode_scores[mode].append(pred_score)
+
+    return {mode: ScoreRuns.from_labels_and_scores(mode_labels[mode], mode_scores[mode], pos_label=True)
+            for mode in mode_labels}
+
+
+def _merge_mode_score_runs(runs_a, runs_b):
+    merged = dict(runs_a)
+    for mode, runs in runs_b.items():
+        merged[mode] = ScoreRuns.merge([merged[mode], runs]) if mode in merged else runs
+    return merged
+
+
 class Evaluation(ModelBase):
 
     def __init__(self):
@@ -108,6 +132,9 @@ class Evaluation(ModelBase):
         extract labels and predict results from data in classification/regression type format
         """
 
+        if isinstance(data, ScoreRuns):
+            return data, None
+
         labels = []
         pred_scores = []
         pred_labels = []
@@ -204,12 +231,13 @@ class Evaluation(ModelBase):
                     eval_result[eval_metric].append(res)
 
             elif eval_metric == consts.PSI:
+                psi_labels, psi_scores = labels.expand() if isinstance(labels, ScoreRuns) else (labels, pred_results)
                 if mode == 'train':
-                    self.psi_train_scores = pred_results
-                    self.psi_train_labels = labels
+                    self.psi_train_scores = psi_scores
+                    self.psi_train_labels = psi_labels
                 elif mode == 'validate':
-                    self.psi_validate_scores = pred_results
-                    self.psi_validate_labels = labels
+                    self.psi_validate_scores = psi_scores
+                    self.psi_validate_labels = psi_labels
 
                 if self.psi_train_scores is not None and self.psi_validate_scores is not None:
                     res = self.metric_interface.psi(
@@ -345,6 +373,11 @@ class Evaluation(ModelBase):
                         'please check the input of the Evaluation Module, result of '
                         'cross validation is not supported.'.format(sample))
 
+    def binary_score_runs(self, eval_data):
+        pos_label = self.pos_label if self.pos_label else 1
+        mode_score_runs = eval_data.applyPartitions(functools.partial(_partition_score_runs, pos_label=pos_label))
+        return mode_score_runs.reduce(_merge_mode_score_runs) or {}
+
     def fit(self, data, return_result=False):
 
         self.check_data(data)
@@ -358,6 +391,14 @@ class Evaluation(ModelBase):
                     'data with {} is None, skip metric computation'.format(key))
                 continue
 
+            if self.eval_type == consts.BINARY:
+                # binary metrics only need runs of scores, build them by partitions instead of collecting data
+                mode_score_runs = self.binary_score_runs(eval_data)
+                for mode in sorted(mode_score_runs):
+                    eval_result = self.evaluate_metrics(mode, mode_score_runs[mode])
+                    self.eval_results[key].append(eval_result)
+                continue
+
             collected_data = list(eval_data.collect())
             if len(collected_data) == 0:
                 continue
@@ -17,13 +17,23 @@ class MetricInterface(object):
         self.pos_label = pos_label
         self.eval_type = eval_type
 
+    @staticmethod
+    def __to_weighted_samples(labels, pred_scores):
+        # runs of scores become one positive and one negative sample per run, weighted by counts
+        if isinstance(labels, classification_metric.ScoreRuns):
+            runs = labels
+            return np.r_[np.ones(len(runs.scores)), np.zeros(len(runs.scores))], \
+                np.r_[runs.scores, runs.scores], np.r_[runs.pos_counts, runs.neg_counts]
+        return labels, pred_scores, None
+
     def auc(self, labels, pred_scores):
         """
         Compute AUC for binary classification.
 
         Parameters
         ----------
-        labels: value list. The labels of data set.
+        labels: value list. The labels of data set. Or ScoreRuns of labels and predict scores, binary metrics
+                accept ScoreRuns in place of labels, and pred_scores is ignored then.
         pred_scores: value list. The predict results of model. It should be corresponding to labels each data.
 
         Returns
@@ -31,11 +41,12 @@ class MetricInterface(object):
         float
             The AUC
         """
+        labels, pred_scores, sample_weight = self.__to_weighted_samples(labels, pred_scores)
         if self.eval_type == consts.BINARY:
-            return roc_auc_score(labels, pred_scores)
+            return roc_auc_score(labels, pred_scores, sample_weight=sample_weight)
         elif self.eval_type == consts.ONE_VS_REST:
             try:
-                score = roc_auc_score(labels, pred_scores)
+                score = roc_auc_score(labels, pred_scores, sample_weight=sample_weight)
             except BaseException:
                 score = 0  # in case all labels are 0 or 1
                 logging.warning("all true labels are 0/1 when running ovr AUC")
@@ -152,8 +163,9 @@ class MetricInterface(object):
 
     def roc(self, labels, pred_scores):
         if self.eval_type == consts.BINARY:
+            labels, pred_scores, sample_weight = self.__to_weighted_samples(labels, pred_scores)
             fpr, tpr, thresholds = roc_curve(
-                np.array(labels), np.array(pred_scores), drop_intermediate=1)
+                np.array(labels), np.array(pred_scores), sample_weight=sample_weight, drop_intermediate=1)
             fpr, tpr, thresholds = list(map(float, fpr)), list(
                 map(float, tpr)), list(map(float, thresholds))
 
@@ -347,14 +359,11 @@ class MetricInterface(object):
 
         if self.eval_type == consts.BINARY:
 
-            sorted_labels, sorted_scores = classification_metric.sort_score_and_label(
-                labels, pred_scores)
+            score_runs = classification_metric.to_score_runs(labels, pred_scores)
             _, cuts = classification_metric.ThresholdCutter.cut_by_step(
-                sorted_scores, steps=0.01)
+                score_runs, steps=0.01)
             fixed_interval_threshold = classification_metric.ThresholdCutter.fixed_interval_threshold()
-            confusion_mat = classification_metric.ConfusionMatrix.compute(
-                sorted_labels, sorted_scores, fixed_interval_threshold, ret=[
-                    'tp', 'fp', 'fn', 'tn'])
+            confusion_mat = score_runs.confusion_mat(fixed_interval_threshold, ret=['tp', 'fp', 'fn', 'tn'])
 
             confusion_mat['tp'] = self.__to_int_list(confusion_mat['tp'])
             confusion_mat['fp'] = self.__to_int_list(confusion_mat['fp'])
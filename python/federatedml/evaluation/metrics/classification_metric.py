@@ -29,6 +29,93 @@ def sort_score_and_label(labels: np.ndarray, pred_scores: np.ndarray):
     return sorted_labels, sorted_scores
 
 
+class ScoreRuns(object):
+    """
+    Binary labels and predict scores summarized as runs of equal scores: unique scores in descending order, with
+    the number of positive and negative samples of each score. Runs of table partitions can be built separately
+    and merged, threshold based metrics are computed from cumulative counts of runs.
+    """
+
+    def __init__(self, scores: np.ndarray, pos_counts: np.ndarray, neg_counts: np.ndarray):
+        self.scores = scores
+        self.pos_counts = pos_counts
+        self.neg_counts = neg_counts
+        self.cum_pos = np.concatenate([[0], np.cumsum(pos_counts)])
+        self.cum_neg = np.concatenate([[0], np.cumsum(neg_counts)])
+
+    @classmethod
+    def from_labels_and_scores(cls, labels, pred_scores, pos_label=1):
+        labels = np.asarray(labels)
+        unique_scores, inverse = np.unique(np.asarray(pred_scores, dtype=np.float64), return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(unique_scores))
+        pos_counts = np.bincount(inverse[labels == pos_label], minlength=len(unique_scores))
+        return cls(np.flip(unique_scores), np.flip(pos_counts), np.flip(counts - pos_counts))
+
+    @classmethod
+    def merge(cls, runs_list):
+        unique_scores, inverse = np.unique(np.concatenate([runs.scores for runs in runs_list]), return_inverse=True)
+        pos_counts = np.bincount(inverse, weights=np.concatenate([runs.pos_counts for runs in runs_list]),
+                                 minlength=len(unique_scores)).astype(np.int64)
+        neg_counts = np.bincount(inverse, weights=np.concatenate([runs.neg_counts for runs in runs_list]),
+                                 minlength=len(unique_scores)).astype(np.int64)
+        return cls(np.flip(unique_scores), np.flip(pos_counts), np.flip(neg_counts))
+
+    @property
+    def pos_num(self):
+        return int(self.cum_pos[-1])
+
+    @property
+    def neg_num(self):
+        return int(self.cum_neg[-1])
+
+    def __len__(self):
+        return self.pos_num + self.neg_num
+
+    def confusion_mat(self, score_thresholds, ret=('tp', 'fp', 'fn', 'tn')):
+        """
+        samples whose scores are larger than a threshold are predicted positive
+        """
+        # number of runs with scores larger than each threshold
+        above = np.searchsorted(-self.scores, -np.asarray(score_thresholds, dtype=np.float64), side='left')
+        tp, fp = self.cum_pos[above], self.cum_neg[above]
+        ret_dict = {'tp': tp, 'fp': fp, 'fn': self.pos_num - tp, 'tn': self.neg_num - fp}
+        return {ret_type: ret_dict[ret_type] for ret_type in ret}
+
+    def sorted_scores_at(self, indexes):
+        """
+        scores at indexes of all scores sorted in descending order
+        """
+        return self.scores[np.searchsorted(self.cum_pos[1:] + self.cum_neg[1:], indexes, side='right')]
+
+    def quantile(self, quantile_list):
+        """
+        same as np.quantile(all_scores, quantile_list, interpolation='nearest')
+        """
+        ascending_indexes = np.around((len(self) - 1) * np.asarray(quantile_list)).astype(np.intp)
+        return self.sorted_scores_at(len(self) - 1 - ascending_indexes)
+
+    def expand(self):
+        """
+        labels and scores of all samples in descending order of scores, positive labels are 1
+        """
+        counts = self.pos_counts + self.neg_counts
+        run_starts = self.cum_pos[:-1] + self.cum_neg[:-1]
+        # positive samples come first in each run
+        edges = np.zeros(len(self) + 1, dtype=int)
+        np.add.at(edges, run_starts, 1)
+        np.add.at(edges, run_starts + self.pos_counts, -1)
+        return np.cumsum(edges)[:-1], np.repeat(self.scores, counts)
+
+
+def to_score_runs(labels, pred_scores, pos_label=1):
+    """
+    labels can be ScoreRuns already, pred_scores is ignored then
+    """
+    if isinstance(labels, ScoreRuns):
+        return labels
+    return ScoreRuns.from_labels_and_scores(labels, pred_scores, pos_label=pos_label)
+
+
 class ConfusionMatrix(object):
 
     @staticmethod
@@ -37,33 +124,8 @@ class ConfusionMatrix(object):
         for ret_type in ret:
             assert ret_type in ['tp', 'tn', 'fp', 'fn']
 
-        sorted_labels = np.array(sorted_labels)
-        sorted_scores = np.array(sorted_pred_scores)
-        sorted_labels[sorted_labels != pos_label] = 0
-        sorted_labels[sorted_labels == pos_label] = 1
-        score_thresholds = np.array([score_thresholds]).transpose()
-        pred_labels = (sorted_scores > score_thresholds) + 0
-
-        ret_dict = {}
-        if 'tp' in ret or 'tn' in ret:
-            match_arr = (pred_labels + sorted_labels)
-            if 'tp' in ret:
-                tp_num = (match_arr == 2).sum(axis=-1)
-                ret_dict['tp'] = tp_num
-            if 'tn' in ret:
-                tn_num = (match_arr == 0).sum(axis=-1)
-                ret_dict['tn'] = tn_num
-
-        if 'fp' in ret or 'fn' in ret:
-            match_arr = (sorted_labels - pred_labels)
-            if 'fp' in ret:
-                fp_num = (match_arr == -1).sum(axis=-1)
-                ret_dict['fp'] = fp_num
-            if 'fn' in ret:
-                fn_num = (match_arr == 1).sum(axis=-1)
-                ret_dict['fn'] = fn_num
-
-        return ret_dict
+        return to_score_runs(sorted_labels, sorted_pred_scores, pos_label=pos_label).confusion_mat(score_thresholds,
+                                                                                                  ret)
 
 
 class ThresholdCutter(object):
@@ -71,9 +133,12 @@ class ThresholdCutter(object):
     @staticmethod
     def cut_by_step(sorted_scores, steps=0.01):
         assert isinstance(steps, float) and (0 < steps < 1)
-        thresholds = list(set(sorted_scores))
-        thresholds, cuts = ThresholdCutter.__filt_threshold(thresholds, 0.01)
-        score_threshold = thresholds
+        if isinstance(sorted_scores, ScoreRuns):
+            unique_scores = sorted_scores.scores
+        else:
+            unique_scores = np.flip(np.unique(sorted_scores))
+        cuts = list(map(float, np.arange(0, 1, 0.01)))
+        score_threshold = [unique_scores[int(len(unique_scores) * cut)] for cut in cuts]
 
         return score_threshold, cuts
 
@@ -88,32 +153,30 @@ class ThresholdCutter(object):
         cuts = np.array([c / 100 for c in range(100)])
         data_size = len(sorted_scores)
         indexs = [int(data_size * cut) for cut in cuts]
-        score_threshold = [sorted_scores[idx] for idx in indexs]
+        if isinstance(sorted_scores, ScoreRuns):
+            score_threshold = list(sorted_scores.sorted_scores_at(indexs))
+        else:
+            score_threshold = [sorted_scores[idx] for idx in indexs]
         return score_threshold, cuts
 
-    @staticmethod
-    def __filt_threshold(thresholds, step):
-        cuts = list(map(float, np.arange(0, 1, step)))
-        size = len(list(thresholds))
-        thresholds.sort(reverse=True)
-        index_list = [int(size * cut) for cut in cuts]
-        new_thresholds = [thresholds[idx] for idx in index_list]
-
-        return new_thresholds, cuts
-
     @staticmethod
     def cut_by_quantile(scores, quantile_list=None, interpolation='nearest', remove_duplicate=True):
 
         if quantile_list is None:  # default is 20 intervals
             quantile_list = [round(i * 0.05, 3) for i in range(20)] + [1.0]
-        quantile_val = np.quantile(scores, quantile_list, interpolation=interpolation)
+        if isinstance(scores, ScoreRuns):
+            assert interpolation == 'nearest', 'only nearest interpolation is supported by score runs'
+            quantile_val = scores.quantile(quantile_list)
+        else:
+            quantile_val = np.quantile(scores, quantile_list, interpolation=interpolation)
         if remove_duplicate:
             quantile_val = sorted(list(set(quantile_val)))
         else:
             quantile_val = sorted(list(quantile_val))
 
         if len(quantile_val) == 1:
-            quantile_val = [np.min(scores), np.max(scores)]
+            quantile_val = [scores.scores[-1], scores.scores[0]] if isinstance(scores, ScoreRuns) \
+                else [np.min(scores), np.max(scores)]
 
         return quantile_val
 
@@ -122,12 +185,11 @@ class KS(object):
 
     @staticmethod
     def compute(labels, pred_scores, pos_label=1, fixed_interval_threshold=True):
-        sorted_labels, sorted_scores = sort_score_and_label(labels, pred_scores)
+        score_runs = to_score_runs(labels, pred_scores, pos_label=pos_label)
 
-        threshold, cuts = ThresholdCutter.cut_by_index(sorted_scores)
-        confusion_mat = ConfusionMatrix.compute(sorted_labels, sorted_scores, threshold, ret=['tp', 'fp'],
-                                                pos_label=pos_label)
-        pos_num, neg_num = neg_pos_count(sorted_labels, pos_label=pos_label)
+        threshold, cuts = ThresholdCutter.cut_by_index(score_runs)
+        confusion_mat = score_runs.confusion_mat(threshold, ret=['tp', 'fp'])
+        pos_num, neg_num = score_runs.pos_num, score_runs.neg_num
 
         assert pos_num > 0 and neg_num > 0, "error when computing KS metric, pos sample number and neg sample number" \
                                             "must be larger than 0"
@@ -154,22 +216,21 @@ class BiClassMetric(object):
         self.pos_label = pos_label
 
     def prepare_confusion_mat(self, labels, scores, add_to_end=True, ):
-        sorted_labels, sorted_scores = sort_score_and_label(labels, scores)
+        score_runs = to_score_runs(labels, scores, pos_label=self.pos_label)
 
         score_threshold, cuts = None, None
 
         if self.cut_method == 'step':
-            score_threshold, cuts = ThresholdCutter.cut_by_step(sorted_scores, steps=0.01)
+            score_threshold, cuts = ThresholdCutter.cut_by_step(score_runs, steps=0.01)
             if add_to_end:
                 score_threshold.append(min(score_threshold) - 0.001)
                 cuts.append(1)
 
         elif self.cut_method == 'quantile':
-            score_threshold = ThresholdCutter.cut_by_quantile(sorted_scores, remove_duplicate=self.remove_duplicate)
+            score_threshold = ThresholdCutter.cut_by_quantile(score_runs, remove_duplicate=self.remove_duplicate)
             score_threshold = list(np.flip(score_threshold))
 
-        confusion_mat = ConfusionMatrix.compute(sorted_labels, sorted_scores, score_threshold,
-                                                ret=['tp', 'fp', 'fn', 'tn'], pos_label=self.pos_label)
+        confusion_mat = score_runs.confusion_mat(score_threshold, ret=['tp', 'fp', 'fn', 'tn'])
 
         return confusion_mat, score_threshold, cuts
 
@@ -388,12 +449,10 @@ class FScore(object):
 
     @staticmethod
     def compute(labels, pred_scores, beta=1, pos_label=1):
-        sorted_labels, sorted_scores = sort_score_and_label(labels, pred_scores)
-        _, cuts = ThresholdCutter.cut_by_step(sorted_scores, steps=0.01)
+        score_runs = to_score_runs(labels, pred_scores, pos_label=pos_label)
+        _, cuts = ThresholdCutter.cut_by_step(score_runs, steps=0.01)
         fixed_interval_threshold = ThresholdCutter.fixed_interval_threshold()
-        confusion_mat = ConfusionMatrix.compute(sorted_labels, sorted_scores,
-                                                fixed_interval_threshold,
-                                                ret=['tp', 'fp', 'fn', 'tn'], pos_label=pos_label)
+        confusion_mat = score_runs.confusion_mat(fixed_interval_threshold, ret=['tp', 'fp', 'fn', 'tn'])
 
         precision_computer = BiClassPrecision()
         recall_computer = BiClassRecall()
@@ -1,7 +1,12 @@
 import unittest
+import uuid
 
 import numpy as np
+from fate_arch.session import computing_session as session
+from federatedml.feature.instance import Instance
+from federatedml.param.evaluation_param import EvaluateParam
 from federatedml.util import consts
+from federatedml.evaluation.evaluation import Evaluation
 from federatedml.evaluation.metrics import classification_metric, clustering_metric, regression_metric
 from federatedml.evaluation.metric_interface import MetricInterface
 
@@ -89,5 +94,63 @@ class TestEvaluation(unittest.TestCase):
             self.psi_val_label)
 
 
+class TestScoreRuns(unittest.TestCase):
+
+    def setUp(self):
+        session.init(str(uuid.uuid1()))
+        # rounded scores have many ties
+        self.scores = np.round(np.random.random(3000), 2)
+        self.labels = (np.random.random(3000) < self.scores).astype(int)
+
+    def test_runs(self):
+        runs = classification_metric.ScoreRuns.merge(
+            [classification_metric.ScoreRuns.from_labels_and_scores(self.labels[i: i + 700], self.scores[i: i + 700])
+             for i in range(0, 3000, 700)])
+        self.assertEqual((len(runs), runs.pos_num), (3000, self.labels.sum()))
+        sorted_scores = np.sort(self.scores)[::-1]
+        np.testing.assert_array_equal(runs.sorted_scores_at(np.arange(3000)), sorted_scores)
+        quantiles = [0, 0.05, 0.33, 0.5, 0.95, 1.0]
+        np.testing.assert_array_equal(runs.quantile(quantiles),
+                                      np.quantile(self.scores, quantiles, interpolation='nearest'))
+        labels, scores = runs.expand()
+        np.testing.assert_array_equal(scores, sorted_scores)
+        self.assertEqual(labels.sum(), self.labels.sum())
+        for score in np.unique(self.scores):
+            self.assertEqual(labels[scores == score].sum(), self.labels[self.scores == score].sum())
+
+        thresholds = [-1, 0, 0.25, 0.5, 0.505, 1.0]
+        confusion_mat = runs.confusion_mat(thresholds)
+        for idx, threshold in enumerate(thresholds):
+            pred = self.scores > threshold
+            self.assertEqual(confusion_mat['tp'][idx], np.sum(pred & (self.labels == 1)))
+            self.assertEqual(confusion_mat['fp'][idx], np.sum(pred & (self.labels == 0)))
+            self.assertEqual(confusion_mat['tn'][idx], np.sum(~pred & (self.labels == 0)))
+
+    def test_binary_evaluation(self):
+        modes = np.where(np.random.random(3000) < 0.7, 'train', 'validate')
+        data = [(i, Instance(features=[label, int(score > 0.5), score, {}, mode]))
+                for i, (label, score, mode) in enumerate(zip(self.labels, self.scores, modes))]
+        param = EvaluateParam(eval_type=consts.BINARY, metrics=consts.ALL_BINARY_METRICS)
+        param.check()
+        evaluation = Evaluation()
+        evaluation._init_model(param)
+
+        table = session.parallelize(data, include_key=True, partition=4)
+        mode_score_runs = evaluation.binary_score_runs(table)
+        self.assertEqual(sorted(mode_score_runs), ['train', 'validate'])
+        local_data = evaluation.split_data_with_type([(k, v.features) for k, v in data])
+        # psi is computed once both train and validate are evaluated
+        expected = [evaluation.evaluate_metrics(mode, local_data[mode]) for mode in ['train', 'validate']]
+        eval_results = [evaluation.evaluate_metrics(mode, mode_score_runs[mode]) for mode in ['train', 'validate']]
+        self.assertIn(consts.PSI, eval_results[1])
+        for expected_result, eval_result in zip(expected, eval_results):
+            self.assertEqual(expected_result.keys(), eval_result.keys())
+            for metric in expected_result:
+                self.assertEqual(str(eval_result[metric]), str(expected_result[metric]), metric)
+
+    def tearDown(self):
+        session.stop()
+
+
 if __name__ == '__main__':
     unittest.main()
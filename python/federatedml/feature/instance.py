@@ -39,6 +39,8 @@ class Instance(object):
 
     """
 
+    __slots__ = ("inst_id", "weight", "features", "label")
+
     def __init__(self, inst_id=None, weight=None, features=None, label=None):
         self.inst_id = inst_id
         self.weight = weight
@@ -67,6 +69,16 @@ class Instance(object):
 
         return copy_obj
 
+    def __reduce__(self):
+        return Instance, (self.inst_id, self.weight, self.features, self.label)
+
+    def __setstate__(self, state):
+        # objects pickled by previous versions hold a plain attribute dict
+        if isinstance(state, tuple):
+            state = state[-1]
+        for key in self.__slots__:
+            setattr(self, key, state.get(key))
+
     @property
     def with_inst_id(self):
         return self.inst_id is not None
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+################################################################################
+#
+#
+################################################################################
+import copy
+import functools
+
+import numpy as np
+
+from federatedml.feature.fate_element_type import NoneType
+from federatedml.feature.instance import Instance
+from federatedml.feature.sparse_vector import SparseVector
+from federatedml.statistic import data_overview
+
+
+class InstanceBlock(object):
+    """
+    Columnar storage of a block of rows, rows of a partition are grouped into blocks so that
+    per-row computation can be done as matrix operations
+
+    Parameters
+    ----------
+    keys : list, keys of rows in the block
+
+    features : ndarray, feature matrix of shape (row_num, feature_num), missing values are nan
+
+    labels: None or ndarray, labels of rows, None if rows have no label
+
+    weights: None or ndarray, weights of rows, None if rows have no weight
+
+    inst_ids: None or list, match ids of rows, None if rows have no match id
+
+    """
+
+    __slots__ = ("keys", "features", "labels", "weights", "inst_ids")
+
+    def __init__(self, keys, features, labels=None, weights=None, inst_ids=None):
+        self.keys = keys
+        self.features = features
+        self.labels = labels
+        self.weights = weights
+        self.inst_ids = inst_ids
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __reduce__(self):
+        return InstanceBlock, (self.keys, self.features, self.labels, self.weights, self.inst_ids)
+
+    @classmethod
+    def from_instances(cls, kv_list, feature_num):
+        """
+        build a block from (key, Instance) pairs, features of Instance can be ndarray or SparseVector
+        """
+        keys = [key for key, _ in kv_list]
+        features = np.zeros((len(kv_list), feature_num), dtype=np.float64)
+        labels, weights, inst_ids = [], [], []
+        for row, (_, inst) in enumerate(kv_list):
+            if isinstance(inst.features, SparseVector):
+                indices, values = inst.features.indices, inst.features.values
+                if values.dtype.kind == 'O':
+                    values = [np.nan if isinstance(value, NoneType) else value for value in values.tolist()]
+                features[row, indices] = values
+            else:
+                features[row] = [np.nan if isinstance(value, NoneType) else value for value in inst.features] \
+                    if inst.features.dtype.kind == 'O' else inst.features
+            labels.append(inst.label)
+            weights.append(inst.weight)
+            inst_ids.append(inst.inst_id)
+
+        return cls(keys, features,
+                   labels=cls._to_column(labels),
+                   weights=cls._to_column(weights),
+                   inst_ids=None if all(inst_id is None for inst_id in inst_ids) else inst_ids)
+
+    @staticmethod
+    def _to_column(values):
+        if all(value is None for value in values):
+            return None
+        column = np.asarray(values)
+        if column.dtype.kind not in 'biuf':
+            column = np.empty(len(values), dtype=object)
+            column[:] = values
+        return column
+
+    def to_instances(self):
+        """
+        return (key, Instance) pairs of rows, features are dense ndarray
+        """
+        labels = self.labels.tolist() if self.labels is not None else [None] * len(self)
+        weights = self.weights.tolist() if self.weights is not None else [None] * len(self)
+        inst_ids = self.inst_ids if self.inst_ids is not None else [None] * len(self)
+        return [(key, Instance(inst_id=inst_id, weight=weight, features=self.features[row].copy(), label=label))
+                for row, (key, label, weight, inst_id) in enumerate(zip(self.keys, labels, weights, inst_ids))]
+
+
+def _rows_to_blocks(kv_iterator, block_size, feature_num):
+    blocks = []
+    kv_list = []
+    for key, inst in kv_iterator:
+        kv_list.append((key, inst))
+        if len(kv_list) == block_size:
+            blocks.append((kv_list[0][0], InstanceBlock.from_instances(kv_list, feature_num)))
+            kv_list = []
+
+    if kv_list:
+        blocks.append((kv_list[0][0], InstanceBlock.from_instances(kv_list, feature_num)))
+
+    return blocks
+
+
+def to_instance_blocks(data_instances, block_size):
+    """
+    convert a Table of Instance to a Table of InstanceBlock holding at most block_size rows each,
+    blocks are keyed by key of their first row
+    """
+    if not isinstance(block_size, int) or block_size <= 0:
+        raise ValueError("block_size should be a positive integer, but {} find".format(block_size))
+
+    header = data_instances.schema.get("header")
+    feature_num = len(header) if header is not None else data_overview.get_features_shape(data_instances)
+    block_func = functools.partial(_rows_to_blocks, block_size=block_size, feature_num=feature_num)
+    blocks = data_instances.mapPartitions(block_func, use_previous_behavior=False)
+    blocks.schema = copy.deepcopy(data_instances.schema)
+    return blocks
+
+
+def from_instance_blocks(instance_blocks):
+    """
+    convert a Table of InstanceBlock back to a Table of Instance with dense features
+    """
+    data_instances = instance_blocks.flatMap(lambda key, block: block.to_instances())
+    data_instances.schema = copy.deepcopy(instance_blocks.schema)
+    return data_instances
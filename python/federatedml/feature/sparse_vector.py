@@ -21,6 +21,8 @@
 #
 ################################################################################
 
+import numpy as np
+
 # =============================================================================
 # Sparse Feature
 # =============================================================================
@@ -32,24 +34,87 @@ class SparseVector(object):
 
     Parameters
     ----------
-    sparse_vec : dict, record (indice, data) kv tuples
+    indices : feature indices of non-zero values, stored in a sorted int32 array
+
+    data : non-zero values, stored in an array of the same order, numeric values keep their numpy dtype,
+           others (e.g. NoneType for missing values) are stored in an object array
 
     shape : the real feature shape of data
 
+    A dict view of (indice, data) kv tuples is built on first dict-style access and becomes the source of truth
+    until the arrays are needed again, so mutating get_sparse_vector() result still works.
     """
 
+    __slots__ = ("shape", "_indices", "_values", "_sparse_vec")
+
     def __init__(self, indices=None, data=None, shape=0):
-        self.sparse_vec = dict(zip(indices, data))
         self.shape = shape
+        self._sparse_vec = None
+        self._set_arrays([] if indices is None else indices, [] if data is None else data)
+
+    def _set_arrays(self, indices, data):
+        indices = np.asarray(indices, dtype=np.int32)
+        values = self._to_value_array(data)
+        if len(indices) != len(values):
+            raise ValueError("indices and data should have the same length: {} != {}".format(len(indices),
+                                                                                           len(values)))
+        if len(indices) > 1 and not np.all(indices[1:] > indices[:-1]):
+            if len(np.unique(indices)) != len(indices):
+                # duplicated indices, last value wins as in a dict
+                sparse_vec = dict(zip(indices.tolist(), values.tolist()))
+                indices = np.fromiter(sparse_vec.keys(), dtype=np.int32, count=len(sparse_vec))
+                values = self._to_value_array(list(sparse_vec.values()))
+            order = np.argsort(indices, kind="stable")
+            indices, values = indices[order], values[order]
+        self._indices, self._values = indices, values
+
+    @staticmethod
+    def _to_value_array(data):
+        if isinstance(data, np.ndarray) and data.dtype.kind in "biufO":
+            return data
+        values = np.asarray(data)
+        if values.dtype.kind not in "biuf":
+            # numpy casts mixed values to str, keep python objects as they are
+            values = np.empty(len(data), dtype=object)
+            values[:] = list(data)
+        return values
+
+    def _sync_arrays(self):
+        if self._sparse_vec is not None:
+            sparse_vec = self._sparse_vec
+            self._sparse_vec = None
+            self._set_arrays(list(sparse_vec.keys()), list(sparse_vec.values()))
+
+    @property
+    def sparse_vec(self):
+        if self._sparse_vec is None:
+            self._sparse_vec = dict(zip(self._indices.tolist(), self._values.tolist()))
+        return self._sparse_vec
+
+    @sparse_vec.setter
+    def sparse_vec(self, sparse_vec):
+        self._sparse_vec = sparse_vec
+
+    @property
+    def indices(self):
+        self._sync_arrays()
+        return self._indices
+
+    @property
+    def values(self):
+        self._sync_arrays()
+        return self._values
 
     def get_data(self, pos, default_val=None):
         return self.sparse_vec.get(pos, default_val)
 
     def count_non_zeros(self):
-        return len(self.sparse_vec)
+        if self._sparse_vec is not None:
+            return len(self._sparse_vec)
+        return len(self._indices)
 
     def count_zeros(self):
-        return self.shape - len(self.sparse_vec)
+        return self.shape - self.count_non_zeros()
 
     def get_shape(self):
         return self.shape
@@ -58,8 +123,12 @@ class SparseVector(object):
         self.shape = shape
 
     def get_all_data(self):
-        for idx, data in self.sparse_vec.items():
-            yield idx, data
+        if self._sparse_vec is not None:
+            for idx, data in self._sparse_vec.items():
+                yield idx, data
+        else:
+            for idx, data in zip(self._indices.tolist(), self._values.tolist()):
+                yield idx, data
 
     def get_sparse_vector(self):
         return self.sparse_vec
@@ -70,3 +139,59 @@ class SparseVector(object):
     @staticmethod
     def is_sparse_vector():
         return True
+
+    def __reduce__(self):
+        if self._sparse_vec is not None:
+            # keep the dict view alive, its holders may still mutate it
+            vec = SparseVector(list(self._sparse_vec.keys()), list(self._sparse_vec.values()), self.shape)
+            return vec.__reduce__()
+        # indices are sorted, the last one is the largest
+        max_index = int(self._indices[-1]) if len(self._indices) else 0
+        indices = self._indices.astype(_index_dtype(max_index), copy=False)
+        values = self._values
+        if values.dtype.kind == "O":
+            return _rebuild_sparse_vector, (self.shape, indices.dtype.str, indices.tobytes(), None, values.tolist())
+        if values.dtype.kind in "iu":
+            values = _narrow_int_array(values)
+        return _rebuild_sparse_vector, (self.shape, indices.dtype.str, indices.tobytes(), values.dtype.str,
+                                        values.tobytes())
+
+    def __setstate__(self, state):
+        # objects pickled by previous versions hold a plain attribute dict
+        if isinstance(state, tuple):
+            state = state[-1]
+        sparse_vec = state.get("sparse_vec", {})
+        self.shape = state.get("shape", 0)
+        self._sparse_vec = None
+        self._set_arrays(list(sparse_vec.keys()), list(sparse_vec.values()))
+
+
+def _index_dtype(max_index):
+    if max_index <= np.iinfo(np.uint8).max:
+        return np.uint8
+    if max_index <= np.iinfo(np.uint16).max:
+        return np.uint16
+    return np.int32
+
+
+def _narrow_int_array(arr):
+    # rows are pickled one by one, store integers in the smallest dtype holding them
+    if len(arr) == 0:
+        return arr.astype(np.uint8)
+    dtype = np.result_type(np.min_scalar_type(arr.min()), np.min_scalar_type(arr.max()))
+    return arr.astype(dtype, copy=False)
+
+
+def _rebuild_sparse_vector(shape, indices_dtype, indices, values_dtype, values):
+    vec = SparseVector.__new__(SparseVector)
+    vec.shape = shape
+    vec._sparse_vec = None
+    vec._indices = np.frombuffer(indices, dtype=np.dtype(indices_dtype)).astype(np.int32)
+    if values_dtype is None:
+        vec._values = np.empty(len(values), dtype=object)
+        vec._values[:] = values
+    else:
+        # arrays from buffers are read-only, values are copied so that they can be updated in place
+        values = np.frombuffer(values, dtype=np.dtype(values_dtype))
+        vec._values = values.astype(np.int64) if values.dtype.kind in "iu" else values.copy()
+    return vec
@@ -0,0 +1,84 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import pickle
+import unittest
+import uuid
+
+import numpy as np
+
+from fate_arch.session import computing_session as session
+from federatedml.feature.fate_element_type import NoneType
+from federatedml.feature.instance import Instance
+from federatedml.feature.instance_block import InstanceBlock, to_instance_blocks, from_instance_blocks
+from federatedml.feature.sparse_vector import SparseVector
+from federatedml.param.data_transform_param import DataTransformParam
+
+
+class TestInstanceBlock(unittest.TestCase):
+
+    def setUp(self):
+        session.init(str(uuid.uuid1()))
+        self.feature_num = 6
+        self.dense = np.random.random((103, self.feature_num))
+        self.dense_data = [(str(i), Instance(inst_id=i, weight=1.0 + i, features=self.dense[i], label=i % 2))
+                           for i in range(len(self.dense))]
+
+    def test_from_instances(self):
+        sparse_data = [("a", Instance(features=SparseVector([1, 4], [2.5, NoneType()], self.feature_num), label=1)),
+                       ("b", Instance(features=SparseVector([0], [3], self.feature_num), label=0))]
+        block = InstanceBlock.from_instances(sparse_data, self.feature_num)
+        self.assertEqual(len(block), 2)
+        np.testing.assert_array_equal(block.features, [[0, 2.5, 0, 0, np.nan, 0], [3, 0, 0, 0, 0, 0]])
+        np.testing.assert_array_equal(block.labels, [1, 0])
+        self.assertIsNone(block.weights)
+        self.assertIsNone(block.inst_ids)
+
+        loaded = pickle.loads(pickle.dumps(block))
+        self.assertEqual(loaded.keys, ["a", "b"])
+        np.testing.assert_array_equal(loaded.features, block.features)
+
+    def test_table_round_trip(self):
+        table = session.parallelize(self.dense_data, include_key=True, partition=4)
+        table.schema = {"header": ["x{}".format(i) for i in range(self.feature_num)]}
+        blocks = to_instance_blocks(table, block_size=10)
+        self.assertEqual(blocks.schema, table.schema)
+        block_list = [block for _, block in blocks.collect()]
+        self.assertEqual(sum(len(block) for block in block_list), len(self.dense_data))
+        self.assertTrue(all(len(block) <= 10 for block in block_list))
+        self.assertTrue(all(block.features.shape[1] == self.feature_num for block in block_list))
+
+        rows = dict(from_instance_blocks(blocks).collect())
+        self.assertEqual(len(rows), len(self.dense_data))
+        for key, inst in self.dense_data:
+            self.assertEqual((rows[key].inst_id, rows[key].weight, rows[key].label),
+                             (inst.inst_id, inst.weight, inst.label))
+            np.testing.assert_array_equal(rows[key].features, inst.features)
+
+    def test_block_size_check(self):
+        table = session.parallelize(self.dense_data, include_key=True, partition=4)
+        with self.assertRaises(ValueError):
+            to_instance_blocks(table, block_size=0)
+        with self.assertRaises(ValueError):
+            DataTransformParam(instance_block_size=-1).check()
+        self.assertTrue(DataTransformParam(instance_block_size=128).check())
+
+    def tearDown(self):
+        session.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -14,9 +14,12 @@
 #  limitations under the License.
 #
 
+import copy
+import pickle
 import unittest
 
 from federatedml.feature.instance import Instance
+from federatedml.feature.sparse_vector import SparseVector
 
 
 class TestInstance(unittest.TestCase):
@@ -33,6 +36,19 @@ class TestInstance(unittest.TestCase):
         inst.set_feature(["yes", "no"])
         self.assertTrue(inst.weight == 3 and inst.label == 5 and inst.features == ["yes", "no"])
 
+    def test_pickle(self):
+        inst = Instance(inst_id=5, weight=2.0, features=SparseVector([1, 4], [0.5, 2], 6), label=1)
+        for loaded in [pickle.loads(pickle.dumps(inst)), copy.deepcopy(inst)]:
+            self.assertEqual((loaded.inst_id, loaded.weight, loaded.label), (5, 2.0, 1))
+            self.assertEqual(dict(loaded.features.get_all_data()), {1: 0.5, 4: 2})
+
+        with self.assertRaises(AttributeError):
+            inst.unknown_attr = 1
+
+        legacy = Instance.__new__(Instance)
+        legacy.__setstate__((None, {"inst_id": 1, "weight": None, "features": [1], "label": 0}))
+        self.assertEqual((legacy.inst_id, legacy.features, legacy.label), (1, [1], 0))
+
 
 if __name__ == '__main__':
     unittest.main()
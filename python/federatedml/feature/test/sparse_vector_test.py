@@ -14,8 +14,13 @@
 #  limitations under the License.
 #
 
+import copy
+import pickle
 import unittest
 
+import numpy as np
+
+from federatedml.feature.fate_element_type import NoneType
 from federatedml.feature.sparse_vector import SparseVector
 
 
@@ -46,6 +51,65 @@ class TestSparseVector(unittest.TestCase):
 
         self.assertTrue(dict(sparse_data.get_all_data()) == dict(zip(indices, data)))
 
+    def test_array_storage(self):
+        sparse_data = SparseVector([5, 1, 3, 1], [5.5, 1.0, 3.5, 2.0], 10)
+        np.testing.assert_array_equal(sparse_data.indices, [1, 3, 5])
+        np.testing.assert_array_equal(sparse_data.values, [2.0, 3.5, 5.5])
+        self.assertEqual(sparse_data.get_data(1), 2.0)
+
+        mixed = SparseVector([0, 2], [NoneType(), 3], 4)
+        self.assertEqual(mixed.values.dtype, object)
+        self.assertEqual(list(mixed.get_all_data()), [(0, NoneType()), (2, 3)])
+        self.assertIsInstance(dict(mixed.get_all_data())[2], int)
+
+    def test_dict_view(self):
+        sparse_data = SparseVector([1, 2], [1, 2], 5)
+        sparse_vec = sparse_data.get_sparse_vector()
+        sparse_vec[0] = NoneType()
+        copied = copy.deepcopy(sparse_data)
+        sparse_vec[4] = 4
+        self.assertEqual(sparse_data.get_data(4), 4)
+        self.assertEqual(copied.count_non_zeros(), 3)
+        np.testing.assert_array_equal(sparse_data.indices, [0, 1, 2, 4])
+
+        sparse_data.set_sparse_vector({3: 1.5})
+        self.assertEqual(list(sparse_data.get_all_data()), [(3, 1.5)])
+        self.assertEqual(sparse_data.count_zeros(), 4)
+
+    def test_pickle(self):
+        for data in [[1, 2, 3], [1.5, 2.5, -3.0], [NoneType(), 1, 2.5], []]:
+            indices = list(range(0, len(data) * 7, 7))
+            sparse_data = SparseVector(indices, data, 100)
+            loaded = pickle.loads(pickle.dumps(sparse_data))
+            self.assertEqual(loaded.shape, 100)
+            self.assertEqual(list(loaded.get_all_data()), list(zip(indices, data)))
+            self.assertEqual(loaded.values.dtype, sparse_data.values.dtype)
+
+    def test_pickle_then_update(self):
+        for data in [[1, 2, 3], [1.5, 2.5, -3.0]]:
+            sparse_data = SparseVector([0, 7, 14], data, 100)
+            loaded = pickle.loads(pickle.dumps(sparse_data))
+            values = loaded.values
+            values[0] = 4
+            values *= 2
+            loaded.indices[-1] = 15
+            self.assertEqual(list(loaded.get_all_data()), [(0, 8), (7, data[1] * 2), (15, data[2] * 2)])
+            self.assertEqual(list(sparse_data.get_all_data()), list(zip([0, 7, 14], data)))
+
+    def test_pickle_index_range(self):
+        # shape may be smaller than the largest index
+        for max_index in [255, 256, 65535, 65536, 2 ** 31 - 1]:
+            sparse_data = SparseVector([0, max_index], [1, 2 ** 40], 1)
+            loaded = pickle.loads(pickle.dumps(sparse_data))
+            self.assertEqual(dict(loaded.get_all_data()), {0: 1, max_index: 2 ** 40})
+
+    def test_pickle_previous_version(self):
+        sparse_data = SparseVector.__new__(SparseVector)
+        sparse_data.__setstate__({"sparse_vec": {3: 1.0, 1: NoneType()}, "shape": 4})
+        self.assertEqual(sparse_data.get_shape(), 4)
+        np.testing.assert_array_equal(sparse_data.indices, [1, 3])
+        self.assertEqual(sparse_data.get_data(1), NoneType())
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -27,6 +27,7 @@ class Guest(batch_info_sync.Guest):
         self.finish_sycn = False
         self.batch_nums = None
         self.batch_masked = False
+        self.hash_shared = False
 
     def register_batch_generator(self, transfer_variables, has_arbiter=True):
         self._register_batch_data_index_transfer(transfer_variables.batch_info,
@@ -40,9 +41,12 @@ class Guest(batch_info_sync.Guest):
                                         batch_strategy=batch_strategy, masked_rate=masked_rate)
         self.batch_nums = self.mini_batch_obj.batch_nums
         self.batch_masked = self.mini_batch_obj.batch_size != self.mini_batch_obj.masked_batch_size
+        # hosts derive unmasked hash batches themselves, masked batches keep the seed secret and send indexes
+        self.hash_shared = batch_strategy == "hash" and not self.batch_masked
         batch_info = {"batch_size": self.mini_batch_obj.batch_size, "batch_num": self.batch_nums,
                       "batch_mutable": self.mini_batch_obj.batch_mutable,
-                      "masked_batch_size": self.mini_batch_obj.masked_batch_size}
+                      "masked_batch_size": self.mini_batch_obj.masked_batch_size,
+                      "hash_seed": self.mini_batch_obj.batch_data_generator.seed if self.hash_shared else None}
         self.sync_batch_info(batch_info, suffix)
 
         if not self.mini_batch_obj.batch_mutable:
@@ -50,6 +54,8 @@ class Guest(batch_info_sync.Guest):
 
     def prepare_batch_data(self, suffix=tuple()):
         self.mini_batch_obj.generate_batch_data()
+        if self.hash_shared:
+            return
         index_generator = self.mini_batch_obj.mini_batch_data_generator(result='index')
         batch_index = 0
         for batch_data_index in index_generator:
@@ -94,6 +100,7 @@ class Host(batch_info_sync.Host):
         self.batch_mutable = False
         self.batch_masked = False
         self.masked_batch_size = None
+        self.mini_batch_obj = None
 
     def register_batch_generator(self, transfer_variables, has_arbiter=None):
         self._register_batch_data_index_transfer(transfer_variables.batch_info,
@@ -108,12 +115,25 @@ class Host(batch_info_sync.Host):
         self.masked_batch_size = batch_info.get("masked_batch_size")
         self.batch_masked = self.masked_batch_size != batch_size
 
+        hash_seed = batch_info.get("hash_seed")
+        if hash_seed is not None:
+            self.mini_batch_obj = MiniBatch(data_instances, batch_size=batch_size, shuffle=self.batch_mutable,
+                                            batch_strategy="hash", hash_seed=hash_seed)
+            if self.mini_batch_obj.batch_nums != self.batch_nums:
+                raise ValueError(f"batch num {self.mini_batch_obj.batch_nums} of host is not the same as "
+                                 f"batch num {self.batch_nums} of guest, data size should be the same")
+
         if not self.batch_mutable:
             self.prepare_batch_data(data_instances, suffix)
         else:
             self.data_inst = data_instances
 
     def prepare_batch_data(self, data_inst, suffix=tuple()):
+        if self.mini_batch_obj is not None:
+            self.mini_batch_obj.generate_batch_data()
+            self.batch_data_insts = list(self.mini_batch_obj.mini_batch_data_generator(result='data'))
+            return
+
         self.batch_data_insts = []
         for batch_index in range(self.batch_nums):
             batch_suffix = suffix + (batch_index,)
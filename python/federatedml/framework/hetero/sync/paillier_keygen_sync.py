@@ -14,7 +14,7 @@
 #
 
 
-from federatedml.secureprotol.encrypt import PaillierEncrypt, IpclPaillierEncrypt
+from federatedml.secureprotol.encrypt import PaillierEncrypt, IpclPaillierEncrypt, RustPaillierEncrypt
 from federatedml.util import consts
 
 
@@ -28,6 +28,8 @@ class Arbiter(object):
             cipher = PaillierEncrypt()
         elif method == consts.PAILLIER_IPCL:
             cipher = IpclPaillierEncrypt()
+        elif method == consts.PAILLIER_RUST:
+            cipher = RustPaillierEncrypt()
         else:
             raise ValueError(f"Unsupported encryption method: {method}")
 
@@ -50,6 +52,8 @@ class _Client(object):
             cipher = PaillierEncrypt()
         elif method == consts.PAILLIER_IPCL:
             cipher = IpclPaillierEncrypt()
+        elif method == consts.PAILLIER_RUST:
+            cipher = RustPaillierEncrypt()
         else:
             raise ValueError(f"Unsupported encryption method: {method}")
 
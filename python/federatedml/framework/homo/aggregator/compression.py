@@ -0,0 +1,150 @@
+import numpy as np
+
+
+UPDATE_DTYPES = ['fp16', 'bf16', 'int8']
+
+
+def _to_bf16(values):
+    # keep the high 16 bits of float32, rounding to nearest even
+    bits = values.astype(np.float32).view(np.uint32)
+    bits = bits + np.uint32(0x7FFF) + ((bits >> np.uint32(16)) & np.uint32(1))
+    return (bits >> np.uint32(16)).astype(np.uint16)
+
+
+def _from_bf16(values):
+    return (values.astype(np.uint32) << np.uint32(16)).view(np.float32)
+
+
+class EncodedChunk(object):
+    """
+    A lossy encoded chunk of a flattened model update, the server decodes it to a dense vector before summing
+
+    Parameters
+    ----------
+    size: int, length of the dense chunk
+
+    values: ndarray, encoded values, of the whole chunk or of the selected indices
+
+    indices: None or ndarray, indices of kept values if the chunk is sparsified
+
+    dtype: None, 'fp16', 'bf16' or 'int8', encoding of values, None means float32
+
+    scale: float, scale of int8 values
+    """
+
+    def __init__(self, size, values, indices=None, dtype=None, scale=1.0):
+        self.size = size
+        self.values = values
+        self.indices = indices
+        self.dtype = dtype
+        self.scale = scale
+
+    @classmethod
+    def encode(cls, chunk, dtype=None, top_k_ratio=None):
+        size = chunk.size
+        indices = None
+        values = chunk
+        if top_k_ratio is not None:
+            k = max(1, int(np.ceil(size * top_k_ratio)))
+            if k < size:
+                indices = np.sort(np.argpartition(np.abs(chunk), size - k)[size - k:])
+                indices = indices.astype(np.uint16 if size <= 1 << 16 else np.uint32)
+                values = chunk[indices]
+
+        scale = 1.0
+        if dtype == 'fp16':
+            values = values.astype(np.float16)
+        elif dtype == 'bf16':
+            values = _to_bf16(values)
+        elif dtype == 'int8':
+            max_abs = float(np.max(np.abs(values))) if values.size else 0.0
+            scale = max_abs / 127 if max_abs > 0 else 1.0
+            values = np.clip(np.rint(values / scale), -127, 127).astype(np.int8)
+        else:
+            values = values.astype(np.float32)
+
+        return cls(size, values, indices, dtype, scale)
+
+    def decode(self):
+        if self.dtype == 'bf16':
+            values = _from_bf16(self.values)
+        elif self.dtype == 'int8':
+            values = self.values.astype(np.float32) * np.float32(self.scale)
+        else:
+            values = self.values.astype(np.float32)
+
+        if self.indices is None:
+            return values
+        dense = np.zeros(self.size, dtype=np.float32)
+        dense[self.indices] = values
+        return dense
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + (self.indices.nbytes if self.indices is not None else 0)
+
+
+class UpdateCompressor(object):
+    """
+    Client side compression of flattened models for FedAVG
+
+    Parameters
+    ----------
+    delta: bool, send the difference to the previous aggregated model instead of the model itself,
+           aggregated deltas are added back to the previous aggregated model. Deltas sum linearly, so this
+           works with secure aggregation, but needs aggregate weights summing to 1
+
+    dtype: None, 'fp16', 'bf16' or 'int8', lossy encoding of the sent values
+
+    top_k_ratio: None or float in (0, 1], only send the largest ratio of values of each chunk by magnitude
+
+    Lossy encodings keep what was lost as a residual, and add it to the update of the next round (error feedback).
+    """
+
+    def __init__(self, delta=False, dtype=None, top_k_ratio=None):
+        if dtype is not None and dtype not in UPDATE_DTYPES:
+            raise ValueError('update dtype should be one of {}, but got {}'.format(UPDATE_DTYPES, dtype))
+        if top_k_ratio is not None and not 0 < top_k_ratio <= 1:
+            raise ValueError('top k ratio should be in (0, 1], but got {}'.format(top_k_ratio))
+        if top_k_ratio is not None and not delta:
+            raise ValueError('top k sparsification only applies to model deltas, delta should be True')
+
+        self.delta = delta
+        self.dtype = dtype
+        self.top_k_ratio = top_k_ratio
+        self._reference = None
+        self._residual = None
+
+    @property
+    def lossy(self):
+        return self.dtype is not None or self.top_k_ratio is not None
+
+    def to_update(self, buffer):
+        if self.delta and self._reference is not None:
+            buffer -= self._reference
+        return buffer
+
+    def from_update(self, buffer):
+        if self.delta:
+            if self._reference is not None:
+                buffer += self._reference
+            self._reference = buffer.copy()
+        return buffer
+
+    def encode_chunks(self, flat_model):
+        chunks = flat_model.chunks()
+        # the first delta round sends whole models, they are kept dense so that all clients start from the same model
+        if not self.lossy or (self.delta and self._reference is None):
+            return chunks
+
+        if self._residual is None:
+            self._residual = np.zeros(flat_model.buffer.size, dtype=np.float32)
+
+        encoded = []
+        for idx, chunk in enumerate(chunks):
+            residual = self._residual[idx * flat_model.chunk_size: idx * flat_model.chunk_size + chunk.size]
+            target = chunk + residual
+            encoded_chunk = EncodedChunk.encode(target, self.dtype, self.top_k_ratio)
+            np.subtract(target, encoded_chunk.decode(), out=residual, casting='unsafe')
+            encoded.append(encoded_chunk)
+        return encoded
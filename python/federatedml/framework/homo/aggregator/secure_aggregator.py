@@ -1,5 +1,6 @@
 from federatedml.framework.homo.blocks import RandomPaddingCipherClient, RandomPaddingCipherServer, PadsCipher, RandomPaddingCipherTransVar
 from federatedml.framework.homo.aggregator.aggregator_base import AggregatorBaseClient, AutoSuffix, AggregatorBaseServer
+from federatedml.framework.homo.aggregator.compression import EncodedChunk, UpdateCompressor
 import numpy as np
 from federatedml.framework.weights import Weights, NumpyWeights
 from federatedml.util import LOGGER
@@ -10,16 +11,99 @@ from federatedml.util import consts
 
 
 AGG_TYPE = ['weighted_mean', 'sum', 'mean']
+# elements per chunk when transferring a flattened torch model
+FLAT_MODEL_CHUNK_SIZE = 1 << 22
+
+
+class FlatModelHeader(object):
+    """
+    Sent ahead of the chunks of a FlatModel, tells the receiver how to reassemble the vector
+    """
+
+    def __init__(self, size, dtype, chunk_size):
+        self.size = size
+        self.dtype = dtype
+        self.chunk_size = chunk_size
+
+    @property
+    def chunk_num(self):
+        return (self.size + self.chunk_size - 1) // self.chunk_size
+
+
+class FlatModel(object):
+    """
+    Parameters of a torch model or optimizer flattened to one contiguous numpy vector
+    """
+
+    def __init__(self, buffer: np.ndarray, chunk_size=FLAT_MODEL_CHUNK_SIZE):
+        self.buffer = buffer
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def get_parameters(model):
+        if isinstance(model, t.nn.Module):
+            return [p for p in model.parameters() if p.requires_grad]
+        return [p for group in model.param_groups for p in group["params"]]
+
+    @staticmethod
+    def _to_numpy(p):
+        p = p.detach().cpu()
+        # numpy has no bfloat16, such parameters are upcast here and cast back by to_torch
+        if p.dtype == t.bfloat16:
+            p = p.float()
+        return p.numpy()
+
+    @classmethod
+    def from_torch(cls, model, chunk_size=FLAT_MODEL_CHUNK_SIZE, dtype=None):
+        """
+        dtype of the buffer defaults to the widest parameter dtype and at least float32,
+        padded buffers have to be float64 or the pads do not cancel out
+        """
+        # numpy() of a cpu tensor is a view, parameters are copied once into the flat buffer
+        views = [cls._to_numpy(p) for p in cls.get_parameters(model)]
+        if dtype is None:
+            dtype = np.result_type(np.float32, *[v.dtype for v in views])
+        buffer = np.empty(sum(v.size for v in views), dtype=dtype)
+        offset = 0
+        for v in views:
+            buffer[offset: offset + v.size] = v.reshape(-1)
+            offset += v.size
+        return cls(buffer, chunk_size)
+
+    def to_torch(self, model):
+        offset = 0
+        for p in self.get_parameters(model):
+            n = p.numel()
+            p.data.copy_(t.from_numpy(self.buffer[offset: offset + n]).view(p.shape).to(p.dtype))
+            offset += n
+        return model
+
+    def header(self):
+        return FlatModelHeader(self.buffer.size, self.buffer.dtype.str, self.chunk_size)
+
+    def chunks(self):
+        return [self.buffer[i: i + self.chunk_size] for i in range(0, self.buffer.size, self.chunk_size)]
+
+    @staticmethod
+    def chunk_suffix(suffix, idx):
+        return (suffix if isinstance(suffix, tuple) else (suffix, )) + ('chunk', idx)
 
 
 class SecureAggregatorClient(AggregatorBaseClient):
 
     def __init__(self, secure_aggregate=True, aggregate_type='weighted_mean', aggregate_weight=1.0,
-                 communicate_match_suffix=None):
+                 communicate_match_suffix=None, compressor: UpdateCompressor = None):
 
         super(SecureAggregatorClient, self).__init__(
             communicate_match_suffix=communicate_match_suffix)
         self.secure_aggregate = secure_aggregate
+        if compressor is not None and compressor.lossy and secure_aggregate:
+            raise ValueError('lossy update compression can not be used with secure aggregation, '
+                             'random pads do not survive casting, quantization or sparsification')
+        self.compressor = compressor
+        # bytes of flattened models sent and received
+        self.sent_bytes = 0
+        self.received_bytes = 0
         self.suffix = {
             "local_loss": AutoSuffix("local_loss"),
             "agg_loss": AutoSuffix("agg_loss"),
@@ -79,14 +163,17 @@ class SecureAggregatorClient(AggregatorBaseClient):
                 model = self._random_padding_cipher.encrypt_table(model)
             return model
 
-        if isinstance(model, t.nn.Module):
-            parameters = list(model.parameters())
-            tmp_list = [[np.array(p.cpu().detach().tolist()) for p in parameters if p.requires_grad]]
-            LOGGER.debug('Aggregate trainable parameters: {}/{}'.format(len(tmp_list[0]), len(parameters)))
-        elif isinstance(model, t.optim.Optimizer):
-            tmp_list = [[np.array(p.cpu().detach().tolist()) for p in group["params"]]
-                        for group in model.param_groups]
-        elif isinstance(model, list):
+        if isinstance(model, (t.nn.Module, t.optim.Optimizer)):
+            to_agg = FlatModel.from_torch(model, dtype=np.float64 if self.secure_aggregate else None)
+            LOGGER.debug('Aggregate flattened parameters: {}'.format(to_agg.buffer.size))
+            if self.compressor is not None:
+                self.compressor.to_update(to_agg.buffer)
+            to_agg.buffer *= self._weight
+            if self.secure_aggregate:
+                self._random_padding_cipher.encrypt_inplace(to_agg.buffer)
+            return to_agg
+
+        if isinstance(model, list):
             for p in model:
                 assert isinstance(
                     p, np.ndarray), 'expecting List[np.ndarray], but got {}'.format(p)
@@ -109,6 +196,10 @@ class SecureAggregatorClient(AggregatorBaseClient):
 
         if isinstance(model, np.ndarray):
             return agg_model.unboxed
+        elif isinstance(agg_model, FlatModel):
+            if self.compressor is not None:
+                self.compressor.from_update(agg_model.buffer)
+            return agg_model.to_torch(model)
         elif isinstance(model, Weights):
             return agg_model
         elif is_table(agg_model):
@@ -118,18 +209,7 @@ class SecureAggregatorClient(AggregatorBaseClient):
                 agg_model = [[np_weight.unboxed for np_weight in arr_list]
                              for arr_list in agg_model]
 
-            if isinstance(model, t.nn.Module):
-                for agg_p, p in zip(agg_model[0], [p for p in model.parameters() if p.requires_grad]):
-                    p.data.copy_(t.Tensor(agg_p))
-
-                return model
-            elif isinstance(model, t.optim.Optimizer):
-                for agg_group, group in zip(agg_model, model.param_groups):
-                    for agg_p, p in zip(agg_group, group["params"]):
-                        p.data.copy_(t.Tensor(agg_p))
-                return model
-            else:
-                return agg_model
+            return agg_model
 
     def send_loss(self, loss, suffix=tuple()):
         suffix = self._get_suffix('local_loss', suffix)
@@ -159,11 +239,33 @@ class SecureAggregatorClient(AggregatorBaseClient):
         suffix = self._get_suffix('local_model', suffix)
         # judge model type
         to_agg_model = self._process_model(model)
-        self.send(to_agg_model, suffix)
+        if isinstance(to_agg_model, FlatModel):
+            self._send_flat_model(to_agg_model, suffix)
+        else:
+            self.send(to_agg_model, suffix)
+
+    def _send_flat_model(self, flat_model: FlatModel, suffix):
+        self.send(flat_model.header(), suffix)
+        chunks = self.compressor.encode_chunks(flat_model) if self.compressor is not None else flat_model.chunks()
+        for idx, chunk in enumerate(chunks):
+            self.sent_bytes += chunk.nbytes
+            self.send(chunk, FlatModel.chunk_suffix(suffix, idx))
+
+    def _get_flat_model(self, header: FlatModelHeader, suffix):
+        buffer = np.empty(header.size, dtype=header.dtype)
+        for idx in range(header.chunk_num):
+            start = idx * header.chunk_size
+            chunk = self.get(FlatModel.chunk_suffix(suffix, idx))[0]
+            self.received_bytes += chunk.nbytes
+            buffer[start: start + header.chunk_size] = chunk
+        return FlatModel(buffer, header.chunk_size)
 
     def get_aggregated_model(self, suffix=tuple()):
         suffix = self._get_suffix("agg_model", suffix)
-        return self.get(suffix)[0]
+        agg_model = self.get(suffix)[0]
+        if isinstance(agg_model, FlatModelHeader):
+            agg_model = self._get_flat_model(agg_model, suffix)
+        return agg_model
 
     def get_aggregated_loss(self, suffix=tuple()):
         suffix = self._get_suffix("agg_loss", suffix)
@@ -216,6 +318,10 @@ class SecureAggregatorServer(AggregatorBaseServer):
         models = self.collect(suffix=suffix, party_idx=party_idx)
         agg_result = None
 
+        # Aggregate flattened torch models chunk by chunk
+        if isinstance(models[0], FlatModelHeader):
+            return self._aggregate_flat_model(models[0], suffix, party_idx)
+
         # Aggregate Weights or Numpy Array
         if isinstance(models[0], Weights):
             agg_result = models[0]
@@ -247,9 +353,25 @@ class SecureAggregatorServer(AggregatorBaseServer):
 
         return agg_result
 
+    def _aggregate_flat_model(self, header: FlatModelHeader, suffix, party_idx=-1):
+        buffer = np.empty(header.size, dtype=header.dtype)
+        for idx in range(header.chunk_num):
+            chunks = self.collect(suffix=FlatModel.chunk_suffix(suffix, idx), party_idx=party_idx)
+            agg_chunk = buffer[idx * header.chunk_size: (idx + 1) * header.chunk_size]
+            chunks = [chunk.decode() if isinstance(chunk, EncodedChunk) else chunk for chunk in chunks]
+            np.copyto(agg_chunk, chunks[0])
+            for chunk in chunks[1:]:
+                np.add(agg_chunk, chunk, out=agg_chunk)
+        return FlatModel(buffer, header.chunk_size)
+
     def broadcast_model(self, model, suffix=tuple(), party_idx=-1):
         suffix = self._get_suffix('agg_model', suffix)
-        self.broadcast(model, suffix=suffix, party_idx=party_idx)
+        if isinstance(model, FlatModel):
+            self.broadcast(model.header(), suffix=suffix, party_idx=party_idx)
+            for idx, chunk in enumerate(model.chunks()):
+                self.broadcast(chunk, suffix=FlatModel.chunk_suffix(suffix, idx), party_idx=party_idx)
+        else:
+            self.broadcast(model, suffix=suffix, party_idx=party_idx)
 
     def aggregate_loss(self, suffix=tuple(), party_idx=-1):
 
@@ -0,0 +1,102 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import unittest
+
+import numpy as np
+
+from federatedml.framework.homo.aggregator.compression import EncodedChunk, UpdateCompressor
+from federatedml.framework.homo.aggregator.secure_aggregator import FlatModel, SecureAggregatorServer
+
+
+class TestUpdateCompression(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        self.chunk = np.random.randn(1000).astype(np.float32)
+
+    def test_encode_chunk(self):
+        for dtype, nbytes, rtol in [(None, 4000, 0), ('fp16', 2000, 1e-3), ('bf16', 2000, 1e-2),
+                                    ('int8', 1000, None)]:
+            encoded = EncodedChunk.encode(self.chunk, dtype)
+            self.assertEqual(encoded.nbytes, nbytes)
+            decoded = encoded.decode()
+            self.assertEqual(decoded.dtype, np.float32)
+            if rtol is None:
+                np.testing.assert_allclose(decoded, self.chunk, atol=encoded.scale / 2 + 1e-6)
+            else:
+                np.testing.assert_allclose(decoded, self.chunk, rtol=rtol)
+
+        encoded = EncodedChunk.encode(self.chunk, top_k_ratio=0.1)
+        self.assertEqual(encoded.nbytes, 100 * (4 + 2))
+        decoded = encoded.decode()
+        self.assertEqual(np.count_nonzero(decoded), 100)
+        kept = np.abs(self.chunk) >= np.sort(np.abs(self.chunk))[-100]
+        np.testing.assert_array_equal(decoded[kept], self.chunk[kept])
+
+    def test_error_feedback(self):
+        compressor = UpdateCompressor(delta=True, dtype='int8', top_k_ratio=0.05)
+        # first round sends the whole model densely
+        first = FlatModel(self.chunk.copy(), chunk_size=300)
+        self.assertTrue(all(isinstance(c, np.ndarray) for c in compressor.encode_chunks(first)))
+        compressor.from_update(first.buffer)
+
+        update = np.random.randn(1000).astype(np.float32) * 0.01
+        sent = np.zeros(1000, dtype=np.float32)
+        for _ in range(40):
+            flat_model = FlatModel(compressor._reference + update, chunk_size=300)
+            compressor.to_update(flat_model.buffer)
+            encoded = compressor.encode_chunks(flat_model)
+            self.assertEqual(len(encoded), 4)
+            decoded = np.concatenate([chunk.decode() for chunk in encoded])
+            sent += decoded
+            compressor._reference = compressor._reference.copy()  # keep the reference, only check the residual
+        # what was not sent stays in the residual
+        np.testing.assert_allclose(sent + compressor._residual, update * 40, atol=1e-4)
+
+    def test_delta_aggregation(self):
+        references = np.random.randn(1000).astype(np.float32)
+        clients = [UpdateCompressor(delta=True, dtype='fp16') for _ in range(3)]
+        for compressor in clients:
+            compressor.from_update(references.copy())
+
+        models = [references + np.random.randn(1000).astype(np.float32) * 0.01 for _ in clients]
+        flat_models = []
+        for compressor, model in zip(clients, models):
+            flat_model = FlatModel(model.copy(), chunk_size=256)
+            compressor.to_update(flat_model.buffer)
+            flat_model.buffer *= 1 / 3
+            flat_models.append((flat_model, compressor.encode_chunks(flat_model)))
+
+        server = SecureAggregatorServer.__new__(SecureAggregatorServer)
+        server.collect = lambda suffix, party_idx=-1: [encoded[suffix[-1]] for _, encoded in flat_models]
+        agg_model = server._aggregate_flat_model(flat_models[0][0].header(), ('local_model', 0))
+
+        for compressor in clients:
+            new_model = compressor.from_update(agg_model.buffer.copy())
+            np.testing.assert_allclose(new_model, np.mean(models, axis=0), atol=1e-4)
+
+    def test_param_check(self):
+        with self.assertRaises(ValueError):
+            UpdateCompressor(dtype='fp8')
+        with self.assertRaises(ValueError):
+            UpdateCompressor(top_k_ratio=0.1)
+        with self.assertRaises(ValueError):
+            UpdateCompressor(delta=True, top_k_ratio=1.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import unittest
+
+import numpy as np
+import torch as t
+
+from federatedml.framework.homo.aggregator.secure_aggregator import FlatModel, SecureAggregatorServer
+from federatedml.secureprotol.encrypt import PadsCipher
+
+
+class TestFlatModel(unittest.TestCase):
+
+    def setUp(self):
+        t.manual_seed(0)
+        self.models = [t.nn.Sequential(t.nn.Linear(7, 5), t.nn.ReLU(), t.nn.Linear(5, 3)) for _ in range(3)]
+        for model in self.models:
+            model[0].bias.requires_grad = False
+
+    def test_round_trip(self):
+        flat_model = FlatModel.from_torch(self.models[0], chunk_size=4)
+        self.assertEqual(flat_model.buffer.dtype, np.float32)
+        self.assertEqual(flat_model.buffer.size, 7 * 5 + 5 * 3 + 3)
+        self.assertEqual(sum(chunk.size for chunk in flat_model.chunks()), flat_model.buffer.size)
+        self.assertEqual(flat_model.header().chunk_num, len(flat_model.chunks()))
+
+        flat_model.to_torch(self.models[1])
+        for p, q in zip(self.models[0].parameters(), self.models[1].parameters()):
+            self.assertEqual(t.equal(p, q), p.requires_grad)
+
+        optimizer = t.optim.SGD(self.models[2].parameters(), lr=0.1)
+        flat_optimizer = FlatModel.from_torch(optimizer)
+        self.assertEqual(flat_optimizer.buffer.size, sum(p.numel() for p in self.models[2].parameters()))
+
+    def test_padded_aggregation(self):
+        flat_models = []
+        for uid, model in enumerate(self.models):
+            cipher = PadsCipher()
+            cipher.set_self_uuid(uid)
+            # each pair of parties shares a key
+            cipher.set_exchanged_keys({other: (min(uid, other) + 1) * 7919 + max(uid, other) for other in range(3)})
+            flat_model = FlatModel.from_torch(model, chunk_size=8, dtype=np.float64)
+            flat_model.buffer *= 0.5
+            raw = flat_model.buffer.copy()
+            cipher.encrypt_inplace(flat_model.buffer)
+            self.assertFalse(np.allclose(raw, flat_model.buffer))
+            flat_models.append(flat_model)
+
+        server = SecureAggregatorServer.__new__(SecureAggregatorServer)
+        server.collect = lambda suffix, party_idx=-1: [m.chunks()[suffix[-1]] for m in flat_models]
+        agg_model = server._aggregate_flat_model(flat_models[0].header(), ('local_model', 0))
+
+        expected = sum(FlatModel.from_torch(model).buffer.astype(np.float64) * 0.5 for model in self.models)
+        self.assertEqual(agg_model.buffer.dtype, np.float64)
+        np.testing.assert_allclose(agg_model.buffer, expected, atol=1e-8)
+
+    def test_bfloat16_round_trip(self):
+        model = self.models[0].to(t.bfloat16)
+        flat_model = FlatModel.from_torch(model, dtype=np.float64)
+        self.assertEqual(flat_model.buffer.dtype, np.float64)
+        self.assertEqual(FlatModel.from_torch(model).buffer.dtype, np.float32)
+
+        flat_model.buffer *= 2
+        flat_model.to_torch(self.models[1].to(t.bfloat16))
+        for p, q in zip(self.models[0].parameters(), self.models[1].parameters()):
+            self.assertEqual(q.dtype, t.bfloat16)
+            if p.requires_grad:
+                self.assertTrue(t.equal(p * 2, q))
+
+
+if __name__ == '__main__':
+    unittest.main()
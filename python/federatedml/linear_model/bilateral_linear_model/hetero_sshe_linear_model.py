@@ -17,6 +17,7 @@
 #  limitations under the License.
 
 import copy
+import operator
 from abc import ABC
 
 import numpy as np
@@ -33,6 +34,8 @@ from federatedml.secureprotol.fixedpoint import FixedPointEndec
 from federatedml.secureprotol.spdz import SPDZ
 from federatedml.secureprotol.spdz.secure_matrix.secure_matrix import SecureMatrix
 from federatedml.secureprotol.spdz.tensor import fixedpoint_table, fixedpoint_numpy
+from federatedml.secureprotol.spdz.tensor.fixedpoint_endec import RingFixedPointEndec
+from federatedml.secureprotol.spdz.utils.ring import RING_SIZE, is_ring
 from federatedml.statistic.data_overview import with_weight, scale_sample_weight
 from federatedml.transfer_variable.transfer_class.batch_generator_transfer_variable import \
     BatchGeneratorTransferVariable
@@ -44,6 +47,9 @@ from federatedml.util import consts
 
 
 class HeteroSSHEBase(BaseLinearModel, ABC):
+    # iterations covered by one batch of beaver triplets, a constant so that both parties generate the same batches
+    TRIPLET_POOL_ITERS = 5
+
     def __init__(self):
         super().__init__()
         self.mode = consts.HETERO
@@ -81,11 +87,15 @@ class HeteroSSHEBase(BaseLinearModel, ABC):
             self.self_optimizer = copy.deepcopy(self.optimizer)
             self.remote_optimizer = copy.deepcopy(self.optimizer)
 
-        self.fixedpoint_encoder = FixedPointEndec(n=self.q_field)
+        if is_ring(self.q_field):
+            self.fixedpoint_encoder = RingFixedPointEndec(precision_fractional=params.ring_fraction_bits)
+        else:
+            self.fixedpoint_encoder = FixedPointEndec(n=self.q_field)
         self.converge_transfer_variable = ConvergeCheckerTransferVariable()
         self.secure_matrix_obj = SecureMatrix(party=self.local_party,
                                               q_field=self.q_field,
-                                              other_party=self.other_party)
+                                              other_party=self.other_party,
+                                              encoder=self.fixedpoint_encoder)
 
     def _init_weights(self, model_shape):
         return self.initializer.init_model(model_shape, init_params=self.init_param_obj)
@@ -94,6 +104,63 @@ class HeteroSSHEBase(BaseLinearModel, ABC):
     def is_respectively_reveal(self):
         return self.model_param.reveal_strategy == "respectively"
 
+    @property
+    def is_ring_share(self):
+        return is_ring(self.q_field)
+
+    @property
+    def product_truncate_bits(self):
+        """
+        fractional bits dropped from ring shares of ciphertexts holding products of two encoded numbers
+        """
+        return self.fixedpoint_encoder.precision_fractional if self.is_ring_share else 0
+
+    def _square_sum(self, tensor):
+        """
+        sum of squares of a local table tensor, ring values are not truncated and keep twice the fractional bits
+        """
+        if self.is_ring_share:
+            square_sum = tensor.value.mapValues(lambda x: x * x).reduce(operator.add)
+            return fixedpoint_numpy.FixedPointTensor(square_sum, self.q_field, self.fixedpoint_encoder)
+        return (tensor * tensor).reduce(operator.add)
+
+    def _prepare_triplets(self, spdz, encoded_batch_data, w_self=None, w_remote=None):
+        """
+        offline phase of the next TRIPLET_POOL_ITERS iterations, each kind of triplets is generated in one batch
+        once the pool runs dry: the (1, d) x (d, 1) dots of loss norm and weight diff of shared models, and with
+        ring shares, table triplets of X w and X^T e of every batch, whose tables are fixed over iterations
+        """
+        iters = min(self.TRIPLET_POOL_ITERS, self.max_iter - self.n_iter_)
+        name = ".".join(("triplets", str(self.n_iter_)))
+
+        dot_num = 0
+        if not self.reveal_every_iter:
+            if self.optimizer.penalty == consts.L2_PENALTY:
+                dot_num += len(encoded_batch_data)
+            if self.converge_func_name == "weight_diff":
+                dot_num += 1
+        if dot_num and not len(spdz.triplet_pool):
+            d = w_self.shape[0] + w_remote.shape[0]
+            spdz.prepare_triplets([((1, d), (d, 1))] * (dot_num * iters), name=name)
+
+        if not self.is_ring_share:
+            return
+
+        kinds = ["g"] if self.reveal_every_iter else ["z", "g"]
+        for batch_idx, batch_data in enumerate(encoded_batch_data):
+            for kind in kinds:
+                for table_role in [consts.GUEST, consts.HOST]:
+                    key = (kind, table_role, batch_idx)
+                    if spdz.triplet_pool.table_len(key):
+                        continue
+                    transpose = kind == "g"
+                    key_name = ".".join((name, kind, table_role, str(batch_idx)))
+                    if table_role == self.role:
+                        spdz.prepare_table_triplets(key, batch_data.value, None, iters, transpose, key_name)
+                    else:
+                        like = batch_data.value if transpose else w_remote.value
+                        spdz.prepare_table_triplets(key, None, like, iters, transpose, key_name)
+
     def _cal_z_in_share(self, w_self, w_remote, features, suffix, cipher):
         raise NotImplementedError("Should not be called here")
 
@@ -289,6 +356,9 @@ class HeteroSSHEBase(BaseLinearModel, ABC):
                 if not self.reveal_every_iter:
                     self.self_optimizer.set_iters(self.n_iter_)
                     self.remote_optimizer.set_iters(self.n_iter_)
+                    self._prepare_triplets(spdz, encoded_batch_data, w_self, w_remote)
+                else:
+                    self._prepare_triplets(spdz, encoded_batch_data)
 
                 for batch_idx, batch_data in enumerate(encoded_batch_data):
                     current_suffix = (str(self.n_iter_), str(batch_idx))
@@ -456,7 +526,10 @@ class HeteroSSHEGuestBase(HeteroSSHEBase, ABC):
         # self.batch_generator.register_batch_generator(BatchGeneratorTransferVariable(), has_arbiter=False)
 
     def _transfer_q_field(self):
-        q_field = self.cipher.public_key.n
+        if self.model_param.share_field == "ring":
+            q_field = RING_SIZE
+        else:
+            q_field = self.cipher.public_key.n
         self.transfer_variable.q_field.remote(q_field, role=consts.HOST, suffix=("q_field",))
 
         return q_field
@@ -487,12 +560,14 @@ class HeteroSSHEGuestBase(HeteroSSHEBase, ABC):
         za_share = self.secure_matrix_obj.secure_matrix_mul(w_remote,
                                                             tensor_name=".".join(za_suffix),
                                                             cipher=cipher,
-                                                            suffix=za_suffix)
+                                                            suffix=za_suffix,
+                                                            triplet_key=("z", consts.HOST, int(suffix[1])))
         zb_suffix = ("zb",) + suffix
         zb_share = self.secure_matrix_obj.secure_matrix_mul(features,
                                                             tensor_name=".".join(zb_suffix),
                                                             cipher=None,
-                                                            suffix=zb_suffix)
+                                                            suffix=zb_suffix,
+                                                            triplet_key=("z", consts.GUEST, int(suffix[1])))
 
         z = z1 + za_share + zb_share
         return z
@@ -507,10 +582,23 @@ class HeteroSSHEGuestBase(HeteroSSHEBase, ABC):
                                                          tensor_name=".".join(ga2_suffix),
                                                          cipher=cipher,
                                                          suffix=ga2_suffix,
-                                                         is_fixedpoint_table=False)
+                                                         is_fixedpoint_table=False,
+                                                         triplet_key=("g", consts.HOST, int(suffix[1])))
 
         # LOGGER.debug(f"ga2_2: {ga2_2}")
 
+        if self.is_ring_share:
+            # encrypted error carries 2f fractional bits in ring mode, guest gradient is computed
+            # from the error shares instead: own share locally, host share under host's key
+            gb2_suffix = ("gb2",) + suffix
+            gb2 = features.dot_local(error_1_n) + \
+                self.secure_matrix_obj.secure_matrix_mul(features,
+                                                         tensor_name=".".join(gb2_suffix),
+                                                         cipher=None,
+                                                         suffix=gb2_suffix,
+                                                         triplet_key=("g", consts.GUEST, int(suffix[1])))
+            return gb2, ga2_2
+
         encrypt_g = self.encrypted_error.dot(features) * (1 / batch_num)
 
         # LOGGER.debug(f"encrypt_g: {encrypt_g}")
@@ -643,13 +731,15 @@ class HeteroSSHEHostBase(HeteroSSHEBase, ABC):
         za_share = self.secure_matrix_obj.secure_matrix_mul(features,
                                                             tensor_name=".".join(za_suffix),
                                                             cipher=None,
-                                                            suffix=za_suffix)
+                                                            suffix=za_suffix,
+                                                            triplet_key=("z", consts.HOST, int(suffix[1])))
 
         zb_suffix = ("zb",) + suffix
         zb_share = self.secure_matrix_obj.secure_matrix_mul(w_remote,
                                                             tensor_name=".".join(zb_suffix),
                                                             cipher=cipher,
-                                                            suffix=zb_suffix)
+                                                            suffix=zb_suffix,
+                                                            triplet_key=("z", consts.GUEST, int(suffix[1])))
 
         z = z1 + za_share + zb_share
         return z
@@ -666,12 +756,23 @@ class HeteroSSHEHostBase(HeteroSSHEBase, ABC):
         ga2_1 = self.secure_matrix_obj.secure_matrix_mul(features,
                                                          tensor_name=".".join(zb_suffix),
                                                          cipher=None,
-                                                         suffix=zb_suffix)
+                                                         suffix=zb_suffix,
+                                                         triplet_key=("g", consts.HOST, int(suffix[1])))
 
         # LOGGER.debug(f"ga2_1: {ga2_1}")
 
         ga_new = ga + ga2_1
 
+        if self.is_ring_share:
+            gb2_suffix = ("gb2",) + suffix
+            gb1 = self.secure_matrix_obj.secure_matrix_mul(error * (1 / batch_num),
+                                                           tensor_name=".".join(gb2_suffix),
+                                                           cipher=cipher,
+                                                           suffix=gb2_suffix,
+                                                           is_fixedpoint_table=False,
+                                                           triplet_key=("g", consts.GUEST, int(suffix[1])))
+            return ga_new, gb1
+
         tensor_name = ".".join(("encrypt_g",) + suffix)
         gb1 = SecureMatrix.from_source(tensor_name,
                                        self.other_party,
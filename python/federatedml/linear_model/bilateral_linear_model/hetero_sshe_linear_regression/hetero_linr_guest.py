@@ -44,17 +44,23 @@ class HeteroLinRGuest(HeteroSSHEGuestBase):
 
         self.encrypted_wx = complete_z
 
-        self.encrypted_error = complete_z - labels
-        if batch_weight:
-            complete_z = complete_z * batch_weight
-            self.encrypted_error = self.encrypted_error * batch_weight
+        if self.is_ring_share:
+            # scaled to 2f fractional bits like other shared products, so that host truncates the same way
+            endec = self.fixedpoint_encoder
+            complete_z = complete_z * endec.encode_signed(batch_weight if batch_weight else 1.0)
+        else:
+            self.encrypted_error = complete_z - labels
+            if batch_weight:
+                complete_z = complete_z * batch_weight
+                self.encrypted_error = self.encrypted_error * batch_weight
 
         tensor_name = ".".join(("complete_z",) + suffix)
         shared_z = SecureMatrix.from_source(tensor_name,
                                             complete_z,
                                             cipher,
                                             self.fixedpoint_encoder.n,
-                                            self.fixedpoint_encoder)
+                                            self.fixedpoint_encoder,
+                                            truncate_bits=self.product_truncate_bits)
         return shared_z
 
     def compute_loss(self, weights, labels, suffix, cipher=None):
@@ -65,7 +71,7 @@ class HeteroLinRGuest(HeteroSSHEGuestBase):
         """
         LOGGER.info(f"[compute_loss]: Calculate loss ...")
         wxy_self = self.wx_self - labels
-        wxy_self_square = (wxy_self * wxy_self).reduce(operator.add)
+        wxy_self_square = self._square_sum(wxy_self)
 
         wxy = (self.wx_remote * wxy_self).reduce(operator.add)
         wx_remote_square = self.secure_matrix_obj.share_encrypted_matrix(suffix=suffix,
@@ -75,7 +81,8 @@ class HeteroLinRGuest(HeteroSSHEGuestBase):
         loss = (wx_remote_square + wxy_self_square) + wxy * 2
 
         batch_num = self.batch_num[int(suffix[2])]
-        loss = loss * (1 / (batch_num * 2))
+        if not self.is_ring_share:
+            loss = loss * (1 / (batch_num * 2))
         # loss = (wx_remote_square + wxy_self_square + 2 * wxy) / (2 * batch_num)
 
         tensor_name = ".".join(("shared_loss",) + suffix)
@@ -83,7 +90,11 @@ class HeteroLinRGuest(HeteroSSHEGuestBase):
                                               source=loss,
                                               cipher=None,
                                               q_field=self.fixedpoint_encoder.n,
-                                              encoder=self.fixedpoint_encoder)
+                                              encoder=self.fixedpoint_encoder,
+                                              truncate_bits=self.product_truncate_bits)
+        if self.is_ring_share:
+            # ring shares carry the sum with 2f fractional bits truncated to f, they are averaged afterwards
+            share_loss = share_loss * (1 / (batch_num * 2))
 
         tensor_name = ".".join(("loss",) + suffix)
         loss = share_loss.get(tensor_name=tensor_name,
@@ -14,7 +14,6 @@
 #  limitations under the License.
 
 import functools
-import operator
 
 import numpy as np
 
@@ -57,7 +56,8 @@ class HeteroLinRHost(HeteroSSHEHostBase):
                                             self.other_party,
                                             cipher,
                                             self.fixedpoint_encoder.n,
-                                            self.fixedpoint_encoder)
+                                            self.fixedpoint_encoder,
+                                            truncate_bits=self.product_truncate_bits)
 
         return shared_z
 
@@ -68,7 +68,7 @@ class HeteroLinRHost(HeteroSSHEHostBase):
             (wx - y)^2 = (wx_h)^2 + (wx_g - y)^2 + 2 * (wx_h * (wx_g - y))
         """
         LOGGER.info(f"[compute_loss]: Calculate loss ...")
-        wx_self_square = (self.wx_self * self.wx_self).reduce(operator.add)
+        wx_self_square = self._square_sum(self.wx_self)
 
         self.secure_matrix_obj.share_encrypted_matrix(suffix=suffix,
                                                       is_remote=True,
@@ -81,7 +81,10 @@ class HeteroLinRHost(HeteroSSHEHostBase):
                                               cipher=cipher,
                                               q_field=self.fixedpoint_encoder.n,
                                               encoder=self.fixedpoint_encoder,
-                                              is_fixedpoint_table=False)
+                                              is_fixedpoint_table=False,
+                                              truncate_bits=self.product_truncate_bits)
+        if self.is_ring_share:
+            share_loss = share_loss * (1 / (2 * self.batch_num[int(suffix[2])]))
 
         if self.reveal_every_iter:
             loss_norm = self.optimizer.loss_norm(weights)
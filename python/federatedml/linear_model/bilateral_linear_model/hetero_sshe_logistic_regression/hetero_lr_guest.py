@@ -52,8 +52,30 @@ class HeteroLRGuest(HeteroSSHEGuestBase):
 
         return sigmoid_z
 
+    def _compute_ring_sigmoid(self, complete_z, batch_weight):
+        """
+        0.25 * z + 0.5 over the integers, the ciphertexts carry 2f fractional bits
+        """
+        endec = self.fixedpoint_encoder
+        bits = 2 * endec.precision_fractional
+        if batch_weight:
+            return complete_z * endec.encode_signed(batch_weight.mapValues(lambda b: 0.25 * b)) + \
+                endec.encode_signed(batch_weight.mapValues(lambda b: 0.5 * b), bits)
+        return complete_z * endec.encode_signed(0.25) + endec.encode_signed(0.5, bits)
+
     def forward(self, weights, features, labels, suffix, cipher, batch_weight):
         self._cal_z(weights, features, suffix, cipher)
+        if self.is_ring_share:
+            self.encrypted_wx = self.wx_self + self.wx_remote
+            sigmoid_z = self._compute_ring_sigmoid(self.encrypted_wx, batch_weight)
+            tensor_name = ".".join(("sigmoid_z",) + suffix)
+            return SecureMatrix.from_source(tensor_name,
+                                            sigmoid_z,
+                                            cipher,
+                                            self.fixedpoint_encoder.n,
+                                            self.fixedpoint_encoder,
+                                            truncate_bits=self.product_truncate_bits)
+
         sigmoid_z = self._compute_sigmoid(self.wx_self, self.wx_remote)
 
         self.encrypted_wx = self.wx_self + self.wx_remote
@@ -71,39 +93,69 @@ class HeteroLRGuest(HeteroSSHEGuestBase):
                                                     self.fixedpoint_encoder)
         return shared_sigmoid_z
 
-    def compute_loss(self, weights, labels, suffix, cipher=None):
+    def _compute_ring_loss(self, labels, suffix):
         """
-          Use Taylor series expand log loss:
-          Loss = - y * log(h(x)) - (1-y) * log(1 - h(x)) where h(x) = 1/(1+exp(-wx))
-          Then loss' = - (1/N)*∑(log(1/2) - 1/2*wx + ywx -1/8(wx)^2)
+        8N * (loss' + log(1/2)) = -\\sum((8y - 4)wx - (wx)^2) is computed over the integers with 2f fractional
+        bits in ring mode, shares of it are scaled by -1/(8N) afterwards
         """
-        LOGGER.info(f"[compute_loss]: Calculate loss ...")
-        wx = (-0.5 * self.encrypted_wx).reduce(operator.add)
-        ywx = (self.encrypted_wx * labels).reduce(operator.add)
-
-        wx_square = (2 * self.wx_remote * self.wx_self).reduce(operator.add) + \
-                    (self.wx_self * self.wx_self).reduce(operator.add)
+        endec = self.fixedpoint_encoder
+        ywx = (self.encrypted_wx * endec.encode_signed(labels.mapValues(lambda y: 8 * y - 4))).reduce(operator.add)
+        wx_square = (self.wx_remote * self.wx_self * 2).reduce(operator.add) + self._square_sum(self.wx_self)
 
         wx_remote_square = self.secure_matrix_obj.share_encrypted_matrix(suffix=suffix,
                                                                          is_remote=False,
                                                                          cipher=None,
                                                                          wx_self_square=None)[0]
 
-        wx_square = (wx_remote_square + wx_square) * -0.125
-
-        batch_num = self.batch_num[int(suffix[2])]
-        loss = (wx + ywx + wx_square) * (-1 / batch_num) - np.log(0.5)
-
         tensor_name = ".".join(("shared_loss",) + suffix)
         share_loss = SecureMatrix.from_source(tensor_name=tensor_name,
-                                              source=loss,
+                                              source=ywx - wx_square - wx_remote_square,
                                               cipher=None,
                                               q_field=self.fixedpoint_encoder.n,
-                                              encoder=self.fixedpoint_encoder)
+                                              encoder=self.fixedpoint_encoder,
+                                              truncate_bits=self.product_truncate_bits)
 
+        batch_num = self.batch_num[int(suffix[2])]
+        share_loss = share_loss * (-1 / (8 * batch_num))
         tensor_name = ".".join(("loss",) + suffix)
-        loss = share_loss.get(tensor_name=tensor_name,
-                              broadcast=False)[0]
+        return share_loss.get(tensor_name=tensor_name, broadcast=False)[0] - np.log(0.5)
+
+    def compute_loss(self, weights, labels, suffix, cipher=None):
+        """
+          Use Taylor series expand log loss:
+          Loss = - y * log(h(x)) - (1-y) * log(1 - h(x)) where h(x) = 1/(1+exp(-wx))
+          Then loss' = - (1/N)*∑(log(1/2) - 1/2*wx + ywx -1/8(wx)^2)
+        """
+        LOGGER.info(f"[compute_loss]: Calculate loss ...")
+        if self.is_ring_share:
+            loss = self._compute_ring_loss(labels, suffix)
+        else:
+            wx = (-0.5 * self.encrypted_wx).reduce(operator.add)
+            ywx = (self.encrypted_wx * labels).reduce(operator.add)
+
+            wx_square = (2 * self.wx_remote * self.wx_self).reduce(operator.add) + \
+                        (self.wx_self * self.wx_self).reduce(operator.add)
+
+            wx_remote_square = self.secure_matrix_obj.share_encrypted_matrix(suffix=suffix,
+                                                                             is_remote=False,
+                                                                             cipher=None,
+                                                                             wx_self_square=None)[0]
+
+            wx_square = (wx_remote_square + wx_square) * -0.125
+
+            batch_num = self.batch_num[int(suffix[2])]
+            loss = (wx + ywx + wx_square) * (-1 / batch_num) - np.log(0.5)
+
+            tensor_name = ".".join(("shared_loss",) + suffix)
+            share_loss = SecureMatrix.from_source(tensor_name=tensor_name,
+                                                  source=loss,
+                                                  cipher=None,
+                                                  q_field=self.fixedpoint_encoder.n,
+                                                  encoder=self.fixedpoint_encoder)
+
+            tensor_name = ".".join(("loss",) + suffix)
+            loss = share_loss.get(tensor_name=tensor_name,
+                                  broadcast=False)[0]
 
         if self.reveal_every_iter:
             loss_norm = self.optimizer.loss_norm(weights)
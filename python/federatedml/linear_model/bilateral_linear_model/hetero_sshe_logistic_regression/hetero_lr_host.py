@@ -14,7 +14,6 @@
 #  limitations under the License.
 
 import functools
-import operator
 
 import numpy as np
 
@@ -63,7 +62,8 @@ class HeteroLRHost(HeteroSSHEHostBase):
                                                     self.other_party,
                                                     cipher,
                                                     self.fixedpoint_encoder.n,
-                                                    self.fixedpoint_encoder)
+                                                    self.fixedpoint_encoder,
+                                                    truncate_bits=self.product_truncate_bits)
 
         return shared_sigmoid_z
 
@@ -74,7 +74,7 @@ class HeteroLRHost(HeteroSSHEHostBase):
           Then loss' = - (1/N)*∑(log(1/2) - 1/2*wx + ywx - 1/8(wx)^2)
         """
         LOGGER.info(f"[compute_loss]: Calculate loss ...")
-        wx_self_square = (self.wx_self * self.wx_self).reduce(operator.add)
+        wx_self_square = self._square_sum(self.wx_self)
 
         self.secure_matrix_obj.share_encrypted_matrix(suffix=suffix,
                                                       is_remote=True,
@@ -87,7 +87,10 @@ class HeteroLRHost(HeteroSSHEHostBase):
                                               cipher=cipher,
                                               q_field=self.fixedpoint_encoder.n,
                                               encoder=self.fixedpoint_encoder,
-                                              is_fixedpoint_table=False)
+                                              is_fixedpoint_table=False,
+                                              truncate_bits=self.product_truncate_bits)
+        if self.is_ring_share:
+            share_loss = share_loss * (-1 / (8 * self.batch_num[int(suffix[2])]))
 
         if self.reveal_every_iter:
             loss_norm = self.optimizer.loss_norm(weights)
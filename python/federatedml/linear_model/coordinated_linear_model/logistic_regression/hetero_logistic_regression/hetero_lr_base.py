@@ -21,7 +21,7 @@ from federatedml.linear_model.coordinated_linear_model.logistic_regression.base_
 from federatedml.optim.gradient.hetero_sqn_gradient import sqn_factory
 from federatedml.param.logistic_regression_param import HeteroLogisticParam
 from federatedml.protobuf.generated import lr_model_meta_pb2
-from federatedml.secureprotol import PaillierEncrypt, IpclPaillierEncrypt
+from federatedml.secureprotol import PaillierEncrypt, IpclPaillierEncrypt, RustPaillierEncrypt
 from federatedml.transfer_variable.transfer_class.hetero_lr_transfer_variable import HeteroLRTransferVariable
 from federatedml.util import LOGGER
 from federatedml.util import consts
@@ -50,6 +50,8 @@ class HeteroLRBase(BaseLogisticRegression):
             self.cipher_operator = PaillierEncrypt()
         elif params.encrypt_param.method == consts.PAILLIER_IPCL:
             self.cipher_operator = IpclPaillierEncrypt()
+        elif params.encrypt_param.method == consts.PAILLIER_RUST:
+            self.cipher_operator = RustPaillierEncrypt()
         else:
             raise ValueError(f"Unsupported encryption method: {params.encrypt_param.method}")
 
@@ -14,15 +14,20 @@
 #  limitations under the License.
 #
 
+import functools
 import random
+
+import numpy as np
+
 from fate_arch.session import computing_session as session
 from federatedml.model_selection import indices
+from federatedml.secureprotol.random import CounterRandomPads
 
 from federatedml.util import LOGGER
 
 
 class MiniBatch:
-    def __init__(self, data_inst, batch_size=320, shuffle=False, batch_strategy="full", masked_rate=0):
+    def __init__(self, data_inst, batch_size=320, shuffle=False, batch_strategy="full", masked_rate=0, hash_seed=None):
         self.batch_data_sids = None
         self.batch_nums = 0
         self.data_inst = data_inst
@@ -32,6 +37,7 @@ class MiniBatch:
         self.batch_data_generator = None
         self.batch_mutable = False
         self.batch_masked = False
+        self.hash_seed = hash_seed
 
         if batch_size == -1:
             self.batch_size = data_inst.count()
@@ -67,10 +73,14 @@ class MiniBatch:
         # if self.batch_mutable:
         #     self.__generate_batch_data()
     def __init_mini_batch_data_seperator(self, data_insts, batch_size, batch_strategy, masked_rate, shuffle):
-        self.data_sids_iter, data_size = indices.collect_index(data_insts)
+        if batch_strategy == "hash":
+            # batches are derived from sample ids on each partition, ids are not collected
+            data_size = data_insts.count()
+        else:
+            self.data_sids_iter, data_size = indices.collect_index(data_insts)
 
         self.batch_data_generator = get_batch_generator(
-            data_size, batch_size, batch_strategy, masked_rate, shuffle=shuffle)
+            data_size, batch_size, batch_strategy, masked_rate, shuffle=shuffle, hash_seed=self.hash_seed)
         self.batch_nums = self.batch_data_generator.batch_nums
         self.batch_mutable = self.batch_data_generator.batch_mutable()
         self.masked_batch_size = self.batch_data_generator.masked_batch_size
@@ -87,7 +97,13 @@ class MiniBatch:
             self.data_inst, self.data_sids_iter)
 
 
-def get_batch_generator(data_size, batch_size, batch_strategy, masked_rate, shuffle):
+def get_batch_generator(data_size, batch_size, batch_strategy, masked_rate, shuffle, hash_seed=None):
+    if batch_strategy == "hash":
+        if masked_rate > 0 and batch_size < data_size:
+            LOGGER.warning("If using hash batch strategy and masked rate > 0, shuffle will always be true")
+            shuffle = True
+        return HashBatchDataGenerator(data_size, batch_size, shuffle=shuffle, masked_rate=masked_rate, seed=hash_seed)
+
     if batch_size >= data_size:
         LOGGER.warning("As batch_size >= data size, all batch strategy will be disabled")
         return FullBatchDataGenerator(data_size, data_size, shuffle=False)
@@ -199,3 +215,94 @@ class RandomBatchDataGenerator(BatchDataGenerator):
                                                                                             batch_ids,
                                                                                             masked_ids)
             return [masked_index_table], [batch_data_table]
+
+
+def _masked_hash_batch_ids(mask_value, batch_nums, mask_rate):
+    # samples of other batches are masked in a window of mask values, which moves with batch id,
+    # batches whose window covers mask_value start around (1 - mask_value) * batch_nums
+    start = int(np.floor((1 - mask_value) * batch_nums)) - 1
+    stop = min(start + int(np.ceil(mask_rate * batch_nums)) + 2, start + batch_nums)
+    return [bid % batch_nums for bid in range(start, stop)
+            if (mask_value + (bid % batch_nums) / batch_nums) % 1.0 < mask_rate]
+
+
+def _bucket_hash_batch(kv_iterator, seed, batch_nums, mask_rate):
+    """
+    group samples of a partition by batch id, a bucket holds samples of the batch and ids of its masked index
+    """
+    kvs = list(kv_iterator)
+    if not kvs:
+        return []
+    rands = CounterRandomPads(seed).rand(CounterRandomPads.hash_keys([key for key, _ in kvs]), 2)
+    batch_ids = np.minimum((rands[:, 0] * batch_nums).astype(np.int64), batch_nums - 1)
+    buckets = {}
+    for (key, value), batch_id, mask_value in zip(kvs, batch_ids.tolist(), rands[:, 1].tolist()):
+        buckets.setdefault(batch_id, ([], []))[0].append((key, value))
+        if mask_rate > 0:
+            buckets[batch_id][1].append((key, None))
+            for masked_id in _masked_hash_batch_ids(mask_value, batch_nums, mask_rate):
+                if masked_id != batch_id:
+                    buckets.setdefault(masked_id, ([], []))[1].append((key, None))
+    return list(buckets.items())
+
+
+def _merge_buckets(bucket1, bucket2):
+    return bucket1[0] + bucket2[0], bucket1[1] + bucket2[1]
+
+
+def _is_bucket(key, value, batch_id):
+    return key == batch_id
+
+
+def _bucket_data(key, value):
+    return value[0]
+
+
+def _bucket_index(key, value):
+    return value[1]
+
+
+class HashBatchDataGenerator(BatchDataGenerator):
+    """
+    Assign samples to batches by a seeded hash of sample id, computed on each partition, parties sharing the seed
+    get the same batches without exchanging sample ids. Batch sizes follow a binomial distribution around batch_size.
+    If shuffle, hash seed changes every epoch.
+    """
+
+    def __init__(self, data_size, batch_size, shuffle=False, masked_rate=0, seed=None):
+        super(HashBatchDataGenerator, self).__init__(data_size, batch_size, shuffle, masked_rate=masked_rate)
+        self.data_size = data_size
+        self.batch_nums = max(1, (data_size + batch_size - 1) // batch_size)
+        self.seed = random.SystemRandom().getrandbits(64) if seed is None else seed
+        self.epoch = 0
+
+        LOGGER.debug(f"Init Hash Batch Data Generator, batch_nums: {self.batch_nums}, batch_size: {self.batch_size}, "
+                     f"masked_batch_size: {self.masked_batch_size}, shuffle: {self.shuffle}")
+
+    def generate_data(self, data_insts, data_sids=None):
+        seed = (self.seed + self.epoch) % (1 << 64) if self.shuffle else self.seed
+        self.epoch += 1
+        masked = self.masked_batch_size > self.batch_size
+        mask_rate = (self.masked_batch_size - self.batch_size) / max(1, self.data_size - self.batch_size)
+        # samples are bucketed by batch in one pass, each batch is then read from its own bucket only
+        buckets = data_insts.mapReducePartitions(
+            functools.partial(_bucket_hash_batch, seed=seed, batch_nums=self.batch_nums,
+                              mask_rate=mask_rate if masked else 0),
+            _merge_buckets)
+
+        index_table = []
+        batch_data = []
+        for bid in range(self.batch_nums):
+            bucket = buckets.filter(functools.partial(_is_bucket, batch_id=bid))
+            batch_data_table = bucket.flatMap(_bucket_data)
+            if masked:
+                batch_index_table = bucket.flatMap(_bucket_index)
+            else:
+                batch_index_table = batch_data_table.mapValues(lambda v: None)
+            index_table.append(batch_index_table)
+            batch_data.append(batch_data_table)
+
+        return index_table, batch_data
+
+    def batch_mutable(self):
+        return self.masked_batch_size > self.batch_size or self.shuffle
@@ -23,6 +23,7 @@ from fate_arch.session import computing_session as session
 from federatedml.feature.instance import Instance
 from federatedml.model_selection import MiniBatch
 from federatedml.model_selection import indices
+from federatedml.model_selection.mini_batch import _masked_hash_batch_ids
 
 session.init("123")
 
@@ -99,6 +100,63 @@ class TestMiniBatch(unittest.TestCase):
                 # print("data_nums: {}, batch_size: {}".format(d_n, b_s))
                 self.test_mini_batch_data_generator(data_num=d_n, batch_size=b_s)
 
+    def test_hash_batch(self):
+        data_num, batch_size = 1000, 64
+        data_instances = self.prepare_data(data_num=data_num, feature_num=5)
+        mini_batch_obj = MiniBatch(data_inst=data_instances, batch_size=batch_size, batch_strategy="hash")
+        self.assertEqual(mini_batch_obj.batch_nums, (data_num + batch_size - 1) // batch_size)
+        self.assertIsNone(mini_batch_obj.data_sids_iter)
+        self.assertFalse(mini_batch_obj.batch_mutable)
+
+        batches = [dict(batch_data.collect()) for batch_data in mini_batch_obj.mini_batch_data_generator()]
+        self.assertEqual(sum(len(batch) for batch in batches), data_num)
+        self.assertEqual(set().union(*[batch.keys() for batch in batches]), set(range(data_num)))
+        self.assertTrue(all(batch[key].inst_id == key for batch in batches for key in batch))
+
+        # a party with the same seed gets the same batches from differently partitioned data
+        other_data = session.parallelize(list(data_instances.collect()), include_key=True, partition=7)
+        other_obj = MiniBatch(data_inst=other_data, batch_size=batch_size, batch_strategy="hash",
+                              hash_seed=mini_batch_obj.batch_data_generator.seed)
+        other_batches = [set(dict(batch_data.collect())) for batch_data in other_obj.mini_batch_data_generator()]
+        self.assertEqual(other_batches, [set(batch) for batch in batches])
+
+    def test_hash_batch_non_ascii_ids(self):
+        keys = ["张三", "李四", "id_0", "müller"]
+        data_instances = session.parallelize([(key, Instance(inst_id=key, features=np.ones(3))) for key in keys],
+                                             include_key=True, partition=2)
+        mini_batch_obj = MiniBatch(data_inst=data_instances, batch_size=2, batch_strategy="hash")
+        batches = [set(dict(batch_data.collect())) for batch_data in mini_batch_obj.mini_batch_data_generator()]
+        self.assertEqual(set().union(*batches), set(keys))
+
+    def test_masked_hash_batch_ids(self):
+        rand = np.random.RandomState(0)
+        for batch_nums in [1, 2, 7, 50]:
+            for mask_rate in [0.01, 0.3, 0.99, 1.0]:
+                for mask_value in rand.random_sample(50).tolist() + [0.0]:
+                    expected = [bid for bid in range(batch_nums)
+                                if (mask_value + bid / batch_nums) % 1.0 < mask_rate]
+                    self.assertEqual(sorted(_masked_hash_batch_ids(mask_value, batch_nums, mask_rate)), expected)
+
+    def test_hash_batch_shuffle_and_mask(self):
+        data_num, batch_size = 1000, 100
+        data_instances = self.prepare_data(data_num=data_num, feature_num=5)
+        mini_batch_obj = MiniBatch(data_inst=data_instances, batch_size=batch_size, batch_strategy="hash",
+                                   masked_rate=1)
+        self.assertTrue(mini_batch_obj.batch_mutable)
+
+        epoch_batches = []
+        for _ in range(2):
+            mini_batch_obj.generate_batch_data()
+            batches = []
+            for batch_data, index_data in mini_batch_obj.mini_batch_data_generator(result='both'):
+                batch_keys, index_keys = set(dict(batch_data.collect())), set(dict(index_data.collect()))
+                self.assertTrue(batch_keys <= index_keys)
+                self.assertTrue(len(index_keys) > len(batch_keys))
+                batches.append(batch_keys)
+            self.assertEqual(sum(len(batch) for batch in batches), data_num)
+            epoch_batches.append(batches)
+        self.assertNotEqual(epoch_batches[0], epoch_batches[1])
+
 
 if __name__ == '__main__':
     unittest.main()
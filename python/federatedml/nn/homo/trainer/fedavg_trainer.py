@@ -9,10 +9,12 @@ from torch.utils.data import DataLoader
 from torch.utils.data.distributed import DistributedSampler
 from federatedml.framework.homo.aggregator.secure_aggregator import SecureAggregatorClient as SecureAggClient
 from federatedml.framework.homo.aggregator.secure_aggregator import SecureAggregatorServer as SecureAggServer
+from federatedml.framework.homo.aggregator.compression import UpdateCompressor, UPDATE_DTYPES
 from federatedml.nn.backend.utils import deepspeed_util
 from federatedml.nn.backend.utils import distributed_util
 from federatedml.nn.dataset.base import Dataset
 from federatedml.nn.homo.trainer.trainer_base import TrainerBase
+from federatedml.model_base import Metric
 from federatedml.util import LOGGER, consts
 from federatedml.optim.convergence import converge_func_factory
 
@@ -38,6 +40,12 @@ class FedAVGTrainer(TrainerBase):
 
     aggregate_every_n_epoch: None or int. if None, aggregate model on the end of every epoch, if int, aggregate
                              every n epochs.
+    delta_update: bool, if True, clients send the difference between local model and the last aggregated model
+                  instead of the whole model, can be used with secure aggregation.
+    update_dtype: None, 'fp16', 'bf16' or 'int8', lossy encoding of sent updates to save uplink bandwidth, values lost
+                  by encoding are added back to the next update. Not available when secure_aggregate is True.
+    top_k_ratio: None or float in (0, 1], only send this ratio of largest update values of each chunk by
+                 magnitude, requires delta_update. Not available when secure_aggregate is True.
 
     cuda: None, int or list of int. if None, use cpu; if int, use the the {int} device, if list of int, use the
           This trainier will automatically detect use DataParallel for multi GPU training, the first index will be
@@ -62,6 +70,7 @@ class FedAVGTrainer(TrainerBase):
     def __init__(self, epochs=10, batch_size=512,  # training parameter
                  early_stop=None, tol=0.0001,  # early stop parameters
                  secure_aggregate=True, weighted_aggregation=True, aggregate_every_n_epoch=None,  # federation
+                 delta_update=False, update_dtype=None, top_k_ratio=None,  # update compression
                  cuda=None,
                  pin_memory=True, shuffle=True, data_loader_worker=0,  # GPU & dataloader
                  validation_freqs=None,  # validation configuration
@@ -97,6 +106,19 @@ class FedAVGTrainer(TrainerBase):
         self.weighted_aggregation = weighted_aggregation
         self.aggregate_every_n_epoch = aggregate_every_n_epoch
 
+        # update compression param
+        self.delta_update = delta_update
+        self.update_dtype = update_dtype
+        self.top_k_ratio = top_k_ratio
+        assert self.update_dtype is None or self.update_dtype in UPDATE_DTYPES, \
+            'update dtype must be None or in {}, but got {}'.format(UPDATE_DTYPES, self.update_dtype)
+        if self.top_k_ratio is not None:
+            assert self.is_float(self.top_k_ratio) and 0 < self.top_k_ratio <= 1, \
+                'top_k_ratio must be a float in (0, 1], but got {}'.format(self.top_k_ratio)
+            assert self.delta_update, 'top_k_ratio requires delta_update'
+        if self.secure_aggregate and (self.update_dtype is not None or self.top_k_ratio is not None):
+            raise ValueError('update_dtype and top_k_ratio are not available when secure_aggregate is True')
+
         # GPU, check cuda setting
         self.cuda = cuda
         self.cuda_main_device = None
@@ -145,8 +167,10 @@ class FedAVGTrainer(TrainerBase):
                                   'aggregate_every_n_epoch'],
                                  self.is_pos_int,
                                  '{} is not a positive int')
-        self.check_trainer_param([self.secure_aggregate, self.weighted_aggregation, self.pin_memory, self.save_to_local_dir], [
-                                 'secure_aggregate', 'weighted_aggregation', 'pin_memory', 'save_to_local_dir'], self.is_bool, '{} is not a bool')
+        self.check_trainer_param([self.secure_aggregate, self.weighted_aggregation, self.pin_memory, self.save_to_local_dir,
+                                  self.delta_update],
+                                 ['secure_aggregate', 'weighted_aggregation', 'pin_memory', 'save_to_local_dir',
+                                  'delta_update'], self.is_bool, '{} is not a bool')
         self.check_trainer_param(
             [self.tol], ['tol'], self.is_float, '{} is not a float')
 
@@ -166,8 +190,13 @@ class FedAVGTrainer(TrainerBase):
                 sample_num = 1.0
 
             if not distributed_util.is_distributed() or distributed_util.is_rank_0():
+                compressor = None
+                if self.delta_update or self.update_dtype is not None or self.top_k_ratio is not None:
+                    compressor = UpdateCompressor(delta=self.delta_update, dtype=self.update_dtype,
+                                                  top_k_ratio=self.top_k_ratio)
                 client_agg = SecureAggClient(
-                    self.secure_aggregate, aggregate_weight=sample_num, communicate_match_suffix=self.comm_suffix)
+                    self.secure_aggregate, aggregate_weight=sample_num, communicate_match_suffix=self.comm_suffix,
+                    compressor=compressor)
             else:
                 client_agg = None
         else:
@@ -331,7 +360,10 @@ class FedAVGTrainer(TrainerBase):
                         deepspeed_util.gather_model(self.model)
 
                     if not distributed_util.is_distributed() or distributed_util.is_rank_0():
+                        transfer_bytes = client_agg.sent_bytes + client_agg.received_bytes
                         self.model = client_agg.model_aggregation(self.model)
+                        self.callback_transfer_bytes(
+                            client_agg.sent_bytes + client_agg.received_bytes - transfer_bytes, i)
                         if distributed_util.is_distributed() and distributed_util.get_num_workers() > 1:
                             self._share_model()
                     else:
@@ -418,6 +450,15 @@ class FedAVGTrainer(TrainerBase):
                 'metrics_summary': evaluation_summary
             })
 
+    def callback_transfer_bytes(self, transfer_bytes: int, epoch_idx: int):
+        # round trip bytes of model parameters in an aggregation round
+        if self._tracker is not None:
+            self._tracker.log_metric_data(
+                metric_name="transfer_bytes",
+                metric_namespace="train",
+                metrics=[Metric(epoch_idx, transfer_bytes)],
+            )
+
     def _predict(self, dataset: Dataset):
         pred_result = []
 
@@ -92,6 +92,9 @@ class DataTransformParam(BaseParam):
         Valid if input_format is "tag" or "sparse", and multiple columns are considered as match_ids,
         the index of match_id, default: 0
         This param works only when data meta has been set with uploading/binding.
+    instance_block_size: None or int
+        if set, output data is grouped into InstanceBlock, each block holds at most instance_block_size rows
+        in columnar format: a dense feature matrix with label, weight and match_id arrays, default: None
     """
 
     def __init__(self, input_format="dense", delimitor=',', data_type='float64',
@@ -102,7 +105,7 @@ class DataTransformParam(BaseParam):
                  outlier_impute=None, outlier_replace_value=0,
                  with_label=False, label_name='y',
                  label_type='int', output_format='dense', need_run=True,
-                 with_match_id=False, match_id_name='', match_id_index=0):
+                 with_match_id=False, match_id_name='', match_id_index=0, instance_block_size=None):
         self.input_format = input_format
         self.delimitor = delimitor
         self.data_type = data_type
@@ -125,6 +128,7 @@ class DataTransformParam(BaseParam):
         self.with_match_id = with_match_id
         self.match_id_name = match_id_name
         self.match_id_index = match_id_index
+        self.instance_block_size = instance_block_size
 
     def check(self):
 
@@ -178,4 +182,8 @@ class DataTransformParam(BaseParam):
         if self.match_id_name is not None and not isinstance(self.match_id_name, str):
             raise ValueError("match_id_name should be str")
 
+        if self.instance_block_size is not None and \
+                (not isinstance(self.instance_block_size, int) or self.instance_block_size <= 0):
+            raise ValueError("instance_block_size should be None or positive integer")
+
         return True
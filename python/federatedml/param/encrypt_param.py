@@ -26,8 +26,9 @@ class EncryptParam(BaseParam):
 
     Parameters
     ----------
-    method : {'Paillier'}
+    method : {'Paillier', 'IPCL', 'PaillierRust'}
         If method is 'Paillier', Paillier encryption will be used for federated ml.
+        'IPCL' and 'PaillierRust' are Paillier encryption backed by ipcl_python and fate_crypto respectively.
         To use non-encryption version in HomoLR, set this to None.
         For detail of Paillier encryption, please check out the paper mentioned in README file.
     key_length : int, default: 1024
@@ -57,6 +58,8 @@ class EncryptParam(BaseParam):
                 self.method = consts.PAILLIER
             elif user_input == "ipcl":
                 self.method = consts.PAILLIER_IPCL
+            elif user_input in ["paillier_rust", consts.PAILLIER_RUST.lower()]:
+                self.method = consts.PAILLIER_RUST
             else:
                 raise ValueError(
                     "encrypt_param's method {} not supported".format(user_input))
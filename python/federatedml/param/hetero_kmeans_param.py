@@ -33,14 +33,26 @@ class KmeansParam(BaseParam):
         tol
     random_stat : None or int
         random seed
+    init_method : {'random', 'k-means++'}, default 'random'
+        Method to choose initial centroids. 'random' chooses samples uniformly, 'k-means++' chooses each
+        next centroid with probability proportional to the squared distance to chosen centroids,
+        which takes k - 1 extra rounds of distance aggregation.
+    batch_size : int, default -1
+        Number of samples used to update centroids in each iteration, centroids are moved towards the mean
+        of their assigned samples with per-centroid learning rates (mini-batch k-means).
+        Samples are grouped into blocks of min(batch_size, 1024) samples on average by a hash of sample ids,
+        and a batch is made of whole blocks, so the number of samples in a batch varies around batch_size.
+        -1 means use all data in each iteration.
     """
 
-    def __init__(self, k=5, max_iter=300, tol=0.001, random_stat=None):
+    def __init__(self, k=5, max_iter=300, tol=0.001, random_stat=None, init_method='random', batch_size=-1):
         super(KmeansParam, self).__init__()
         self.k = k
         self.max_iter = max_iter
         self.tol = tol
         self.random_stat = random_stat
+        self.init_method = init_method
+        self.batch_size = batch_size
 
     def check(self):
         descr = "Kmeans_param's"
@@ -75,3 +87,16 @@ class KmeansParam(BaseParam):
             elif self.random_stat < 0:
                 raise ValueError(
                     descr + "random_stat not supported, should be larger than/equal to 0".format(self.random_stat))
+
+        if self.init_method not in ['random', 'k-means++']:
+            raise ValueError(
+                descr + "init_method {} not supported, should be 'random' or 'k-means++'".format(self.init_method))
+
+        if not isinstance(self.batch_size, int):
+            raise ValueError(
+                descr + "batch_size {} not supported, should be int type".format(self.batch_size))
+        elif self.batch_size != -1 and self.batch_size <= 0:
+            raise ValueError(
+                descr + "batch_size {} not supported, should be -1 or larger than 0".format(self.batch_size))
+
+        return True
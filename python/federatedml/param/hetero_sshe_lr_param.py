@@ -70,6 +70,12 @@ class HeteroSSHELRParam(LogisticParam):
     reveal_every_iter: bool, default: False
         Whether reconstruct model weights every iteration. If so, Regularization is available.
         The performance will be better as well since the algorithm process is simplified.
+    share_field: str, "paillier" or "ring", default: "paillier"
+        "paillier": Secret shares live in the field of the Paillier modulus, held as python big integers.
+        "ring": Secret shares live in the ring Z_2^64, held as uint64 arrays, the arithmetic wraps around natively.
+        Only the "respectively" reveal strategy is supported.
+    ring_fraction_bits: int, default: 16
+        Fractional bits of fixed point numbers when share_field is "ring".
 
     """
 
@@ -82,6 +88,8 @@ class HeteroSSHELRParam(LogisticParam):
                  multi_class='ovr', use_mix_rand=True,
                  reveal_strategy="respectively",
                  reveal_every_iter=False,
+                 share_field="paillier",
+                 ring_fraction_bits=16,
                  callback_param=CallbackParam(),
                  encrypted_mode_calculator_param=EncryptedModeCalculatorParam()
                  ):
@@ -96,6 +104,8 @@ class HeteroSSHELRParam(LogisticParam):
         self.use_mix_rand = use_mix_rand
         self.reveal_strategy = reveal_strategy
         self.reveal_every_iter = reveal_every_iter
+        self.share_field = share_field
+        self.ring_fraction_bits = ring_fraction_bits
         self.encrypted_mode_calculator_param = copy.deepcopy(encrypted_mode_calculator_param)
 
     def check(self):
@@ -150,6 +160,15 @@ class HeteroSSHELRParam(LogisticParam):
                                                            ["respectively", "encrypted_reveal_in_host"],
                                                            f"{descr} reveal_strategy")
 
+        self.share_field = self.check_and_change_lower(self.share_field, ["paillier", "ring"],
+                                                       f"{descr} share_field")
+        if self.share_field == "ring":
+            if self.reveal_strategy != "respectively":
+                raise ValueError(f"{descr} reveal_strategy should be 'respectively' when share_field is 'ring'")
+            if type(self.ring_fraction_bits).__name__ != "int" or not 0 < self.ring_fraction_bits <= 24:
+                raise ValueError(f"{descr} ring_fraction_bits should be an int in (0, 24], "
+                                 f"but got {self.ring_fraction_bits}")
+
         if self.reveal_strategy == "encrypted_reveal_in_host" and self.reveal_every_iter:
             raise PermissionError("reveal strategy: encrypted_reveal_in_host mode is not allow to reveal every iter.")
         self.encrypted_mode_calculator_param.check()
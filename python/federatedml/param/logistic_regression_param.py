@@ -45,10 +45,12 @@ class LogisticParam(LinearModelParam):
         Regularization strength coefficient.
     optimizer : {'rmsprop', 'sgd', 'adam', 'nesterov_momentum_sgd', 'adagrad'}, default: 'rmsprop'
         Optimize method.
-    batch_strategy : str, {'full', 'random'}, default: "full"
+    batch_strategy : str, {'full', 'random', 'hash'}, default: "full"
         Strategy to generate batch data.
             a) full: use full data to generate batch_data, batch_nums every iteration is ceil(data_size /  batch_size)
             b) random: select data randomly from full data, batch_num will be 1 every iteration.
+            c) hash: like full, but samples are assigned to batches by a seeded hash of sample id on each partition,
+               so sample ids are not collected, batch sizes vary around batch_size.
     batch_size : int, default: -1
         Batch size when updating model. -1 means use all data in a batch. i.e. Not to use mini-batch strategy.
     shuffle : bool, default: True
@@ -144,7 +146,7 @@ class LogisticParam(LinearModelParam):
         descr = "logistic_param's"
         super(LogisticParam, self).check()
         self.predict_param.check()
-        if self.encrypt_param.method not in [consts.PAILLIER, consts.PAILLIER_IPCL, None]:
+        if self.encrypt_param.method not in [consts.PAILLIER, consts.PAILLIER_IPCL, consts.PAILLIER_RUST, None]:
             raise ValueError(
                 "logistic_param's encrypted method support 'Paillier' or None only")
         self.multi_class = self.check_and_change_lower(
@@ -152,8 +154,8 @@ class LogisticParam(LinearModelParam):
         if not isinstance(self.masked_rate, (float, int)) or self.masked_rate < 0:
             raise ValueError(
                 "masked rate should be non-negative numeric number")
-        if not isinstance(self.batch_strategy, str) or self.batch_strategy.lower() not in ["full", "random"]:
-            raise ValueError("batch strategy should be full or random")
+        if not isinstance(self.batch_strategy, str) or self.batch_strategy.lower() not in ["full", "random", "hash"]:
+            raise ValueError("batch strategy should be full, random or hash")
         self.batch_strategy = self.batch_strategy.lower()
         if not isinstance(self.shuffle, bool):
             raise ValueError("shuffle should be boolean type")
@@ -18,8 +18,34 @@
 #
 
 
+import functools
+
 from fate_crypto.psi import Curve25519
 
+POINT_BYTES = 32
+
+_MODE_FORMATS = {
+    0: lambda k, v, e: (k, e),
+    1: lambda k, v, e: (e, -1),
+    2: lambda k, v, e: (e, v),
+    3: lambda k, v, e: (k, (e, v)),
+    4: lambda k, v, e: (e, k),
+    5: lambda k, v, e: (e, (k, v)),
+}
+
+
+def _unpack(buffer):
+    return [buffer[i: i + POINT_BYTES] for i in range(0, len(buffer), POINT_BYTES)]
+
+
+def _process_partition(kv_iterator, mode, batch_func):
+    keys, values = [], []
+    for k, v in kv_iterator:
+        keys.append(k)
+        values.append(v)
+    fmt = _MODE_FORMATS[mode]
+    return [fmt(k, v, e) for k, v, e in zip(keys, values, batch_func(keys))]
+
 
 class EllipticCurve(object):
     """
@@ -49,6 +75,28 @@ class EllipticCurve(object):
     def sign(self, ciphertext):
         return self.curve.diffie_hellman(ciphertext)
 
+    def encrypt_batch(self, plaintexts):
+        """
+        list of encrypted plaintexts, computed in one native call if fate_crypto provides batch methods
+        """
+        if hasattr(self.curve, "encrypt_batch"):
+            return _unpack(self.curve.encrypt_batch(plaintexts))
+        return [self.curve.encrypt(plaintext) for plaintext in plaintexts]
+
+    def sign_batch(self, ciphertexts):
+        if hasattr(self.curve, "diffie_hellman_batch"):
+            return _unpack(self.curve.diffie_hellman_batch(b"".join(ciphertexts)))
+        return [self.curve.diffie_hellman(ciphertext) for ciphertext in ciphertexts]
+
+    @staticmethod
+    def _map_partitions(plaintable, mode, batch_func, error_msg):
+        if mode not in _MODE_FORMATS:
+            raise ValueError(error_msg)
+        # modes keeping the original key do not move rows across partitions
+        return plaintable.mapPartitions(functools.partial(_process_partition, mode=mode, batch_func=batch_func),
+                                        use_previous_behavior=False,
+                                        preserves_partitioning=mode in (0, 3))
+
     def map_hash_encrypt(self, plaintable, mode, hash_operator, salt):
         """
         adapted from CryptorExecutor
@@ -63,42 +111,11 @@ class EllipticCurve(object):
         :param mode: int
         :return: Table
         """
-        if mode == 0:
-            return plaintable.map(
-                lambda k, v: (
-                    k, self.curve.encrypt(
-                        hash_operator.compute(
-                            k, suffix_salt=salt))))
-        elif mode == 1:
-            return plaintable.map(
-                lambda k, v: (
-                    self.curve.encrypt(
-                        hash_operator.compute(
-                            k, suffix_salt=salt)), -1))
-        elif mode == 2:
-            return plaintable.map(
-                lambda k, v: (
-                    self.curve.encrypt(
-                        hash_operator.compute(
-                            k, suffix_salt=salt)), v))
-        elif mode == 3:
-            return plaintable.map(
-                lambda k, v: (
-                    k, (self.curve.encrypt(
-                        hash_operator.compute(
-                            k, suffix_salt=salt)), v)))
-        elif mode == 4:
-            return plaintable.map(
-                lambda k, v: (
-                    self.curve.encrypt(
-                        hash_operator.compute(
-                            k, suffix_salt=salt)), k))
-        elif mode == 5:
-            return plaintable.map(
-                lambda k, v: (self.curve.encrypt(hash_operator.compute(k, suffix_salt=salt)), (k, v)))
-
-        else:
-            raise ValueError("Unsupported mode for elliptic curve map encryption")
+        def _hash_encrypt(keys):
+            return self.encrypt_batch([hash_operator.compute(k, suffix_salt=salt) for k in keys])
+
+        return self._map_partitions(plaintable, mode, _hash_encrypt,
+                                    "Unsupported mode for elliptic curve map encryption")
 
     def map_encrypt(self, plaintable, mode):
         """
@@ -114,21 +131,8 @@ class EllipticCurve(object):
         :param mode: int
         :return: Table
         """
-        if mode == 0:
-            return plaintable.map(lambda k, v: (k, self.curve.encrypt(k)))
-        elif mode == 1:
-            return plaintable.map(lambda k, v: (self.curve.encrypt(k), -1))
-        elif mode == 2:
-            return plaintable.map(lambda k, v: (self.curve.encrypt(k), v))
-        elif mode == 3:
-            return plaintable.map(lambda k, v: (k, (self.curve.encrypt(k), v)))
-        elif mode == 4:
-            return plaintable.map(lambda k, v: (self.curve.encrypt(k), k))
-        elif mode == 5:
-            return plaintable.map(lambda k, v: (self.curve.encrypt(k), (k, v)))
-
-        else:
-            raise ValueError("Unsupported mode for elliptic curve map encryption")
+        return self._map_partitions(plaintable, mode, self.encrypt_batch,
+                                    "Unsupported mode for elliptic curve map encryption")
 
     def map_sign(self, plaintable, mode):
         """
@@ -144,18 +148,5 @@ class EllipticCurve(object):
         :param mode: int
         :return: Table
         """
-        if mode == 0:
-            return plaintable.map(lambda k, v: (k, self.curve.diffie_hellman(k)))
-        elif mode == 1:
-            return plaintable.map(lambda k, v: (self.curve.diffie_hellman(k), -1))
-        elif mode == 2:
-            return plaintable.map(lambda k, v: (self.curve.diffie_hellman(k), v))
-        elif mode == 3:
-            return plaintable.map(lambda k, v: (k, (self.curve.diffie_hellman(k), v)))
-        elif mode == 4:
-            return plaintable.map(lambda k, v: (self.curve.diffie_hellman(k), k))
-        elif mode == 5:
-            return plaintable.map(lambda k, v: (self.curve.diffie_hellman(k), (k, v)))
-
-        else:
-            raise ValueError("Unsupported mode for elliptic curve map sign")
+        return self._map_partitions(plaintable, mode, self.sign_batch,
+                                    "Unsupported mode for elliptic curve map sign")
@@ -15,7 +15,6 @@
 #
 
 import functools
-import hashlib
 from collections import Iterable
 
 import numpy as np
@@ -26,13 +25,20 @@ from federatedml.feature.instance import Instance
 from federatedml.secureprotol import gmpy_math
 from federatedml.secureprotol.fate_paillier import PaillierKeypair
 from federatedml.secureprotol.fate_paillier import PaillierEncryptedNumber
-from federatedml.secureprotol.random import RandomPads
+from federatedml.secureprotol.fate_paillier import PaillierObfuscatorPool
+from federatedml.secureprotol.fixedpoint import FixedPointNumber
+from federatedml.secureprotol.random import RandomPads, CounterRandomPads
 
 try:
     from ipcl_python import PaillierKeypair as IpclPaillierKeypair
 except ImportError:
     pass
 
+try:
+    from fate_crypto import paillier as fate_crypto_paillier
+except ImportError:
+    pass
+
 _TORCH_VALID = False
 try:
     import torch
@@ -124,6 +130,22 @@ class Encrypt(object):
     def recursive_raw_decrypt(self, X):
         return self._recursive_func(X, self.raw_decrypt)
 
+    def _recursive_batch_func(self, obj, batch_func):
+        """
+        same as _recursive_func, but every flat array, list or tuple goes through batch_func in one call
+        """
+        if isinstance(obj, np.ndarray):
+            return np.reshape(batch_func(list(obj.flat)), obj.shape)
+        elif isinstance(obj, Iterable):
+            if any(isinstance(o, Iterable) for o in obj):
+                return type(obj)(
+                    self._recursive_batch_func(o, batch_func) if isinstance(o, Iterable) else batch_func([o])[0]
+                    for o in obj
+                )
+            return type(obj)(batch_func(list(obj)))
+        else:
+            return batch_func([obj])[0]
+
 
 class RsaEncrypt(Encrypt):
     def __init__(self):
@@ -179,6 +201,7 @@ class RsaEncrypt(Encrypt):
 class PaillierEncrypt(Encrypt):
     def __init__(self):
         super(PaillierEncrypt, self).__init__()
+        self._obfuscator_pool = None
 
     def generate_key(self, n_length=1024):
         self.public_key, self.privacy_key = PaillierKeypair.generate_keypair(
@@ -224,6 +247,167 @@ class PaillierEncrypt(Encrypt):
         raw_en_func = functools.partial(self.raw_encrypt, exponent=exponent)
         return self._recursive_func(X, raw_en_func)
 
+    def _get_obfuscator_pool(self):
+        if getattr(self, "_obfuscator_pool", None) is None or self._obfuscator_pool.public_key != self.public_key:
+            self._obfuscator_pool = PaillierObfuscatorPool(self.public_key)
+        return self._obfuscator_pool
+
+    def encrypt_list(self, values):
+        if self.public_key is not None:
+            return self.public_key.encrypt_batch(values, obfuscator_pool=self._get_obfuscator_pool())
+        else:
+            return [None] * len(values)
+
+    def decrypt_list(self, values):
+        if self.privacy_key is not None:
+            return self.privacy_key.decrypt_batch(values)
+        else:
+            return [None] * len(values)
+
+    def raw_encrypt_list(self, values, exponent=0):
+        ciphertexts = self.public_key.raw_encrypt_batch(values, obfuscator_pool=self._get_obfuscator_pool())
+        return [PaillierEncryptedNumber(public_key=self.public_key, ciphertext=ciphertext, exponent=exponent,
+                                        is_obfuscated=True) for ciphertext in ciphertexts]
+
+    def raw_decrypt_list(self, values):
+        return self.privacy_key.raw_decrypt_batch([value.ciphertext(be_secure=False) for value in values])
+
+    def encrypt_vector(self, values):
+        return self.public_key.encrypt_vector(values, obfuscator_pool=self._get_obfuscator_pool())
+
+    def decrypt_vector(self, encrypted_vector):
+        return self.privacy_key.decrypt_vector(encrypted_vector)
+
+    def recursive_encrypt_batch(self, X):
+        return self._recursive_batch_func(X, self.encrypt_list)
+
+    def recursive_decrypt_batch(self, X):
+        return self._recursive_batch_func(X, self.decrypt_list)
+
+    def recursive_raw_encrypt_batch(self, X, exponent=0):
+        raw_en_func = functools.partial(self.raw_encrypt_list, exponent=exponent)
+        return self._recursive_batch_func(X, raw_en_func)
+
+    def recursive_raw_decrypt_batch(self, X):
+        return self._recursive_batch_func(X, self.raw_decrypt_list)
+
+
+def _ints_to_bytes(values, width):
+    return b"".join(int(value).to_bytes(width, "little") for value in values)
+
+
+def _bytes_to_ints(data, width):
+    return [int.from_bytes(data[i: i + width], "little") for i in range(0, len(data), width)]
+
+
+class RustPaillierEncrypt(PaillierEncrypt):
+    """
+    Paillier encryption whose batch operations run in `fate_crypto.paillier`, which releases the GIL
+    and works on a whole batch in parallel.
+    Keys and ciphertexts are the same `fate_paillier` objects as in PaillierEncrypt, so the two can be mixed.
+    """
+
+    def __init__(self):
+        super(RustPaillierEncrypt, self).__init__()
+        self._native_public_key = None
+        self._native_privacy_key = None
+
+    def __getstate__(self):
+        # native keys are not picklable, they are rebuilt lazily
+        state = self.__dict__.copy()
+        state["_native_public_key"] = None
+        state["_native_privacy_key"] = None
+        return state
+
+    def _get_native_public_key(self):
+        if self._native_public_key is None or self._native_public_key[0] != self.public_key:
+            n = self.public_key.n
+            native_key = fate_crypto_paillier.PK(_ints_to_bytes([n], (n.bit_length() + 7) // 8))
+            self._native_public_key = (self.public_key, native_key)
+        return self._native_public_key[1]
+
+    def _get_native_privacy_key(self):
+        if self._native_privacy_key is None or self._native_privacy_key[0] != self.privacy_key:
+            p, q = self.privacy_key.p, self.privacy_key.q
+            native_key = fate_crypto_paillier.SK(_ints_to_bytes([p], (p.bit_length() + 7) // 8),
+                                                 _ints_to_bytes([q], (q.bit_length() + 7) // 8))
+            self._native_privacy_key = (self.privacy_key, native_key)
+        return self._native_privacy_key[1]
+
+    def _to_ciphertext_vector(self, values):
+        for value in values:
+            if not isinstance(value, PaillierEncryptedNumber):
+                raise TypeError("value should be an PaillierEncryptedNumber, not: %s" % type(value))
+            if value.public_key != self.public_key:
+                raise ValueError("value was encrypted against a different key!")
+        width = 2 * self._get_native_public_key().n_bytes
+        return fate_crypto_paillier.CiphertextVector(
+            _ints_to_bytes([value.ciphertext(be_secure=False) for value in values], width), width)
+
+    def _from_ciphertext_vector(self, ciphertexts, exponents, is_obfuscated):
+        return [PaillierEncryptedNumber(public_key=self.public_key, ciphertext=ciphertext, exponent=exponent,
+                                        is_obfuscated=is_obfuscated)
+                for ciphertext, exponent in zip(_bytes_to_ints(ciphertexts.to_bytes(), ciphertexts.width),
+                                                exponents)]
+
+    def _native_encrypt(self, plaintexts, exponents):
+        native_key = self._get_native_public_key()
+        ciphertexts = native_key.encrypt(_ints_to_bytes(plaintexts, native_key.n_bytes))
+        return self._from_ciphertext_vector(ciphertexts, exponents, is_obfuscated=True)
+
+    def encrypt_list(self, values):
+        if self.public_key is None:
+            return [None] * len(values)
+        encodings = [FixedPointNumber.encode(value.decode() if isinstance(value, FixedPointNumber) else value,
+                                             self.public_key.n, self.public_key.max_int) for value in values]
+        return self._native_encrypt([encoding.encoding for encoding in encodings],
+                                    [encoding.exponent for encoding in encodings])
+
+    def raw_encrypt_list(self, values, exponent=0):
+        return self._native_encrypt(values, [exponent] * len(values))
+
+    def raw_decrypt_list(self, values):
+        native_key = self._get_native_privacy_key()
+        return _bytes_to_ints(native_key.decrypt(self._to_ciphertext_vector(values)), native_key.n_bytes)
+
+    def decrypt_list(self, values):
+        if self.privacy_key is None:
+            return [None] * len(values)
+        return [FixedPointNumber(encoded, value.exponent, self.public_key.n, self.public_key.max_int).decode()
+                for encoded, value in zip(self.raw_decrypt_list(values), values)]
+
+    def add_list(self, x, y):
+        """
+        Element-wise sum of two lists of PaillierEncryptedNumber, same as `[a + b for a, b in zip(x, y)]`
+        """
+        if len(x) != len(y):
+            raise ValueError(f"length mismatch: {len(x)} != {len(y)}")
+        aligned_x, aligned_y = [], []
+        for a, b in zip(x, y):
+            if a.exponent < b.exponent:
+                a = a.increase_exponent_to(b.exponent)
+            elif a.exponent > b.exponent:
+                b = b.increase_exponent_to(a.exponent)
+            aligned_x.append(a)
+            aligned_y.append(b)
+        ciphertexts = self._get_native_public_key().add(self._to_ciphertext_vector(aligned_x),
+                                                        self._to_ciphertext_vector(aligned_y))
+        return self._from_ciphertext_vector(ciphertexts, [a.exponent for a in aligned_x], is_obfuscated=False)
+
+    def mul_list(self, x, scalars):
+        """
+        Element-wise product of PaillierEncryptedNumber and scalars, same as `[a * s for a, s in zip(x, scalars)]`
+        """
+        if len(x) != len(scalars):
+            raise ValueError(f"length mismatch: {len(x)} != {len(scalars)}")
+        native_key = self._get_native_public_key()
+        encodings = [FixedPointNumber.encode(scalar.decode() if isinstance(scalar, FixedPointNumber) else scalar,
+                                             self.public_key.n, self.public_key.max_int) for scalar in scalars]
+        ciphertexts = native_key.mul(self._to_ciphertext_vector(x),
+                                     _ints_to_bytes([encoding.encoding for encoding in encodings], native_key.n_bytes))
+        return self._from_ciphertext_vector(ciphertexts, [a.exponent + encoding.exponent
+                                                          for a, encoding in zip(x, encodings)], is_obfuscated=False)
+
 
 class IpclPaillierEncrypt(Encrypt):
     """
@@ -360,44 +544,51 @@ class PadsCipher(Encrypt):
                 ret -= rand.rand(1)[0] * self._amplify_factor
         return ret
 
-    def encrypt_table(self, table):
-        def _pad(key, value, seeds, amplify_factor):
-            has_key = int(hashlib.md5(f"{key}".encode("ascii")).hexdigest(), 16)
-            # LOGGER.debug(f"hash_key: {has_key}")
-            cur_seeds = {uid: has_key + seed for uid, seed in seeds.items()}
-            # LOGGER.debug(f"cur_seeds: {cur_seeds}")
-            rands = {uid: RandomPads(v & 0xFFFFFFFF) for uid, v in cur_seeds.items()}
-
-            if isinstance(value, np.ndarray):
-                ret = value
-                for uid, rand in rands.items():
-                    if uid > self._uuid:
-                        ret = rand.add_rand_pads(ret, 1.0 * amplify_factor)
-                    else:
-                        ret = rand.add_rand_pads(ret, -1.0 * amplify_factor)
-                return key, ret
-            elif isinstance(value, Instance):
-                ret = value.features
-                for uid, rand in rands.items():
-                    if uid > self._uuid:
-                        ret = rand.add_rand_pads(ret, 1.0 * amplify_factor)
-                    else:
-                        ret = rand.add_rand_pads(ret, -1.0 * amplify_factor)
-                value.features = ret
-                return key, value
+    def encrypt_inplace(self, value: np.ndarray):
+        """
+        add pads to a contiguous float64 array in place, without the temporary copies of encrypt,
+        pads added to narrower floats lose precision and do not cancel out
+        """
+        if value.dtype != np.float64:
+            raise ValueError(f"in place pads need a float64 array, got {value.dtype}")
+        for uid, rand in self._rands.items():
+            if uid > self._uuid:
+                rand.add_rand_pads_inplace(value, 1.0 * self._amplify_factor)
             else:
-                ret = value
-                for uid, rand in rands.items():
-                    if uid > self._uuid:
-                        ret += rand.rand(1)[0] * self._amplify_factor
-                    else:
-                        ret -= rand.rand(1)[0] * self._amplify_factor
-                return key, ret
+                rand.add_rand_pads_inplace(value, -1.0 * self._amplify_factor)
+        return value
+
+    def encrypt_table(self, table):
+        def _pad_partition(kvs, rands, amplify_factor):
+            kvs = list(kvs)
+            if not kvs:
+                return []
+
+            # pads of a row are derived from its key, so they cancel out whatever the partitioning is
+            key_hashes = CounterRandomPads.hash_keys([key for key, _ in kvs])
+            arrays = [value.features if isinstance(value, Instance) else value for _, value in kvs]
+            size = max(np.size(arr) for arr in arrays)
+            pads = np.zeros((len(kvs), size))
+            for sign, rand in rands:
+                pads += rand.rand(key_hashes, size) * (sign * amplify_factor)
+
+            ret = []
+            for (key, value), arr, pad in zip(kvs, arrays, pads):
+                if isinstance(value, np.ndarray):
+                    ret.append((key, value + pad[:value.size].reshape(value.shape)))
+                elif isinstance(value, Instance):
+                    value.features = arr + pad[:arr.size].reshape(arr.shape)
+                    ret.append((key, value))
+                else:
+                    ret.append((key, value + pad[0]))
+            return ret
 
         f = functools.partial(
-            _pad, seeds=self._seeds, amplify_factor=self._amplify_factor
+            _pad_partition,
+            rands=[(1.0 if uid > self._uuid else -1.0, CounterRandomPads(seed)) for uid, seed in self._seeds.items()],
+            amplify_factor=self._amplify_factor
         )
-        return table.map(f)
+        return table.mapPartitions(f, use_previous_behavior=False, preserves_partitioning=True)
 
     def decrypt(self, value):
         return value
@@ -30,6 +30,9 @@ class EncryptModeCalculator(object):
     mode: str, accpet 'strict', 'fast', 'balance'. "confusion_opt", "confusion_opt_balance"
           'strict': means that re-encrypted every function call.
 
+    values of a row are encrypted and decrypted in batch if encrypter is PaillierEncrypt,
+    obfuscators come from a fixed-base pool and decryption powmods are done in one call.
+
     """
 
     def __init__(self, encrypter=None, mode="strict", re_encrypted_rate=1):
@@ -57,15 +60,22 @@ class EncryptModeCalculator(object):
 
     def get_enc_func(self, encrypter, raw_enc=False, exponent=0):
         if not raw_enc:
+            if isinstance(encrypter, PaillierEncrypt):
+                return encrypter.recursive_encrypt_batch
             return encrypter.recursive_encrypt
         else:
             if isinstance(self.encrypter, PaillierEncrypt):
-                raw_en_func = functools.partial(self.encrypter.recursive_raw_encrypt, exponent=exponent)
+                raw_en_func = functools.partial(self.encrypter.recursive_raw_encrypt_batch, exponent=exponent)
             else:
                 raw_en_func = self.encrypter.recursive_raw_encrypt
 
             return raw_en_func
 
+    def get_dec_func(self, encrypter):
+        if isinstance(encrypter, PaillierEncrypt):
+            return encrypter.recursive_decrypt_batch
+        return encrypter.recursive_decrypt
+
     def encrypt(self, input_data):
         """
         Encrypt data according to different mode
@@ -92,13 +102,13 @@ class EncryptModeCalculator(object):
         pass
 
     def recursive_encrypt(self, input_data):
-        return self.encrypter.recursive_encrypt(input_data)
+        return self.get_enc_func(self.encrypter)(input_data)
 
     def distribute_encrypt(self, input_data):
         return self.encrypt(input_data)
 
     def distribute_decrypt(self, input_data):
-        return self.encrypter.distribute_decrypt(input_data)
+        return input_data.mapValues(self.get_dec_func(self.encrypter))
 
     def recursive_decrypt(self, input_data):
-        return self.encrypter.recursive_decrypt(input_data)
+        return self.get_dec_func(self.encrypter)(input_data)
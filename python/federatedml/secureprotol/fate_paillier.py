@@ -16,8 +16,11 @@
 #  limitations under the License.
 #
 
+import os
 import random
 
+import numpy as np
+
 from federatedml.secureprotol import gmpy_math
 from federatedml.secureprotol.fixedpoint import FixedPointNumber
 
@@ -108,6 +111,103 @@ class PaillierPublicKey(object):
 
         return encryptednumber
 
+    def raw_encrypt_batch(self, plaintexts, obfuscator_pool=None):
+        """return list of obfuscated ciphertexts of plaintexts, obfuscators are taken from obfuscator_pool
+        """
+        if obfuscator_pool is None:
+            obfuscator_pool = PaillierObfuscatorPool(self)
+        elif obfuscator_pool.public_key != self:
+            raise ValueError("obfuscator_pool was generated against a different key!")
+
+        for plaintext in plaintexts:
+            if not isinstance(plaintext, int):
+                raise TypeError("plaintext should be int, but got: %s" %
+                                type(plaintext))
+
+        # (n * m + 1) % n^2 is the inverse of (n * (n - m) + 1), same as the shortcut of raw_encrypt
+        n, nsquare = gmpy_math.mpz(self.n), gmpy_math.mpz(self.nsquare)
+        obfuscators = obfuscator_pool.generate(len(plaintexts))
+        return [int((n * plaintext + 1) % nsquare * obfuscator % nsquare)
+                for plaintext, obfuscator in zip(plaintexts, obfuscators)]
+
+    def encrypt_batch(self, values, precision=None, obfuscator_pool=None):
+        """Encode and Paillier encrypt a list of real numbers, return list of obfuscated PaillierEncryptedNumber.
+        """
+        encodings = [FixedPointNumber.encode(value.decode() if isinstance(value, FixedPointNumber) else value,
+                                             self.n, self.max_int, precision) for value in values]
+        ciphertexts = self.raw_encrypt_batch([encoding.encoding for encoding in encodings], obfuscator_pool)
+        return [PaillierEncryptedNumber(self, ciphertext, encoding.exponent, is_obfuscated=True)
+                for ciphertext, encoding in zip(ciphertexts, encodings)]
+
+    def encrypt_vector(self, values, precision=None, obfuscator_pool=None):
+        """Encode a list of real numbers at one shared exponent and Paillier encrypt them,
+        return obfuscated PaillierEncryptedVector.
+        """
+        values = [value.decode() if isinstance(value, FixedPointNumber) else value for value in values]
+        exponent = max((FixedPointNumber.encode(value, self.n, self.max_int, precision).exponent
+                        for value in values), default=0)
+        plaintexts = [FixedPointNumber.encode(value, self.n, self.max_int, precision, max_exponent=exponent).encoding
+                      for value in values]
+        ciphertexts = self.raw_encrypt_batch(plaintexts, obfuscator_pool) if plaintexts else []
+        return PaillierEncryptedVector(self, ciphertexts, exponent, is_obfuscated=True)
+
+
+class PaillierObfuscatorPool(object):
+    """Generates obfuscators r^n mod n^2 from a fixed base.
+
+    h = r0^n mod n^2 is drawn once, every obfuscator is h^x for a random x of half the key length,
+    h^x multiplies precomputed h^(d * 2^(w * i)) of the w-bit windows of x,
+    which is much cheaper than a full powmod(r, n, n^2).
+    """
+
+    def __init__(self, public_key, window_bits=6, exponent_bits=None):
+        self.public_key = public_key
+        self.window_bits = window_bits
+        self.exponent_bits = exponent_bits or (public_key.n.bit_length() + 1) // 2
+        r = random.SystemRandom().randrange(1, public_key.n)
+        self.base = gmpy_math.powmod(r, public_key.n, public_key.nsquare)
+        self._table = None
+
+    def __getstate__(self):
+        # table is large, rebuild it where it is used
+        state = self.__dict__.copy()
+        state["_table"] = None
+        return state
+
+    def _get_table(self):
+        if self._table is None:
+            nsquare = gmpy_math.mpz(self.public_key.nsquare)
+            base = gmpy_math.mpz(self.base)
+            table = []
+            for _ in range((self.exponent_bits + self.window_bits - 1) // self.window_bits):
+                row = [gmpy_math.mpz(1)]
+                for _ in range(1, 1 << self.window_bits):
+                    row.append(row[-1] * base % nsquare)
+                table.append(row)
+                base = row[-1] * base % nsquare
+            self._table = table
+        return self._table
+
+    def generate(self, num):
+        """return list of num obfuscators
+        """
+        table = self._get_table()
+        nsquare = gmpy_math.mpz(self.public_key.nsquare)
+        mask = (1 << self.window_bits) - 1
+        exponent_mask = (1 << self.exponent_bits) - 1
+        exponent_bytes = (self.exponent_bits + 7) // 8
+        random_bytes = os.urandom(num * exponent_bytes)
+        obfuscators = []
+        for i in range(num):
+            x = int.from_bytes(random_bytes[i * exponent_bytes: (i + 1) * exponent_bytes], "little") & exponent_mask
+            obfuscator = gmpy_math.mpz(1)
+            for row in table:
+                if x & mask:
+                    obfuscator = obfuscator * row[x & mask] % nsquare
+                x >>= self.window_bits
+            obfuscators.append(obfuscator)
+        return obfuscators
+
 
 class PaillierPrivateKey(object):
     """Contains a private key and associated decryption method.
@@ -180,6 +280,55 @@ class PaillierPrivateKey(object):
 
         return self.crt(mp, mq)
 
+    def raw_decrypt_batch(self, ciphertexts):
+        """return list of raw plaintexts, the powmods modulo p^2 and q^2 run in one call each.
+        """
+        for ciphertext in ciphertexts:
+            if not isinstance(ciphertext, int):
+                raise TypeError("ciphertext should be an int, not: %s" %
+                                type(ciphertext))
+
+        p, q = gmpy_math.mpz(self.p), gmpy_math.mpz(self.q)
+        cp_list = gmpy_math.powmod_base_list(ciphertexts, self.p - 1, self.psquare)
+        cq_list = gmpy_math.powmod_base_list(ciphertexts, self.q - 1, self.qsquare)
+        plaintexts = []
+        for cp, cq in zip(cp_list, cq_list):
+            mp = (cp - 1) // p * self.hp % p
+            mq = (cq - 1) // q * self.hq % q
+            plaintexts.append(int(self.crt(mp, mq)))
+        return plaintexts
+
+    def decrypt_batch(self, encrypted_numbers):
+        """return list of decrypted & decoded plaintexts of encrypted_numbers.
+        """
+        for encrypted_number in encrypted_numbers:
+            if not isinstance(encrypted_number, PaillierEncryptedNumber):
+                raise TypeError("encrypted_number should be an PaillierEncryptedNumber, \
+                                 not: %s" % type(encrypted_number))
+            if self.public_key != encrypted_number.public_key:
+                raise ValueError("encrypted_number was encrypted against a different key!")
+
+        encodes = self.raw_decrypt_batch([encrypted_number.ciphertext(be_secure=False)
+                                          for encrypted_number in encrypted_numbers])
+        return [FixedPointNumber(encoded,
+                                 encrypted_number.exponent,
+                                 self.public_key.n,
+                                 self.public_key.max_int).decode()
+                for encoded, encrypted_number in zip(encodes, encrypted_numbers)]
+
+    def decrypt_vector(self, encrypted_vector):
+        """return list of decrypted & decoded plaintexts of PaillierEncryptedVector.
+        """
+        if self.public_key != encrypted_vector.public_key:
+            raise ValueError("encrypted_vector was encrypted against a different key!")
+        if len(encrypted_vector) == 0:
+            return []
+
+        encodes = self.raw_decrypt_batch(encrypted_vector.ciphertexts(be_secure=False))
+        return [FixedPointNumber(encoded, encrypted_vector.exponent,
+                                 self.public_key.n, self.public_key.max_int).decode()
+                for encoded in encodes]
+
     def decrypt(self, encrypted_number):
         """return the decrypted & decoded plaintext of encrypted_number.
         """
@@ -204,11 +353,11 @@ class PaillierEncryptedNumber(object):
     """Represents the Paillier encryption of a float or int.
     """
 
-    def __init__(self, public_key, ciphertext, exponent=0):
+    def __init__(self, public_key, ciphertext, exponent=0, is_obfuscated=False):
         self.public_key = public_key
         self.__ciphertext = ciphertext
         self.exponent = exponent
-        self.__is_obfuscator = False
+        self.__is_obfuscator = is_obfuscated
 
         if not isinstance(self.__ciphertext, int):
             raise TypeError("ciphertext should be an int, not: %s" % type(self.__ciphertext))
@@ -341,3 +490,214 @@ class PaillierEncryptedNumber(object):
         ciphertext = gmpy_math.mpz(e_x) * gmpy_math.mpz(e_y) % self.public_key.nsquare
 
         return PaillierEncryptedNumber(self.public_key, int(ciphertext), exponent)
+
+
+class PaillierEncryptedVector(object):
+    """Represents the Paillier encryption of a vector of floats or ints sharing one exponent.
+
+    Ciphertexts are kept as raw ints, exponents are aligned once per vector instead of once per add,
+    so add, sum and scalar-mul are a single mulmod/powmod per element.
+    """
+
+    def __init__(self, public_key, ciphertexts, exponent=0, is_obfuscated=False):
+        if not isinstance(public_key, PaillierPublicKey):
+            raise TypeError("public_key should be a PaillierPublicKey, not: %s" % type(public_key))
+
+        self.public_key = public_key
+        self.__ciphertexts = [int(ciphertext) for ciphertext in ciphertexts]
+        self.exponent = exponent
+        self.__is_obfuscated = is_obfuscated
+
+    @classmethod
+    def from_encrypted_numbers(cls, encrypted_numbers, exponent=None):
+        """return PaillierEncryptedVector of encrypted_numbers, aligned to exponent or their max exponent.
+        """
+        if len(encrypted_numbers) == 0:
+            raise ValueError("can not build PaillierEncryptedVector from empty input")
+        public_key = encrypted_numbers[0].public_key
+        for encrypted_number in encrypted_numbers:
+            if not isinstance(encrypted_number, PaillierEncryptedNumber):
+                raise TypeError("encrypted_number should be an PaillierEncryptedNumber, not: %s"
+                                % type(encrypted_number))
+            if encrypted_number.public_key != public_key:
+                raise ValueError("encrypted_numbers have different public key!")
+
+        max_exponent = max(encrypted_number.exponent for encrypted_number in encrypted_numbers)
+        if exponent is None:
+            exponent = max_exponent
+        elif exponent < max_exponent:
+            raise ValueError("New exponent %i should be great than old exponent %i" % (exponent, max_exponent))
+
+        nsquare = gmpy_math.mpz(public_key.nsquare)
+        ciphertexts = []
+        for encrypted_number in encrypted_numbers:
+            ciphertext = encrypted_number.ciphertext(be_secure=False)
+            if encrypted_number.exponent < exponent:
+                factor = pow(FixedPointNumber.BASE, exponent - encrypted_number.exponent)
+                ciphertext = gmpy_math.powmod(ciphertext, factor, nsquare)
+            ciphertexts.append(ciphertext)
+
+        return cls(public_key, ciphertexts, exponent)
+
+    def to_encrypted_numbers(self):
+        """return list of PaillierEncryptedNumber, all with the exponent of this vector.
+        """
+        return [PaillierEncryptedNumber(self.public_key, ciphertext, self.exponent, is_obfuscated=self.__is_obfuscated)
+                for ciphertext in self.__ciphertexts]
+
+    def ciphertexts(self, be_secure=True):
+        """return list of raw ciphertexts.
+        """
+        if be_secure and not self.__is_obfuscated:
+            self.apply_obfuscator()
+
+        return self.__ciphertexts
+
+    def apply_obfuscator(self, obfuscator_pool=None):
+        """multiply every ciphertext by an obfuscator from obfuscator_pool.
+        """
+        if obfuscator_pool is None:
+            obfuscator_pool = PaillierObfuscatorPool(self.public_key)
+        nsquare = gmpy_math.mpz(self.public_key.nsquare)
+        obfuscators = obfuscator_pool.generate(len(self.__ciphertexts))
+        self.__ciphertexts = [int(gmpy_math.mpz(ciphertext) * obfuscator % nsquare)
+                              for ciphertext, obfuscator in zip(self.__ciphertexts, obfuscators)]
+        self.__is_obfuscated = True
+
+    def __getstate__(self):
+        # ciphertexts are serialized as one fixed width buffer
+        width = (self.public_key.nsquare.bit_length() + 7) // 8
+        return (self.public_key, self.exponent, self.__is_obfuscated, width,
+                b"".join(ciphertext.to_bytes(width, "little") for ciphertext in self.__ciphertexts))
+
+    def __setstate__(self, state):
+        self.public_key, self.exponent, self.__is_obfuscated, width, data = state
+        self.__ciphertexts = [int.from_bytes(data[i: i + width], "little") for i in range(0, len(data), width)]
+
+    def __len__(self):
+        return len(self.__ciphertexts)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return PaillierEncryptedVector(self.public_key, self.__ciphertexts[item], self.exponent,
+                                           is_obfuscated=self.__is_obfuscated)
+        return PaillierEncryptedNumber(self.public_key, self.__ciphertexts[item], self.exponent,
+                                       is_obfuscated=self.__is_obfuscated)
+
+    def __iter__(self):
+        return iter(self.to_encrypted_numbers())
+
+    def increase_exponent_to(self, new_exponent):
+        """return PaillierEncryptedVector:
+           new PaillierEncryptedVector with same values but having great exponent.
+        """
+        if new_exponent < self.exponent:
+            raise ValueError("New exponent %i should be great than old exponent %i" % (new_exponent, self.exponent))
+        if new_exponent == self.exponent:
+            return self
+
+        factor = pow(FixedPointNumber.BASE, new_exponent - self.exponent)
+        nsquare = gmpy_math.mpz(self.public_key.nsquare)
+        ciphertexts = gmpy_math.powmod_base_list(self.__ciphertexts, factor, nsquare)
+
+        return PaillierEncryptedVector(self.public_key, ciphertexts, new_exponent)
+
+    def __check_length(self, other):
+        if len(other) != len(self):
+            raise ValueError("length mismatch: %i != %i" % (len(self), len(other)))
+
+    def __encode_scalars(self, scalars, max_exponent=None):
+        """return encodings of scalars, all at the same exponent
+        """
+        n, max_int = self.public_key.n, self.public_key.max_int
+        scalars = [scalar.decode() if isinstance(scalar, FixedPointNumber) else scalar for scalar in scalars]
+        exponent = max((FixedPointNumber.encode(scalar, n, max_int, max_exponent=max_exponent).exponent
+                        for scalar in scalars), default=max_exponent or 0)
+        return [FixedPointNumber.encode(scalar, n, max_int, max_exponent=exponent).encoding
+                for scalar in scalars], exponent
+
+    def __broadcast(self, other):
+        if isinstance(other, (list, tuple, np.ndarray)):
+            self.__check_length(other)
+            return list(other)
+        return [other] * len(self)
+
+    def __add__(self, other):
+        if isinstance(other, PaillierEncryptedVector):
+            return self.__add_encrypted_vector(other)
+        else:
+            return self.__add_scalars(self.__broadcast(other))
+
+    def __radd__(self, other):
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        return self + (other * -1)
+
+    def __rsub__(self, other):
+        return other + (self * -1)
+
+    def __add_encrypted_vector(self, other):
+        """return PaillierEncryptedVector: z = E(x) + E(y), element-wise
+        """
+        if self.public_key != other.public_key:
+            raise ValueError("add two vectors have different public key!")
+        self.__check_length(other)
+
+        x, y = self, other
+        if x.exponent < y.exponent:
+            x = x.increase_exponent_to(y.exponent)
+        elif x.exponent > y.exponent:
+            y = y.increase_exponent_to(x.exponent)
+
+        return x.__raw_add(y.ciphertexts(be_secure=False))
+
+    def __add_scalars(self, scalars):
+        """return PaillierEncryptedVector: z = E(x) + y, element-wise
+        """
+        encodings, exponent = self.__encode_scalars(scalars, max_exponent=self.exponent)
+        n, nsquare = gmpy_math.mpz(self.public_key.n), gmpy_math.mpz(self.public_key.nsquare)
+        encrypted_scalars = [(n * encoding + 1) % nsquare for encoding in encodings]
+
+        return self.increase_exponent_to(exponent).__raw_add(encrypted_scalars)
+
+    def __raw_add(self, ciphertexts):
+        nsquare = gmpy_math.mpz(self.public_key.nsquare)
+        return PaillierEncryptedVector(self.public_key,
+                                       [gmpy_math.mpz(e_x) * e_y % nsquare
+                                        for e_x, e_y in zip(self.__ciphertexts, ciphertexts)],
+                                       self.exponent)
+
+    def __mul__(self, scalar):
+        """return PaillierEncryptedVector: z = E(x) * y, element-wise, y is a scalar or a vector of scalars
+        """
+        encodings, exponent = self.__encode_scalars(self.__broadcast(scalar))
+        n, max_int = self.public_key.n, self.public_key.max_int
+        nsquare = gmpy_math.mpz(self.public_key.nsquare)
+
+        ciphertexts = []
+        for ciphertext, plaintext in zip(self.__ciphertexts, encodings):
+            if plaintext >= n - max_int:
+                # Very large plaintext, play a sneaky trick using inverses
+                neg_c = gmpy_math.invert(ciphertext, nsquare)
+                ciphertexts.append(gmpy_math.powmod(neg_c, n - plaintext, nsquare))
+            else:
+                ciphertexts.append(gmpy_math.powmod(ciphertext, plaintext, nsquare))
+
+        return PaillierEncryptedVector(self.public_key, ciphertexts, self.exponent + exponent)
+
+    def __rmul__(self, scalar):
+        return self.__mul__(scalar)
+
+    def __truediv__(self, scalar):
+        return self.__mul__([1 / s for s in self.__broadcast(scalar)])
+
+    def sum(self):
+        """return PaillierEncryptedNumber: encrypted sum of all elements
+        """
+        nsquare = gmpy_math.mpz(self.public_key.nsquare)
+        ciphertext = gmpy_math.mpz(1)
+        for e_x in self.__ciphertexts:
+            ciphertext = ciphertext * e_x % nsquare
+
+        return PaillierEncryptedNumber(self.public_key, int(ciphertext), self.exponent)
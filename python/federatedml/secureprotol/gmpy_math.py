@@ -36,6 +36,16 @@ def powmod(a, b, c):
         return int(gmpy2.powmod(a, b, c))
 
 
+def powmod_base_list(bases, b, c):
+    """
+    return list of int: [(a ** b) % c for a in bases]
+    """
+    if hasattr(gmpy2, "powmod_base_list"):
+        return [int(x) for x in gmpy2.powmod_base_list(bases, b, c)]
+
+    return [int(gmpy2.powmod(a, b, c)) for a in bases]
+
+
 def crt_coefficient(p, q):
     """
     return crt coefficient
@@ -55,6 +65,15 @@ def powmod_crt(x, d, n, p, q, cp, cq):
     return int((rp * cp + rq * cq) % n)
 
 
+def powmod_crt_base_list(bases, d, n, p, q, cp, cq):
+    """
+    return list of int: [(a ** d) % n for a in bases], one list powmod modulo each prime
+    """
+    rp_list = powmod_base_list(bases, d % (p - 1), p)
+    rq_list = powmod_base_list(bases, d % (q - 1), q)
+    return [(rp * cp + rq * cq) % n for rp, rq in zip(rp_list, rq_list)]
+
+
 def invert(a, b):
     """return int: x, where a * x == 1 mod b"""
     x = int(gmpy2.invert(a, b))
@@ -65,6 +84,24 @@ def invert(a, b):
     return x
 
 
+def invert_list(values, b):
+    """
+    return list of int: [invert(a, b) for a in values], Montgomery's trick with a single modular inversion
+    """
+    prefix = []
+    acc = gmpy2.mpz(1)
+    for a in values:
+        prefix.append(acc)
+        acc = acc * a % b
+    inv = invert(acc, b) if values else 1
+
+    res = [0] * len(values)
+    for i in range(len(values) - 1, -1, -1):
+        res[i] = int(inv * prefix[i] % b)
+        inv = inv * values[i] % b
+    return res
+
+
 def getprimeover(n):
     """return a random n-bit prime number"""
     r = gmpy2.mpz(random.SystemRandom().getrandbits(n))
@@ -14,6 +14,9 @@
 #  limitations under the License.
 #
 
+import hashlib
+
+import numpy as np
 from numpy.random import RandomState
 
 
@@ -43,3 +46,53 @@ class RandomPads(object):
         where r is random array with uniform distribution U[0,1) and r.shape == a.shape
         """
         return a + self._rand.rand(*a.shape) * w
+
+    def add_rand_pads_inplace(self, a, w, chunk_size=1 << 20):
+        """a += r * w in place,
+        where r is random array with uniform distribution U[0,1) and r.size == a.size,
+        r is generated chunk by chunk to bound memory, giving the same r as add_rand_pads
+        """
+        if not a.flags.c_contiguous:
+            raise ValueError("in place pads need a C contiguous array")
+        view = a.reshape(-1)
+        for start in range(0, view.size, chunk_size):
+            end = min(start + chunk_size, view.size)
+            pads = self._rand.rand(end - start)
+            pads *= w
+            view[start: end] += pads
+        return a
+
+
+class CounterRandomPads(object):
+    """counter based random pads for secret homogeneous aggregation of tables
+    the pads of a row only depend on the seed and the hash of its key, so parties get the same pads
+    for the same key however their tables are partitioned, and pads of a whole partition are
+    generated by a few numpy calls, the generator is splitmix64
+    """
+
+    _GAMMA = np.uint64(0x9E3779B97F4A7C15)
+
+    def __init__(self, seed):
+        self._seed = np.uint64(seed)
+
+    @staticmethod
+    def _mix(z):
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+    @staticmethod
+    def hash_keys(keys):
+        """64 bits md5 digests of keys as an uint64 array"""
+        digests = b"".join(hashlib.md5(f"{key}".encode("utf-8")).digest()[:8] for key in keys)
+        return np.frombuffer(digests, dtype="<u8").astype(np.uint64)
+
+    def rand(self, key_hashes, size):
+        """
+        random array of shape (len(key_hashes), size) with uniform distribution U[0,1),
+        row i is the stream of key_hashes[i]
+        """
+        states = self._mix(key_hashes ^ (np.full_like(key_hashes, self._seed) * self._GAMMA))
+        counters = np.arange(1, size + 1, dtype=np.uint64) * self._GAMMA
+        z = self._mix(states[:, None] + counters[None, :])
+        return (z >> np.uint64(11)) * (1.0 / (1 << 53))
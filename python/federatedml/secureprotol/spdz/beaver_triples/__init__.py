@@ -15,3 +15,5 @@
 #
 
 from federatedml.secureprotol.spdz.beaver_triples.he import beaver_triplets
+from federatedml.secureprotol.spdz.beaver_triples.he import beaver_triplets_batch
+from federatedml.secureprotol.spdz.beaver_triples.pool import BeaverTriplePool
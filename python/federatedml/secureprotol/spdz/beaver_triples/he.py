@@ -16,31 +16,101 @@
 import numpy as np
 
 from fate_arch.session import is_table
+from federatedml.secureprotol.fate_paillier import PaillierObfuscatorPool
 from federatedml.secureprotol.spdz.communicator import Communicator
 from federatedml.secureprotol.spdz.utils import rand_tensor, urand_tensor
+from federatedml.secureprotol.spdz.utils.ring import is_ring, lift, mask_rand, ring_rand, unlift
 from federatedml.util import LOGGER
 
 
+def _encrypt_array(arr, public_key, obfuscator_pool):
+    encrypted = np.empty(arr.size, dtype=object)
+    encrypted[:] = public_key.encrypt_batch(list(arr.flat), obfuscator_pool=obfuscator_pool)
+    return encrypted.reshape(arr.shape)
+
+
+def _decrypt_array(arr, private_key, otypes):
+    return np.array(private_key.decrypt_batch(list(arr.flat)), dtype=otypes[0]).reshape(arr.shape)
+
+
 def encrypt_tensor(tensor, public_key):
-    encrypted_zero = public_key.encrypt(0)
+    """
+    encrypt every array in one batch, obfuscators come from a fixed-base pool instead of a powmod each
+    """
+    obfuscator_pool = PaillierObfuscatorPool(public_key)
     if isinstance(tensor, np.ndarray):
-        return np.vectorize(lambda e: encrypted_zero + e)(tensor)
+        return _encrypt_array(tensor, public_key, obfuscator_pool)
     elif is_table(tensor):
-        return tensor.mapValues(lambda x: np.vectorize(lambda e: encrypted_zero + e)(x))
+        return tensor.mapValues(lambda x: _encrypt_array(x, public_key, obfuscator_pool))
     else:
         raise NotImplementedError(f"type={type(tensor)}")
 
 
 def decrypt_tensor(tensor, private_key, otypes):
     if isinstance(tensor, np.ndarray):
-        return np.vectorize(private_key.decrypt, otypes)(tensor)
+        return _decrypt_array(tensor, private_key, otypes)
     elif is_table(tensor):
-        return tensor.mapValues(lambda x: np.vectorize(private_key.decrypt, otypes)(x))
+        return tensor.mapValues(lambda x: _decrypt_array(x, private_key, otypes))
     else:
         raise NotImplementedError(f"type={type(tensor)}")
 
 
+def encrypt_ring_tensor(tensor, public_key):
+    """
+    encrypt signed python ints of ring elements in one batch per array
+    """
+    obfuscator_pool = PaillierObfuscatorPool(public_key)
+    if isinstance(tensor, np.ndarray):
+        return _encrypt_array(lift(tensor), public_key, obfuscator_pool)
+    elif is_table(tensor):
+        return tensor.mapValues(lambda x: _encrypt_array(lift(x), public_key, obfuscator_pool))
+    else:
+        raise NotImplementedError(f"type={type(tensor)}")
+
+
+def decrypt_ring_tensor(tensor, private_key):
+    """
+    decrypt ciphertexts of ints to ring elements in one batch
+    """
+    return unlift(_decrypt_array(tensor, private_key, [object]))
+
+
+def _lift_tensor(tensor):
+    if is_table(tensor):
+        return tensor.mapValues(lift)
+    return lift(tensor)
+
+
+def ring_beaver_triplets(a_tensor, b_tensor, dot, q_field, he_key_pair, communicator: Communicator, name):
+    """
+    triplets of the ring Z_2^64, a and b are drawn in bulk as uint64 arrays and c is computed with wraparound,
+    cross terms a_i * b_j are computed over the integers inside Paillier ciphertexts and reduced after decryption
+    """
+    public_key, private_key = he_key_pair
+    a = rand_tensor(q_field, a_tensor)
+    b = rand_tensor(q_field, b_tensor)
+
+    self_index, other_index = communicator.party_idx, 1 - communicator.party_idx
+    c = dot(a, b)
+    communicator.remote_encrypted_tensor(encrypted=encrypt_ring_tensor(a, public_key), tag=f"{name}_a_{self_index}")
+    _p, (ea,) = communicator.get_encrypted_tensors(tag=f"{name}_a_{other_index}")
+    eab = dot(ea, _lift_tensor(b))
+    r = mask_rand(eab.shape)
+    c = c - unlift(r)
+    communicator.remote_encrypted_cross_tensor(encrypted=eab + r,
+                                               parties=_p,
+                                               tag=f"{name}_cross_a_{other_index}_b_{self_index}")
+    crosses = communicator.get_encrypted_cross_tensors(tag=f"{name}_cross_a_{self_index}_b_{other_index}")
+    for eab in crosses:
+        c = c + decrypt_ring_tensor(eab, private_key)
+
+    return a, b, c
+
+
 def beaver_triplets(a_tensor, b_tensor, dot, q_field, he_key_pair, communicator: Communicator, name):
+    if is_ring(q_field):
+        return ring_beaver_triplets(a_tensor, b_tensor, dot, q_field, he_key_pair, communicator, name)
+
     public_key, private_key = he_key_pair
     a = rand_tensor(q_field, a_tensor)
     b = rand_tensor(q_field, b_tensor)
@@ -67,3 +137,117 @@ def beaver_triplets(a_tensor, b_tensor, dot, q_field, he_key_pair, communicator:
     c = _cross(communicator.party_idx, 1 - communicator.party_idx)
 
     return a, b, c % q_field
+
+
+def _dot(x, y):
+    ret = np.dot(x, y)
+    if not isinstance(ret, np.ndarray):
+        ret = np.array([ret])
+    return ret
+
+
+def _pack(arrays):
+    return np.concatenate([arr.reshape(-1) for arr in arrays])
+
+
+def _unpack(packed, shapes):
+    arrays, offset = [], 0
+    for shape in shapes:
+        size = int(np.prod(shape, dtype=np.int64))
+        arrays.append(packed[offset: offset + size].reshape(shape))
+        offset += size
+    return arrays
+
+
+def beaver_triplets_batch(shapes, q_field, he_key_pair, communicator: Communicator, name):
+    """
+    triplets of ndarray operands for a list of (a_shape, b_shape), c = np.dot(a, b).
+    All a of the batch are packed into one array, encrypted in one batch and sent in one message,
+    and so are the masked cross terms, so a batch costs two exchanges however many triplets it holds
+    """
+    if not shapes:
+        return []
+
+    public_key, private_key = he_key_pair
+    ring = is_ring(q_field)
+    self_index, other_index = communicator.party_idx, 1 - communicator.party_idx
+
+    a_list = [rand_tensor(q_field, np.zeros(a_shape)) for a_shape, _ in shapes]
+    b_list = [rand_tensor(q_field, np.zeros(b_shape)) for _, b_shape in shapes]
+    c_list = [_dot(a, b) for a, b in zip(a_list, b_list)]
+
+    packed_a = _pack(a_list)
+    encrypted_a = encrypt_ring_tensor(packed_a, public_key) if ring else encrypt_tensor(packed_a, public_key)
+    communicator.remote_encrypted_tensor(encrypted=encrypted_a, tag=f"{name}_a_{self_index}")
+    _p, (ea,) = communicator.get_encrypted_tensors(tag=f"{name}_a_{other_index}")
+
+    crosses = []
+    for i, (ea_i, b) in enumerate(zip(_unpack(ea, [a_shape for a_shape, _ in shapes]), b_list)):
+        if ring:
+            eab = _dot(ea_i, lift(b))
+            r = mask_rand(eab.shape)
+            c_list[i] = c_list[i] - unlift(r)
+        else:
+            eab = _dot(ea_i, b)
+            r = urand_tensor(q_field, c_list[i])
+            c_list[i] = c_list[i] - r
+        crosses.append(eab + r)
+
+    communicator.remote_encrypted_cross_tensor(encrypted=_pack(crosses),
+                                               parties=_p,
+                                               tag=f"{name}_cross_a_{other_index}_b_{self_index}")
+    for packed_eab in communicator.get_encrypted_cross_tensors(tag=f"{name}_cross_a_{self_index}_b_{other_index}"):
+        if ring:
+            decrypted = decrypt_ring_tensor(packed_eab, private_key)
+        else:
+            decrypted = decrypt_tensor(packed_eab, private_key, [object])
+        for i, cross in enumerate(_unpack(decrypted, [c.shape for c in c_list])):
+            c_list[i] = c_list[i] + cross
+
+    if not ring:
+        c_list = [c % q_field for c in c_list]
+    return list(zip(a_list, b_list, c_list))
+
+
+def _outer_sum(it):
+    ret = None
+    for _, (x, y) in it:
+        ret = np.multiply.outer(x, y) if ret is None else ret + np.multiply.outer(x, y)
+    return ret
+
+
+def ring_table_triplets(mask, like, num, transpose, he_key_pair, communicator: Communicator, name):
+    """
+    triplets of a fixed ring table U held by one party and `num` random operands v of the other party,
+    c = U v for d-vectors v, or c = U^T v for tables v of the keys of U when transpose. The table party
+    passes its mask U and gets the shares of c, the other party passes `like`, a d-vector or a table of the keys,
+    and gets (v, c) pairs. All v are encrypted in one batch and all cross terms come back in one message
+    """
+    public_key, private_key = he_key_pair
+    if mask is None:
+        if is_table(like):
+            v = like.mapValues(lambda x: ring_rand((num,)))
+        else:
+            v = ring_rand((num,) + np.shape(like))
+        communicator.remote_encrypted_tensor(encrypted=encrypt_ring_tensor(v, public_key), tag=f"{name}_v")
+        cross = communicator.get_encrypted_cross_tensors(tag=f"{name}_cross")[0]
+        if transpose:
+            c = decrypt_ring_tensor(cross, private_key)
+            return [(v.mapValues(lambda x, i=i: x[i: i + 1]), c[i]) for i in range(num)]
+        c = cross.mapValues(lambda x: decrypt_ring_tensor(x, private_key))
+        return [(v[i], c.mapValues(lambda x, i=i: x[i: i + 1])) for i in range(num)]
+
+    _p, (ev,) = communicator.get_encrypted_tensors(tag=f"{name}_v")
+    if transpose:
+        r = mask_rand((num,) + np.shape(mask.first()[1]))
+        cross = ev.join(mask, lambda x, u: [x, lift(u)]).applyPartitions(_outer_sum) \
+            .reduce(lambda x, y: x if y is None else y if x is None else x + y)
+        communicator.remote_encrypted_cross_tensor(encrypted=cross + r, parties=_p, tag=f"{name}_cross")
+        c = unlift(-r)
+        return [c[i] for i in range(num)]
+
+    r = mask.mapValues(lambda x: mask_rand((num,)))
+    cross = mask.join(r, lambda u, x: np.dot(ev, lift(u)) + x)
+    communicator.remote_encrypted_cross_tensor(encrypted=cross, parties=_p, tag=f"{name}_cross")
+    c = r.mapValues(lambda x: unlift(-x))
+    return [c.mapValues(lambda x, i=i: x[i: i + 1]) for i in range(num)]
@@ -0,0 +1,86 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import collections
+import operator
+
+import numpy as np
+
+from federatedml.secureprotol.spdz.beaver_triples.he import beaver_triplets_batch, ring_table_triplets
+from federatedml.secureprotol.spdz.utils.ring import ring_rand
+
+
+class BeaverTriplePool(object):
+    """
+    triplets generated ahead of the online phase, keyed by operand shapes, or by caller keys for table triplets.
+    Both parties have to generate and pop the same shapes in the same order, a triplet is a pair of shares
+    """
+
+    def __init__(self):
+        self._triplets = collections.defaultdict(collections.deque)
+        self._tables = {}
+
+    def generate(self, shapes, q_field, he_key_pair, communicator, name):
+        shapes = [(tuple(a_shape), tuple(b_shape)) for a_shape, b_shape in shapes]
+        triplets = beaver_triplets_batch(shapes, q_field, he_key_pair, communicator, name)
+        for key, triplet in zip(shapes, triplets):
+            self._triplets[key].append(triplet)
+
+    def pop(self, a_shape, b_shape):
+        triplets = self._triplets.get((tuple(a_shape), tuple(b_shape)))
+        if not triplets:
+            return None
+        return triplets.popleft()
+
+    def generate_table(self, key, table, like, num, he_key_pair, communicator, name, transpose=False):
+        """
+        ring triplets of a fixed batch table, the party holding the table passes it and the other party passes
+        `like` as in ring_table_triplets. The table is masked by the first batch of its key and sent masked
+        to the other party once, later batches reuse the mask
+        """
+        if key not in self._tables:
+            if table is not None:
+                fixed = table.mapValues(lambda x: ring_rand(np.shape(x)))
+                communicator.remote_share(share=table.join(fixed, operator.sub),
+                                          tensor_name=f"{name}_masked", party=communicator.other_parties[0])
+            else:
+                fixed = communicator.get_share(tensor_name=f"{name}_masked", party=communicator.other_parties[0])[0]
+            self._tables[key] = (fixed, collections.deque())
+
+        fixed, triplets = self._tables[key]
+        if table is not None:
+            triplets.extend((None, c) for c in ring_table_triplets(fixed, None, num, transpose,
+                                                                   he_key_pair, communicator, name))
+        else:
+            triplets.extend(ring_table_triplets(None, like, num, transpose, he_key_pair, communicator, name))
+
+    def pop_table(self, key):
+        """
+        (mask, None, c) for the party holding the table, (masked table, v, c) for the other party
+        """
+        if not self.table_len(key):
+            return None
+        fixed, triplets = self._tables[key]
+        return (fixed,) + triplets.popleft()
+
+    def table_len(self, key):
+        return len(self._tables[key][1]) if key in self._tables else 0
+
+    def clear(self):
+        self._triplets.clear()
+        self._tables.clear()
+
+    def __len__(self):
+        return sum(len(triplets) for triplets in self._triplets.values())
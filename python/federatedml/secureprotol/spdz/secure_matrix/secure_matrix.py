@@ -14,25 +14,29 @@
 #  limitations under the License.
 #
 
+import operator
 
 import numpy as np
 
 from fate_arch.common import Party
 from fate_arch.session import is_table
 from federatedml.secureprotol.fixedpoint import FixedPointEndec
+from federatedml.secureprotol.spdz import SPDZ
 from federatedml.secureprotol.spdz.tensor import fixedpoint_numpy, fixedpoint_table
+from federatedml.secureprotol.spdz.tensor.fixedpoint_endec import RingFixedPointEndec
+from federatedml.secureprotol.spdz.utils.ring import is_ring, lift
 from federatedml.transfer_variable.transfer_class.secret_share_transfer_variable import SecretShareTransferVariable
 from federatedml.util import consts
 
 
 class SecureMatrix(object):
     # SecureMatrix in SecretSharing With He;
-    def __init__(self, party: Party, q_field, other_party):
+    def __init__(self, party: Party, q_field, other_party, encoder=None):
         self.transfer_variable = SecretShareTransferVariable()
         self.party = party
         self.other_party = other_party
         self.q_field = q_field
-        self.encoder = None
+        self.encoder = encoder
         self.get_or_create_endec(self.q_field)
 
     def set_flowid(self, flowid):
@@ -40,19 +44,44 @@ class SecureMatrix(object):
 
     def get_or_create_endec(self, q_field, **kwargs):
         if self.encoder is None:
-            self.encoder = FixedPointEndec(q_field)
+            self.encoder = RingFixedPointEndec() if is_ring(q_field) else FixedPointEndec(q_field)
         return self.encoder
 
-    def secure_matrix_mul(self, matrix, tensor_name, cipher=None, suffix=tuple(), is_fixedpoint_table=True):
+    def _encrypt_share(self, matrix, cipher):
+        """
+        in ring mode the share itself is encrypted as signed ints, its decoded float would lose the wraparound
+        """
+        if is_ring(self.q_field):
+            if isinstance(matrix, fixedpoint_table.FixedPointTensor):
+                return matrix.value.mapValues(lambda x: cipher.recursive_encrypt_batch(lift(x)))
+            return cipher.recursive_encrypt_batch(lift(matrix.value))
+
+        if isinstance(matrix, fixedpoint_table.FixedPointTensor):
+            return cipher.distribute_encrypt(matrix.value)
+        return cipher.recursive_encrypt(matrix.value)
+
+    def secure_matrix_mul(self, matrix, tensor_name, cipher=None, suffix=tuple(), is_fixedpoint_table=True,
+                          triplet_key=None):
+        if triplet_key is not None:
+            triplet = SPDZ.get_instance().triplet_pool.pop_table(triplet_key)
+            if triplet is not None:
+                return self.triplet_matrix_mul(matrix, triplet, tensor_name, suffix=suffix)
+
         current_suffix = ("secure_matrix_mul",) + suffix
         dst_role = consts.GUEST if self.party.role == consts.HOST else consts.HOST
 
+        # products of two shares carry twice the fractional bits, ring shares drop them after decryption
+        truncate_bits = self.encoder.precision_fractional if is_ring(self.q_field) else 0
+
         if cipher is not None:
-            de_matrix = self.encoder.decode(matrix.value)
-            if isinstance(matrix, fixedpoint_table.FixedPointTensor):
-                encrypt_mat = cipher.distribute_encrypt(de_matrix)
+            if is_ring(self.q_field):
+                encrypt_mat = self._encrypt_share(matrix, cipher)
             else:
-                encrypt_mat = cipher.recursive_encrypt(de_matrix)
+                de_matrix = self.encoder.decode(matrix.value)
+                if isinstance(matrix, fixedpoint_table.FixedPointTensor):
+                    encrypt_mat = cipher.distribute_encrypt(de_matrix)
+                else:
+                    encrypt_mat = cipher.recursive_encrypt(de_matrix)
 
             # remote encrypted matrix;
             self.transfer_variable.encrypted_share_matrix.remote(encrypt_mat,
@@ -65,7 +94,8 @@ class SecureMatrix(object):
                                                     cipher,
                                                     self.q_field,
                                                     self.encoder,
-                                                    is_fixedpoint_table=is_fixedpoint_table)
+                                                    is_fixedpoint_table=is_fixedpoint_table,
+                                                    truncate_bits=truncate_bits)
 
             return share_tensor
 
@@ -86,19 +116,48 @@ class SecureMatrix(object):
                                                     ret,
                                                     cipher,
                                                     self.q_field,
-                                                    self.encoder)
+                                                    self.encoder,
+                                                    truncate_bits=truncate_bits)
 
             return share_tensor
 
+    def triplet_matrix_mul(self, matrix, triplet, tensor_name, suffix=tuple()):
+        """
+        ring shares of a product of a fixed batch table X and an operand y of the other party with a pooled
+        table triplet, see BeaverTriplePool.generate_table. The other party sends f = y - v, the table party
+        computes X f + c and the other party (X - U) v + c, no Paillier operation is left online.
+        The product is X y for vectors y, and X^T y for tables y of the keys of X
+        """
+        current_suffix = ("triplet_matrix_mul",) + suffix
+        dst_role = consts.GUEST if self.party.role == consts.HOST else consts.HOST
+
+        fixed, v, c = triplet
+        if v is None:
+            x = matrix.value
+            f = self.transfer_variable.encrypted_share_matrix.get(role=dst_role, idx=0, suffix=current_suffix)
+            transpose = not is_table(c)
+        else:
+            transpose = is_table(v)
+            f = matrix.value.join(v, operator.sub) if transpose else matrix.value - v
+            self.transfer_variable.encrypted_share_matrix.remote(f, role=dst_role, idx=0, suffix=current_suffix)
+            x, f = fixed, v
+
+        party_idx = SPDZ.get_instance().party_idx
+        if transpose:
+            share = fixedpoint_table.table_dot_mod(f, x, self.q_field).reshape(-1) + c
+            return fixedpoint_numpy.FixedPointTensor(self.encoder.truncate(share, party_idx),
+                                                     self.q_field, self.encoder, tensor_name)
+
+        share = x.join(c, lambda row, c_row: c_row + np.dot(row, f))
+        return fixedpoint_table.FixedPointTensor(self.encoder.truncate(share, party_idx),
+                                                 self.q_field, self.encoder, tensor_name)
+
     def share_encrypted_matrix(self, suffix, is_remote, cipher, **kwargs):
         current_suffix = ("share_encrypted_matrix",) + suffix
         if is_remote:
             for var_name, var in kwargs.items():
                 dst_role = consts.GUEST if self.party.role == consts.HOST else consts.HOST
-                if isinstance(var, fixedpoint_table.FixedPointTensor):
-                    encrypt_var = cipher.distribute_encrypt(var.value)
-                else:
-                    encrypt_var = cipher.recursive_encrypt(var.value)
+                encrypt_var = self._encrypt_share(var, cipher)
                 self.transfer_variable.encrypted_share_matrix.remote(encrypt_var, role=dst_role,
                                                                      suffix=(var_name,) + current_suffix)
         else:
@@ -115,24 +174,27 @@ class SecureMatrix(object):
             return tuple(res)
 
     @classmethod
-    def from_source(cls, tensor_name, source, cipher, q_field, encoder, is_fixedpoint_table=True):
+    def from_source(cls, tensor_name, source, cipher, q_field, encoder, is_fixedpoint_table=True, truncate_bits=0):
         if is_table(source):
             share_tensor = fixedpoint_table.PaillierFixedPointTensor.from_source(tensor_name=tensor_name,
                                                                                  source=source,
                                                                                  encoder=encoder,
-                                                                                 q_field=q_field)
+                                                                                 q_field=q_field,
+                                                                                 truncate_bits=truncate_bits)
             return share_tensor
 
         elif isinstance(source, np.ndarray):
             share_tensor = fixedpoint_numpy.PaillierFixedPointTensor.from_source(tensor_name=tensor_name,
                                                                                  source=source,
                                                                                  encoder=encoder,
-                                                                                 q_field=q_field)
+                                                                                 q_field=q_field,
+                                                                                 truncate_bits=truncate_bits)
             return share_tensor
 
         elif isinstance(source, (fixedpoint_table.PaillierFixedPointTensor,
                                  fixedpoint_numpy.PaillierFixedPointTensor)):
-            return cls.from_source(tensor_name, source.value, cipher, q_field, encoder, is_fixedpoint_table)
+            return cls.from_source(tensor_name, source.value, cipher, q_field, encoder, is_fixedpoint_table,
+                                   truncate_bits)
 
         elif isinstance(source, Party):
             if is_fixedpoint_table:
@@ -140,13 +202,15 @@ class SecureMatrix(object):
                                                                                      source=source,
                                                                                      encoder=encoder,
                                                                                      q_field=q_field,
-                                                                                     cipher=cipher)
+                                                                                     cipher=cipher,
+                                                                                     truncate_bits=truncate_bits)
             else:
                 share_tensor = fixedpoint_numpy.PaillierFixedPointTensor.from_source(tensor_name=tensor_name,
                                                                                      source=source,
                                                                                      encoder=encoder,
                                                                                      q_field=q_field,
-                                                                                     cipher=cipher)
+                                                                                     cipher=cipher,
+                                                                                     truncate_bits=truncate_bits)
 
             return share_tensor
         else:
@@ -15,6 +15,7 @@
 #
 
 from federatedml.secureprotol.fate_paillier import PaillierKeypair
+from federatedml.secureprotol.spdz.beaver_triples import BeaverTriplePool
 from federatedml.secureprotol.spdz.communicator import Communicator
 from federatedml.secureprotol.spdz.utils import NamingService
 from federatedml.secureprotol.spdz.utils import naming
@@ -56,6 +57,7 @@ class SPDZ(object):
         self.q_field = self._align_q_field(q_field)
 
         self.use_mix_rand = use_mix_rand
+        self.triplet_pool = BeaverTriplePool()
 
     def __enter__(self):
         self._prev_name_service = NamingService.set_instance(self.name_service)
@@ -77,6 +79,23 @@ class SPDZ(object):
     def dot(cls, left, right, target_name=None):
         return left.dot(right, target_name)
 
+    def prepare_triplets(self, shapes, name=None):
+        """
+        offline phase, generate triplets of the (a_shape, b_shape) list in one batch,
+        fixed point tensors of matching shapes consume them instead of generating their own
+        """
+        name = name or self.name_service.next()
+        self.triplet_pool.generate(shapes, self.q_field, (self.public_key, self.private_key), self.communicator, name)
+
+    def prepare_table_triplets(self, key, table, like, num, transpose=False, name=None):
+        """
+        offline phase of `num` products of a fixed ring table and operands of the other party,
+        the party holding the table passes it and the other party passes `like`, see BeaverTriplePool.generate_table
+        """
+        name = name or self.name_service.next()
+        self.triplet_pool.generate_table(key, table, like, num, (self.public_key, self.private_key),
+                                         self.communicator, name, transpose)
+
     def set_flowid(self, flowid):
         self.communicator.set_flowid(flowid)
 
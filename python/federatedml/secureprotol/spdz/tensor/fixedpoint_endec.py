@@ -14,10 +14,12 @@
 #  limitations under the License.
 #
 import functools
+import math
 
 import numpy as np
 
 from fate_arch.session import is_table
+from federatedml.secureprotol.spdz.utils.ring import RING_BITS, RING_SIZE, lift
 
 
 class FixedPointEndec(object):
@@ -82,3 +84,75 @@ class FixedPointEndec(object):
             return integer_tensor.mapValues(f)
         else:
             raise ValueError(f"unsupported type: {type(integer_tensor)}")
+
+
+class RingFixedPointEndec(object):
+    """
+    fixed point numbers of the ring Z_2^64, a float x is stored as round(x * 2^precision_fractional) in an uint64,
+    negative numbers wrap around. Products of two encoded numbers carry 2 * precision_fractional fractional bits
+    and are truncated back share by share, party 0 rounds its share down and party 1 rounds up, the truncated
+    shares sum to the truncated secret except with probability about |secret| / 2^63.
+    """
+
+    # significant bits kept when multiplying shares by a public scalar
+    SCALAR_BITS = 16
+
+    def __init__(self, precision_fractional=16, *args, **kwargs):
+        self.n = RING_SIZE
+        self.field = RING_SIZE
+        self.precision_fractional = precision_fractional
+
+    def _encode(self, float_tensor, precision_fractional):
+        upscaled = np.rint(np.asarray(float_tensor, dtype=np.float64) * (1 << precision_fractional))
+        if np.any(np.abs(upscaled) >= 2.0 ** (RING_BITS - 1)):
+            raise ValueError(f"{float_tensor} cannot be correctly embedded: choose a lower precision")
+        return upscaled.astype(np.int64).view(np.uint64)
+
+    def _decode(self, integer_tensor, precision_fractional):
+        return np.asarray(integer_tensor, dtype=np.uint64).view(np.int64) / (1 << precision_fractional)
+
+    @staticmethod
+    def _truncate(integer_tensor, idx, bits):
+        integer_tensor = np.asarray(integer_tensor, dtype=np.uint64)
+        if idx == 0:
+            return (integer_tensor.view(np.int64) >> bits).view(np.uint64)
+        else:
+            return np.negative((np.negative(integer_tensor).view(np.int64) >> bits).view(np.uint64))
+
+    @staticmethod
+    def _apply(tensor, op):
+        if is_table(tensor):
+            return tensor.mapValues(op)
+        return op(tensor)
+
+    def encode(self, float_tensor, precision_fractional=None):
+        precision_fractional = self.precision_fractional if precision_fractional is None else precision_fractional
+        return self._apply(float_tensor, functools.partial(self._encode, precision_fractional=precision_fractional))
+
+    def decode(self, integer_tensor, precision_fractional=None):
+        precision_fractional = self.precision_fractional if precision_fractional is None else precision_fractional
+        return self._apply(integer_tensor, functools.partial(self._decode, precision_fractional=precision_fractional))
+
+    def truncate(self, integer_tensor, idx=0, bits=None):
+        bits = self.precision_fractional if bits is None else bits
+        return self._apply(integer_tensor, functools.partial(self._truncate, idx=idx, bits=bits))
+
+    def encode_signed(self, float_tensor, precision_fractional=None):
+        """
+        encoded numbers as signed python ints, the plaintexts added to or multiplied into Paillier ciphertexts
+        """
+        if np.ndim(float_tensor) == 0 and not is_table(float_tensor):
+            return int(self.encode(float_tensor, precision_fractional).view(np.int64))
+        return self._apply(self.encode(float_tensor, precision_fractional), lift)
+
+    def encode_scalar(self, scalar):
+        """
+        return (mantissa, bits), shares times the mantissa truncated by bits are the shares times scalar,
+        SCALAR_BITS significant bits of scalar are kept however small it is, e.g. 1 / batch_size
+        """
+        if isinstance(scalar, (int, np.integer)):
+            return np.array(scalar, dtype=np.int64).view(np.uint64), 0
+        if scalar == 0:
+            return np.uint64(0), 0
+        bits = min(max(0, self.SCALAR_BITS - math.frexp(scalar)[1]), RING_BITS - 2)
+        return self._encode(scalar, bits), bits
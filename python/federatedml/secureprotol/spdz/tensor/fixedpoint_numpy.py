@@ -22,7 +22,9 @@ from fate_arch.computing import is_table
 from federatedml.secureprotol.spdz.beaver_triples import beaver_triplets
 from federatedml.secureprotol.spdz.tensor import fixedpoint_table
 from federatedml.secureprotol.spdz.tensor.base import TensorBase
+from federatedml.secureprotol.spdz.tensor.fixedpoint_endec import RingFixedPointEndec
 from federatedml.secureprotol.spdz.utils import urand_tensor
+from federatedml.secureprotol.spdz.utils.ring import is_ring, lift, mask_rand, mod_q, unlift
 # from federatedml.secureprotol.spdz.tensor.fixedpoint_endec import FixedPointEndec
 from federatedml.secureprotol.fixedpoint import FixedPointEndec
 from federatedml.util import LOGGER
@@ -49,8 +51,10 @@ class FixedPointTensor(TensorBase):
     def dot_local(self, other, target_name=None):
         if isinstance(other, FixedPointTensor):
             other = other.value
+        else:
+            other = self._encode_plain(other)
 
-        ret = np.dot(self.value, other) % self.q_field
+        ret = mod_q(np.dot(self.value, other), self.q_field)
         ret = self.endec.truncate(ret, self.get_spdz().party_idx)
 
         if not isinstance(ret, np.ndarray):
@@ -83,6 +87,8 @@ class FixedPointTensor(TensorBase):
         q_field = kwargs['q_field'] if 'q_field' in kwargs else spdz.q_field
         if 'encoder' in kwargs:
             encoder = kwargs['encoder']
+        elif is_ring(q_field):
+            encoder = RingFixedPointEndec()
         else:
             base = kwargs['base'] if 'base' in kwargs else 10
             frac = kwargs['frac'] if 'frac' in kwargs else 4
@@ -93,9 +99,9 @@ class FixedPointTensor(TensorBase):
             spdz.communicator.remote_share(share=_pre, tensor_name=tensor_name, party=spdz.other_parties[0])
             for _party in spdz.other_parties[1:]:
                 r = urand_tensor(q_field, source)
-                spdz.communicator.remote_share(share=(r - _pre) % q_field, tensor_name=tensor_name, party=_party)
+                spdz.communicator.remote_share(share=mod_q(r - _pre, q_field), tensor_name=tensor_name, party=_party)
                 _pre = r
-            share = (source - _pre) % q_field
+            share = mod_q(source - _pre, q_field)
         elif isinstance(source, Party):
             share = spdz.communicator.get_share(tensor_name=tensor_name, party=source)[0]
         else:
@@ -113,16 +119,20 @@ class FixedPointTensor(TensorBase):
             return ret
             # return np.einsum(einsum_expr, _x, _y, optimize=True)
 
-        a, b, c = beaver_triplets(a_tensor=self.value, b_tensor=other.value, dot=_dot_func,
-                                  q_field=self.q_field, he_key_pair=(spdz.public_key, spdz.private_key),
-                                  communicator=spdz.communicator, name=target_name)
+        triplet = spdz.triplet_pool.pop(self.value.shape, other.value.shape)
+        if triplet is not None:
+            a, b, c = triplet
+        else:
+            a, b, c = beaver_triplets(a_tensor=self.value, b_tensor=other.value, dot=_dot_func,
+                                      q_field=self.q_field, he_key_pair=(spdz.public_key, spdz.private_key),
+                                      communicator=spdz.communicator, name=target_name)
 
         x_add_a = self._raw_add(a).reconstruct(f"{target_name}_confuse_x")
         y_add_b = other._raw_add(b).reconstruct(f"{target_name}_confuse_y")
         cross = c - _dot_func(a, y_add_b) - _dot_func(x_add_a, b)
         if spdz.party_idx == 0:
             cross += _dot_func(x_add_a, y_add_b)
-        cross = cross % self.q_field
+        cross = mod_q(cross, self.q_field)
         cross = self.endec.truncate(cross, self.get_spdz().party_idx)
         share = self._boxed(cross, tensor_name=target_name)
         return share
@@ -149,7 +159,7 @@ class FixedPointTensor(TensorBase):
             # LOGGER.debug(f"share_val: {share_val}, other_share: {other_share}")
             share_val += other_share
             try:
-                share_val %= self.q_field
+                share_val = mod_q(share_val, self.q_field)
                 return share_val
             except BaseException:
                 return share_val
@@ -182,20 +192,34 @@ class FixedPointTensor(TensorBase):
         return self._boxed(value=self.value, tensor_name=tensor_name)
 
     def _raw_add(self, other):
-        z_value = (self.value + other) % self.q_field
+        z_value = mod_q(self.value + other, self.q_field)
         return self._boxed(z_value)
 
     def _raw_sub(self, other):
-        z_value = (self.value - other) % self.q_field
+        z_value = mod_q(self.value - other, self.q_field)
         return self._boxed(z_value)
 
+    def _encode_plain(self, other):
+        """
+        plaintext operands of ring tensors are encoded first, uint64 arrays are taken as encoded already
+        """
+        if not is_ring(self.q_field) or getattr(other, "dtype", None) == np.uint64:
+            return other
+        return self.endec.encode(other)
+
+    def _lifted(self):
+        """
+        value as plaintext of Paillier ciphertexts, shares of ring tensors are lifted to signed ints
+        """
+        return lift(self.value) if is_ring(self.q_field) else self.value
+
     def __add__(self, other):
         if isinstance(other, PaillierFixedPointTensor):
-            z_value = (self.value + other)
+            z_value = (self._lifted() + other.value)
             return PaillierFixedPointTensor(z_value)
         elif isinstance(other, FixedPointTensor):
             return self._raw_add(other.value)
-        z_value = (self.value + other) % self.q_field
+        z_value = mod_q(self.value + self._encode_plain(other), self.q_field)
         return self._boxed(z_value)
 
     def __radd__(self, other):
@@ -203,29 +227,35 @@ class FixedPointTensor(TensorBase):
 
     def __sub__(self, other):
         if isinstance(other, PaillierFixedPointTensor):
-            z_value = (self.value - other)
+            z_value = (self._lifted() - other.value)
             return PaillierFixedPointTensor(z_value)
         elif isinstance(other, FixedPointTensor):
             return self._raw_sub(other.value)
-        z_value = (self.value - other) % self.q_field
+        z_value = mod_q(self.value - self._encode_plain(other), self.q_field)
         return self._boxed(z_value)
 
     def __rsub__(self, other):
         if isinstance(other, (PaillierFixedPointTensor, FixedPointTensor)):
             return other - self
-        z_value = (other - self.value) % self.q_field
+        z_value = mod_q(self._encode_plain(other) - self.value, self.q_field)
         return self._boxed(z_value)
 
     def __mul__(self, other):
         if isinstance(other, PaillierFixedPointTensor):
-            z_value = self.value * other.value
+            z_value = self._lifted() * other.value
             return PaillierFixedPointTensor(z_value)
 
         if isinstance(other, FixedPointTensor):
             other = other.value
+        elif is_ring(self.q_field) and np.ndim(other) == 0 and getattr(other, "dtype", None) != np.uint64:
+            mantissa, bits = self.endec.encode_scalar(other)
+            z_value = self.endec.truncate(self.value * mantissa, self.get_spdz().party_idx, bits)
+            return self._boxed(z_value)
+        else:
+            other = self._encode_plain(other)
 
         z_value = self.value * other
-        z_value = z_value % self.q_field
+        z_value = mod_q(z_value, self.q_field)
         z_value = self.endec.truncate(z_value, self.get_spdz().party_idx)
 
         return self._boxed(z_value)
@@ -253,7 +283,7 @@ class PaillierFixedPointTensor(TensorBase):
             return ret
 
         if isinstance(other, (FixedPointTensor, fixedpoint_table.FixedPointTensor)):
-            other = other.value
+            other = other._lifted()
         if isinstance(other, np.ndarray):
             ret = _vec_dot(self.value, other)
             return self._boxed(ret, target_name)
@@ -293,8 +323,10 @@ class PaillierFixedPointTensor(TensorBase):
         return self._boxed(z_value)
 
     def __add__(self, other):
-        if isinstance(other, (PaillierFixedPointTensor, FixedPointTensor)):
+        if isinstance(other, PaillierFixedPointTensor):
             return self._raw_add(other.value)
+        elif isinstance(other, FixedPointTensor):
+            return self._raw_add(other._lifted())
         else:
             return self._raw_add(other)
 
@@ -302,14 +334,18 @@ class PaillierFixedPointTensor(TensorBase):
         return self.__add__(other)
 
     def __sub__(self, other):
-        if isinstance(other, (PaillierFixedPointTensor, FixedPointTensor)):
+        if isinstance(other, PaillierFixedPointTensor):
             return self._raw_sub(other.value)
+        elif isinstance(other, FixedPointTensor):
+            return self._raw_sub(other._lifted())
         else:
             return self._raw_sub(other)
 
     def __rsub__(self, other):
-        if isinstance(other, (PaillierFixedPointTensor, FixedPointTensor)):
+        if isinstance(other, PaillierFixedPointTensor):
             z_value = other.value - self.value
+        elif isinstance(other, FixedPointTensor):
+            z_value = other._lifted() - self.value
         else:
             z_value = other - self.value
         return self._boxed(z_value)
@@ -318,7 +354,7 @@ class PaillierFixedPointTensor(TensorBase):
         if isinstance(other, PaillierFixedPointTensor):
             raise NotImplementedError("__mul__ not support PaillierFixedPointTensor")
         elif isinstance(other, FixedPointTensor):
-            return self._boxed(self.value * other.value)
+            return self._boxed(self.value * other._lifted())
         else:
             return self._boxed(self.value * other)
 
@@ -336,11 +372,16 @@ class PaillierFixedPointTensor(TensorBase):
         q_field = kwargs['q_field'] if 'q_field' in kwargs else spdz.q_field
         if 'encoder' in kwargs:
             encoder = kwargs['encoder']
+        elif is_ring(q_field):
+            encoder = RingFixedPointEndec()
         else:
             base = kwargs['base'] if 'base' in kwargs else 10
             frac = kwargs['frac'] if 'frac' in kwargs else 4
             encoder = FixedPointEndec(n=q_field, field=q_field, base=base, precision_fractional=frac)
 
+        if is_ring(q_field):
+            return cls._ring_from_source(tensor_name, source, spdz, q_field, encoder, **kwargs)
+
         if isinstance(source, np.ndarray):
             _pre = urand_tensor(q_field, source)
 
@@ -369,3 +410,32 @@ class PaillierFixedPointTensor(TensorBase):
                                     tensor_name=tensor_name)
         else:
             raise ValueError(f"type={type(source)}")
+
+    @classmethod
+    def _ring_from_source(cls, tensor_name, source, spdz, q_field, encoder, **kwargs):
+        """
+        ciphertexts of signed ints are shared over Z_2^64: the holder keeps a statistically hiding mask and sends
+        the masked ciphertexts, both parties reduce mod 2^64 and drop truncate_bits fractional bits of their shares
+        """
+        truncate_bits = kwargs.get('truncate_bits', 0)
+        if isinstance(source, np.ndarray):
+            mask = mask_rand(source.shape)
+            spdz.communicator.remote_share(share=source - mask,
+                                           tensor_name=tensor_name,
+                                           party=spdz.other_parties[-1])
+            share = unlift(mask)
+
+        elif isinstance(source, Party):
+            share = spdz.communicator.get_share(tensor_name=tensor_name, party=source)[0]
+            is_cipher_source = kwargs['is_cipher_source'] if 'is_cipher_source' in kwargs else True
+            if is_cipher_source:
+                share = unlift(kwargs['cipher'].recursive_decrypt_batch(share))
+        else:
+            raise ValueError(f"type={type(source)}")
+
+        if truncate_bits:
+            share = encoder.truncate(share, spdz.party_idx, truncate_bits)
+        return FixedPointTensor(value=share,
+                                q_field=q_field,
+                                endec=encoder,
+                                tensor_name=tensor_name)
@@ -24,8 +24,10 @@ from fate_arch.session import is_table
 from federatedml.secureprotol.spdz.beaver_triples import beaver_triplets
 from federatedml.secureprotol.spdz.tensor import fixedpoint_numpy
 from federatedml.secureprotol.spdz.tensor.base import TensorBase
+from federatedml.secureprotol.spdz.tensor.fixedpoint_endec import RingFixedPointEndec
 from federatedml.secureprotol.spdz.utils import NamingService
 from federatedml.secureprotol.spdz.utils import urand_tensor
+from federatedml.secureprotol.spdz.utils.ring import is_ring, lift, mask_rand, mod_q, unlift
 # from federatedml.secureprotol.spdz.tensor.fixedpoint_endec import FixedPointEndec
 from federatedml.secureprotol.fixedpoint import FixedPointEndec
 
@@ -35,7 +37,7 @@ def _table_binary_op(x, y, op):
 
 
 def _table_binary_mod_op(x, y, q_field, op):
-    return x.join(y, lambda a, b: op(a, b) % q_field)
+    return x.join(y, lambda a, b: mod_q(op(a, b), q_field))
 
 
 def _table_scalar_op(x, d, op):
@@ -43,16 +45,16 @@ def _table_scalar_op(x, d, op):
 
 
 def _table_scalar_mod_op(x, d, q_field, op):
-    return x.mapValues(lambda a: op(a, d) % q_field)
+    return x.mapValues(lambda a: mod_q(op(a, d), q_field))
 
 
 def _table_dot_mod_func(it, q_field):
     ret = None
     for _, (x, y) in it:
         if ret is None:
-            ret = np.tensordot(x, y, [[], []]) % q_field
+            ret = mod_q(np.tensordot(x, y, [[], []]), q_field)
         else:
-            ret = (ret + np.tensordot(x, y, [[], []])) % q_field
+            ret = mod_q(ret + np.tensordot(x, y, [[], []]), q_field)
     return ret
 
 
@@ -104,14 +106,14 @@ class FixedPointTensor(TensorBase):
         cross = c - table_dot_mod(a, y_add_b, self.q_field) - table_dot_mod(x_add_a, b, self.q_field)
         if spdz.party_idx == 0:
             cross += table_dot_mod(x_add_a, y_add_b, self.q_field)
-        cross = cross % self.q_field
+        cross = mod_q(cross, self.q_field)
         cross = self.endec.truncate(cross, self.get_spdz().party_idx)
         share = fixedpoint_numpy.FixedPointTensor(cross, self.q_field, self.endec, target_name)
         return share
 
     def dot_local(self, other, target_name=None):
         def _vec_dot(x, y, party_idx, q_field, endec):
-            ret = np.dot(x, y) % q_field
+            ret = mod_q(np.dot(x, y), q_field)
             ret = endec.truncate(ret, party_idx)
             if not isinstance(ret, np.ndarray):
                 ret = np.array([ret])
@@ -119,6 +121,8 @@ class FixedPointTensor(TensorBase):
 
         if isinstance(other, FixedPointTensor) or isinstance(other, fixedpoint_numpy.FixedPointTensor):
             other = other.value
+        else:
+            other = self._encode_plain(other)
 
         if isinstance(other, np.ndarray):
             party_idx = self.get_spdz().party_idx
@@ -156,6 +160,8 @@ class FixedPointTensor(TensorBase):
         q_field = kwargs['q_field'] if 'q_field' in kwargs else spdz.q_field
         if 'encoder' in kwargs:
             encoder = kwargs['encoder']
+        elif is_ring(q_field):
+            encoder = RingFixedPointEndec()
         else:
             base = kwargs['base'] if 'base' in kwargs else 10
             frac = kwargs['frac'] if 'frac' in kwargs else 4
@@ -217,16 +223,35 @@ class FixedPointTensor(TensorBase):
     def as_name(self, tensor_name):
         return self._boxed(value=self.value, tensor_name=tensor_name)
 
+    def _encode_plain(self, other):
+        """
+        plaintext operands of ring tensors are encoded first, uint64 values are taken as encoded already
+        """
+        if not is_ring(self.q_field):
+            return other
+        if is_table(other):
+            if other.first()[1].dtype == np.uint64:
+                return other
+        elif getattr(other, "dtype", None) == np.uint64:
+            return other
+        return self.endec.encode(other)
+
+    def _lifted(self):
+        """
+        value as plaintext of Paillier ciphertexts, shares of ring tensors are lifted to signed ints
+        """
+        return self.value.mapValues(lift) if is_ring(self.q_field) else self.value
+
     def __add__(self, other):
         if isinstance(other, PaillierFixedPointTensor):
-            z_value = _table_binary_op(self.value, other.value, operator.add)
+            z_value = _table_binary_op(self._lifted(), other.value, operator.add)
             return PaillierFixedPointTensor(z_value)
         elif isinstance(other, FixedPointTensor):
             z_value = _table_binary_mod_op(self.value, other.value, self.q_field, operator.add)
         elif is_table(other):
-            z_value = _table_binary_mod_op(self.value, other, self.q_field, operator.add)
+            z_value = _table_binary_mod_op(self.value, self._encode_plain(other), self.q_field, operator.add)
         else:
-            z_value = _table_scalar_mod_op(self.value, other, self.q_field, operator.add)
+            z_value = _table_scalar_mod_op(self.value, self._encode_plain(other), self.q_field, operator.add)
         return self._boxed(z_value)
 
     def __radd__(self, other):
@@ -234,14 +259,14 @@ class FixedPointTensor(TensorBase):
 
     def __sub__(self, other):
         if isinstance(other, PaillierFixedPointTensor):
-            z_value = _table_binary_op(self.value, other.value, operator.sub)
+            z_value = _table_binary_op(self._lifted(), other.value, operator.sub)
             return PaillierFixedPointTensor(z_value)
         elif isinstance(other, FixedPointTensor):
             z_value = _table_binary_mod_op(self.value, other.value, self.q_field, operator.sub)
         elif is_table(other):
-            z_value = _table_binary_mod_op(self.value, other, self.q_field, operator.sub)
+            z_value = _table_binary_mod_op(self.value, self._encode_plain(other), self.q_field, operator.sub)
         else:
-            z_value = _table_scalar_mod_op(self.value, other, self.q_field, operator.sub)
+            z_value = _table_scalar_mod_op(self.value, self._encode_plain(other), self.q_field, operator.sub)
 
         return self._boxed(z_value)
 
@@ -249,12 +274,14 @@ class FixedPointTensor(TensorBase):
         if isinstance(other, (PaillierFixedPointTensor, FixedPointTensor)):
             return other - self
         elif is_table(other):
-            z_value = _table_binary_mod_op(other, self.value, self.q_field, operator.sub)
+            z_value = _table_binary_mod_op(self._encode_plain(other), self.value, self.q_field, operator.sub)
         else:
             z_value = _table_scalar_mod_op(self.value, other, self.q_field, -1 * operator.sub)
         return self._boxed(z_value)
 
     def __mul__(self, other):
+        if is_ring(self.q_field):
+            return self._ring_mul(other)
         if isinstance(other, FixedPointTensor):
             z_value = _table_binary_mod_op(self.value, other.value, self.q_field, operator.mul)
         elif isinstance(other, PaillierFixedPointTensor):
@@ -264,6 +291,23 @@ class FixedPointTensor(TensorBase):
         z_value = self.endec.truncate(z_value, self.get_spdz().party_idx)
         return self._boxed(z_value)
 
+    def _ring_mul(self, other):
+        if isinstance(other, PaillierFixedPointTensor):
+            return PaillierFixedPointTensor(_table_binary_op(self._lifted(), other.value, operator.mul))
+
+        bits = None
+        if isinstance(other, FixedPointTensor):
+            z_value = _table_binary_op(self.value, other.value, operator.mul)
+        elif is_table(other):
+            z_value = _table_binary_op(self.value, self._encode_plain(other), operator.mul)
+        elif np.ndim(other) == 0 and getattr(other, "dtype", None) != np.uint64:
+            mantissa, bits = self.endec.encode_scalar(other)
+            z_value = _table_scalar_op(self.value, mantissa, operator.mul)
+        else:
+            z_value = _table_scalar_op(self.value, self._encode_plain(other), operator.mul)
+        z_value = self.endec.truncate(z_value, self.get_spdz().party_idx, bits)
+        return self._boxed(z_value)
+
     def __rmul__(self, other):
         return self.__mul__(other)
 
@@ -292,7 +336,7 @@ class PaillierFixedPointTensor(TensorBase):
             return ret
 
         if isinstance(other, (FixedPointTensor, fixedpoint_numpy.FixedPointTensor)):
-            other = other.value
+            other = other._lifted()
 
         if isinstance(other, np.ndarray):
             ret = self.value.mapValues(lambda x: _vec_dot(x, other))
@@ -315,8 +359,10 @@ class PaillierFixedPointTensor(TensorBase):
         return self.__str__()
 
     def __add__(self, other):
-        if isinstance(other, (PaillierFixedPointTensor, FixedPointTensor)):
+        if isinstance(other, PaillierFixedPointTensor):
             return self._boxed(_table_binary_op(self.value, other.value, operator.add))
+        elif isinstance(other, FixedPointTensor):
+            return self._boxed(_table_binary_op(self.value, other._lifted(), operator.add))
         elif is_table(other):
             return self._boxed(_table_binary_op(self.value, other, operator.add))
         else:
@@ -326,16 +372,20 @@ class PaillierFixedPointTensor(TensorBase):
         return self.__add__(other)
 
     def __sub__(self, other):
-        if isinstance(other, (PaillierFixedPointTensor, FixedPointTensor)):
+        if isinstance(other, PaillierFixedPointTensor):
             return self._boxed(_table_binary_op(self.value, other.value, operator.sub))
+        elif isinstance(other, FixedPointTensor):
+            return self._boxed(_table_binary_op(self.value, other._lifted(), operator.sub))
         elif is_table(other):
             return self._boxed(_table_binary_op(self.value, other, operator.sub))
         else:
             return self._boxed(_table_scalar_op(self.value, other, operator.sub))
 
     def __rsub__(self, other):
-        if isinstance(other, (PaillierFixedPointTensor, FixedPointTensor)):
+        if isinstance(other, PaillierFixedPointTensor):
             return self._boxed(_table_binary_op(other.value, self.value, operator.sub))
+        elif isinstance(other, FixedPointTensor):
+            return self._boxed(_table_binary_op(other._lifted(), self.value, operator.sub))
         elif is_table(other):
             return self._boxed(_table_binary_op(other, self.value, operator.sub))
         else:
@@ -343,7 +393,7 @@ class PaillierFixedPointTensor(TensorBase):
 
     def __mul__(self, other):
         if isinstance(other, FixedPointTensor):
-            z_value = _table_binary_op(self.value, other.value, operator.mul)
+            z_value = _table_binary_op(self.value, other._lifted(), operator.mul)
         elif is_table(other):
             z_value = _table_binary_op(self.value, other, operator.mul)
         else:
@@ -363,11 +413,16 @@ class PaillierFixedPointTensor(TensorBase):
 
         if 'encoder' in kwargs:
             encoder = kwargs['encoder']
+        elif is_ring(q_field):
+            encoder = RingFixedPointEndec()
         else:
             base = kwargs['base'] if 'base' in kwargs else 10
             frac = kwargs['frac'] if 'frac' in kwargs else 4
             encoder = FixedPointEndec(n=q_field, field=q_field, base=base, precision_fractional=frac)
 
+        if is_ring(q_field):
+            return cls._ring_from_source(tensor_name, source, spdz, q_field, encoder, **kwargs)
+
         if is_table(source):
             _pre = urand_tensor(q_field, source, use_mix=spdz.use_mix_rand)
 
@@ -396,3 +451,33 @@ class PaillierFixedPointTensor(TensorBase):
                                     tensor_name=tensor_name)
         else:
             raise ValueError(f"type={type(source)}")
+
+    @classmethod
+    def _ring_from_source(cls, tensor_name, source, spdz, q_field, encoder, **kwargs):
+        """
+        same as fixedpoint_numpy.PaillierFixedPointTensor._ring_from_source, masks are drawn per partition
+        """
+        truncate_bits = kwargs.get('truncate_bits', 0)
+        if is_table(source):
+            masks = source.mapValues(lambda x: mask_rand(np.shape(x)))
+            spdz.communicator.remote_share(share=_table_binary_op(source, masks, operator.sub),
+                                           tensor_name=tensor_name, party=spdz.other_parties[-1])
+            share = masks.mapValues(unlift)
+
+        elif isinstance(source, Party):
+            share = spdz.communicator.get_share(tensor_name=tensor_name, party=source)[0]
+            is_cipher_source = kwargs['is_cipher_source'] if 'is_cipher_source' in kwargs else True
+            if is_cipher_source:
+                cipher = kwargs.get("cipher")
+                if cipher is None:
+                    raise ValueError("Cipher is not provided")
+                share = share.mapValues(lambda x: unlift(cipher.recursive_decrypt_batch(x)))
+        else:
+            raise ValueError(f"type={type(source)}")
+
+        if truncate_bits:
+            share = encoder.truncate(share, spdz.party_idx, truncate_bits)
+        return FixedPointTensor(value=share,
+                                q_field=q_field,
+                                endec=encoder,
+                                tensor_name=tensor_name)
@@ -0,0 +1,166 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import threading
+import unittest
+
+import numpy as np
+
+from fate_arch.session import computing_session as session
+from federatedml.secureprotol.encrypt import PaillierEncrypt
+from federatedml.secureprotol.spdz.beaver_triples import BeaverTriplePool, beaver_triplets_batch
+from federatedml.secureprotol.spdz.beaver_triples.he import decrypt_tensor, encrypt_tensor
+from federatedml.secureprotol.spdz.test.ring_fixedpoint_test import _LocalCommunicator
+from federatedml.secureprotol.spdz.utils.ring import RING_SIZE, ring_rand
+
+FIELD = 2 << 60
+SHAPES = [((1, 6), (6, 1)), ((3, 2), (2, 4)), ((1, 6), (6, 1))]
+
+
+class TestBeaverTriplePool(unittest.TestCase):
+
+    def _run_parties(self, target):
+        boxes = {}
+        results = [None, None]
+
+        def _run(idx):
+            cipher = PaillierEncrypt()
+            cipher.generate_key(1024)
+            results[idx] = target((cipher.public_key, cipher.privacy_key), _LocalCommunicator(idx, boxes))
+
+        threads = [threading.Thread(target=_run, args=(idx,)) for idx in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def _assert_triplets(self, triplets_0, triplets_1, q_field):
+        self.assertEqual(len(triplets_0), len(SHAPES))
+        for (a_shape, b_shape), t0, t1 in zip(SHAPES, triplets_0, triplets_1):
+            a, b, c = [t0[i] + t1[i] for i in range(3)]
+            self.assertEqual(a.shape, a_shape)
+            self.assertEqual(b.shape, b_shape)
+            if q_field == RING_SIZE:
+                np.testing.assert_array_equal(np.dot(a, b), c)
+            else:
+                for x, y in zip(c.flat, np.dot(a, b).flat):
+                    self.assertLess(self._field_diff(x, y, q_field), 1e-3)
+
+    @staticmethod
+    def _field_diff(x, y, q_field):
+        """
+        distance in the field of two fixed point numbers, aligned to the larger exponent
+        """
+        exponent = max(x.exponent, y.exponent)
+        diff = (x.encoding * x.BASE ** (exponent - x.exponent) - y.encoding * y.BASE ** (exponent - y.exponent))
+        diff %= q_field
+        return min(diff, q_field - diff) / x.BASE ** exponent
+
+    def test_encrypt_decrypt_tensor(self):
+        cipher = PaillierEncrypt()
+        cipher.generate_key(1024)
+        x = np.random.randint(-1000, 1000, (4, 3)).astype(object)
+        decrypted = decrypt_tensor(encrypt_tensor(x, cipher.public_key), cipher.privacy_key, [object])
+        self.assertEqual(decrypted.shape, x.shape)
+        np.testing.assert_array_equal(decrypted, x)
+
+    def test_ring_batch(self):
+        results = self._run_parties(lambda key_pair, communicator: beaver_triplets_batch(
+            SHAPES, RING_SIZE, key_pair, communicator, "ring_batch"))
+        self._assert_triplets(*results, RING_SIZE)
+
+    def test_field_batch(self):
+        results = self._run_parties(lambda key_pair, communicator: beaver_triplets_batch(
+            SHAPES, FIELD, key_pair, communicator, "field_batch"))
+        self._assert_triplets(*results, FIELD)
+
+    def test_pool(self):
+        def _generate(key_pair, communicator):
+            pool = BeaverTriplePool()
+            pool.generate(SHAPES, RING_SIZE, key_pair, communicator, "pool")
+            return pool
+
+        pools = self._run_parties(_generate)
+        self.assertEqual(len(pools[0]), len(SHAPES))
+        self.assertIsNone(pools[0].pop((2, 2), (2, 2)))
+
+        popped = [[pool.pop(a_shape, b_shape) for a_shape, b_shape in SHAPES] for pool in pools]
+        self._assert_triplets(*popped, RING_SIZE)
+        self.assertEqual(len(pools[0]), 0)
+        self.assertIsNone(pools[0].pop((1, 6), (6, 1)))
+
+
+class TestTableTriplets(unittest.TestCase):
+
+    def setUp(self):
+        session.init("test_table_triplets")
+        self.x = {i: ring_rand((3,)) for i in range(20)}
+        self.table = session.parallelize(list(self.x.items()), include_key=True, partition=3)
+
+    def tearDown(self):
+        session.stop()
+
+    def _generate(self, like, transpose):
+        boxes = {}
+        results = [None, None]
+
+        def _run(idx):
+            cipher = PaillierEncrypt()
+            cipher.generate_key(1024)
+            communicator = _LocalCommunicator(idx, boxes)
+            pool = BeaverTriplePool()
+            for name in ["first", "refill"]:
+                if idx == 0:
+                    pool.generate_table("x", self.table, None, 2, (cipher.public_key, cipher.privacy_key),
+                                        communicator, name, transpose)
+                else:
+                    pool.generate_table("x", None, like, 2, (cipher.public_key, cipher.privacy_key),
+                                        communicator, name, transpose)
+            results[idx] = [pool.pop_table("x") for _ in range(pool.table_len("x"))]
+
+        threads = [threading.Thread(target=_run, args=(idx,)) for idx in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(results[0]), 4)
+        self.assertEqual(len(results[1]), 4)
+        return results
+
+    def test_table_vector(self):
+        y = ring_rand((3,))
+        for (mask, _, c_0), (masked, v, c_1) in zip(*self._generate(y, transpose=False)):
+            mask, masked, c_0, c_1 = dict(mask.collect()), dict(masked.collect()), dict(c_0.collect()), \
+                dict(c_1.collect())
+            for k, x in self.x.items():
+                np.testing.assert_array_equal(mask[k] + masked[k], x)
+                np.testing.assert_array_equal(c_0[k] + c_1[k], np.dot(mask[k], v))
+                # online: the table party holds x (y - v) + c_0, the other party (x - u) v + c_1
+                np.testing.assert_array_equal(np.dot(x, y - v) + c_0[k] + np.dot(masked[k], v) + c_1[k],
+                                              np.dot(x, y))
+
+    def test_table_transpose(self):
+        e = {k: ring_rand((1,)) for k in self.x}
+        for (mask, _, c_0), (masked, v, c_1) in zip(*self._generate(self.table, transpose=True)):
+            mask, masked, v = dict(mask.collect()), dict(masked.collect()), dict(v.collect())
+            np.testing.assert_array_equal(c_0 + c_1, sum(mask[k] * v[k] for k in self.x))
+            np.testing.assert_array_equal(sum(x * (e[k] - v[k]) + masked[k] * v[k] for k, x in self.x.items())
+                                          + c_0 + c_1, sum(x * e[k] for k, x in self.x.items()))
+
+
+if __name__ == '__main__':
+    unittest.main()
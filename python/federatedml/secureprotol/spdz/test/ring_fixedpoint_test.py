@@ -0,0 +1,142 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import queue
+import threading
+import unittest
+
+import numpy as np
+
+from federatedml.secureprotol.encrypt import PaillierEncrypt
+from federatedml.secureprotol.spdz.beaver_triples import beaver_triplets
+from federatedml.secureprotol.spdz.tensor.fixedpoint_endec import RingFixedPointEndec
+from federatedml.secureprotol.spdz.utils import rand_tensor
+from federatedml.secureprotol.spdz.utils.ring import RING_SIZE, lift, mask_rand, ring_rand, unlift
+
+
+class _LocalCommunicator(object):
+    """
+    in-memory exchange between two threads, one per party
+    """
+
+    def __init__(self, party_idx, boxes):
+        self.party_idx = party_idx
+        self._boxes = boxes
+        self._lock = threading.Lock()
+
+    def _box(self, tag):
+        with self._lock:
+            return self._boxes.setdefault(tag, queue.Queue())
+
+    def remote_encrypted_tensor(self, encrypted, tag):
+        self._box(tag).put(encrypted)
+
+    def get_encrypted_tensors(self, tag):
+        return [1 - self.party_idx], (self._box(tag).get(timeout=60),)
+
+    def remote_encrypted_cross_tensor(self, encrypted, parties, tag):
+        self._box(tag).put(encrypted)
+
+    def get_encrypted_cross_tensors(self, tag):
+        return [self._box(tag).get(timeout=60)]
+
+    @property
+    def other_parties(self):
+        return [1 - self.party_idx]
+
+    def remote_share(self, share, tensor_name, party):
+        self._box(tensor_name).put(share)
+
+    def get_share(self, tensor_name, party):
+        return [self._box(tensor_name).get(timeout=60)]
+
+
+class TestRingFixedPoint(unittest.TestCase):
+
+    def setUp(self):
+        self.endec = RingFixedPointEndec(precision_fractional=16)
+        self.x = np.random.uniform(-100, 100, (20, 3))
+        self.y = np.random.uniform(-100, 100, (20, 3))
+
+    def _share(self, encoded):
+        share = ring_rand(encoded.shape)
+        return share, encoded - share
+
+    def test_encode_decode(self):
+        encoded = self.endec.encode(self.x)
+        self.assertEqual(encoded.dtype, np.uint64)
+        np.testing.assert_allclose(self.endec.decode(encoded), self.x, atol=2 ** -16)
+
+        s0, s1 = self._share(encoded)
+        np.testing.assert_allclose(self.endec.decode(s0 + s1), self.x, atol=2 ** -16)
+
+        with self.assertRaises(ValueError):
+            self.endec.encode(np.array([2.0 ** 50]))
+
+    def test_truncate_product_shares(self):
+        s0, s1 = self._share(self.endec.encode(self.x) * self.endec.encode(self.y))
+        product = self.endec.truncate(s0, 0) + self.endec.truncate(s1, 1)
+        np.testing.assert_allclose(self.endec.decode(product), self.x * self.y, atol=1e-2)
+
+    def test_encode_scalar(self):
+        s0, s1 = self._share(self.endec.encode(self.x))
+        for scalar in [1 / 12345, -0.125, 3, 1e4]:
+            mantissa, bits = self.endec.encode_scalar(scalar)
+            product = self.endec.truncate(s0 * mantissa, 0, bits) + self.endec.truncate(s1 * mantissa, 1, bits)
+            np.testing.assert_allclose(self.endec.decode(product), self.x * scalar,
+                                       atol=abs(scalar) * 2 ** -10 + 2 ** -14)
+
+    def test_share_paillier_product(self):
+        cipher = PaillierEncrypt()
+        cipher.generate_key(1024)
+        s0, s1 = self._share(self.endec.encode(self.x))
+        encrypted = cipher.recursive_encrypt_batch(lift(s0)) + lift(s1)
+        encrypted = encrypted * self.endec.encode_signed(self.y)
+
+        mask = mask_rand(encrypted.shape)
+        share_0 = self.endec.truncate(unlift(mask), 0)
+        share_1 = self.endec.truncate(unlift(cipher.recursive_decrypt_batch(encrypted - mask)), 1)
+        np.testing.assert_allclose(self.endec.decode(share_0 + share_1), self.x * self.y, atol=1e-2)
+
+    def test_rand_tensor(self):
+        r = rand_tensor(RING_SIZE, self.x)
+        self.assertEqual(r.dtype, np.uint64)
+        self.assertEqual(r.shape, self.x.shape)
+
+    def test_beaver_triplets(self):
+        boxes = {}
+        triplets = [None, None]
+
+        def _run(idx):
+            cipher = PaillierEncrypt()
+            cipher.generate_key(1024)
+            triplets[idx] = beaver_triplets(self.x.T, self.y, np.dot, RING_SIZE,
+                                            (cipher.public_key, cipher.privacy_key),
+                                            _LocalCommunicator(idx, boxes), "ring_triplets")
+
+        threads = [threading.Thread(target=_run, args=(idx,)) for idx in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        a, b, c = [triplets[0][i] + triplets[1][i] for i in range(3)]
+        self.assertEqual(c.dtype, np.uint64)
+        np.testing.assert_array_equal(np.dot(a, b), c)
+
+
+if __name__ == '__main__':
+    unittest.main()
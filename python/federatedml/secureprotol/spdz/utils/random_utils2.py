@@ -22,6 +22,7 @@ import sys
 import numpy as np
 from fate_arch.session import is_table
 from federatedml.secureprotol.fixedpoint import FixedPointNumber
+from federatedml.secureprotol.spdz.utils.ring import is_ring, ring_rand
 
 
 FLOAT_MANTISSA_BITS = 32
@@ -39,6 +40,8 @@ def rand_number_generator(q_field):
 
 
 def rand_tensor(q_field, tensor):
+    if is_ring(q_field):
+        return _ring_rand_tensor(tensor)
     if is_table(tensor):
         return tensor.mapValues(
             lambda x: np.array([rand_number_generator(q_field=q_field)
@@ -88,7 +91,17 @@ def _mix_rand_func(it, q_field):
     return result
 
 
+def _ring_rand_tensor(tensor):
+    if is_table(tensor):
+        return tensor.mapValues(lambda x: ring_rand(np.shape(x)))
+    if isinstance(tensor, np.ndarray):
+        return ring_rand(tensor.shape)
+    raise NotImplementedError(f"type={type(tensor)}")
+
+
 def urand_tensor(q_field, tensor, use_mix=False):
+    if is_ring(q_field):
+        return _ring_rand_tensor(tensor)
     if is_table(tensor):
         if use_mix:
             return tensor.mapPartitions(functools.partial(_mix_rand_func,
@@ -0,0 +1,75 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import os
+
+import numpy as np
+
+RING_BITS = 64
+RING_SIZE = 1 << RING_BITS
+STATISTICAL_SECURITY = 40
+
+# masks of values leaving a Paillier ciphertext, the ciphertexts hold sums of products of two signed ring elements
+MASK_BITS = 2 * RING_BITS + 2 * STATISTICAL_SECURITY
+
+
+def is_ring(q_field):
+    """
+    shares of the ring Z_2^64 live in uint64 arrays, arithmetic wraps around instead of being reduced
+    """
+    return q_field == RING_SIZE
+
+
+def mod_q(value, q_field):
+    if is_ring(q_field):
+        return value
+    return value % q_field
+
+
+def ring_rand(shape):
+    """
+    uniform ring elements drawn from os.urandom in one call
+    """
+    size = int(np.prod(shape, dtype=np.int64))
+    return np.frombuffer(bytearray(os.urandom(8 * size)), dtype=np.uint64).reshape(shape)
+
+
+def lift(value):
+    """
+    signed python ints of ring elements, used as plaintexts of Paillier ciphertexts
+    """
+    return np.asarray(value, dtype=np.uint64).view(np.int64).astype(object)
+
+
+def unlift(value):
+    """
+    ring elements of python ints, e.g. decrypted plaintexts
+    """
+    value = np.asarray(value, dtype=object)
+    return (value % RING_SIZE).astype(np.uint64)
+
+
+def mask_rand(shape, bits=MASK_BITS):
+    """
+    python ints uniform in [0, 2^bits), masks of ciphertexts turned into ring shares
+    """
+    size = int(np.prod(shape, dtype=np.int64))
+    width = (bits + 7) // 8
+    data = os.urandom(width * size)
+    shift = width * 8 - bits
+    arr = np.empty(size, dtype=object)
+    for i in range(size):
+        arr[i] = int.from_bytes(data[i * width: (i + 1) * width], 'little') >> shift
+    return arr.reshape(shape)
@@ -0,0 +1,72 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import unittest
+import uuid
+
+from fate_arch.session import computing_session as session
+from federatedml.secureprotol.elliptic_curve_encryption import EllipticCurve
+from federatedml.secureprotol.hash.hash_factory import Hash
+from federatedml.util import consts
+
+
+class TestEllipticCurve(unittest.TestCase):
+    def setUp(self):
+        session.init(str(uuid.uuid1()))
+        self.guest_curve = EllipticCurve(consts.CURVE25519)
+        self.host_curve = EllipticCurve(consts.CURVE25519)
+        self.hash_operator = Hash(consts.SHA256, hex_output=False)
+        self.ids = [str(i) for i in range(100)]
+
+    def test_batch(self):
+        messages = [self.hash_operator.compute(sid) for sid in self.ids]
+        encrypted = self.guest_curve.encrypt_batch(messages)
+        self.assertListEqual(encrypted, [self.guest_curve.encrypt(m) for m in messages])
+        self.assertListEqual(self.host_curve.sign_batch(encrypted), [self.host_curve.sign(e) for e in encrypted])
+        self.assertListEqual(self.guest_curve.encrypt_batch([]), [])
+
+    def test_map_modes(self):
+        table = session.parallelize([(sid, i) for i, sid in enumerate(self.ids)], include_key=True, partition=3)
+        enc = {sid: self.guest_curve.encrypt(self.hash_operator.compute(sid, suffix_salt="s")) for sid in self.ids}
+        expected = {
+            0: {(k, enc[k]) for k in self.ids},
+            1: {(enc[k], -1) for k in self.ids},
+            2: {(enc[k], i) for i, k in enumerate(self.ids)},
+            3: {(k, (enc[k], i)) for i, k in enumerate(self.ids)},
+            4: {(enc[k], k) for k in self.ids},
+            5: {(enc[k], (k, i)) for i, k in enumerate(self.ids)},
+        }
+        for mode, rows in expected.items():
+            result = self.guest_curve.map_hash_encrypt(table, mode=mode, hash_operator=self.hash_operator, salt="s")
+            self.assertSetEqual(set(result.collect()), rows)
+        with self.assertRaises(ValueError):
+            self.guest_curve.map_encrypt(table, mode=6)
+
+    def test_map_sign(self):
+        table = session.parallelize([(sid, None) for sid in self.ids], include_key=True, partition=3)
+        guest_ids = self.guest_curve.map_hash_encrypt(table, mode=1, hash_operator=self.hash_operator, salt="")
+        host_ids = self.host_curve.map_hash_encrypt(table, mode=4, hash_operator=self.hash_operator, salt="")
+
+        guest_doubly = self.host_curve.map_sign(guest_ids, mode=1)
+        host_doubly = self.guest_curve.map_sign(host_ids, mode=4)
+        self.assertEqual(guest_doubly.join(host_doubly, lambda v1, v2: v2).count(), len(self.ids))
+
+    def tearDown(self):
+        session.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
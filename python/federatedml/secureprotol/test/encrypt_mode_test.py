@@ -84,6 +84,28 @@ class TestEncryptModeCalculator(unittest.TestCase):
             for j in range(30):
                 self.assertTrue(np.fabs(self.numpy_data[j] - decrypt_data_i[j] + i).all() < 1e-5)
 
+    def test_batch_decrypt(self):
+        from federatedml.secureprotol.encrypt_mode import EncryptModeCalculator
+        from federatedml.secureprotol import PaillierEncrypt
+        from federatedml.secureprotol.fixedpoint import FixedPointNumber
+        encrypter = PaillierEncrypt()
+        encrypter.generate_key(1024)
+        encrypted_calculator = EncryptModeCalculator(encrypter)
+
+        data_tuple = encrypted_calculator.distribute_decrypt(encrypted_calculator.encrypt(self.data_tuple))
+        self.assertEqual(dict(data_tuple.collect()), dict(enumerate(self.tuple_data)))
+        data_numpy = dict(encrypted_calculator.distribute_decrypt(encrypted_calculator.encrypt(self.data_numpy))
+                          .collect())
+        for key, value in data_numpy.items():
+            np.testing.assert_almost_equal(value, self.numpy_data[key])
+
+        raw_data = dict(encrypted_calculator.raw_encrypt(self.data_list, exponent=3).collect())
+        for key, value in raw_data.items():
+            self.assertEqual([v.exponent for v in value], [3] * len(value))
+            self.assertEqual(encrypter.recursive_raw_decrypt_batch(value), self.list_data[key])
+            np.testing.assert_almost_equal(encrypted_calculator.recursive_decrypt(value),
+                                           [v * FixedPointNumber.BASE ** -3 for v in self.list_data[key]])
+
 
 if __name__ == '__main__':
     unittest.main()
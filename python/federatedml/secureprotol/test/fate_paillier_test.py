@@ -14,12 +14,16 @@
 #  limitations under the License.
 #
 
-import numpy as np
+import pickle
 import unittest
+
+import numpy as np
 from federatedml.secureprotol.fate_paillier import PaillierKeypair
 from federatedml.secureprotol.fate_paillier import PaillierPublicKey
 from federatedml.secureprotol.fate_paillier import PaillierPrivateKey
 from federatedml.secureprotol.fate_paillier import PaillierEncryptedNumber
+from federatedml.secureprotol.fate_paillier import PaillierObfuscatorPool
+from federatedml.secureprotol.fate_paillier import PaillierEncryptedVector
 
 
 class TestPaillierEncryptedNumber(unittest.TestCase):
@@ -82,5 +86,98 @@ class TestPaillierEncryptedNumber(unittest.TestCase):
             self.assertAlmostEqual(de_en_x, x)
 
 
+class TestPaillierBatch(unittest.TestCase):
+    def setUp(self):
+        self.public_key, self.private_key = PaillierKeypair.generate_keypair()
+        self.obfuscator_pool = PaillierObfuscatorPool(self.public_key)
+
+    def test_encrypt_batch(self):
+        values = list(np.random.randn(50) * 1000) + [0, 1, -1, 123456789, -987654321, 0.5]
+        en_values = self.public_key.encrypt_batch(values, obfuscator_pool=self.obfuscator_pool)
+        self.assertEqual(len(set(en.ciphertext() for en in en_values)), len(values))
+        for value, en_value in zip(values, en_values):
+            self.assertAlmostEqual(self.private_key.decrypt(en_value), value)
+        np.testing.assert_almost_equal(self.private_key.decrypt_batch(en_values), values)
+
+        en_sum = en_values[0] * 3 + en_values[1] - 2.5
+        self.assertAlmostEqual(self.private_key.decrypt(en_sum), values[0] * 3 + values[1] - 2.5)
+
+    def test_raw_batch(self):
+        plaintexts = [0, 1, 2 ** 64, self.public_key.max_int, self.public_key.n - 1, self.public_key.n - 12345]
+        ciphertexts = self.public_key.raw_encrypt_batch(plaintexts, self.obfuscator_pool)
+        self.assertEqual([self.private_key.raw_decrypt(c) for c in ciphertexts], plaintexts)
+        self.assertEqual(self.private_key.raw_decrypt_batch(ciphertexts), plaintexts)
+        # same as raw_encrypt before obfuscation
+        plain_ciphertexts = [self.public_key.raw_encrypt(p, random_value=1) for p in plaintexts]
+        self.assertEqual(self.private_key.raw_decrypt_batch(plain_ciphertexts), plaintexts)
+
+    def test_obfuscator_pool(self):
+        pool = PaillierObfuscatorPool(self.public_key, window_bits=4, exponent_bits=10)
+        obfuscators = pool.generate(20)
+        base = pool.base
+        candidates = {pow(base, x, self.public_key.nsquare) for x in range(1 << 10)}
+        self.assertTrue(all(int(o) in candidates for o in obfuscators))
+        pickled = pickle.loads(pickle.dumps(pool))
+        self.assertIsNone(pickled._table)
+        self.assertTrue(all(int(o) in candidates for o in pickled.generate(5)))
+
+    def test_different_key(self):
+        other_public_key, _ = PaillierKeypair.generate_keypair()
+        with self.assertRaises(ValueError):
+            other_public_key.raw_encrypt_batch([1], self.obfuscator_pool)
+
+
+class TestPaillierEncryptedVector(unittest.TestCase):
+    def setUp(self):
+        self.public_key, self.private_key = PaillierKeypair.generate_keypair()
+        self.x = list(np.random.randn(20) * 100) + [0, 3, -7, 1e-8]
+        self.y = list(np.random.randn(20)) + [2, 0.5, 1e6, -4]
+
+    def test_encrypt_decrypt(self):
+        en_x = self.public_key.encrypt_vector(self.x)
+        self.assertEqual(len(en_x), len(self.x))
+        self.assertTrue(all(en.exponent == en_x.exponent for en in en_x))
+        np.testing.assert_almost_equal(self.private_key.decrypt_vector(en_x), self.x)
+        np.testing.assert_almost_equal(self.private_key.decrypt_batch(en_x.to_encrypted_numbers()), self.x)
+        self.assertEqual(self.private_key.decrypt_vector(self.public_key.encrypt_vector([])), [])
+
+    def test_same_as_encrypted_number(self):
+        en_numbers = self.public_key.encrypt_batch(self.x)
+        self.assertGreater(len(set(en.exponent for en in en_numbers)), 1)
+        en_x = PaillierEncryptedVector.from_encrypted_numbers(en_numbers)
+        self.assertEqual(en_x.exponent, max(en.exponent for en in en_numbers))
+        # alignment is the same as PaillierEncryptedNumber.increase_exponent_to
+        for en_number, aligned in zip(en_numbers, en_x):
+            expected = en_number.increase_exponent_to(en_x.exponent) if en_number.exponent < en_x.exponent \
+                else en_number
+            self.assertEqual(aligned.ciphertext(be_secure=False), expected.ciphertext(be_secure=False))
+
+        en_y = self.public_key.encrypt_vector(self.y)
+        np.testing.assert_almost_equal(self.private_key.decrypt_vector(en_x + en_y), np.add(self.x, self.y))
+        np.testing.assert_almost_equal(self.private_key.decrypt_vector(en_x - en_y), np.subtract(self.x, self.y))
+        np.testing.assert_almost_equal(self.private_key.decrypt_vector(en_x + self.y), np.add(self.x, self.y))
+        np.testing.assert_almost_equal(self.private_key.decrypt_vector(2.5 - en_x), np.subtract(2.5, self.x))
+        np.testing.assert_almost_equal(self.private_key.decrypt_vector(en_x * np.array(self.y)),
+                                       np.multiply(self.x, self.y), decimal=4)
+        np.testing.assert_almost_equal(self.private_key.decrypt_vector(en_x * -3), np.multiply(self.x, -3))
+        np.testing.assert_almost_equal(self.private_key.decrypt_vector(en_x / 4), np.divide(self.x, 4))
+        self.assertAlmostEqual(self.private_key.decrypt((en_x * self.y).sum()), np.dot(self.x, self.y), places=4)
+        self.assertAlmostEqual(self.private_key.decrypt(en_x.sum()), sum(self.x))
+
+        with self.assertRaises(ValueError):
+            en_x + self.y[1:]
+
+    def test_obfuscate_and_pickle(self):
+        en_x = PaillierEncryptedVector.from_encrypted_numbers(self.public_key.encrypt_batch(self.x)) + 1
+        raw = list(en_x.ciphertexts(be_secure=False))
+        secure = en_x.ciphertexts()
+        self.assertTrue(all(a != b for a, b in zip(raw, secure)))
+        loaded = pickle.loads(pickle.dumps(en_x))
+        self.assertEqual(loaded.ciphertexts(be_secure=False), secure)
+        self.assertEqual(loaded.exponent, en_x.exponent)
+        np.testing.assert_almost_equal(self.private_key.decrypt_vector(loaded), np.add(self.x, 1))
+        np.testing.assert_almost_equal(self.private_key.decrypt_vector(loaded[2:5]), np.add(self.x[2:5], 1))
+
+
 if __name__ == '__main__':
     unittest.main()
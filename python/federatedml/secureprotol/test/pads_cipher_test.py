@@ -0,0 +1,97 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import hashlib
+import unittest
+import uuid
+
+import numpy as np
+
+from fate_arch.session import computing_session as session
+from federatedml.feature.instance import Instance
+from federatedml.secureprotol.encrypt import PadsCipher
+from federatedml.secureprotol.random import CounterRandomPads
+
+
+class TestPadsCipher(unittest.TestCase):
+
+    def setUp(self):
+        session.init(str(uuid.uuid1()))
+        self.party_num = 3
+        self.ciphers = []
+        for uid in range(self.party_num):
+            cipher = PadsCipher()
+            cipher.set_self_uuid(uid)
+            # each pair of parties shares a key
+            cipher.set_exchanged_keys({other: (min(uid, other) + 1) * 7919 + max(uid, other)
+                                       for other in range(self.party_num)})
+            cipher.set_amplify_factor(1000)
+            self.ciphers.append(cipher)
+
+    def test_counter_pads(self):
+        rand = CounterRandomPads(42)
+        key_hashes = CounterRandomPads.hash_keys(range(100))
+        pads = rand.rand(key_hashes, 8)
+        self.assertEqual(pads.shape, (100, 8))
+        self.assertTrue(np.all((pads >= 0) & (pads < 1)))
+        np.testing.assert_array_equal(rand.rand(key_hashes[::-1][:10], 3), pads[::-1][:10, :3])
+        self.assertFalse(np.allclose(CounterRandomPads(43).rand(key_hashes, 8), pads))
+
+    def test_hash_non_ascii_keys(self):
+        key_hashes = CounterRandomPads.hash_keys(["张三", "id_0"])
+        self.assertEqual(len(set(key_hashes.tolist())), 2)
+        # ascii keys hash the same as before utf-8 encoding
+        self.assertEqual(key_hashes[1], np.frombuffer(hashlib.md5(b"id_0").digest()[:8], dtype="<u8")[0])
+
+    def test_encrypt_table(self):
+        keys = list(range(200))
+        values = [{key: np.random.random(4) for key in keys} for _ in range(self.party_num)]
+        scalars = [{key: np.random.random() for key in keys} for _ in range(self.party_num)]
+        expected = {key: sum(v[key] for v in values) for key in keys}
+        expected_scalar = {key: sum(v[key] for v in scalars) for key in keys}
+
+        padded, padded_scalar, padded_inst = [], [], []
+        for uid, cipher in enumerate(self.ciphers):
+            # parties may partition their tables differently
+            partition = uid + 2
+            table = session.parallelize(list(values[uid].items()), include_key=True, partition=partition)
+            padded.append(dict(cipher.encrypt_table(table).collect()))
+            table = session.parallelize(list(scalars[uid].items()), include_key=True, partition=partition)
+            padded_scalar.append(dict(cipher.encrypt_table(table).collect()))
+            table = session.parallelize([(k, Instance(features=v.copy())) for k, v in values[uid].items()],
+                                        include_key=True, partition=partition)
+            padded_inst.append(dict(cipher.encrypt_table(table).collect()))
+
+        self.assertFalse(np.allclose(padded[0][0], values[0][0]))
+        for key in keys:
+            np.testing.assert_allclose(sum(p[key] for p in padded), expected[key], atol=1e-8)
+            np.testing.assert_allclose(sum(p[key].features for p in padded_inst), expected[key], atol=1e-8)
+            self.assertAlmostEqual(sum(p[key] for p in padded_scalar), expected_scalar[key], delta=1e-8)
+
+    def test_encrypt_inplace(self):
+        values = [np.random.random(1000) for _ in range(self.party_num)]
+        padded = [cipher.encrypt_inplace(v.copy()) for cipher, v in zip(self.ciphers, values)]
+        np.testing.assert_allclose(sum(padded), sum(values), atol=1e-8)
+
+        with self.assertRaises(ValueError):
+            self.ciphers[0].encrypt_inplace(values[0].astype(np.float32))
+
+    def tearDown(self):
+        session.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
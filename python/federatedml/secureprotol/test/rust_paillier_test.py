@@ -0,0 +1,94 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import pickle
+import random
+import unittest
+
+from federatedml.secureprotol.encrypt import PaillierEncrypt, RustPaillierEncrypt
+from federatedml.secureprotol.fate_paillier import PaillierEncryptedNumber
+
+try:
+    from fate_crypto import paillier as fate_crypto_paillier
+except ImportError:
+    fate_crypto_paillier = None
+
+
+@unittest.skipIf(fate_crypto_paillier is None, "fate_crypto.paillier not available")
+class TestRustPaillierEncrypt(unittest.TestCase):
+    def setUp(self):
+        self.encrypter = RustPaillierEncrypt()
+        self.encrypter.generate_key(1024)
+        self.public_key, self.privacy_key = self.encrypter.get_key_pair()
+        self.python_encrypter = PaillierEncrypt()
+        self.python_encrypter.set_public_key(self.public_key)
+        self.python_encrypter.set_privacy_key(self.privacy_key)
+        self.values = [0, 1, -1, 0.5, -3.25, 1e10, -1e-10, *(random.uniform(-1e6, 1e6) for _ in range(50))]
+
+    def test_raw_encrypt_same_as_fate_paillier(self):
+        n = self.public_key.n
+        native_key = self.encrypter._get_native_public_key()
+        plaintexts = [0, 1, n - 1, *(random.randrange(n) for _ in range(20))]
+        random_values = [random.randrange(1, n) for _ in plaintexts]
+        ciphertexts = native_key.encrypt(b"".join(m.to_bytes(native_key.n_bytes, "little") for m in plaintexts),
+                                         b"".join(r.to_bytes(native_key.n_bytes, "little") for r in random_values))
+        width = ciphertexts.width
+        data = ciphertexts.to_bytes()
+        self.assertEqual([int.from_bytes(data[i * width: (i + 1) * width], "little") for i in range(len(plaintexts))],
+                         [self.public_key.raw_encrypt(m, random_value=r) for m, r in zip(plaintexts, random_values)])
+
+    def test_encrypt_decrypt(self):
+        encrypted = self.encrypter.encrypt_list(self.values)
+        self.assertTrue(all(isinstance(x, PaillierEncryptedNumber) for x in encrypted))
+        self.assertEqual([x.exponent for x in encrypted],
+                         [self.public_key.encrypt(v).exponent for v in self.values])
+        self.assertEqual(self.encrypter.decrypt_list(encrypted), self.python_encrypter.decrypt_list(encrypted))
+        for value, decrypted in zip(self.values, self.encrypter.decrypt_list(encrypted)):
+            self.assertAlmostEqual(value, decrypted)
+
+        python_encrypted = self.python_encrypter.encrypt_list(self.values)
+        self.assertEqual(self.encrypter.raw_decrypt_list(python_encrypted),
+                         self.python_encrypter.raw_decrypt_list(python_encrypted))
+
+    def test_raw_encrypt_list(self):
+        plaintexts = [random.randrange(1 << 64) for _ in range(20)]
+        encrypted = self.encrypter.raw_encrypt_list(plaintexts, exponent=3)
+        self.assertEqual([x.exponent for x in encrypted], [3] * len(plaintexts))
+        self.assertEqual(self.encrypter.raw_decrypt_list(encrypted), plaintexts)
+
+    def test_add_mul_same_as_fate_paillier(self):
+        x = self.python_encrypter.encrypt_list(self.values)
+        y = self.python_encrypter.encrypt_list(self.values[::-1])
+        for native, python in zip(self.encrypter.add_list(x, y), [a + b for a, b in zip(x, y)]):
+            self.assertEqual(native.ciphertext(be_secure=False), python.ciphertext(be_secure=False))
+            self.assertEqual(native.exponent, python.exponent)
+
+        scalars = [2, -1, 0.125, *self.values[3:]]
+        for native, python in zip(self.encrypter.mul_list(x, scalars), [a * s for a, s in zip(x, scalars)]):
+            self.assertEqual(native.ciphertext(be_secure=False), python.ciphertext(be_secure=False))
+            self.assertEqual(native.exponent, python.exponent)
+
+        with self.assertRaises(ValueError):
+            self.encrypter.add_list(x, y[1:])
+
+    def test_pickle(self):
+        encrypted = self.encrypter.encrypt_list(self.values)
+        encrypter = pickle.loads(pickle.dumps(self.encrypter))
+        self.assertEqual(encrypter.decrypt_list(encrypted), self.encrypter.decrypt_list(encrypted))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -14,6 +14,7 @@
 #  limitations under the License.
 #
 
+import functools
 import random
 
 from federatedml.param.intersect_param import DEFAULT_RANDOM_BIT
@@ -48,7 +49,8 @@ class RsaIntersect(Intersect):
         self.random_bit = self.rsa_params.random_bit
         self.split_calculation = self.rsa_params.split_calculation
         self.random_base_fraction = self.rsa_params.random_base_fraction
-        self.first_hash_operator = Hash(self.rsa_params.hash_method, False)
+        # ids are hashed to ints right away, digests are kept as bytes instead of going through hex strings
+        self.first_hash_operator = Hash(self.rsa_params.hash_method, False, hex_output=False)
         self.final_hash_operator = Hash(self.rsa_params.final_hash_method, False)
         self.salt = self.rsa_params.salt
 
@@ -75,7 +77,7 @@ class RsaIntersect(Intersect):
                 for k, v in kv_iterator:
                     if hash_operator is not None:
                         v = (k, v)
-                        k = int(Intersect.hash(k, hash_operator, salt), 16)
+                        k = RsaIntersect.hash_to_int(k, hash_operator, salt)
                     res.append((k % count, [(k, v)]))
                 return res
 
@@ -91,8 +93,13 @@ class RsaIntersect(Intersect):
             return reduced_pair_group.flatMap(pubkey_id_generate)
         else:
             LOGGER.debug(f"fraction not provided or invalid, fraction value: {fraction}.")
-            return data.map(lambda k, v: RsaIntersect.pubkey_id_process_per(k, v, random_bit, rsa_e, rsa_n,
-                                                                            hash_operator, salt))
+            return data.mapPartitions(functools.partial(RsaIntersect.pubkey_id_process_partition,
+                                                        random_bit=random_bit,
+                                                        rsa_e=rsa_e,
+                                                        rsa_n=rsa_n,
+                                                        hash_operator=hash_operator,
+                                                        salt=salt),
+                                      use_previous_behavior=False)
 
     @staticmethod
     def generate_rsa_key(rsa_bit=1024):
@@ -125,17 +132,49 @@ class RsaIntersect(Intersect):
             self.cp = cp
             self.cq = cq
 
+    @staticmethod
+    def hash_to_int(value, hash_operator, salt=''):
+        """
+        H(value) as int, byte digests are converted directly, the same int as parsing their hex digest
+        """
+        h_value = Intersect.hash(value, hash_operator, salt)
+        if not isinstance(h_value, bytes):
+            return int(h_value, 16)
+        if hash_operator.method == "none":
+            return int(h_value.decode('utf-8'), 16)
+        return int.from_bytes(h_value, 'big')
+
     @staticmethod
     def pubkey_id_process_per(hash_sid, v, random_bit, rsa_e, rsa_n, hash_operator=None, salt=''):
         r = random.SystemRandom().getrandbits(random_bit)
         if hash_operator:
             processed_id = gmpy_math.powmod(r, rsa_e, rsa_n) * \
-                int(Intersect.hash(hash_sid, hash_operator, salt), 16) % rsa_n
+                RsaIntersect.hash_to_int(hash_sid, hash_operator, salt) % rsa_n
             return processed_id, (hash_sid, r)
         else:
             processed_id = gmpy_math.powmod(r, rsa_e, rsa_n) * hash_sid % rsa_n
             return processed_id, (v[0], r)
 
+    @staticmethod
+    def pubkey_id_process_partition(kv_iterator, random_bit, rsa_e, rsa_n, hash_operator=None, salt=''):
+        """
+        blind a partition of ids with r^e, powers of all random r are computed in one list powmod
+        """
+        sids, hash_sids = [], []
+        for k, v in kv_iterator:
+            if hash_operator:
+                sids.append(k)
+                hash_sids.append(RsaIntersect.hash_to_int(k, hash_operator, salt))
+            else:
+                sids.append(v[0])
+                hash_sids.append(k)
+
+        rand = random.SystemRandom()
+        r_list = [rand.getrandbits(random_bit) for _ in hash_sids]
+        r_e_list = gmpy_math.powmod_base_list(r_list, rsa_e, rsa_n)
+        return [(r_e * hash_sid % rsa_n, (sid, r))
+                for r_e, hash_sid, sid, r in zip(r_e_list, hash_sids, sids, r_list)]
+
     @staticmethod
     def prvkey_id_process(
             hash_sid,
@@ -150,8 +189,8 @@ class RsaIntersect(Intersect):
             salt,
             first_hash_operator=None):
         if first_hash_operator:
-            processed_id = Intersect.hash(gmpy_math.powmod_crt(int(Intersect.hash(
-                hash_sid, first_hash_operator, salt), 16), rsa_d, rsa_n, rsa_p, rsa_q, cp, cq), final_hash_operator, salt)
+            processed_id = Intersect.hash(gmpy_math.powmod_crt(RsaIntersect.hash_to_int(
+                hash_sid, first_hash_operator, salt), rsa_d, rsa_n, rsa_p, rsa_q, cp, cq), final_hash_operator, salt)
             return processed_id, hash_sid
         else:
             processed_id = Intersect.hash(gmpy_math.powmod_crt(hash_sid, rsa_d, rsa_n, rsa_p, rsa_q, cp, cq),
@@ -159,18 +198,87 @@ class RsaIntersect(Intersect):
                                           salt)
             return processed_id, v[0]
 
+    @staticmethod
+    def prvkey_id_process_partition(kv_iterator, rsa_d, rsa_n, rsa_p, rsa_q, cp, cq, final_hash_operator, salt,
+                                    first_hash_operator=None):
+        """
+        sign a partition of ids, the CRT exponentiations run as one list powmod per prime
+        """
+        sids, hash_sids = [], []
+        for k, v in kv_iterator:
+            if first_hash_operator:
+                sids.append(k)
+                hash_sids.append(RsaIntersect.hash_to_int(k, first_hash_operator, salt))
+            else:
+                sids.append(v[0])
+                hash_sids.append(k)
+
+        signs = gmpy_math.powmod_crt_base_list(hash_sids, rsa_d, rsa_n, rsa_p, rsa_q, cp, cq)
+        return [(Intersect.hash(sign, final_hash_operator, salt), sid) for sign, sid in zip(signs, sids)]
+
     def cal_prvkey_ids_process_pair(self, data_instances, d, n, p, q, cp, cq, first_hash_operator=None):
-        return data_instances.map(
-            lambda k, v: self.prvkey_id_process(k, v, d, n, p, q, cp, cq,
-                                                self.final_hash_operator,
-                                                self.rsa_params.salt,
-                                                first_hash_operator)
-        )
+        return data_instances.mapPartitions(functools.partial(self.prvkey_id_process_partition,
+                                                              rsa_d=d,
+                                                              rsa_n=n,
+                                                              rsa_p=p,
+                                                              rsa_q=q,
+                                                              cp=cp,
+                                                              cq=cq,
+                                                              final_hash_operator=self.final_hash_operator,
+                                                              salt=self.rsa_params.salt,
+                                                              first_hash_operator=first_hash_operator),
+                                            use_previous_behavior=False)
 
     @staticmethod
     def sign_id(hash_sid, rsa_d, rsa_n, rsa_p, rsa_q, cp, cq):
         return gmpy_math.powmod_crt(hash_sid, rsa_d, rsa_n, rsa_p, rsa_q, cp, cq)
 
+    @staticmethod
+    def sign_id_partition(kv_iterator, rsa_d, rsa_n, rsa_p, rsa_q, cp, cq):
+        keys = [k for k, _ in kv_iterator]
+        return list(zip(keys, gmpy_math.powmod_crt_base_list(keys, rsa_d, rsa_n, rsa_p, rsa_q, cp, cq)))
+
+    @staticmethod
+    def sign_ids(pubkey_ids, rsa_d, rsa_n, rsa_p, rsa_q, cp, cq):
+        """
+        table(k, k^d % n) of the other party's blinded ids, keys are kept so partitioning is preserved
+        """
+        return pubkey_ids.mapPartitions(functools.partial(RsaIntersect.sign_id_partition,
+                                                          rsa_d=rsa_d,
+                                                          rsa_n=rsa_n,
+                                                          rsa_p=rsa_p,
+                                                          rsa_q=rsa_q,
+                                                          cp=cp,
+                                                          cq=cq),
+                                        use_previous_behavior=False,
+                                        preserves_partitioning=True)
+
+    @staticmethod
+    def unblind_id_partition(kv_iterator, rsa_n, final_hash_operator, salt):
+        keys, sids, signs, r_list = [], [], [], []
+        for k, (g, sign) in kv_iterator:
+            keys.append(k)
+            sids.append(g[0])
+            r_list.append(int(g[1]))
+            signs.append(int(sign))
+
+        r_inv_list = gmpy_math.invert_list(r_list, rsa_n)
+        return [(k, (sid, Intersect.hash(sign * r_inv % rsa_n, final_hash_operator, salt)))
+                for k, sid, sign, r_inv in zip(keys, sids, signs, r_inv_list)]
+
+    @staticmethod
+    def unblind_ids(pubkey_ids_process, recv_sign_ids, rsa_n, final_hash_operator, salt):
+        """
+        table(r^e % n * hash(sid), (sid, hash(sign / r))), the random r of a partition are inverted together
+        """
+        sign_ids_pair = pubkey_ids_process.join(recv_sign_ids, lambda g, sign: (g, sign))
+        return sign_ids_pair.mapPartitions(functools.partial(RsaIntersect.unblind_id_partition,
+                                                             rsa_n=rsa_n,
+                                                             final_hash_operator=final_hash_operator,
+                                                             salt=salt),
+                                           use_previous_behavior=False,
+                                           preserves_partitioning=True)
+
     def split_calculation_process(self, data_instances):
         raise NotImplementedError("This method should not be called here")
 
@@ -185,7 +293,7 @@ class RsaIntersect(Intersect):
         if self.split_calculation:
             # H(k), (k, v)
             hash_data_instances = data_instances.map(
-                lambda k, v: (int(Intersect.hash(k, self.first_hash_operator, self.salt), 16), (k, v)))
+                lambda k, v: (self.hash_to_int(k, self.first_hash_operator, self.salt), (k, v)))
             intersect_ids = self.split_calculation_process(hash_data_instances)
         else:
             intersect_ids = self.unified_calculation_process(data_instances)
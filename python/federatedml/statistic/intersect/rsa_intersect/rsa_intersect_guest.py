@@ -14,8 +14,6 @@
 #  limitations under the License.
 #
 
-import gmpy2
-
 from federatedml.statistic.intersect.rsa_intersect.rsa_intersect_base import RsaIntersect
 from federatedml.util import consts, LOGGER
 
@@ -45,14 +43,13 @@ class RsaIntersectionGuest(RsaIntersect):
 
     def sign_host_ids(self, host_pubkey_ids_list):
         # Process(signs) hosts' ids
-        guest_sign_host_ids_list = [host_pubkey_ids.map(lambda k, v:
-                                                        (k, self.sign_id(k,
-                                                                         self.d[i],
-                                                                         self.n[i],
-                                                                         self.p[i],
-                                                                         self.q[i],
-                                                                         self.cp[i],
-                                                                         self.cq[i])))
+        guest_sign_host_ids_list = [self.sign_ids(host_pubkey_ids,
+                                                  self.d[i],
+                                                  self.n[i],
+                                                  self.p[i],
+                                                  self.q[i],
+                                                  self.cp[i],
+                                                  self.cq[i])
                                     for i, host_pubkey_ids in enumerate(host_pubkey_ids_list)]
         LOGGER.info("Sign host_pubkey_ids with guest prv_keys")
 
@@ -160,12 +157,11 @@ class RsaIntersectionGuest(RsaIntersect):
 
         # table(r^e % n *hash(sid), sid, hash(guest_ids_process/r))
         # g[0]=(r^e % n *hash(sid), sid), g[1]=random bits r
-        host_sign_guest_ids_list = [v.join(recv_host_sign_guest_ids_list[i],
-                                           lambda g, r: (g[0], RsaIntersectionGuest.hash(gmpy2.divm(int(r),
-                                                                                                    int(g[1]),
-                                                                                                    self.rcv_n[i]),
-                                                                                         self.final_hash_operator,
-                                                                                         self.rsa_params.salt)))
+        host_sign_guest_ids_list = [self.unblind_ids(v,
+                                                     recv_host_sign_guest_ids_list[i],
+                                                     self.rcv_n[i],
+                                                     self.final_hash_operator,
+                                                     self.rsa_params.salt)
                                     for i, v in enumerate(pubkey_ids_process_list)]
         # table(hash(guest_ids_process/r), sid))
         sid_host_sign_guest_ids_list = [g.map(lambda k, v: (v[1], v[0])) for g in host_sign_guest_ids_list]
@@ -221,12 +217,11 @@ class RsaIntersectionGuest(RsaIntersect):
 
         # table(r^e % n *hash(sid), sid, hash(guest_ids_process/r))
         # g[0]=(r^e % n *hash(sid), sid), g[1]=random bits r
-        host_sign_guest_ids_list = [v.join(recv_host_sign_guest_ids_list[i],
-                                           lambda g, r: (g[0], RsaIntersectionGuest.hash(gmpy2.divm(int(r),
-                                                                                                    int(g[1]),
-                                                                                                    self.rcv_n[i]),
-                                                                                         self.final_hash_operator,
-                                                                                         self.rsa_params.salt)))
+        host_sign_guest_ids_list = [self.unblind_ids(v,
+                                                     recv_host_sign_guest_ids_list[i],
+                                                     self.rcv_n[i],
+                                                     self.final_hash_operator,
+                                                     self.rsa_params.salt)
                                     for i, v in enumerate(pubkey_ids_process_list)]
 
         # table(hash(guest_ids_process/r), sid))
@@ -293,12 +288,11 @@ class RsaIntersectionGuest(RsaIntersect):
 
         # table(r^e % n *hash(sid), sid, hash(guest_ids_process/r))
         # g[0]=(r^e % n *hash(sid), sid), g[1]=random bits r
-        host_sign_guest_ids_list = [v.join(recv_host_sign_guest_ids_list[i],
-                                           lambda g, r: (g[0], RsaIntersectionGuest.hash(gmpy2.divm(int(r),
-                                                                                                    int(g[1]),
-                                                                                                    self.rcv_n[i]),
-                                                                                         self.final_hash_operator,
-                                                                                         self.rsa_params.salt)))
+        host_sign_guest_ids_list = [self.unblind_ids(v,
+                                                     recv_host_sign_guest_ids_list[i],
+                                                     self.rcv_n[i],
+                                                     self.final_hash_operator,
+                                                     self.rsa_params.salt)
                                     for i, v in enumerate(pubkey_ids_process_list)]
 
         # table(hash(guest_ids_process/r), sid))
@@ -370,12 +364,11 @@ class RsaIntersectionGuest(RsaIntersect):
 
         # table(r^e % n *hash(sid), sid, hash(guest_ids_process/r))
         # g[0]=(r^e % n *hash(sid), sid), g[1]=random bits r
-        host_sign_guest_ids_list = [v.join(recv_host_sign_guest_ids_list[i],
-                                           lambda g, r: (g[0], RsaIntersectionGuest.hash(gmpy2.divm(int(r),
-                                                                                                    int(g[1]),
-                                                                                                    self.rcv_n[i]),
-                                                                                         self.final_hash_operator,
-                                                                                         self.rsa_params.salt)))
+        host_sign_guest_ids_list = [self.unblind_ids(v,
+                                                     recv_host_sign_guest_ids_list[i],
+                                                     self.rcv_n[i],
+                                                     self.final_hash_operator,
+                                                     self.rsa_params.salt)
                                     for i, v in enumerate(pubkey_ids_process_list)]
 
         # table(hash(guest_ids_process/r), sid))
@@ -14,7 +14,6 @@
 #  limitations under the License.
 #
 
-import gmpy2
 import uuid
 
 from federatedml.statistic.intersect.rsa_intersect.rsa_intersect_base import RsaIntersect
@@ -90,13 +89,7 @@ class RsaIntersectionHost(RsaIntersect):
         # get & sign guest pubkey-encrypted odd ids
         guest_pubkey_ids = self.transfer_variable.guest_pubkey_ids.get(idx=0)
         LOGGER.info(f"Get guest_pubkey_ids from guest")
-        host_sign_guest_ids = guest_pubkey_ids.map(lambda k, v: (k, self.sign_id(k,
-                                                                                 self.d,
-                                                                                 self.n,
-                                                                                 self.p,
-                                                                                 self.q,
-                                                                                 self.cp,
-                                                                                 self.cq)))
+        host_sign_guest_ids = self.sign_ids(guest_pubkey_ids, self.d, self.n, self.p, self.q, self.cp, self.cq)
         LOGGER.debug(f"host sign guest_pubkey_ids")
         # send signed guest odd ids
         self.transfer_variable.host_sign_guest_ids.remote(host_sign_guest_ids,
@@ -111,13 +104,11 @@ class RsaIntersectionHost(RsaIntersect):
         # receive guest-signed host even ids
         recv_guest_sign_host_ids = self.transfer_variable.guest_sign_host_ids.get(idx=0)
         LOGGER.info(f"Get guest_sign_host_ids from Guest.")
-        guest_sign_host_ids = pubkey_ids_process.join(recv_guest_sign_host_ids,
-                                                      lambda g, r: (g[0],
-                                                                    RsaIntersectionHost.hash(gmpy2.divm(int(r),
-                                                                                                        int(g[1]),
-                                                                                                        self.rcv_n),
-                                                                                             self.final_hash_operator,
-                                                                                             self.rsa_params.salt)))
+        guest_sign_host_ids = self.unblind_ids(pubkey_ids_process,
+                                               recv_guest_sign_host_ids,
+                                               self.rcv_n,
+                                               self.final_hash_operator,
+                                               self.rsa_params.salt)
         sid_guest_sign_host_ids = guest_sign_host_ids.map(lambda k, v: (v[1], v[0]))
 
         encrypt_intersect_even_ids = sid_guest_sign_host_ids.join(guest_prvkey_ids, lambda sid, h: sid)
@@ -173,13 +164,7 @@ class RsaIntersectionHost(RsaIntersect):
         LOGGER.info("Get guest_pubkey_ids from guest")
 
         # Process(signs) guest ids and return to guest
-        host_sign_guest_ids = guest_pubkey_ids.map(lambda k, v: (k, self.sign_id(k,
-                                                                                 self.d,
-                                                                                 self.n,
-                                                                                 self.p,
-                                                                                 self.q,
-                                                                                 self.cp,
-                                                                                 self.cq)))
+        host_sign_guest_ids = self.sign_ids(guest_pubkey_ids, self.d, self.n, self.p, self.q, self.cp, self.cq)
         self.transfer_variable.host_sign_guest_ids.remote(host_sign_guest_ids,
                                                           role=consts.GUEST,
                                                           idx=0)
@@ -252,13 +237,7 @@ class RsaIntersectionHost(RsaIntersect):
         LOGGER.info("Get guest_pubkey_ids from guest")
 
         # Process(signs) guest ids and return to guest
-        host_sign_guest_ids = guest_pubkey_ids.map(lambda k, v: (k, self.sign_id(k,
-                                                                                 self.d,
-                                                                                 self.n,
-                                                                                 self.p,
-                                                                                 self.q,
-                                                                                 self.cp,
-                                                                                 self.cq)))
+        host_sign_guest_ids = self.sign_ids(guest_pubkey_ids, self.d, self.n, self.p, self.q, self.cp, self.cq)
         self.transfer_variable.host_sign_guest_ids.remote(host_sign_guest_ids,
                                                           role=consts.GUEST,
                                                           idx=0)
@@ -322,13 +301,7 @@ class RsaIntersectionHost(RsaIntersect):
         LOGGER.info("Get guest_pubkey_ids from guest")
 
         # Process(signs) guest ids and return to guest
-        host_sign_guest_ids = guest_pubkey_ids.map(lambda k, v: (k, self.sign_id(k,
-                                                                                 self.d,
-                                                                                 self.n,
-                                                                                 self.p,
-                                                                                 self.q,
-                                                                                 self.cp,
-                                                                                 self.cq)))
+        host_sign_guest_ids = self.sign_ids(guest_pubkey_ids, self.d, self.n, self.p, self.q, self.cp, self.cq)
         self.transfer_variable.host_sign_guest_ids.remote(host_sign_guest_ids,
                                                           role=consts.GUEST,
                                                           idx=0)
@@ -0,0 +1,94 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import random
+import unittest
+import uuid
+
+from fate_arch.session import computing_session as session
+from federatedml.param.intersect_param import IntersectParam
+from federatedml.secureprotol import gmpy_math
+from federatedml.secureprotol.hash.hash_factory import Hash
+from federatedml.statistic.intersect.rsa_intersect.rsa_intersect_base import RsaIntersect
+
+
+class TestRsaIntersectBatch(unittest.TestCase):
+    def setUp(self):
+        session.init(str(uuid.uuid1()))
+        self.rsa_operator = RsaIntersect()
+        self.rsa_operator.load_params(IntersectParam())
+        self.e, self.d, self.n, self.p, self.q = RsaIntersect.generate_rsa_key(1024)
+        self.cp, self.cq = gmpy_math.crt_coefficient(self.p, self.q)
+
+    def data_to_table(self, ids, partition=3):
+        return session.parallelize([(sid, 1) for sid in ids], include_key=True, partition=partition)
+
+    def test_hash_to_int(self):
+        for method in ["sha256", "md5", "none"]:
+            hex_operator = Hash(method, False)
+            bytes_operator = Hash(method, False, hex_output=False)
+            salt = "" if method == "none" else "salt"
+            for value in ["1", "123abc"]:
+                self.assertEqual(RsaIntersect.hash_to_int(value, bytes_operator, salt),
+                                 int(RsaIntersect.hash(value, hex_operator, salt), 16))
+
+    def test_list_powmod(self):
+        bases = [random.SystemRandom().getrandbits(1000) for _ in range(20)]
+        self.assertListEqual(gmpy_math.powmod_crt_base_list(bases, self.d, self.n, self.p, self.q, self.cp, self.cq),
+                             [gmpy_math.powmod(x, self.d, self.n) for x in bases])
+        self.assertListEqual(gmpy_math.invert_list(bases, self.n), [gmpy_math.invert(x, self.n) for x in bases])
+        self.assertListEqual(gmpy_math.invert_list([], self.n), [])
+
+    def test_blind_sign_unblind(self):
+        guest_ids = [str(i) for i in range(0, 200)]
+        host_ids = [str(i) for i in range(150, 300)]
+        salt = self.rsa_operator.salt
+
+        pubkey_ids = RsaIntersect.pubkey_id_process(self.data_to_table(guest_ids),
+                                                    fraction=None,
+                                                    random_bit=self.rsa_operator.random_bit,
+                                                    rsa_e=self.e,
+                                                    rsa_n=self.n,
+                                                    hash_operator=self.rsa_operator.first_hash_operator,
+                                                    salt=salt)
+        self.assertEqual(pubkey_ids.count(), len(guest_ids))
+
+        sign_ids = RsaIntersect.sign_ids(pubkey_ids.mapValues(lambda v: None),
+                                         self.d, self.n, self.p, self.q, self.cp, self.cq)
+        guest_sign_ids = RsaIntersect.unblind_ids(pubkey_ids, sign_ids, self.n,
+                                                  self.rsa_operator.final_hash_operator, salt)
+        host_prvkey_ids = self.rsa_operator.cal_prvkey_ids_process_pair(self.data_to_table(host_ids, partition=4),
+                                                                        self.d, self.n, self.p, self.q,
+                                                                        self.cp, self.cq,
+                                                                        self.rsa_operator.first_hash_operator)
+
+        for sid, hash_value in host_prvkey_ids.collect():
+            expected = RsaIntersect.prvkey_id_process(hash_value, None, self.d, self.n, self.p, self.q,
+                                                      self.cp, self.cq, self.rsa_operator.final_hash_operator, salt,
+                                                      self.rsa_operator.first_hash_operator)
+            self.assertEqual(sid, expected[0])
+
+        guest_hash_ids = guest_sign_ids.map(lambda k, v: (v[1], v[0]))
+        intersect_ids = guest_hash_ids.join(host_prvkey_ids, lambda sid, h: sid)
+        self.assertListEqual(sorted(v for _, v in intersect_ids.collect()),
+                             sorted(set(guest_ids) & set(host_ids)))
+
+    def tearDown(self):
+        session.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -31,6 +31,7 @@ class HeteroKmeansTransferVariable(BaseTransferVariables):
     def __init__(self, flowid=0):
         super().__init__(flowid)
         self.arbiter_tol = self._create_variable(name='arbiter_tol', src=['arbiter'], dst=['host', 'guest'])
+        self.block_sizes = self._create_variable(name='block_sizes', src=['guest'], dst=['host'])
         self.cluster_result = self._create_variable(name='cluster_result', src=['arbiter'], dst=['host', 'guest'])
         self.cluster_evaluation = self._create_variable(
             name='cluster_evaluation', src=['arbiter'], dst=['host', 'guest'])
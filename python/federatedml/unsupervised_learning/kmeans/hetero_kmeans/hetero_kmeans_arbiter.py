@@ -51,10 +51,14 @@ class HeteroKmeansArbiter(BaseKmeansModel):
     def sum_in_cluster(self, iterator):
         sum_result = dict()
         for k, v in iterator:
-            if v[1] not in sum_result:
-                sum_result[v[1]] = np.sqrt(v[0][v[1]])
-            else:
-                sum_result[v[1]] += np.sqrt(v[0][v[1]])
+            # v is [dist, cluster] of a sample, or of a block of samples
+            if np.ndim(v[1]) == 0:
+                sum_result[v[1]] = sum_result.get(v[1], 0) + np.sqrt(max(v[0][v[1]], 0))
+                continue
+            inner_dist = np.sqrt(np.maximum(v[0][np.arange(len(v[1])), v[1]], 0))
+            dist_sums = np.bincount(v[1], weights=inner_dist)
+            for cluster in np.unique(v[1]):
+                sum_result[cluster] = sum_result.get(cluster, 0) + dist_sums[cluster]
         return sum_result
 
     def cal_ave_dist(self, dist_cluster_table, cluster_result):
@@ -83,7 +87,33 @@ class HeteroKmeansArbiter(BaseKmeansModel):
             rs[k1] = max(v1.get(k1, 0), v2.get(k1, 0))
         return rs
 
-    def cal_dbi(self, dist_sum, cluster_result, suffix):
+    @staticmethod
+    def sample_by_dist(dist_table):
+        """
+        sample a (block id, row) position with probability proportional to its distance, uniformly if all are 0
+        """
+        block_stats = sorted(dist_table.mapValues(lambda v: (float(np.sum(v)), v.size)).collect())
+        weights = np.array([dist for _, (dist, _) in block_stats])
+        if weights.sum() <= 0:
+            weights = np.array([size for _, (_, size) in block_stats], dtype=np.float64)
+        block_id = block_stats[np.random.choice(len(block_stats), p=weights / weights.sum())][0]
+
+        dist = dist_table.filter(lambda k, v: k == block_id).first()[1]
+        weights = dist if dist.sum() > 0 else np.ones(dist.size)
+        return block_id, int(np.random.choice(dist.size, p=weights / weights.sum()))
+
+    def init_centroid(self):
+        """
+        k-means++, each next centroid is sampled by the squared distance to the nearest chosen centroid
+        """
+        min_dist = None
+        for idx in range(1, self.k):
+            dist = self.aggregator.aggregate_model(suffix=('init', idx)).mapValues(lambda v: np.maximum(v.ravel(), 0))
+            min_dist = dist if min_dist is None else min_dist.join(dist, np.minimum)
+            position = self.sample_by_dist(min_dist)
+            self.aggregator.broadcast_model(position, suffix=('init', idx))
+
+    def cal_dbi(self, dist_sum, cluster_result, suffix, iter_num=None):
         dist_cluster_table = dist_sum.join(cluster_result, lambda v1, v2: [v1, v2])
         dist_table = self.cal_ave_dist(dist_cluster_table, cluster_result)  # ave dist in each cluster
         if len(dist_table) == 1:
@@ -96,17 +126,24 @@ class HeteroKmeansArbiter(BaseKmeansModel):
             cluster_avg_intra_dist.append(dist_table[i][2])
         self.DBI = clustering_metric.DaviesBouldinIndex.compute(self, cluster_avg_intra_dist,
                                                                 list(cluster_dist._weights))
-        self.callback_dbi(suffix - 1, self.DBI)
+        self.callback_dbi(suffix - 1 if iter_num is None else iter_num, self.DBI)
 
     def fit(self, data_instances=None, validate_data=None):
         LOGGER.info("Enter hetero Kmeans arbiter fit")
+        np.random.seed(self.random_stat)
+        if self.init_method == 'k-means++':
+            self.init_centroid()
+
         last_cluster_result = None
         while self.n_iter_ < self.max_iter:
 
             dist_sum = self.aggregator.aggregate_model(suffix=(self.n_iter_,))
-            if last_cluster_result is not None:
+            cluster_result = dist_sum.mapValues(lambda v: np.argmin(v, axis=-1))
+            # batches differ between iterations, so dbi of a mini batch is measured with its own cluster result
+            if self.mini_batch:
+                self.cal_dbi(dist_sum, cluster_result, self.n_iter_, iter_num=self.n_iter_)
+            elif last_cluster_result is not None:
                 self.cal_dbi(dist_sum, last_cluster_result, self.n_iter_)
-            cluster_result = dist_sum.mapValues(lambda v: np.argmin(v))
             self.aggregator.broadcast_model(cluster_result, suffix=(self.n_iter_,))
 
             tol1 = self.transfer_variable.guest_tol.get(idx=0, suffix=(self.n_iter_,))
@@ -125,12 +162,19 @@ class HeteroKmeansArbiter(BaseKmeansModel):
             if self.is_converged:
                 break
 
-        # calculate finall round dbi
+        self.final_dbi(last_cluster_result)
+
+    def final_dbi(self, last_cluster_result):
+        """
+        dbi of the final centroids over all samples, clients send distances of all samples after training.
+        A mini batch result only covers the samples of the last batch, so in mini-batch mode the final centroids
+        are measured with the assignment of all samples instead
+        """
         dist_sum = self.aggregator.aggregate_model(suffix=(self.n_iter_,))
-        cluster_result = dist_sum.mapValues(lambda v: np.argmin(v))
+        cluster_result = dist_sum.mapValues(lambda v: np.argmin(v, axis=-1))
 
         self.aggregator.broadcast_model(cluster_result, suffix=(self.n_iter_,))
-        self.cal_dbi(dist_sum, last_cluster_result, self.n_iter_)
+        self.cal_dbi(dist_sum, cluster_result if self.mini_batch else last_cluster_result, self.n_iter_)
         dist_sum_dbi = self.aggregator.aggregate_model(suffix=(self.n_iter_ + 1, ))
         self.aggregator.broadcast_model(cluster_result, suffix=(self.n_iter_ + 1,))
 
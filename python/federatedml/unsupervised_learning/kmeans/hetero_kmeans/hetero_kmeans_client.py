@@ -18,9 +18,10 @@ import functools
 
 import numpy as np
 
-from fate_arch.session import computing_session as session
 from federatedml.feature.instance import Instance
 from federatedml.framework.weights import NumpyWeights
+from federatedml.unsupervised_learning.kmeans.kmeans_block import KMEANS_BLOCK_SIZE, cluster_stats_partition, \
+    gather_rows, get_block_num, locate_rows, merge_cluster_stats, row_dist_partition, square_dist, to_kmeans_blocks
 from federatedml.unsupervised_learning.kmeans.kmeans_model_base import BaseKmeansModel
 from federatedml.util import LOGGER
 from federatedml.util import consts
@@ -32,55 +33,118 @@ class HeteroKmeansClient(BaseKmeansModel):
         super(HeteroKmeansClient, self).__init__()
         self.client_dist = None
         self.client_tol = None
+        self.data_count = None
+        self.centroid_counts = None
         self.aggregator = SecureAggregatorClient(
             secure_aggregate=True, aggregate_type='sum', communicate_match_suffix='kmeans')
 
     @staticmethod
-    def educl_dist(u, centroid_list):
-        result = []
-        for c in centroid_list:
-            result.append(np.sum(np.square(np.array(c) - u.features)))
-        return np.array(result)
-
-    def get_centroid(self, data_instances):
-        random_key = []
-        key = list(data_instances.mapValues(
-            lambda data_instance: None).collect())
-        random_list = list(np.random.choice(
-            data_instances.count(), self.k, replace=False))
-        for k in random_list:
-            random_key.append(key[k][0])
-        return random_key
-
-    def cluster_sum(self, iterator):
-        cluster_result = dict()
-        for k, v in iterator:
-            if v[1] not in cluster_result:
-                cluster_result[v[1]] = v[0]
-            else:
-                cluster_result[v[1]] += v[0]
-        return cluster_result
-
-    def centroid_cal(self, cluster_result, data_instances):
-        cluster_result_table = data_instances.join(
-            cluster_result, lambda v1, v2: [v1.features, v2])
-        centroid_feature_sum = cluster_result_table.applyPartitions(
-            self.cluster_sum).reduce(self.sum_dict)
-        cluster_count = cluster_result.applyPartitions(
-            self.count).reduce(self.sum_dict)
+    def block_dist(block, centroid_list):
+        return square_dist(block.features, centroid_list)
+
+    def get_centroid(self, block_sizes, num):
+        random_list = np.random.choice(sum(block_sizes.values()), num, replace=False)
+        return locate_rows(block_sizes, random_list)
+
+    def get_block_size(self):
+        """
+        mini batches are made of whole blocks, blocks are no larger than a batch so that batches stay close to
+        batch_size
+        """
+        if not self.mini_batch:
+            return KMEANS_BLOCK_SIZE
+        return min(KMEANS_BLOCK_SIZE, self.batch_size)
+
+    def check_block_sizes(self, data_blocks):
+        """
+        guest sends sizes of its blocks to host, host checks that both parties got the same blocks
+        """
+        block_sizes = dict(data_blocks.mapValues(len).collect())
+        if self.role == consts.GUEST:
+            self.transfer_variable.block_sizes.remote(block_sizes, role=consts.HOST, idx=-1)
+        else:
+            guest_block_sizes = self.transfer_variable.block_sizes.get(idx=0)
+            if guest_block_sizes != block_sizes:
+                raise ValueError("Sample blocks of guest and host differ, guest has {} blocks of {} samples and "
+                                 "host has {} blocks of {} samples, check that both parties use the same intersected "
+                                 "data and batch_size".format(len(guest_block_sizes), sum(guest_block_sizes.values()),
+                                                              len(block_sizes), sum(block_sizes.values())))
+        return block_sizes
+
+    def init_centroid(self, data_blocks, block_sizes):
+        """
+        guest chooses samples uniformly as centroids, with k-means++ only the first one, and each next centroid is
+        sampled by arbiter according to the aggregated distances to the nearest chosen centroid
+        """
+        num = 1 if self.init_method == 'k-means++' else self.k
+        if self.role == consts.GUEST:
+            positions = self.get_centroid(block_sizes, num)
+            self.transfer_variable.centroid_list.remote(
+                positions, role=consts.HOST, idx=-1)
+        else:
+            positions = self.transfer_variable.centroid_list.get(
+                idx=0)
+        centroid_list = gather_rows(data_blocks, positions)
+
+        for idx in range(num, self.k):
+            d = functools.partial(self.block_dist, centroid_list=centroid_list[-1:])
+            self.aggregator.send_model(data_blocks.mapValues(d), suffix=('init', idx))
+            position = self.aggregator.get_aggregated_model(suffix=('init', idx))
+            centroid_list.extend(gather_rows(data_blocks, [position]))
+        return centroid_list
+
+    def get_batch_blocks(self, data_blocks, block_num):
+        """
+        blocks are random groups of samples, mini batches take consecutive block ids in turn
+        """
+        if not self.mini_batch:
+            return data_blocks
+        batch_block_num = min(block_num, int(np.ceil(block_num * self.batch_size / self.data_count)))
+        start = self.n_iter_ * batch_block_num
+        batch_ids = {(start + i) % block_num for i in range(batch_block_num)}
+        return data_blocks.filter(lambda k, v: k in batch_ids)
+
+    def cluster_stats(self, cluster_result, data):
+        stats_table = data.join(cluster_result, lambda v1, v2: (v1.features, v2))
+        feature_sums, cluster_count = stats_table.applyPartitions(
+            functools.partial(cluster_stats_partition, k=self.k)).reduce(merge_cluster_stats)
+        return feature_sums, cluster_count
+
+    def centroid_cal(self, cluster_result, data):
+        centroid_feature_sum, cluster_count = self.cluster_stats(cluster_result, data)
         centroid_list = []
         cluster_count_list = []
-        count_all = data_instances.count()
+        count_all = int(cluster_count.sum())
         for k in range(self.k):
-            if k not in centroid_feature_sum:
+            count = int(cluster_count[k])
+            if count == 0:
                 centroid_list.append(self.centroid_list[int(k)])
                 cluster_count_list.append([k, 0, 0])
             else:
-                count = cluster_count[k]
                 centroid_list.append(centroid_feature_sum[k] / count)
                 cluster_count_list.append([k, count, count / count_all])
         return centroid_list, cluster_count_list
 
+    def mini_batch_centroid_cal(self, cluster_result, data):
+        """
+        move each centroid towards the mean of its samples in batch, by the ratio of them in all samples it has seen
+        """
+        centroid_feature_sum, cluster_count = self.cluster_stats(cluster_result, data)
+        centroid_list = []
+        cluster_count_list = []
+        count_all = int(cluster_count.sum())
+        for k in range(self.k):
+            count = int(cluster_count[k])
+            centroid = np.array(self.centroid_list[k], dtype=np.float64)
+            if count == 0:
+                centroid_list.append(centroid)
+                cluster_count_list.append([k, 0, 0])
+            else:
+                self.centroid_counts[k] += count
+                centroid_list.append(centroid + (centroid_feature_sum[k] - count * centroid) / self.centroid_counts[k])
+                cluster_count_list.append([k, count, count / count_all])
+        return centroid_list, cluster_count_list
+
     def centroid_dist(self, centroid_list):
         cluster_dist_list = []
         for i in range(0, len(centroid_list)):
@@ -94,37 +158,39 @@ class HeteroKmeansClient(BaseKmeansModel):
         LOGGER.info("Enter hetero_kmeans_client fit")
         self.header = self.get_header(data_instances)
         self._abnormal_detection(data_instances)
-        if self.k > data_instances.count() or self.k < 2:
+        self.data_count = data_instances.count()
+        if self.k > self.data_count or self.k < 2:
             raise ValueError('K is too larger or too small for current data')
 
+        # Samples are grouped into blocks by key, blocks of guest and host hold the same samples in the same order,
+        # so distances and cluster results are sent block by block
+        block_num = get_block_num(self.data_count, self.get_block_size())
+        data_blocks = to_kmeans_blocks(data_instances, block_num)
+        block_sizes = self.check_block_sizes(data_blocks)
+
         # Get initialized centroid
         np.random.seed(self.random_stat)
-        if self.role == consts.GUEST:
-            first_centroid_key = self.get_centroid(data_instances)
-            self.transfer_variable.centroid_list.remote(
-                first_centroid_key, role=consts.HOST, idx=-1)
-        else:
-            first_centroid_key = self.transfer_variable.centroid_list.get(
-                idx=0)
-        key_table = session.parallelize(tuple(zip(first_centroid_key, first_centroid_key)),
-                                        partition=data_instances.partitions, include_key=True)
-        centroid_list = list(key_table.join(
-            data_instances, lambda v1, v2: v2.features).collect())
-        self.centroid_list = [v[1] for v in centroid_list]
+        self.centroid_list = self.init_centroid(data_blocks, block_sizes)
+        self.centroid_counts = np.zeros(self.k)
 
         while self.n_iter_ < self.max_iter:
             self.send_cluster_dist(self.n_iter_, self.centroid_list)
+            batch_blocks = self.get_batch_blocks(data_blocks, block_num)
             d = functools.partial(
-                self.educl_dist, centroid_list=self.centroid_list)
-            dist_all_table = data_instances.mapValues(d)
+                self.block_dist, centroid_list=self.centroid_list)
+            dist_all_table = batch_blocks.mapValues(d)
 
             LOGGER.debug('sending model, suffix is {}'.format((self.n_iter_)))
             self.aggregator.send_model(dist_all_table, suffix=(self.n_iter_, ))
             cluster_result = self.aggregator.get_aggregated_model(
                 suffix=(self.n_iter_, ))
 
-            centroid_new, self.cluster_count = self.centroid_cal(
-                cluster_result, data_instances)
+            if self.mini_batch:
+                centroid_new, self.cluster_count = self.mini_batch_centroid_cal(
+                    cluster_result, batch_blocks)
+            else:
+                centroid_new, self.cluster_count = self.centroid_cal(
+                    cluster_result, batch_blocks)
             client_tol = np.sum(
                 np.sum((np.array(self.centroid_list) - np.array(centroid_new)) ** 2, axis=1))
             self.client_tol.remote(
@@ -144,15 +210,15 @@ class HeteroKmeansClient(BaseKmeansModel):
                 break
 
         # calculate final round dbi
-        self.extra_dbi(data_instances, self.n_iter_, self.centroid_list)
+        self.extra_dbi(data_blocks, self.n_iter_, self.centroid_list)
         centroid_new, self.cluster_count = self.centroid_cal(
-            self.cluster_result, data_instances)
-        self.extra_dbi(data_instances, self.n_iter_ + 1, centroid_new)
+            self.cluster_result, data_blocks)
+        self.extra_dbi(data_blocks, self.n_iter_ + 1, centroid_new)
         # LOGGER.debug(f"Final centroid list: {self.centroid_list}")
 
-    def extra_dbi(self, data_instances, suffix, centroids):
-        d = functools.partial(self.educl_dist, centroid_list=centroids)
-        dist_all_table = data_instances.mapValues(d)
+    def extra_dbi(self, data_blocks, suffix, centroids):
+        d = functools.partial(self.block_dist, centroid_list=centroids)
+        dist_all_table = data_blocks.mapValues(d)
         self.aggregator.send_model(dist_all_table, suffix=(suffix, ))
         self.cluster_result = self.aggregator.get_aggregated_model(
             suffix=(suffix, ))
@@ -163,23 +229,24 @@ class HeteroKmeansClient(BaseKmeansModel):
         self.aggregator.send_model(NumpyWeights(
             np.array(cluster_dist)), suffix=('cluster_dist', suffix,))
 
+    def row_dist(self, data_instances, centroid_list):
+        d = functools.partial(row_dist_partition, centroids=centroid_list)
+        return data_instances.mapPartitions(d, use_previous_behavior=False, preserves_partitioning=True)
+
     def predict(self, data_instances):
 
         LOGGER.info("Start predict ...")
 
         self.header = self.get_header(data_instances)
         self._abnormal_detection(data_instances)
-        d = functools.partial(
-            self.educl_dist, centroid_list=self.centroid_list)
-        dist_all_table = data_instances.mapValues(d)
+        dist_all_table = self.row_dist(data_instances, self.centroid_list)
 
         self.aggregator.send_model(dist_all_table, suffix=('predict', ))
         cluster_result = self.aggregator.get_aggregated_model(
             suffix=('predict', ))
         centroid_new, self.cluster_count = self.centroid_cal(
             cluster_result, data_instances)
-        d = functools.partial(self.educl_dist, centroid_list=centroid_new)
-        dist_all_table = data_instances.mapValues(d)
+        dist_all_table = self.row_dist(data_instances, centroid_new)
 
         self.aggregator.send_model(dist_all_table, suffix=('predict_dbi', ))
         cluster_result_dbi = self.aggregator.get_aggregated_model(
@@ -189,10 +256,8 @@ class HeteroKmeansClient(BaseKmeansModel):
         self.aggregator.send_model(NumpyWeights(
             np.array(cluster_dist)), suffix=('predict_cluster_dist', ))
 
-        LOGGER.debug(f"first_data: {data_instances.first()[1].__dict__}")
         predict_result = data_instances.join(cluster_result, lambda v1, v2: Instance(
             features=[v1.label, int(v2)], inst_id=v1.inst_id))
-        LOGGER.debug(f"predict_data: {predict_result.first()[1].__dict__}")
 
         return predict_result
 
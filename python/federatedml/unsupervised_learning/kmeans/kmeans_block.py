@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import copy
+import functools
+import hashlib
+import operator
+
+import numpy as np
+
+from federatedml.feature.instance_block import InstanceBlock
+from federatedml.statistic import data_overview
+
+KMEANS_BLOCK_SIZE = 1024
+
+
+def block_index(key, block_num):
+    """
+    block id of a row, derived from its key only so that all parties group their rows into the same blocks
+    """
+    digest = hashlib.md5(str(key).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'little') % block_num
+
+
+def get_block_num(count, block_size=KMEANS_BLOCK_SIZE):
+    return max(1, int(np.ceil(count / block_size)))
+
+
+def _rows_to_block_lists(kv_iterator, block_num):
+    block_lists = {}
+    for key, inst in kv_iterator:
+        block_lists.setdefault(block_index(key, block_num), []).append((key, inst))
+    return list(block_lists.items())
+
+
+def _to_block(kv_list, feature_num):
+    return InstanceBlock.from_instances(sorted(kv_list, key=operator.itemgetter(0)), feature_num)
+
+
+def to_kmeans_blocks(data_instances, block_num):
+    """
+    group a Table of Instance to a Table of InstanceBlock keyed by block id, rows of a block are sorted by key,
+    parties sharing the same sample ids get aligned blocks without exchanging anything
+    """
+    header = data_instances.schema.get("header")
+    feature_num = len(header) if header is not None else data_overview.get_features_shape(data_instances)
+    blocks = data_instances.mapReducePartitions(functools.partial(_rows_to_block_lists, block_num=block_num),
+                                                operator.add)
+    blocks = blocks.mapValues(functools.partial(_to_block, feature_num=feature_num))
+    blocks.schema = copy.deepcopy(data_instances.schema)
+    return blocks
+
+
+def square_dist(features, centroids):
+    """
+    squared euclidean distances of shape (row_num, k) between rows of features and centroids
+    """
+    centroids = np.asarray(centroids, dtype=np.float64)
+    dist = np.einsum('ij,ij->i', features, features)[:, None] - 2 * features @ centroids.T
+    dist += np.einsum('ij,ij->i', centroids, centroids)[None, :]
+    return np.maximum(dist, 0, out=dist)
+
+
+def row_dist_partition(kv_iterator, centroids, chunk_size=KMEANS_BLOCK_SIZE):
+    """
+    distances of Instance rows to centroids, rows of a partition are stacked into matrices of chunk_size rows
+    """
+    result = []
+    keys, features = [], []
+
+    def _flush():
+        dist = square_dist(np.array(features, dtype=np.float64), centroids)
+        result.extend(zip(keys, dist))
+        keys.clear()
+        features.clear()
+
+    for key, inst in kv_iterator:
+        keys.append(key)
+        features.append(inst.features)
+        if len(keys) == chunk_size:
+            _flush()
+    if keys:
+        _flush()
+    return result
+
+
+def cluster_stats(features, assignments, k):
+    """
+    per cluster feature sums of shape (k, feature_num) and row counts of shape (k, )
+    """
+    assignments = np.asarray(assignments, dtype=np.int64)
+    counts = np.bincount(assignments, minlength=k)
+    sums = np.zeros((k, features.shape[1]))
+    order = np.argsort(assignments, kind='stable')
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    non_empty = counts > 0
+    if features.shape[0] > 0:
+        sums[non_empty] = np.add.reduceat(features[order], starts[non_empty], axis=0)
+    return sums, counts
+
+
+def cluster_stats_partition(kv_iterator, k, chunk_size=KMEANS_BLOCK_SIZE):
+    """
+    cluster stats of a partition of (features, assignments) pairs, single rows are stacked before computing
+    """
+    sums, counts = None, np.zeros(k, dtype=np.int64)
+    features, assignments = [], []
+
+    def _flush():
+        nonlocal sums, counts
+        chunk_sums, chunk_counts = cluster_stats(np.vstack(features), np.concatenate(assignments), k)
+        sums = chunk_sums if sums is None else sums + chunk_sums
+        counts = counts + chunk_counts
+        features.clear()
+        assignments.clear()
+
+    row_num = 0
+    for _, (feature, assignment) in kv_iterator:
+        features.append(np.atleast_2d(feature))
+        assignments.append(np.atleast_1d(assignment))
+        row_num += len(assignments[-1])
+        if row_num >= chunk_size:
+            _flush()
+            row_num = 0
+    if features:
+        _flush()
+    return sums, counts
+
+
+def merge_cluster_stats(s1, s2):
+    if s1[0] is None:
+        return s2
+    if s2[0] is None:
+        return s1
+    return s1[0] + s2[0], s1[1] + s2[1]
+
+
+def locate_rows(block_sizes, indexes):
+    """
+    map global row indexes to (block id, row) positions, rows are ordered by block id
+    """
+    block_ids = sorted(block_sizes)
+    offsets = np.cumsum([block_sizes[block_id] for block_id in block_ids])
+    positions = []
+    for idx in indexes:
+        block_idx = int(np.searchsorted(offsets, idx, side='right'))
+        start = offsets[block_idx - 1] if block_idx > 0 else 0
+        positions.append((block_ids[block_idx], int(idx - start)))
+    return positions
+
+
+def gather_rows(blocks, positions):
+    """
+    features of rows at (block id, row) positions
+    """
+    block_ids = {block_id for block_id, _ in positions}
+    features = dict(blocks.filter(lambda k, v: k in block_ids).mapValues(lambda block: block.features).collect())
+    return [features[block_id][row].copy() for block_id, row in positions]
@@ -25,6 +25,7 @@ from federatedml.util import abnormal_detection
 from federatedml.feature.instance import Instance
 from federatedml.util import consts
 import functools
+import numpy as np
 
 LOGGER = log.getLogger()
 
@@ -38,6 +39,8 @@ class BaseKmeansModel(ModelBase):
         self.max_iter = 0
         self.tol = 0
         self.random_stat = None
+        self.init_method = 'random'
+        self.batch_size = -1
         self.iter = iter
         self.centroid_list = None
         self.cluster_result = None
@@ -58,6 +61,8 @@ class BaseKmeansModel(ModelBase):
         self.max_iter = params.max_iter
         self.tol = params.tol
         self.random_stat = params.random_stat
+        self.init_method = params.init_method
+        self.batch_size = params.batch_size
         # self.aggregator.register_aggregator(self.transfer_variable)
 
     def get_header(self, data_instances):
@@ -100,12 +105,18 @@ class BaseKmeansModel(ModelBase):
     def count(self, iterator):
         count_result = dict()
         for k, v in iterator:
-            if v not in count_result:
-                count_result[v] = 1
-            else:
-                count_result[v] += 1
+            # v is the cluster of a sample, or the clusters of a block of samples
+            if np.ndim(v) == 0:
+                count_result[v] = count_result.get(v, 0) + 1
+                continue
+            for cluster, num in zip(*np.unique(v, return_counts=True)):
+                count_result[cluster] = count_result.get(cluster, 0) + int(num)
         return count_result
 
+    @property
+    def mini_batch(self):
+        return self.batch_size != -1
+
     @staticmethod
     def sum_dict(d1, d2):
         temp = dict()
@@ -0,0 +1,79 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import unittest
+import uuid
+
+import numpy as np
+
+from fate_arch.session import computing_session as session
+from federatedml.framework.weights import NumpyWeights
+from federatedml.unsupervised_learning.kmeans.hetero_kmeans.hetero_kmeans_arbiter import HeteroKmeansArbiter
+from federatedml.unsupervised_learning.kmeans.kmeans_model_base import BaseKmeansModel
+
+
+class _LocalAggregator(object):
+    """
+    aggregator of which clients sent the same distances of all samples in every round
+    """
+
+    def __init__(self, dist, cluster_dist):
+        self._dist = dist
+        self._cluster_dist = cluster_dist
+
+    def aggregate_model(self, suffix):
+        return self._cluster_dist if suffix[0] == 'cluster_dist' else self._dist
+
+    def broadcast_model(self, model, suffix):
+        pass
+
+
+class TestHeteroKmeansArbiter(unittest.TestCase):
+
+    def setUp(self):
+        session.init(str(uuid.uuid1()))
+        self.k = 3
+        self.blocks = [(block_id, np.random.random((20, self.k))) for block_id in range(4)]
+
+    def _arbiter(self, batch_size):
+        arbiter = HeteroKmeansArbiter.__new__(HeteroKmeansArbiter)
+        BaseKmeansModel.__init__(arbiter)
+        arbiter.batch_size = batch_size
+        arbiter.n_iter_ = 5
+        dist = session.parallelize(self.blocks, include_key=True, partition=2)
+        arbiter.aggregator = _LocalAggregator(dist, NumpyWeights(np.random.random(self.k * (self.k - 1)) + 1))
+        arbiter.dbi = {}
+        arbiter.callback_dbi = lambda iter_num, dbi: arbiter.dbi.__setitem__(iter_num, dbi)
+        return arbiter
+
+    def test_mini_batch_final_dbi(self):
+        # cluster result of the last mini batch, made of the first block only
+        last_cluster_result = session.parallelize([(0, np.arange(20) % self.k)], include_key=True, partition=2)
+        arbiter = self._arbiter(batch_size=20)
+        arbiter.final_dbi(last_cluster_result)
+        # both final rounds got the distances of all samples, and are measured with the assignment of all samples
+        self.assertAlmostEqual(arbiter.dbi[4], arbiter.dbi[5])
+
+        arbiter = self._arbiter(batch_size=-1)
+        arbiter.final_dbi(last_cluster_result)
+        self.assertNotAlmostEqual(arbiter.dbi[4], arbiter.dbi[5])
+
+    def tearDown(self):
+        session.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
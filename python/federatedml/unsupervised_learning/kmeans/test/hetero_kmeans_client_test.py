@@ -0,0 +1,132 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import unittest
+import uuid
+
+import numpy as np
+
+from fate_arch.session import computing_session as session
+from federatedml.feature.instance import Instance
+from federatedml.framework.weights import NumpyWeights
+from federatedml.unsupervised_learning.kmeans.hetero_kmeans.hetero_kmeans_client import HeteroKmeansGuest, \
+    HeteroKmeansHost
+from federatedml.unsupervised_learning.kmeans.kmeans_block import KMEANS_BLOCK_SIZE, get_block_num, \
+    to_kmeans_blocks
+from federatedml.unsupervised_learning.kmeans.kmeans_model_base import BaseKmeansModel
+from federatedml.util import consts
+
+
+class _LocalAggregator(object):
+    """
+    arbiter of a single client, clusters are the nearest centroids of the client's own distances
+    """
+
+    def __init__(self):
+        self._model = None
+
+    def send_model(self, model, suffix):
+        self._model = model
+
+    def get_aggregated_model(self, suffix):
+        if isinstance(self._model, NumpyWeights):
+            return self._model
+        return self._model.mapValues(lambda dist: int(np.argmin(dist)))
+
+
+class _LocalVariable(object):
+    """
+    transfer variable of which get returns what was sent by guest
+    """
+
+    def __init__(self, obj=None):
+        self._obj = obj
+
+    def remote(self, obj, role=None, idx=-1, suffix=tuple()):
+        self._obj = obj
+
+    def get(self, idx=-1, suffix=tuple()):
+        return self._obj
+
+
+class TestHeteroKmeansClient(unittest.TestCase):
+
+    def setUp(self):
+        session.init(str(uuid.uuid1()))
+        self.k = 3
+        self.features = np.random.random((60, 4))
+        self.keys = [str(i) for i in range(60)]
+
+    def _client(self):
+        # federation is not needed to predict, the aggregator is replaced by a local one
+        client = HeteroKmeansGuest.__new__(HeteroKmeansGuest)
+        BaseKmeansModel.__init__(client)
+        client.k = self.k
+        client.centroid_list = [self.features[i] for i in range(self.k)]
+        client.aggregator = _LocalAggregator()
+        return client
+
+    def test_predict(self):
+        data = [(key, Instance(inst_id=key, features=row, label=i % 2))
+                for i, (key, row) in enumerate(zip(self.keys, self.features))]
+        table = session.parallelize(data, include_key=True, partition=3)
+        table.schema = {"header": ["x{}".format(i) for i in range(self.features.shape[1])]}
+
+        predict_result = dict(self._client().predict(table).collect())
+        self.assertEqual(len(predict_result), len(self.keys))
+        for i, key in enumerate(self.keys):
+            label, cluster = predict_result[key].features
+            self.assertEqual(label, i % 2)
+            self.assertTrue(0 <= cluster < self.k)
+
+    def _blocks(self, keys, block_num):
+        data = [(key, Instance(inst_id=key, features=self.features[i])) for i, key in enumerate(keys)]
+        table = session.parallelize(data, include_key=True, partition=3)
+        table.schema = {"header": ["x{}".format(i) for i in range(self.features.shape[1])]}
+        return to_kmeans_blocks(table, block_num)
+
+    def test_block_size(self):
+        client = self._client()
+        self.assertEqual(client.get_block_size(), KMEANS_BLOCK_SIZE)
+        client.batch_size = 16
+        self.assertEqual(client.get_block_size(), 16)
+        client.batch_size = KMEANS_BLOCK_SIZE * 4
+        self.assertEqual(client.get_block_size(), KMEANS_BLOCK_SIZE)
+
+    def test_check_block_sizes(self):
+        block_num = get_block_num(len(self.keys), block_size=16)
+        guest = self._client()
+        guest.role = consts.GUEST
+        guest.transfer_variable.block_sizes = _LocalVariable()
+        block_sizes = guest.check_block_sizes(self._blocks(self.keys, block_num))
+        self.assertEqual(sum(block_sizes.values()), len(self.keys))
+
+        host = HeteroKmeansHost.__new__(HeteroKmeansHost)
+        BaseKmeansModel.__init__(host)
+        host.role = consts.HOST
+        host.transfer_variable.block_sizes = _LocalVariable(block_sizes)
+        self.assertEqual(host.check_block_sizes(self._blocks(self.keys, block_num)), block_sizes)
+        with self.assertRaises(ValueError):
+            host.check_block_sizes(self._blocks(self.keys, block_num + 1))
+        with self.assertRaises(ValueError):
+            host.check_block_sizes(self._blocks(self.keys[:-1], block_num))
+
+    def tearDown(self):
+        session.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
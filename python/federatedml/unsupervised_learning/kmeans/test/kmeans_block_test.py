@@ -0,0 +1,118 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import functools
+import unittest
+import uuid
+
+import numpy as np
+
+from fate_arch.session import computing_session as session
+from federatedml.feature.instance import Instance
+from federatedml.param.hetero_kmeans_param import KmeansParam
+from federatedml.unsupervised_learning.kmeans.kmeans_block import cluster_stats_partition, gather_rows, \
+    get_block_num, locate_rows, merge_cluster_stats, row_dist_partition, square_dist, to_kmeans_blocks
+
+
+class TestKmeansBlock(unittest.TestCase):
+
+    def setUp(self):
+        session.init(str(uuid.uuid1()))
+        self.k = 4
+        self.guest_features = np.random.random((500, 3))
+        self.host_features = np.random.random((500, 5))
+        self.centroids = np.random.random((self.k, 3))
+        self.keys = [str(i) for i in range(500)]
+
+    def _table(self, features, partition):
+        data = [(key, Instance(features=row)) for key, row in zip(self.keys, features)]
+        table = session.parallelize(data, include_key=True, partition=partition)
+        table.schema = {"header": ["x{}".format(i) for i in range(features.shape[1])]}
+        return table
+
+    def test_blocks_aligned(self):
+        block_num = get_block_num(len(self.keys), block_size=64)
+        guest_blocks = dict(to_kmeans_blocks(self._table(self.guest_features, 4), block_num).collect())
+        host_blocks = dict(to_kmeans_blocks(self._table(self.host_features, 7), block_num).collect())
+        self.assertEqual(guest_blocks.keys(), host_blocks.keys())
+        self.assertEqual(sum(len(block) for block in guest_blocks.values()), len(self.keys))
+
+        index = {key: i for i, key in enumerate(self.keys)}
+        for block_id, block in guest_blocks.items():
+            self.assertEqual(block.keys, host_blocks[block_id].keys)
+            rows = [index[key] for key in block.keys]
+            np.testing.assert_array_equal(block.features, self.guest_features[rows])
+            np.testing.assert_array_equal(host_blocks[block_id].features, self.host_features[rows])
+
+    def test_square_dist(self):
+        expected = ((self.guest_features[:, None, :] - self.centroids[None, :, :]) ** 2).sum(axis=2)
+        np.testing.assert_allclose(square_dist(self.guest_features, self.centroids), expected, atol=1e-12)
+        self.assertTrue((square_dist(self.centroids, self.centroids) >= 0).all())
+
+        table = self._table(self.guest_features, 4)
+        rows = dict(table.mapPartitions(functools.partial(row_dist_partition, centroids=self.centroids, chunk_size=7),
+                                        use_previous_behavior=False, preserves_partitioning=True).collect())
+        self.assertEqual(len(rows), len(self.keys))
+        for i, key in enumerate(self.keys):
+            np.testing.assert_allclose(rows[key], expected[i], atol=1e-12)
+
+    def test_cluster_stats(self):
+        assignments = np.random.randint(0, self.k - 1, len(self.keys))
+        expected_sums = np.array([self.guest_features[assignments == c].sum(axis=0) for c in range(self.k)])
+        expected_counts = np.bincount(assignments, minlength=self.k)
+
+        table = self._table(self.guest_features, 4)
+        cluster_result = session.parallelize(list(zip(self.keys, assignments)), include_key=True, partition=4)
+        row_stats = table.join(cluster_result, lambda v1, v2: (v1.features, v2))
+
+        blocks = to_kmeans_blocks(table, get_block_num(len(self.keys), block_size=64))
+        index = {key: i for i, key in enumerate(self.keys)}
+        block_result = blocks.mapValues(lambda block: assignments[[index[key] for key in block.keys]])
+        block_stats = blocks.join(block_result, lambda v1, v2: (v1.features, v2))
+
+        for stats_table in [row_stats, block_stats]:
+            sums, counts = stats_table.applyPartitions(
+                functools.partial(cluster_stats_partition, k=self.k, chunk_size=50)).reduce(merge_cluster_stats)
+            np.testing.assert_allclose(sums, expected_sums)
+            np.testing.assert_array_equal(counts, expected_counts)
+            self.assertEqual(counts[self.k - 1], 0)
+
+    def test_locate_and_gather_rows(self):
+        blocks = to_kmeans_blocks(self._table(self.guest_features, 4), get_block_num(len(self.keys), block_size=64))
+        block_sizes = dict(blocks.mapValues(len).collect())
+        positions = locate_rows(block_sizes, range(len(self.keys)))
+        self.assertEqual(len(set(positions)), len(self.keys))
+        self.assertTrue(all(0 <= row < block_sizes[block_id] for block_id, row in positions))
+
+        block_list = dict(blocks.collect())
+        index = {key: i for i, key in enumerate(self.keys)}
+        picked = positions[::97]
+        for (block_id, row), features in zip(picked, gather_rows(blocks, picked)):
+            np.testing.assert_array_equal(features, self.guest_features[index[block_list[block_id].keys[row]]])
+
+    def test_param_check(self):
+        self.assertTrue(KmeansParam(init_method='k-means++', batch_size=128).check())
+        with self.assertRaises(ValueError):
+            KmeansParam(init_method='k-means||').check()
+        with self.assertRaises(ValueError):
+            KmeansParam(batch_size=0).check()
+
+    def tearDown(self):
+        session.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
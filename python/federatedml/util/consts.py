@@ -32,6 +32,7 @@ SEQ_2_SEQ_LM = "seq_2_seq_lm"
 ONE_VS_REST = 'one_vs_rest'
 PAILLIER = 'Paillier'
 PAILLIER_IPCL = 'IPCL'
+PAILLIER_RUST = 'PaillierRust'
 RANDOM_PADS = "RandomPads"
 NONE = "None"
 AFFINE = 'Affine'
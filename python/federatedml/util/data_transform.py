@@ -27,6 +27,7 @@ import functools
 import numpy as np
 
 from federatedml.feature.instance import Instance
+from federatedml.feature.instance_block import to_instance_blocks
 from federatedml.feature.sparse_vector import SparseVector
 from federatedml.model_base import ModelBase
 from federatedml.protobuf.generated.data_transform_meta_pb2 import DataTransformMeta
@@ -1056,13 +1057,19 @@ class DataTransform(ModelBase):
                 self.set_summary(summary_buf)
 
         clear_schema(data_inst)
-        return data_inst
+        return self._to_output_blocks(data_inst)
 
     def transform(self, data):
         self._load_reader(data.schema)
         data_inst = self.transformer.read_data(data, "transform")
         clear_schema(data_inst)
-        return data_inst
+        return self._to_output_blocks(data_inst)
+
+    def _to_output_blocks(self, data_inst):
+        if self.model_param.instance_block_size is None:
+            return data_inst
+        LOGGER.info("output data as InstanceBlock of {} rows".format(self.model_param.instance_block_size))
+        return to_instance_blocks(data_inst, self.model_param.instance_block_size)
 
     def export_model(self):
         if not self.need_run:
@@ -1,3 +1,3 @@
-from .fate_crypto import hash, psi
+from .fate_crypto import hash, paillier, psi
 
-__all__ = ["hash", "psi"]
+__all__ = ["hash", "paillier", "psi"]
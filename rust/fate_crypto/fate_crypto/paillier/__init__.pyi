@@ -0,0 +1,62 @@
+from typing import Optional
+
+class CiphertextVector(object):
+    """a vector of paillier ciphertexts, serialized as `width` bytes little-endian integers"""
+
+    def __init__(self, data: bytes, width: int): ...
+    @property
+    def width(self) -> int: ...
+    def to_bytes(self) -> bytes: ...
+    def __len__(self) -> int: ...
+
+class PK(object):
+    def __init__(self, n: bytes):
+        """paillier public key.
+
+        Args:
+            n (bytes): modulus in little-endian bytes
+        """
+        ...
+    @property
+    def n_bytes(self) -> int:
+        """byte width of plaintexts, scalars and random values, ciphertexts are twice as wide"""
+        ...
+    def encrypt(
+        self, plaintexts: bytes, random_values: Optional[bytes] = None, obfuscate: bool = True
+    ) -> CiphertextVector:
+        """encrypt plaintexts in [0, n) to `(n * m + 1) * r^n mod n^2`.
+
+        Args:
+            plaintexts (bytes): concatenated `n_bytes` wide plaintexts
+            random_values (bytes, optional): concatenated `n_bytes` wide r in [1, n), drawn randomly if not given
+            obfuscate (bool): skip the r^n obfuscator if False
+
+        Returns:
+            CiphertextVector: ciphertexts
+        """
+        ...
+    def obfuscate(self, ciphertexts: CiphertextVector, random_values: Optional[bytes] = None) -> CiphertextVector: ...
+    def add(self, x: CiphertextVector, y: CiphertextVector) -> CiphertextVector:
+        """element-wise homomorphic addition"""
+        ...
+    def mul(self, x: CiphertextVector, scalars: bytes) -> CiphertextVector:
+        """element-wise homomorphic multiplication by `n_bytes` wide scalars in [0, n)"""
+        ...
+    def sum(self, x: CiphertextVector) -> CiphertextVector:
+        """homomorphic sum of all elements, as a vector of length one"""
+        ...
+
+class SK(object):
+    def __init__(self, p: bytes, q: bytes):
+        """paillier private key.
+
+        Args:
+            p (bytes): prime factor in little-endian bytes
+            q (bytes): prime factor in little-endian bytes
+        """
+        ...
+    @property
+    def n_bytes(self) -> int: ...
+    def decrypt(self, ciphertexts: CiphertextVector) -> bytes:
+        """decrypt to concatenated `n_bytes` wide raw plaintexts"""
+        ...
@@ -1,4 +1,4 @@
-from typing import overload
+from typing import List, Union, overload
 
 class Curve25519(object):
     @overload
@@ -31,3 +31,23 @@ class Curve25519(object):
             bytes: sharedsecret in 32-length bytes
         """
         ...
+    def encrypt_batch(self, messages: List[bytes]) -> bytes:
+        """encrypt a batch of messages, see `encrypt`.
+
+        Args:
+            messages (List[bytes]): messages to encrypt
+
+        Returns:
+            bytes: encrypted messages packed with a stride of 32 bytes
+        """
+        ...
+    def diffie_hellman_batch(self, pubs: Union[bytes, List[bytes]]) -> bytes:
+        """generate diffie_hellman like sharedsecrets of a batch, see `diffie_hellman`.
+
+        Args:
+            pubs (Union[bytes, List[bytes]]): encrypted messages in 32-length bytes, or their concatenation
+
+        Returns:
+            bytes: sharedsecrets packed with a stride of 32 bytes
+        """
+        ...
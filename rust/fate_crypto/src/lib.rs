@@ -1,10 +1,12 @@
 mod psi;
 mod hash;
+mod paillier;
 use pyo3::prelude::*;
 
 #[pymodule]
 fn fate_crypto(py: Python, m: &PyModule) -> PyResult<()> {
     psi::register(py, m)?;
     hash::register(py, m)?;
+    paillier::register(py, m)?;
     Ok(())
 }
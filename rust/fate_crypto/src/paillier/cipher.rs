@@ -0,0 +1,410 @@
+use num_bigint::{BigInt, BigUint};
+use num_integer::Integer;
+use num_traits::One;
+use pyo3::class::sequence::PySequenceProtocol;
+use pyo3::exceptions::{PyValueError, PyZeroDivisionError};
+use pyo3::prelude::*;
+use pyo3::types::PyBytes;
+use pyo3::ToPyObject;
+use rand::RngCore;
+use std::thread;
+
+// All integers cross the python boundary as contiguous little-endian buffers of fixed width,
+// `n_bytes` for plaintexts/scalars/random values and `2 * n_bytes` for ciphertexts.
+fn byte_length(x: &BigUint) -> usize {
+    ((x.bits() + 7) / 8) as usize
+}
+
+/// `f(0), ..., f(len - 1)` computed by contiguous ranges on scoped threads
+fn par_map<R: Send, F: Fn(usize) -> R + Sync>(len: usize, f: F) -> Vec<R> {
+    let threads = thread::available_parallelism()
+        .map(|n| n.get())
+        .unwrap_or(1)
+        .min(len);
+    if threads <= 1 {
+        return (0..len).map(&f).collect();
+    }
+    let chunk = (len + threads - 1) / threads;
+    let f = &f;
+    thread::scope(|s| {
+        let handles: Vec<_> = (0..len)
+            .step_by(chunk)
+            .map(|start| {
+                s.spawn(move || (start..len.min(start + chunk)).map(f).collect::<Vec<R>>())
+            })
+            .collect();
+        handles
+            .into_iter()
+            .flat_map(|handle| handle.join().unwrap())
+            .collect()
+    })
+}
+
+fn mod_inverse(x: &BigUint, modulus: &BigUint) -> Option<BigUint> {
+    let modulus = BigInt::from(modulus.clone());
+    let egcd = BigInt::from(x.clone()).extended_gcd(&modulus);
+    match egcd.gcd.is_one() {
+        true => egcd.x.mod_floor(&modulus).to_biguint(),
+        false => None,
+    }
+}
+
+/// L(x) = (x - 1) / m of paillier, only its value mod m is used, x = 0 wraps as python's floor division does
+fn l_func(x: BigUint, m: &BigUint, msquare: &BigUint) -> BigUint {
+    (x + msquare - 1u32) / m
+}
+
+fn from_fixed_width(data: &[u8], width: usize) -> PyResult<Vec<BigUint>> {
+    if width == 0 || data.len() % width != 0 {
+        return Err(PyValueError::new_err(format!(
+            "buffer of {} bytes is not a multiple of width {}",
+            data.len(),
+            width
+        )));
+    }
+    Ok(data.chunks(width).map(BigUint::from_bytes_le).collect())
+}
+
+fn to_fixed_width(values: &[BigUint], width: usize) -> Vec<u8> {
+    let mut buffer = vec![0u8; values.len() * width];
+    for (chunk, value) in buffer.chunks_mut(width).zip(values.iter()) {
+        let digits = value.to_bytes_le();
+        chunk[..digits.len()].copy_from_slice(&digits);
+    }
+    buffer
+}
+
+fn check_below(values: &[BigUint], bound: &BigUint, name: &str) -> PyResult<()> {
+    match values.iter().any(|v| v >= bound) {
+        true => Err(PyValueError::new_err(format!("{} out of bounds", name))),
+        false => Ok(()),
+    }
+}
+
+#[pyclass(module = "fate_crypto.paillier", name = "CiphertextVector")]
+#[derive(Clone)]
+pub struct CiphertextVector {
+    data: Vec<BigUint>,
+    width: usize,
+}
+
+#[pymethods]
+impl CiphertextVector {
+    #[new]
+    fn new(data: &[u8], width: usize, py: Python) -> PyResult<Self> {
+        let data = py.allow_threads(|| from_fixed_width(data, width))?;
+        Ok(CiphertextVector { data, width })
+    }
+    #[getter]
+    fn width(&self) -> usize {
+        self.width
+    }
+    #[pyo3(text_signature = "($self)")]
+    fn to_bytes(&self, py: Python) -> PyObject {
+        let buffer = py.allow_threads(|| to_fixed_width(&self.data, self.width));
+        PyBytes::new(py, &buffer).into()
+    }
+    fn __reduce__(&self, py: Python) -> (PyObject, (PyObject, usize)) {
+        (
+            py.get_type::<CiphertextVector>().to_object(py),
+            (self.to_bytes(py), self.width),
+        )
+    }
+}
+
+#[pyproto]
+impl PySequenceProtocol for CiphertextVector {
+    fn __len__(&self) -> usize {
+        self.data.len()
+    }
+}
+
+#[pyclass(module = "fate_crypto.paillier", name = "PK")]
+pub struct PK {
+    n: BigUint,
+    nsquare: BigUint,
+    max_int: BigUint,
+    n_bytes: usize,
+}
+
+impl PK {
+    fn wrap(&self, data: Vec<BigUint>) -> CiphertextVector {
+        CiphertextVector {
+            data,
+            width: 2 * self.n_bytes,
+        }
+    }
+    fn random_value(&self) -> BigUint {
+        // 64 extra bits keep the bias of the reduction negligible, r is drawn from [1, n)
+        let mut bytes = vec![0u8; self.n_bytes + 8];
+        rand::thread_rng().fill_bytes(&mut bytes);
+        BigUint::from_bytes_le(&bytes) % (&self.n - 1u32) + 1u32
+    }
+    fn obfuscator(&self, r: &BigUint) -> BigUint {
+        r.modpow(&self.n, &self.nsquare)
+    }
+    fn mul_mod(&self, a: &BigUint, b: &BigUint) -> BigUint {
+        a * b % &self.nsquare
+    }
+    fn raw_encrypt(&self, plaintext: &BigUint) -> BigUint {
+        (&self.n * plaintext + 1u32) % &self.nsquare
+    }
+    fn obfuscate_with(
+        &self,
+        ciphertexts: &[BigUint],
+        random_values: Option<Vec<BigUint>>,
+    ) -> Vec<BigUint> {
+        match random_values {
+            Some(random_values) => par_map(ciphertexts.len(), |i| {
+                self.mul_mod(&ciphertexts[i], &self.obfuscator(&random_values[i]))
+            }),
+            None => par_map(ciphertexts.len(), |i| {
+                self.mul_mod(&ciphertexts[i], &self.obfuscator(&self.random_value()))
+            }),
+        }
+    }
+    fn parse_random_values(
+        &self,
+        random_values: Option<&[u8]>,
+        num: usize,
+    ) -> PyResult<Option<Vec<BigUint>>> {
+        match random_values {
+            None => Ok(None),
+            Some(random_values) => {
+                let random_values = from_fixed_width(random_values, self.n_bytes)?;
+                if random_values.len() != num {
+                    return Err(PyValueError::new_err(format!(
+                        "expect {} random values, got {}",
+                        num,
+                        random_values.len()
+                    )));
+                }
+                check_below(&random_values, &self.n, "random value")?;
+                Ok(Some(random_values))
+            }
+        }
+    }
+    fn scalar_mul(&self, c: &BigUint, k: &BigUint) -> Option<BigUint> {
+        // same branch as PaillierEncryptedNumber.__mul__: very large scalars go through the inverse
+        if *k >= &self.n - &self.max_int {
+            let neg_c = mod_inverse(c, &self.nsquare)?;
+            let neg_k = &self.n - k;
+            Some(neg_c.modpow(&neg_k, &self.nsquare))
+        } else {
+            Some(c.modpow(k, &self.nsquare))
+        }
+    }
+}
+
+#[pymethods]
+impl PK {
+    #[new]
+    fn new(n: &[u8]) -> PyResult<Self> {
+        let n = BigUint::from_bytes_le(n);
+        if n <= BigUint::from(3u32) {
+            return Err(PyValueError::new_err("invalid public key"));
+        }
+        let nsquare = &n * &n;
+        let max_int = &n / 3u32 - 1u32;
+        let n_bytes = byte_length(&n);
+        Ok(PK {
+            n,
+            nsquare,
+            max_int,
+            n_bytes,
+        })
+    }
+    #[getter]
+    fn n_bytes(&self) -> usize {
+        self.n_bytes
+    }
+    /// encrypt `n_bytes` wide plaintexts, obfuscators are r^n with r taken from `random_values`
+    /// or drawn randomly, `obfuscate=False` gives the deterministic ciphertexts `n * m + 1`
+    #[pyo3(text_signature = "($self, plaintexts, random_values=None, obfuscate=True)")]
+    #[args(random_values = "None", obfuscate = "true")]
+    fn encrypt(
+        &self,
+        plaintexts: &[u8],
+        random_values: Option<&[u8]>,
+        obfuscate: bool,
+        py: Python,
+    ) -> PyResult<CiphertextVector> {
+        py.allow_threads(|| {
+            let plaintexts = from_fixed_width(plaintexts, self.n_bytes)?;
+            check_below(&plaintexts, &self.n, "plaintext")?;
+            let random_values = self.parse_random_values(random_values, plaintexts.len())?;
+            let ciphertexts = par_map(plaintexts.len(), |i| self.raw_encrypt(&plaintexts[i]));
+            Ok(self.wrap(match obfuscate {
+                true => self.obfuscate_with(&ciphertexts, random_values),
+                false => ciphertexts,
+            }))
+        })
+    }
+    #[pyo3(text_signature = "($self, ciphertexts, random_values=None)")]
+    #[args(random_values = "None")]
+    fn obfuscate(
+        &self,
+        ciphertexts: PyRef<CiphertextVector>,
+        random_values: Option<&[u8]>,
+        py: Python,
+    ) -> PyResult<CiphertextVector> {
+        let ciphertexts: &CiphertextVector = &ciphertexts;
+        py.allow_threads(|| {
+            let random_values = self.parse_random_values(random_values, ciphertexts.data.len())?;
+            Ok(self.wrap(self.obfuscate_with(&ciphertexts.data, random_values)))
+        })
+    }
+    /// element-wise E(x + y) = E(x) * E(y) mod n^2
+    #[pyo3(text_signature = "($self, x, y)")]
+    fn add(
+        &self,
+        x: PyRef<CiphertextVector>,
+        y: PyRef<CiphertextVector>,
+        py: Python,
+    ) -> PyResult<CiphertextVector> {
+        let (x, y): (&CiphertextVector, &CiphertextVector) = (&x, &y);
+        if x.data.len() != y.data.len() {
+            return Err(PyValueError::new_err(format!(
+                "length mismatch: {} != {}",
+                x.data.len(),
+                y.data.len()
+            )));
+        }
+        Ok(py.allow_threads(|| {
+            self.wrap(par_map(x.data.len(), |i| {
+                self.mul_mod(&x.data[i], &y.data[i])
+            }))
+        }))
+    }
+    /// element-wise E(x * k) for `n_bytes` wide scalars k in [0, n)
+    #[pyo3(text_signature = "($self, x, scalars)")]
+    fn mul(
+        &self,
+        x: PyRef<CiphertextVector>,
+        scalars: &[u8],
+        py: Python,
+    ) -> PyResult<CiphertextVector> {
+        let x: &CiphertextVector = &x;
+        py.allow_threads(|| {
+            let scalars = from_fixed_width(scalars, self.n_bytes)?;
+            if scalars.len() != x.data.len() {
+                return Err(PyValueError::new_err(format!(
+                    "length mismatch: {} != {}",
+                    x.data.len(),
+                    scalars.len()
+                )));
+            }
+            check_below(&scalars, &self.n, "scalar")?;
+            par_map(x.data.len(), |i| self.scalar_mul(&x.data[i], &scalars[i]))
+                .into_iter()
+                .collect::<Option<Vec<BigUint>>>()
+                .map(|data| self.wrap(data))
+                .ok_or_else(|| PyZeroDivisionError::new_err("ciphertext is not invertible"))
+        })
+    }
+    /// E(sum(x)) as a vector of length one
+    #[pyo3(text_signature = "($self, x)")]
+    fn sum(&self, x: PyRef<CiphertextVector>, py: Python) -> CiphertextVector {
+        let x: &CiphertextVector = &x;
+        py.allow_threads(|| {
+            // partial products of contiguous ranges, then their product
+            let threads = thread::available_parallelism()
+                .map(|n| n.get())
+                .unwrap_or(1);
+            let chunk = ((x.data.len() + threads - 1) / threads).max(1);
+            let chunks: Vec<&[BigUint]> = x.data.chunks(chunk).collect();
+            let product = |values: &[BigUint]| {
+                values
+                    .iter()
+                    .fold(BigUint::one(), |a, b| self.mul_mod(&a, b))
+            };
+            let partials = par_map(chunks.len(), |i| product(chunks[i]));
+            let total = product(&partials);
+            self.wrap(vec![total])
+        })
+    }
+}
+
+#[pyclass(module = "fate_crypto.paillier", name = "SK")]
+pub struct SK {
+    p: BigUint,
+    q: BigUint,
+    psquare: BigUint,
+    qsquare: BigUint,
+    q_inverse: BigUint,
+    hp: BigUint,
+    hq: BigUint,
+    n: BigUint,
+    n_bytes: usize,
+}
+
+impl SK {
+    fn h_func(g: &BigUint, x: &BigUint, xsquare: &BigUint) -> Option<BigUint> {
+        let l = l_func(g.modpow(&(x - 1u32), xsquare), x, xsquare);
+        mod_inverse(&l, x)
+    }
+    fn raw_decrypt(&self, c: &BigUint) -> BigUint {
+        let cp = c.modpow(&(&self.p - 1u32), &self.psquare);
+        let mp = l_func(cp, &self.p, &self.psquare) * &self.hp % &self.p;
+        let cq = c.modpow(&(&self.q - 1u32), &self.qsquare);
+        let mq = l_func(cq, &self.q, &self.qsquare) * &self.hq % &self.q;
+        // crt, the difference is taken mod p as integers are unsigned
+        let u = (mp + &self.p - &mq % &self.p) * &self.q_inverse % &self.p;
+        (mq + u * &self.q) % &self.n
+    }
+}
+
+#[pymethods]
+impl SK {
+    #[new]
+    fn new(p: &[u8], q: &[u8]) -> PyResult<Self> {
+        let (p, q) = (BigUint::from_bytes_le(p), BigUint::from_bytes_le(q));
+        if p == q {
+            return Err(PyValueError::new_err("p and q have to be different"));
+        }
+        let (p, q) = if q < p { (q, p) } else { (p, q) };
+        let n = &p * &q;
+        let g = &n + 1u32;
+        let psquare = &p * &p;
+        let qsquare = &q * &q;
+        let invalid = || PyValueError::new_err("invalid private key");
+        let q_inverse = mod_inverse(&q, &p).ok_or_else(invalid)?;
+        let hp = SK::h_func(&g, &p, &psquare).ok_or_else(invalid)?;
+        let hq = SK::h_func(&g, &q, &qsquare).ok_or_else(invalid)?;
+        let n_bytes = byte_length(&n);
+        Ok(SK {
+            p,
+            q,
+            psquare,
+            qsquare,
+            q_inverse,
+            hp,
+            hq,
+            n,
+            n_bytes,
+        })
+    }
+    #[getter]
+    fn n_bytes(&self) -> usize {
+        self.n_bytes
+    }
+    /// decrypt to `n_bytes` wide raw plaintexts
+    #[pyo3(text_signature = "($self, ciphertexts)")]
+    fn decrypt(&self, ciphertexts: PyRef<CiphertextVector>, py: Python) -> PyObject {
+        let ciphertexts: &CiphertextVector = &ciphertexts;
+        let buffer = py.allow_threads(|| {
+            let plaintexts = par_map(ciphertexts.data.len(), |i| {
+                self.raw_decrypt(&ciphertexts.data[i])
+            });
+            to_fixed_width(&plaintexts, self.n_bytes)
+        });
+        PyBytes::new(py, &buffer).into()
+    }
+}
+
+pub(crate) fn register(_py: Python<'_>, m: &PyModule) -> PyResult<()> {
+    m.add_class::<PK>()?;
+    m.add_class::<SK>()?;
+    m.add_class::<CiphertextVector>()?;
+    Ok(())
+}
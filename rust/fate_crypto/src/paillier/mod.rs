@@ -0,0 +1,12 @@
+mod cipher;
+use pyo3::prelude::*;
+
+pub(crate) fn register(py: Python, m: &PyModule) -> PyResult<()> {
+    let submodule_paillier = PyModule::new(py, "paillier")?;
+    cipher::register(py, submodule_paillier)?;
+    m.add_submodule(submodule_paillier)?;
+    py.import("sys")?
+        .getattr("modules")?
+        .set_item("fate_crypto.paillier", submodule_paillier)?;
+    Ok(())
+}
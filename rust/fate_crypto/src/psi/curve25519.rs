@@ -1,12 +1,65 @@
 use curve25519_dalek::edwards::EdwardsPoint;
 use curve25519_dalek::montgomery::MontgomeryPoint;
 use curve25519_dalek::scalar::Scalar;
-use pyo3::exceptions::PyTypeError;
+use pyo3::exceptions::{PyTypeError, PyValueError};
 use pyo3::prelude::*;
 use pyo3::types::{PyBytes, PyTuple};
 use pyo3::ToPyObject;
 use rand::rngs::StdRng;
 use rand::{RngCore, SeedableRng};
+use rayon::prelude::*;
+
+const POINT_BYTES: usize = 32;
+
+/// a batch of inputs, either a list of bytes or one contiguous buffer of `POINT_BYTES` wide points
+#[derive(FromPyObject)]
+enum Batch<'a> {
+    Packed(&'a [u8]),
+    List(Vec<&'a [u8]>),
+}
+
+impl<'a> Batch<'a> {
+    fn into_points(self) -> PyResult<Vec<&'a [u8]>> {
+        let points = match self {
+            Batch::Packed(data) => {
+                if data.len() % POINT_BYTES != 0 {
+                    return Err(PyValueError::new_err(format!(
+                        "buffer of {} bytes is not a multiple of {}",
+                        data.len(),
+                        POINT_BYTES
+                    )));
+                }
+                data.chunks(POINT_BYTES).collect()
+            }
+            Batch::List(points) => points,
+        };
+        match points.iter().any(|point| point.len() != POINT_BYTES) {
+            true => Err(PyValueError::new_err(format!(
+                "diffie_hellman accept {} bytes pubkey",
+                POINT_BYTES
+            ))),
+            false => Ok(points),
+        }
+    }
+}
+
+// results of a batch are packed into one buffer with a stride of `POINT_BYTES`
+fn pack<T, F>(inputs: &[T], f: F) -> Vec<u8>
+where
+    T: Sync,
+    F: Fn(&T) -> MontgomeryPoint + Sync,
+{
+    let mut buffer = vec![0u8; inputs.len() * POINT_BYTES];
+    buffer
+        .par_chunks_mut(POINT_BYTES)
+        .zip(inputs.par_iter())
+        .for_each(|(chunk, input)| chunk.copy_from_slice(f(input).as_bytes()));
+    buffer
+}
+
+fn hash_to_point(bytes: &[u8]) -> MontgomeryPoint {
+    EdwardsPoint::hash_from_bytes::<sha2::Sha512>(bytes).to_montgomery()
+}
 
 #[pyclass(module = "fate_crypto.psi", name = "Curve25519")]
 struct Secret(Scalar);
@@ -54,12 +107,7 @@ impl Secret {
     }
     #[pyo3(text_signature = "($self, bytes)")]
     fn encrypt(&self, bytes: &[u8], py: Python) -> PyObject {
-        PyBytes::new(
-            py,
-            (EdwardsPoint::hash_from_bytes::<sha2::Sha512>(bytes).to_montgomery() * self.0)
-                .as_bytes(),
-        )
-        .into()
+        PyBytes::new(py, (hash_to_point(bytes) * self.0).as_bytes()).into()
     }
     #[pyo3(text_signature = "($self, their_public)")]
     fn diffie_hellman(&self, their_public: &[u8], py: Python) -> PyObject {
@@ -74,6 +122,25 @@ impl Secret {
         )
         .into()
     }
+    /// encrypt a list of messages, the results are concatenated into one buffer of 32 bytes each
+    #[pyo3(text_signature = "($self, messages)")]
+    fn encrypt_batch(&self, messages: Vec<&[u8]>, py: Python) -> PyObject {
+        let secret = self.0;
+        let buffer = py.allow_threads(|| pack(&messages, |m| hash_to_point(m) * secret));
+        PyBytes::new(py, &buffer).into()
+    }
+    /// diffie_hellman of a list of 32 bytes points or of their concatenation, packed like `encrypt_batch`
+    #[pyo3(text_signature = "($self, their_publics)")]
+    fn diffie_hellman_batch(&self, their_publics: Batch, py: Python) -> PyResult<PyObject> {
+        let secret = self.0;
+        let buffer = py.allow_threads(|| -> PyResult<Vec<u8>> {
+            let points = their_publics.into_points()?;
+            Ok(pack(&points, |p| {
+                MontgomeryPoint((*p).try_into().expect("checked point width")) * secret
+            }))
+        })?;
+        Ok(PyBytes::new(py, &buffer).into())
+    }
 }
 
 pub(crate) fn register(_py: Python<'_>, m: &PyModule) -> PyResult<()> {
@@ -0,0 +1,103 @@
+from fate_crypto.paillier import PK, SK, CiphertextVector
+import pickle
+import unittest
+import random
+
+# 512-bit modulus made of two known primes, small enough to keep the reference computation fast
+P = 2 ** 255 - 19
+Q = 2 ** 256 - 189
+N = P * Q
+NSQUARE = N * N
+
+
+def to_bytes(values, width):
+    return b"".join(v.to_bytes(width, "little") for v in values)
+
+
+def from_bytes(data, width):
+    return [int.from_bytes(data[i: i + width], "little") for i in range(0, len(data), width)]
+
+
+def reference_decrypt(c):
+    lam = (P - 1) * (Q - 1)
+    mu = pow((pow(N + 1, lam, NSQUARE) - 1) // N, -1, N)
+    return (pow(c, lam, NSQUARE) - 1) // N * mu % N
+
+
+class TestPaillier(unittest.TestCase):
+    def setUp(self):
+        self.pk = PK(N.to_bytes((N.bit_length() + 7) // 8, "little"))
+        self.sk = SK(P.to_bytes(32, "little"), Q.to_bytes(32, "little"))
+        self.width = self.pk.n_bytes
+        self.rng = random.SystemRandom()
+        self.plaintexts = [0, 1, N - 1, *(self.rng.randrange(N) for _ in range(50))]
+
+    def encrypt(self, values, **kwargs):
+        return self.pk.encrypt(to_bytes(values, self.width), **kwargs)
+
+    def ciphertexts(self, x):
+        return from_bytes(x.to_bytes(), x.width)
+
+    def test_encrypt_with_random_values(self):
+        rs = [self.rng.randrange(1, N) for _ in self.plaintexts]
+        x = self.encrypt(self.plaintexts, random_values=to_bytes(rs, self.width))
+        self.assertEqual(len(x), len(self.plaintexts))
+        self.assertEqual(x.width, 2 * self.width)
+        self.assertEqual(
+            self.ciphertexts(x),
+            [(N * m + 1) % NSQUARE * pow(r, N, NSQUARE) % NSQUARE for m, r in zip(self.plaintexts, rs)],
+        )
+
+    def test_decrypt(self):
+        x = self.encrypt(self.plaintexts)
+        self.assertEqual(from_bytes(self.sk.decrypt(x), self.width), self.plaintexts)
+        self.assertEqual([reference_decrypt(c) for c in self.ciphertexts(x)], self.plaintexts)
+
+    def test_add_mul_sum(self):
+        x = self.encrypt(self.plaintexts, obfuscate=False)
+        y = self.encrypt(self.plaintexts[::-1])
+        xs, ys = self.ciphertexts(x), self.ciphertexts(y)
+        self.assertEqual(self.ciphertexts(self.pk.add(x, y)), [a * b % NSQUARE for a, b in zip(xs, ys)])
+        self.assertEqual(
+            from_bytes(self.sk.decrypt(self.pk.add(x, y)), self.width),
+            [(a + b) % N for a, b in zip(self.plaintexts, self.plaintexts[::-1])],
+        )
+
+        max_int = N // 3 - 1
+        scalars = [0, 1, N - 1, N - max_int, *(self.rng.randrange(N) for _ in range(len(xs) - 4))]
+        expected = [
+            pow(pow(c, -1, NSQUARE), N - k, NSQUARE) if k >= N - max_int else pow(c, k, NSQUARE)
+            for c, k in zip(xs, scalars)
+        ]
+        product = self.pk.mul(x, to_bytes(scalars, self.width))
+        self.assertEqual(self.ciphertexts(product), expected)
+        self.assertEqual(
+            from_bytes(self.sk.decrypt(product), self.width),
+            [m * k % N for m, k in zip(self.plaintexts, scalars)],
+        )
+
+        total = self.pk.sum(y)
+        self.assertEqual(len(total), 1)
+        self.assertEqual(from_bytes(self.sk.decrypt(total), self.width), [sum(self.plaintexts) % N])
+
+    def test_obfuscate(self):
+        x = self.encrypt(self.plaintexts, obfuscate=False)
+        y = self.pk.obfuscate(x)
+        self.assertNotEqual(self.ciphertexts(x), self.ciphertexts(y))
+        self.assertEqual(self.sk.decrypt(x), self.sk.decrypt(y))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            self.pk.encrypt(b"\x00" * (self.width + 1))
+        with self.assertRaises(ValueError):
+            self.pk.add(self.encrypt([1, 2]), self.encrypt([1]))
+
+    def test_pickle(self):
+        x = self.encrypt(self.plaintexts)
+        y = pickle.loads(pickle.dumps(x))
+        self.assertIsInstance(y, CiphertextVector)
+        self.assertEqual(x.to_bytes(), y.to_bytes())
+
+
+if __name__ == "__main__":
+    unittest.main()
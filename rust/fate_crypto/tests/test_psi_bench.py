@@ -28,6 +28,19 @@ def test_ecdh_dh_bench(benchmark):
     result = benchmark(dh, k, e)
 
 
+def test_ecdh_encrypt_batch_bench(benchmark):
+    k = Curve25519()
+    ms = [random.SystemRandom().getrandbits(256).to_bytes(32, "little") for _ in range(1000)]
+    result = benchmark(k.encrypt_batch, ms)
+
+
+def test_ecdh_dh_batch_bench(benchmark):
+    k = Curve25519()
+    ms = [random.SystemRandom().getrandbits(256).to_bytes(32, "little") for _ in range(1000)]
+    e = k.encrypt_batch(ms)
+    result = benchmark(k.diffie_hellman_batch, e)
+
+
 def test_sha256_bench(benchmark):
     m = "1000000000"
     result = benchmark(sha256, m)
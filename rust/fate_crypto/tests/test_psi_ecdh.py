@@ -13,6 +13,21 @@ class TestStringMethods(unittest.TestCase):
             k2.diffie_hellman(k1.encrypt(m)), k1.diffie_hellman(k2.encrypt(m))
         )
 
+    def test_batch(self):
+        k1 = Curve25519()
+        k2 = Curve25519()
+        ms = [random.SystemRandom().getrandbits(33 * 8).to_bytes(33, "little") for _ in range(10)]
+        encrypted = k1.encrypt_batch(ms)
+        self.assertEqual(encrypted, b"".join(k1.encrypt(m) for m in ms))
+
+        points = [encrypted[i: i + 32] for i in range(0, len(encrypted), 32)]
+        signed = k2.diffie_hellman_batch(encrypted)
+        self.assertEqual(signed, k2.diffie_hellman_batch(points))
+        self.assertEqual(signed, b"".join(k2.diffie_hellman(p) for p in points))
+        self.assertEqual(k1.encrypt_batch([]), b"")
+        with self.assertRaises(ValueError):
+            k2.diffie_hellman_batch(encrypted[:-1])
+
     def test_pickle(self):
         k1 = Curve25519()
         m = random.SystemRandom().getrandbits(33 * 8).to_bytes(33, "little")